@@ -0,0 +1,7 @@
+"""The benchmarks of Codetrail commands on generated repositories.
+
+Run `python -m benchmarks --help` from the root of the project for the options. A run
+writes its results as JSON, so runs can be compared, and fails if a benchmark goes
+over its budget in `benchmarks/budget.json`. Timings depend on the machine, so write
+a new budget with `--write-budget` when checking runs on another machine.
+"""
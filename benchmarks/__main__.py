@@ -0,0 +1,121 @@
+"""This is the entrypoint of the benchmarks.
+
+Usage:
+    python -m benchmarks [--files <n>] [--depth <n>] [--sizes <distribution>]
+        [--commits <n>] [--seed <n>] [--repeat <n>] [--only <benchmark>...]
+        [--output <file>] [--budget <file>] [--write-budget <file>]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks import generator
+from benchmarks import suite
+
+
+def parse_arguments(arguments: list[str]) -> argparse.Namespace:
+    """Parse the command line options of the benchmarks.
+
+    Args:
+        arguments: The command line arguments.
+
+    Returns:
+        The parsed options.
+    """
+    defaults = generator.RepositorySpec()
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark Codetrail commands on a generated repository.",
+    )
+    parser.add_argument("--files", type=int, default=defaults.files)
+    parser.add_argument("--depth", type=int, default=defaults.depth)
+    parser.add_argument(
+        "--sizes",
+        choices=list(generator.SIZE_DISTRIBUTIONS),
+        default=defaults.sizes,
+        help="The distribution of file sizes.",
+    )
+    parser.add_argument("--commits", type=int, default=defaults.commits)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=suite.DEFAULT_REPEAT,
+        help="The number of timed runs of every benchmark.",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=list(suite.BENCHMARKS),
+        metavar="benchmark",
+        help="The benchmarks to run, all of them by default.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="Where to write the results, standard output by default.",
+    )
+    parser.add_argument(
+        "--budget",
+        type=Path,
+        help="The budget to fail the run against.",
+    )
+    parser.add_argument(
+        "--write-budget",
+        type=Path,
+        help="Where to write a budget allowing the measured costs.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=suite.DEFAULT_TOLERANCE,
+        help="The fraction by which runs may exceed a written budget.",
+    )
+    return parser.parse_args(arguments)
+
+
+def main(arguments: list[str]) -> int:
+    """Run the benchmarks, write their results and check them against a budget.
+
+    Args:
+        arguments: The command line arguments.
+
+    Returns:
+        The exit status, 1 if a benchmark went over its budget.
+    """
+    options = parse_arguments(arguments)
+    spec = generator.RepositorySpec(
+        files=options.files,
+        depth=options.depth,
+        sizes=options.sizes,
+        commits=options.commits,
+        seed=options.seed,
+    )
+    with tempfile.TemporaryDirectory(prefix="codetrail-benchmarks-") as root:
+        results = suite.run_suite(Path(root), spec, options.only, options.repeat)
+
+    report = json.dumps(results, indent=2)
+    if options.output is None:
+        sys.stdout.write(f"{report}\n")
+    else:
+        options.output.write_text(f"{report}\n", encoding="utf-8")
+    if options.write_budget is not None:
+        budget = suite.make_budget(results, options.tolerance)
+        options.write_budget.write_text(
+            f"{json.dumps(budget, indent=2)}\n",
+            encoding="utf-8",
+        )
+    if options.budget is None:
+        return 0
+    budget = json.loads(options.budget.read_text(encoding="utf-8"))
+    violations = suite.check_budget(results, budget)
+    for violation in violations:
+        sys.stderr.write(f"{violation}\n")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
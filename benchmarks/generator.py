@@ -0,0 +1,211 @@
+"""This module generates synthetic work trees and histories for the benchmarks.
+
+Everything is derived from a `RepositorySpec` and its seed, so two runs with the same
+spec produce byte-identical files and the same commit IDs, and their timings can be
+compared.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from codetrail import cmd_init
+from codetrail import commands
+from codetrail import commits
+from codetrail import index
+from codetrail import models
+from codetrail import refs
+from codetrail import trees
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from codetrail.objects import ObjectStore
+
+# The size buckets of every distribution, as (largest size in bytes, weight) pairs.
+# A file picks a bucket by weight, then a size between half the bucket and all of it.
+SIZE_DISTRIBUTIONS: dict[str, tuple[tuple[int, int], ...]] = {
+    "tiny": ((256, 1),),
+    "source": ((1024, 40), (8192, 40), (65536, 15), (262144, 5)),
+    "large": ((65536, 6), (1048576, 3), (8388608, 1)),
+}
+
+WORDS = (
+    b"def",
+    b"return",
+    b"self",
+    b"import",
+    b"class",
+    b"value",
+    b"path",
+    b"commit",
+    b"tree",
+    b"None",
+    b"=",
+    b"(",
+    b")",
+    b":",
+)
+
+COMMIT_TIME = 1700000000
+SIGNATURE = "Bench Mark <bench@mark.com>"
+
+
+class RepositorySpec(NamedTuple):
+    """The shape of a synthetic repository.
+
+    Attributes:
+        files: The number of files in the work tree.
+        depth: The number of directory levels below the work tree.
+        sizes: The name of the file size distribution, see `SIZE_DISTRIBUTIONS`.
+        commits: The number of commits of the `master` branch.
+        seed: The seed every file and commit is derived from.
+    """
+
+    files: int = 1000
+    depth: int = 4
+    sizes: str = "source"
+    commits: int = 20
+    seed: int = 0
+
+
+def generate_files(spec: RepositorySpec) -> dict[str, bytes]:
+    """Generate the content of a work tree.
+
+    Directories have about as many entries at every level. The first file is at
+    the full depth, so the deepest directory always exists.
+
+    Args:
+        spec: The shape of the repository.
+
+    Returns:
+        The content of every file, by POSIX path, in path order.
+
+    Raises:
+        ValueError: If the size distribution is unknown.
+    """
+    if spec.sizes not in SIZE_DISTRIBUTIONS:
+        msg = f"Unknown size distribution '{spec.sizes}'"
+        raise ValueError(msg)
+    rng = random.Random(spec.seed)  # noqa: S311
+    width = max(2, round(spec.files ** (1 / (spec.depth + 1))))
+    files = {}
+    for number in range(spec.files):
+        levels = spec.depth if number == 0 else rng.randint(0, spec.depth)
+        directories = [f"d{rng.randrange(width)}" for _ in range(levels)]
+        path = "/".join([*directories, f"f{number:06}.txt"])
+        files[path] = file_content(rng, spec.sizes)
+    return dict(sorted(files.items()))
+
+
+def file_content(rng: random.Random, sizes: str) -> bytes:
+    """Generate text content with a size drawn from a distribution.
+
+    Args:
+        rng: The random generator to draw from.
+        sizes: The name of the file size distribution.
+
+    Returns:
+        Lines of words from a small vocabulary, which compress like source code.
+    """
+    buckets = SIZE_DISTRIBUTIONS[sizes]
+    (largest,) = rng.choices(
+        [size for size, _ in buckets],
+        weights=[weight for _, weight in buckets],
+    )
+    size = rng.randint(largest // 2, largest)
+    line = b" ".join(rng.choices(WORDS, k=12)) + b"\n"
+    line += f"# {rng.getrandbits(64):016x}\n".encode()
+    return (line * (size // len(line) + 1))[:size]
+
+
+def deepest_directory(files: dict[str, bytes]) -> str:
+    """Find the directory of a work tree with the most levels.
+
+    Args:
+        files: The content of every file, by POSIX path.
+
+    Returns:
+        The POSIX path of the directory, "" for the work tree itself.
+    """
+    deepest = max(files, key=lambda path: (path.count("/"), path))
+    return deepest.rpartition("/")[0]
+
+
+def write_work_tree(root: Path, files: dict[str, bytes]) -> None:
+    """Write the files of a work tree.
+
+    Args:
+        root: The work tree.
+        files: The content of every file, by POSIX path.
+    """
+    for path, content in files.items():
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+
+
+def generate_repository(root: Path, spec: RepositorySpec) -> models.CodetrailRepository:
+    """Initialize a repository and generate its history and work tree.
+
+    Every commit after the first rewrites a twentieth of the files. `master` points
+    to the last commit, and the work tree holds its files, unstaged.
+
+    Args:
+        root: The work tree of the repository.
+        spec: The shape of the repository.
+
+    Returns:
+        The repository.
+    """
+    cmd_init.initialize_repository(commands.InitializeRepository(path=root))
+    repository = models.CodetrailRepository(root)
+    store = repository.objects
+    files = generate_files(spec)
+    blobs = {path: store.write_object("blob", data) for path, data in files.items()}
+    rng = random.Random(spec.seed + 1)  # noqa: S311
+    changed = max(1, spec.files // 20)
+    parents: tuple[str, ...] = ()
+    for number in range(spec.commits):
+        if number:
+            for path in rng.sample(sorted(files), min(changed, len(files))):
+                files[path] = file_content(rng, spec.sizes)
+                blobs[path] = store.write_object("blob", files[path])
+        oid = write_commit(store, blobs, parents, COMMIT_TIME + number)
+        parents = (oid,)
+    if parents:
+        refs.write_ref(repository.repo_dir, "refs/heads/master", parents[0])
+    write_work_tree(root, files)
+    return repository
+
+
+def write_commit(
+    store: ObjectStore,
+    blobs: dict[str, str],
+    parents: tuple[str, ...],
+    timestamp: int,
+) -> str:
+    """Write the trees and commit of a snapshot of the work tree.
+
+    Args:
+        store: The object store receiving the objects.
+        blobs: The hex ID of the blob of every file, by POSIX path.
+        parents: The hex IDs of the parent commits.
+        timestamp: The unix time of the commit.
+
+    Returns:
+        The hex ID of the commit.
+    """
+    entries = [
+        index.IndexEntry(path, oid, index.MODE_FILE, 0, 0, 0, 0)
+        for path, oid in sorted(blobs.items())
+    ]
+    root, built = trees.build_index_trees(entries)
+    for tree_entries in built.values():
+        store.write_object("tree", trees.encode_tree(tree_entries))
+    signature = f"{SIGNATURE} {timestamp} +0000"
+    message = f"Commit {timestamp}\n"
+    commit = commits.Commit(root, parents, signature, signature, message)
+    return store.write_object("commit", commit.encode())
@@ -0,0 +1,402 @@
+"""This module holds the benchmarks, how they are measured and their budgets.
+
+Every benchmark prepares an operation on a generated workspace. The operation is run
+in a loop long enough to time reliably, found while warming up, then the loop is
+timed `repeat` times. It is run once more under `tracemalloc` to record its peak
+memory, so tracing does not skew the timings. Peak memory covers the Python
+allocations of the benchmarking process, not those of worker processes.
+
+Operations measure the cold path: caches the operation would otherwise hit on a
+second run, such as the memoized repository discovery or the parsed configuration,
+are dropped before every run.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import itertools
+import logging
+import platform
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import NamedTuple
+
+from benchmarks import generator
+from codetrail import cmd_add
+from codetrail import cmd_config
+from codetrail import cmd_init
+from codetrail import commands
+from codetrail import configuration
+from codetrail import history
+from codetrail import models
+from codetrail import refs
+from codetrail import utils
+from codetrail.conf import LOGGER
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from collections.abc import Iterable
+    from pathlib import Path
+
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.5
+MIN_SAMPLE_SECONDS = 0.05
+
+
+class Workspace(NamedTuple):
+    """The directories the benchmarks run in.
+
+    Attributes:
+        root: The scratch directory holding everything else.
+        repository: The generated repository, with its history and work tree.
+        tree: A copy of the work tree with no repository below it.
+        deepest: The deepest directory of the work tree of the repository.
+    """
+
+    root: Path
+    repository: models.CodetrailRepository
+    tree: Path
+    deepest: Path
+
+
+class Measurement(NamedTuple):
+    """The cost of an operation.
+
+    Attributes:
+        runs: The number of timed loops.
+        loops: The number of runs of the operation in every loop.
+        best: The fastest run, in seconds, from the fastest loop.
+        median: The median run, in seconds, from the median loop.
+        peak_bytes: The peak of the memory allocated during a run, in bytes.
+    """
+
+    runs: int
+    loops: int
+    best: float
+    median: float
+    peak_bytes: int
+
+
+Operation = Callable[[], object]
+
+BENCHMARKS: dict[str, Callable[[Workspace], Operation]] = {}
+
+
+def benchmark(
+    name: str,
+) -> Callable[[Callable[[Workspace], Operation]], Callable[[Workspace], Operation]]:
+    """Register a function preparing the operation of a benchmark.
+
+    Args:
+        name: The name of the benchmark.
+
+    Returns:
+        The decorator registering the function.
+    """
+
+    def register(
+        prepare: Callable[[Workspace], Operation],
+    ) -> Callable[[Workspace], Operation]:
+        BENCHMARKS[name] = prepare
+        return prepare
+
+    return register
+
+
+@benchmark("init")
+def prepare_init(workspace: Workspace) -> Operation:
+    """Initialize a new repository on every run.
+
+    Args:
+        workspace: The workspace to run in.
+
+    Returns:
+        The operation.
+    """
+    numbers = itertools.count()
+
+    def operation() -> None:
+        path = workspace.root / "init" / str(next(numbers))
+        cmd_init.initialize_repository(commands.InitializeRepository(path=path))
+
+    return operation
+
+
+@benchmark("find_repository_path")
+def prepare_find_repository_path(workspace: Workspace) -> Operation:
+    """Find the repository from the deepest directory of its work tree.
+
+    Args:
+        workspace: The workspace to run in.
+
+    Returns:
+        The operation.
+    """
+
+    def operation() -> Path | None:
+        utils.clear_repository_cache()
+        return utils.find_repository_path(workspace.deepest)
+
+    return operation
+
+
+@benchmark("find_child_repository_path")
+def prepare_find_child_repository_path(workspace: Workspace) -> Operation:
+    """Search a whole work tree for a repository below it, finding none.
+
+    Args:
+        workspace: The workspace to run in.
+
+    Returns:
+        The operation.
+    """
+    return lambda: utils.find_child_repository_path(workspace.tree)
+
+
+@benchmark("config_read")
+def prepare_config_read(workspace: Workspace) -> Operation:
+    """Read a configuration value, parsing the configuration files again.
+
+    Args:
+        workspace: The workspace to run in.
+
+    Returns:
+        The operation.
+    """
+    with contextlib.chdir(workspace.repository.work_tree):
+        cmd_config.set_config(commands.SetConfig(key="user.name", value="Bench"))
+
+    def operation() -> None:
+        configuration.invalidate()
+        cmd_config.get_config(commands.GetConfig(key="user.name"))
+
+    return operation
+
+
+@benchmark("config_write")
+def prepare_config_write(workspace: Workspace) -> Operation:  # noqa: ARG001
+    """Write a configuration value, a different one on every run.
+
+    Args:
+        workspace: The workspace to run in.
+
+    Returns:
+        The operation.
+    """
+    numbers = itertools.count()
+
+    def operation() -> None:
+        entries = {"user.name": f"Bench {next(numbers)}"}
+        cmd_config.set_config_entries(commands.SetConfigEntries(entries=entries))
+
+    return operation
+
+
+@benchmark("add")
+def prepare_add(workspace: Workspace) -> Operation:
+    """Stage the whole work tree into an empty index.
+
+    Args:
+        workspace: The workspace to run in.
+
+    Returns:
+        The operation.
+    """
+    repository = workspace.repository
+
+    def operation() -> None:
+        repository.index_path.unlink(missing_ok=True)
+        cmd_add.add_paths(commands.AddPaths(paths=[repository.work_tree]))
+
+    return operation
+
+
+@benchmark("log")
+def prepare_log(workspace: Workspace) -> Operation:
+    """Walk the history of `master` with a new object store.
+
+    Args:
+        workspace: The workspace to run in.
+
+    Returns:
+        The operation.
+    """
+    work_tree = workspace.repository.work_tree
+    tip = refs.resolve_ref(workspace.repository.repo_dir, "refs/heads/master")
+    tips = [] if tip is None else [tip]
+
+    def operation() -> int:
+        store = models.CodetrailRepository(work_tree).objects
+        return sum(1 for _ in history.iter_history(store, tips))
+
+    return operation
+
+
+def make_workspace(root: Path, spec: generator.RepositorySpec) -> Workspace:
+    """Generate the repository and the plain work tree the benchmarks run in.
+
+    Args:
+        root: An empty scratch directory.
+        spec: The shape of the repository.
+
+    Returns:
+        The workspace.
+    """
+    repository = generator.generate_repository(root / "repository", spec)
+    files = generator.generate_files(spec)
+    generator.write_work_tree(root / "tree", files)
+    deepest = repository.work_tree / generator.deepest_directory(files)
+    return Workspace(root, repository, root / "tree", deepest)
+
+
+def measure(operation: Operation, repeat: int) -> Measurement:
+    """Measure the time and peak memory of an operation.
+
+    Args:
+        operation: The operation.
+        repeat: The number of timed loops.
+
+    Returns:
+        The measurement.
+    """
+    loops = 1
+    while time_loop(operation, loops) < MIN_SAMPLE_SECONDS:
+        loops *= 2
+    timings = [time_loop(operation, loops) / loops for _ in range(repeat)]
+    tracemalloc.start()
+    try:
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Measurement(repeat, loops, min(timings), statistics.median(timings), peak)
+
+
+def time_loop(operation: Operation, loops: int) -> float:
+    """Time a number of runs of an operation.
+
+    Args:
+        operation: The operation.
+        loops: The number of runs.
+
+    Returns:
+        The time all runs took, in seconds.
+    """
+    start = time.perf_counter()
+    for _ in range(loops):
+        operation()
+    return time.perf_counter() - start
+
+
+@contextlib.contextmanager
+def quiet() -> Generator[None]:
+    """Silence the informational messages of the commands."""
+    level = LOGGER.level
+    LOGGER.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        LOGGER.setLevel(level)
+
+
+def run_suite(
+    root: Path,
+    spec: generator.RepositorySpec,
+    names: Iterable[str] | None = None,
+    repeat: int = DEFAULT_REPEAT,
+) -> dict[str, Any]:
+    """Run benchmarks on a generated workspace.
+
+    Args:
+        root: An empty scratch directory.
+        spec: The shape of the repository.
+        names: The benchmarks to run, None for all of them.
+        repeat: The number of timed runs of every benchmark.
+
+    Returns:
+        The results, which can be written as JSON: the spec, the interpreter and
+        platform, and the measurement of every benchmark by name.
+
+    Raises:
+        ValueError: If a benchmark is unknown.
+    """
+    names = list(BENCHMARKS if names is None else names)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        msg = f"Unknown benchmarks {unknown}, choose from {list(BENCHMARKS)}"
+        raise ValueError(msg)
+
+    measurements = {}
+    with quiet():
+        workspace = make_workspace(root, spec)
+        with contextlib.chdir(workspace.repository.work_tree):
+            for name in names:
+                operation = BENCHMARKS[name](workspace)
+                measurements[name] = measure(operation, repeat)._asdict()
+    return {
+        "spec": spec._asdict(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": measurements,
+    }
+
+
+def make_budget(
+    results: dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> dict[str, Any]:
+    """Make a budget allowing every benchmark its measured cost.
+
+    Args:
+        results: The results of a run, see `run_suite`.
+        tolerance: The fraction by which a later run may exceed the budget.
+
+    Returns:
+        The budget, which can be written as JSON.
+    """
+    return {
+        "spec": dict(results["spec"]),
+        "tolerance": tolerance,
+        "budgets": {
+            name: {"median": result["median"], "peak_bytes": result["peak_bytes"]}
+            for name, result in results["benchmarks"].items()
+        },
+    }
+
+
+def check_budget(results: dict[str, Any], budget: dict[str, Any]) -> list[str]:
+    """Compare the results of a run with a budget.
+
+    Benchmarks without a budget, or that were not run, are not checked.
+
+    Args:
+        results: The results of a run, see `run_suite`.
+        budget: The budget, see `make_budget`.
+
+    Returns:
+        A message for every benchmark slower, or using more memory, than its budget
+        allows, none if the run is within budget.
+    """
+    if results["spec"] != budget["spec"]:
+        return [f"The budget is for the spec {budget['spec']}, not {results['spec']}"]
+    allowance = 1 + budget["tolerance"]
+    violations = []
+    for name, limits in budget["budgets"].items():
+        result = results["benchmarks"].get(name)
+        if result is None:
+            continue
+        if result["median"] > limits["median"] * allowance:
+            violations.append(
+                f"{name} took {result['median']:.6f}s, over its budget of "
+                f"{limits['median']:.6f}s by more than {budget['tolerance']:.0%}",
+            )
+        if result["peak_bytes"] > limits["peak_bytes"] * allowance:
+            violations.append(
+                f"{name} allocated {result['peak_bytes']} bytes, over its budget of "
+                f"{limits['peak_bytes']} bytes by more than {budget['tolerance']:.0%}",
+            )
+    return violations
@@ -8,7 +8,7 @@ from codetrail import parsers
 
 def main() -> None:
     """Entrypoint for the version control system."""
-    args = parsers.arg_parser.parse_args(sys.argv[1:])
+    args = parsers.parse_arguments(sys.argv[1:])
     cli.run(args.command, args)
 
 
@@ -0,0 +1,277 @@
+"""This module holds the checkout engine.
+
+Checking out a tree only touches the paths that differ between the staging index
+and the target tree. The trees are compared with the tree diff engine, so
+directories whose tree ID did not change are skipped without reading any object,
+and switching between two branches that differ in a few files writes those few
+files whatever the size of the work tree.
+
+A checkout runs in three steps:
+
+1. Every path about to be overwritten or removed is checked against the index, so
+   local changes and untracked files are never lost.
+2. Removed paths are deleted, along with the directories they leave empty.
+3. A pool of threads inflates the blobs and writes the files. Decompression and
+   file writes release the GIL, so the workers keep the disk busy instead of one
+   core. In a partial clone, the missing blobs are fetched first, in one batch.
+
+The index entries of the written files are built from their stat data, and the
+index is written once, at the end.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from codetrail import exceptions
+from codetrail import index
+from codetrail import objects
+from codetrail import tree_diff
+
+if TYPE_CHECKING:
+    from codetrail.objects import ObjectStore
+    from codetrail.trees import TreeEntry
+
+EXECUTABLE_PERMISSIONS = 0o777
+FILE_PERMISSIONS = 0o666
+
+
+class CheckoutResult(NamedTuple):
+    """The work done by a checkout.
+
+    Attributes:
+        written: The number of files written.
+        removed: The number of files removed.
+    """
+
+    written: int
+    removed: int
+
+
+def plan_checkout(
+    store: ObjectStore,
+    staging: index.StagingIndex,
+    base: str | None,
+    target: str | None,
+) -> list[tree_diff.Change]:
+    """Compute the paths to update to move the index from one tree to another.
+
+    A path changed in the index but not between the two trees keeps its staged
+    content. A path changed in both is a conflict, unless the index already holds
+    the target content.
+
+    Args:
+        store: The object store holding the trees.
+        staging: The staging index.
+        base: The hex ID of the tree the index was checked out from, None for an
+            empty tree.
+        target: The hex ID of the tree to check out, None for an empty tree.
+
+    Returns:
+        The changes in path order, with the index entry on the old side and the
+        target entry on the new side.
+
+    Raises:
+        CheckoutConflictError: If a path with staged changes differs in the target.
+    """
+    staged = {
+        change.path: change.new
+        for change in tree_diff.diff_tree_to_index(store, base, staging)
+    }
+    changes = []
+    conflicts = []
+    for change in tree_diff.diff_trees(store, base, target):
+        current = staged.get(change.path, change.old)
+        if current == change.new:
+            continue
+        if change.path in staged:
+            conflicts.append(change.path)
+        changes.append(tree_diff.Change(change.path, current, change.new))
+    if conflicts:
+        msg = _conflict_message("have staged changes", conflicts)
+        raise exceptions.CheckoutConflictError(msg)
+    return changes
+
+
+def check_work_tree(
+    work_tree: Path,
+    staging: index.StagingIndex,
+    changes: list[tree_diff.Change],
+) -> None:
+    """Check that a checkout does not overwrite local changes or untracked files.
+
+    Files whose stat data matches their index entry are not read; the others are
+    hashed and compared with the index.
+
+    Args:
+        work_tree: The work tree.
+        staging: The staging index.
+        changes: The changes returned by `plan_checkout`.
+
+    Raises:
+        CheckoutConflictError: If a file to update or remove has local changes, or
+            an untracked file is in the way.
+    """
+    conflicts = [
+        change.path
+        for change in changes
+        if not _is_clean(work_tree, staging, change.path)
+    ]
+    if conflicts:
+        msg = _conflict_message("have local changes or are untracked", conflicts)
+        raise exceptions.CheckoutConflictError(msg)
+
+
+def _conflict_message(reason: str, paths: list[str]) -> str:
+    listing = "".join(f"\n    {path}" for path in paths)
+    return f"Checkout would overwrite files that {reason}:{listing}"
+
+
+def _is_clean(work_tree: Path, staging: index.StagingIndex, path: str) -> bool:
+    file = work_tree / path
+    try:
+        status = file.lstat()
+    except FileNotFoundError:
+        return True
+    except NotADirectoryError:
+        return _blocking_file(work_tree, path) in staging
+    if stat.S_ISDIR(status.st_mode):
+        return all(
+            (Path(directory) / name).relative_to(work_tree).as_posix() in staging
+            for directory, _, names in os.walk(file)
+            for name in names
+        )
+    entry = staging.get(path)
+    if entry is None or entry.mode != index.normalize_mode(status.st_mode):
+        return False
+    return staging.is_fresh(path, status) or entry.oid == _hash(file, status)
+
+
+def _blocking_file(work_tree: Path, path: str) -> str:
+    parents = reversed(PurePosixPath(path).parents[:-1])
+    return next(
+        parent.as_posix()
+        for parent in parents
+        if not (work_tree / parent).is_dir() or (work_tree / parent).is_symlink()
+    )
+
+
+def _hash(file: Path, status: os.stat_result) -> str:
+    if stat.S_ISLNK(status.st_mode):
+        return objects.hash_object("blob", str(file.readlink()).encode())
+    return objects.hash_object("blob", file.read_bytes())
+
+
+def remove_file(work_tree: Path, path: str) -> None:
+    """Remove a file and the directories it leaves empty.
+
+    Args:
+        work_tree: The work tree.
+        path: The POSIX path relative to the work tree.
+    """
+    file = work_tree / path
+    file.unlink(missing_ok=True)
+    for parent in PurePosixPath(path).parents[:-1]:
+        try:
+            (work_tree / parent).rmdir()
+        except OSError:
+            return
+
+
+def write_file(
+    store: ObjectStore,
+    work_tree: Path,
+    path: str,
+    entry: TreeEntry,
+) -> index.IndexEntry:
+    """Write a blob to the work tree, replacing what is at its path.
+
+    Args:
+        store: The object store holding the blob.
+        work_tree: The work tree.
+        path: The POSIX path relative to the work tree.
+        entry: The tree entry of the file.
+
+    Returns:
+        The index entry of the written file.
+    """
+    file = work_tree / path
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file.unlink(missing_ok=True)
+    if entry.mode == index.MODE_SYMLINK:
+        file.symlink_to(store.read_object(entry.oid).data.decode())
+    else:
+        permissions = (
+            EXECUTABLE_PERMISSIONS
+            if entry.mode == index.MODE_EXECUTABLE
+            else FILE_PERMISSIONS
+        )
+        fd = os.open(file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, permissions)
+        with store.open_object(entry.oid) as stream, os.fdopen(fd, "wb") as output:
+            for chunk in stream:
+                output.write(chunk)
+    return index.IndexEntry.from_stat(path, entry.oid, file.lstat())
+
+
+def checkout_tree(  # noqa: PLR0913
+    store: ObjectStore,
+    staging: index.StagingIndex,
+    work_tree: Path,
+    base: str | None,
+    target: str | None,
+    *,
+    workers: int,
+) -> CheckoutResult:
+    """Update the work tree and the index from one tree to another.
+
+    Nothing is touched when a conflict is found. The index is written once, after
+    every file has been written.
+
+    Args:
+        store: The object store holding the trees and blobs.
+        staging: The staging index.
+        work_tree: The work tree.
+        base: The hex ID of the tree the index was checked out from, None for an
+            empty tree.
+        target: The hex ID of the tree to check out, None for an empty tree.
+        workers: The number of threads writing files.
+
+    Returns:
+        The number of files written and removed.
+    """
+    changes = plan_checkout(store, staging, base, target)
+    check_work_tree(work_tree, staging, changes)
+
+    removed = 0
+    for change in changes:
+        if change.new is None:
+            remove_file(work_tree, change.path)
+            staging.remove(change.path)
+            removed += 1
+
+    writes = [change for change in changes if change.new is not None]
+    if writes and store.promisor is not None:
+        store.promisor.fetch(
+            store,
+            [change.new.oid for change in writes if change.new is not None],
+        )
+    if writes:
+        # Map the packs before the threads look objects up concurrently.
+        _ = store.packs
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for entry in executor.map(
+                functools.partial(write_file, store, work_tree),
+                [change.path for change in writes],
+                [change.new for change in writes],
+            ):
+                staging.add(entry)
+
+    staging.write()
+    return CheckoutResult(len(writes), removed)
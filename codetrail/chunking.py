@@ -0,0 +1,200 @@
+"""This module holds the content-defined chunker used for large files.
+
+A large file that changes by a few bytes between two versions would be stored
+twice if it was stored whole. Splitting it where its content says so, rather than
+at fixed offsets, keeps the boundaries in place around an edit: every chunk outside
+the edited region is the same object in both versions and is stored once.
+
+Boundaries follow FastCDC: a gear rolling hash is updated one byte at a time, and a
+chunk ends where the hash matches a mask. The gear table maps every byte value to a
+single bit, so the low bits of the hash are the marks of the last bytes and a mask
+match is an occurrence of a fixed sequence of marks. The marks of a whole buffer
+are computed with one `bytes.translate` and the next match is found with
+`bytes.find`, both of which run in C at memory speed.
+
+Chunk sizes are normalized as in FastCDC: no boundary is looked for in the first
+`CHUNK_MIN_SIZE` bytes, a stricter sequence is required until `CHUNK_AVERAGE_SIZE`
+and a looser one after it, and a chunk never exceeds `CHUNK_MAX_SIZE`.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from codetrail import exceptions
+from codetrail.conf import CHUNK_AVERAGE_SIZE
+from codetrail.conf import CHUNK_MAX_SIZE
+from codetrail.conf import CHUNK_MIN_SIZE
+from codetrail.conf import CHUNK_READ_SIZE
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from typing import BinaryIO
+
+NORMALIZATION_LEVEL = 2
+
+
+def _seeded_bits(seed: bytes, count: int) -> bytes:
+    digest = hashlib.sha256(seed).digest()
+    return bytes(digest[bit >> 3] >> (bit & 7) & 1 for bit in range(count))
+
+
+GEAR_MARKS = _seeded_bits(b"codetrail gear table", 256)
+STRICT_PATTERN = _seeded_bits(
+    b"codetrail cut pattern",
+    CHUNK_AVERAGE_SIZE.bit_length() - 1 + NORMALIZATION_LEVEL,
+)
+LOOSE_PATTERN = STRICT_PATTERN[2 * NORMALIZATION_LEVEL :]
+
+
+class ChunkPolicy(NamedTuple):
+    """The files stored as content-defined chunks instead of whole blobs.
+
+    Attributes:
+        threshold: The size in bytes from which every file is chunked, 0 to only
+            chunk the files matching a pattern.
+        patterns: The shell patterns of the paths chunked whatever their size.
+    """
+
+    threshold: int = 0
+    patterns: tuple[str, ...] = ()
+
+    @classmethod
+    def parse(cls, threshold: int, patterns: str) -> ChunkPolicy:
+        """Build a policy from its configuration values.
+
+        Args:
+            threshold: The size in bytes from which every file is chunked.
+            patterns: The shell patterns, separated by whitespace or commas.
+
+        Returns:
+            The chunk policy.
+        """
+        return cls(max(threshold, 0), tuple(patterns.replace(",", " ").split()))
+
+    def __bool__(self) -> bool:
+        """Check whether the policy chunks any file.
+
+        Returns:
+            True if a threshold or a pattern is set, False otherwise.
+        """
+        return bool(self.threshold or self.patterns)
+
+    def applies(self, path: str, size: int) -> bool:
+        """Check whether a file is stored as chunks.
+
+        Args:
+            path: The POSIX path relative to the work tree.
+            size: The file size in bytes.
+
+        Returns:
+            True if the file is large enough or matches a pattern.
+        """
+        if self.threshold and size >= self.threshold:
+            return True
+        return any(fnmatch.fnmatchcase(path, pattern) for pattern in self.patterns)
+
+
+def find_cut(marks: bytes | bytearray, start: int, end: int) -> int:
+    """Find where the chunk starting at an offset ends.
+
+    Args:
+        marks: The gear marks of the buffer, as built with `GEAR_MARKS`.
+        start: The offset where the chunk starts.
+        end: The end of the buffer. Unless the data ends there, it must be at least
+            `CHUNK_MAX_SIZE` bytes past `start` for the result to be stable.
+
+    Returns:
+        The offset just past the end of the chunk.
+    """
+    limit = min(end, start + CHUNK_MAX_SIZE)
+    if limit - start <= CHUNK_MIN_SIZE:
+        return limit
+    normal = min(limit, start + CHUNK_AVERAGE_SIZE)
+    first = start + CHUNK_MIN_SIZE - len(STRICT_PATTERN)
+    match = marks.find(STRICT_PATTERN, first, normal)
+    if match >= 0:
+        return match + len(STRICT_PATTERN)
+    match = marks.find(LOOSE_PATTERN, normal - len(LOOSE_PATTERN), limit)
+    if match >= 0:
+        return match + len(LOOSE_PATTERN)
+    return limit
+
+
+def iter_chunks(
+    stream: BinaryIO,
+    size: int,
+    read_size: int = CHUNK_READ_SIZE,
+) -> Iterator[bytes]:
+    """Split the content of a stream into content-defined chunks.
+
+    Args:
+        stream: The stream to read content from.
+        size: The number of bytes to read.
+        read_size: The number of bytes read at a time.
+
+    Yields:
+        The chunks, in order. Fewer than `size` bytes are yielded if the stream
+        ends early.
+    """
+    data = bytearray()
+    marks = bytearray()
+    start = 0
+    remaining = size
+    while True:
+        while remaining and len(data) - start < CHUNK_MAX_SIZE:
+            block = stream.read(min(read_size, remaining))
+            if not block:
+                remaining = 0
+                break
+            data += block
+            marks += block.translate(GEAR_MARKS)
+            remaining -= len(block)
+        if start == len(data):
+            return
+        cut = find_cut(marks, start, len(data))
+        yield bytes(data[start:cut])
+        start = cut
+        if start >= read_size:
+            del data[:start]
+            del marks[:start]
+            start = 0
+
+
+def encode_manifest(chunks: Iterable[tuple[str, int]]) -> bytes:
+    """Encode the list of chunks of a file.
+
+    Args:
+        chunks: The hex object ID and size of every chunk, in order.
+
+    Returns:
+        One `<object ID> <size>` line per chunk.
+    """
+    return "".join(f"{oid} {size}\n" for oid, size in chunks).encode()
+
+
+def parse_manifest(data: bytes) -> list[tuple[str, int]]:
+    """Decode the list of chunks of a file.
+
+    Args:
+        data: The manifest content.
+
+    Returns:
+        The hex object ID and size of every chunk, in order.
+
+    Raises:
+        CorruptObjectError: If a line is malformed.
+    """
+    chunks = []
+    for line in data.decode().splitlines():
+        try:
+            oid, size = line.split(" ")
+            chunks.append((oid, int(size)))
+        except ValueError as e:
+            msg = f"Malformed chunk manifest line {line!r}"
+            raise exceptions.CorruptObjectError(msg) from e
+    return chunks
@@ -1,15 +1,20 @@
-"""This package contains the command line app logic."""
+"""This package contains the command line app logic.
+
+Each handler imports the module implementing its command, so running a command
+only pays for the modules it needs.
+"""
 
 import argparse
+import os
+import shlex
+import sys
 
-from codetrail import cmd_config
-from codetrail import cmd_init
 from codetrail import commands
 from codetrail import exceptions
 from codetrail.conf import LOGGER
 
 
-def run(command: str, arguments: argparse.Namespace) -> None:
+def run(command: str, arguments: argparse.Namespace) -> None:  # noqa: PLR0912
     """Match the command based to the appropriate handler.
 
     Args:
@@ -21,8 +26,30 @@ def run(command: str, arguments: argparse.Namespace) -> None:
     """
     if command == "init":
         init(arguments)
+    elif command == "add":
+        add(arguments)
     elif command in {"set", "unset", "get", "list", "edit"}:
         config(arguments)
+    elif command == "repack":
+        repack(arguments)
+    elif command == "commit-graph":
+        commit_graph(arguments)
+    elif command == "log":
+        log(arguments)
+    elif command == "pack-refs":
+        pack_refs(arguments)
+    elif command == "branch":
+        branch(arguments)
+    elif command == "checkout":
+        checkout(arguments)
+    elif command == "upload-pack":
+        upload_pack(arguments)
+    elif command == "fetch":
+        fetch(arguments)
+    elif command == "clone":
+        clone(arguments)
+    elif command == "remote":
+        remote(arguments)
     else:
         msg = f"Invalid Command '{command}'"
         raise exceptions.InvalidCommandError(msg)
@@ -34,6 +61,8 @@ def init(arguments: argparse.Namespace) -> None:
     Args:
         arguments: Parsed command-line arguments containing the target path.
     """
+    from codetrail import cmd_init  # noqa: PLC0415
+
     try:
         command = commands.InitializeRepository(path=arguments.path)
         cmd_init.initialize_repository(command)
@@ -41,6 +70,296 @@ def init(arguments: argparse.Namespace) -> None:
         LOGGER.error(str(e))
 
 
+def add(arguments: argparse.Namespace) -> None:
+    """Handle the add command by staging files in the index.
+
+    Args:
+        arguments: Parsed command-line arguments containing the paths.
+    """
+    from codetrail import cmd_add  # noqa: PLC0415
+
+    try:
+        command = commands.AddPaths(paths=arguments.paths)
+        cmd_add.add_paths(command)
+    except (
+        exceptions.NotARepositoryError,
+        exceptions.UnmatchedPathError,
+        exceptions.PathOutsideRepositoryError,
+        exceptions.CorruptIndexError,
+        exceptions.UnsupportedConfigError,
+    ) as e:
+        LOGGER.error(str(e))
+
+
+def repack(arguments: argparse.Namespace) -> None:
+    """Handle the repack command by packing the repository objects.
+
+    Args:
+        arguments: Parsed command-line arguments containing the delta options.
+    """
+    from codetrail import cmd_repack  # noqa: PLC0415
+
+    try:
+        command = commands.RepackRepository(
+            window=arguments.window,
+            depth=arguments.depth,
+            write_bitmap=arguments.write_bitmap,
+        )
+        cmd_repack.repack_repository(command)
+    except (
+        exceptions.NotARepositoryError,
+        exceptions.UnsupportedConfigError,
+        exceptions.ObjectNotFoundError,
+        exceptions.CorruptObjectError,
+    ) as e:
+        LOGGER.error(str(e))
+
+
+def commit_graph(arguments: argparse.Namespace) -> None:  # noqa: ARG001
+    """Handle the commit-graph command by writing the commit graph.
+
+    Args:
+        arguments: Parsed command-line arguments containing the action.
+    """
+    from codetrail import cmd_commit_graph  # noqa: PLC0415
+
+    try:
+        cmd_commit_graph.write_commit_graph(commands.WriteCommitGraph())
+    except (
+        exceptions.NotARepositoryError,
+        exceptions.ObjectNotFoundError,
+        exceptions.CorruptObjectError,
+        exceptions.UnsupportedConfigError,
+    ) as e:
+        LOGGER.error(str(e))
+
+
+def log(arguments: argparse.Namespace) -> None:
+    """Handle the log command by showing the commit history.
+
+    Output stops quietly when the reader goes away, e.g. when piped into `head`.
+
+    Args:
+        arguments: Parsed command-line arguments containing the revision and limits.
+    """
+    from codetrail import cmd_log  # noqa: PLC0415
+
+    try:
+        command = commands.LogCommits(
+            revision=arguments.revision,
+            max_count=arguments.max_count,
+            since=arguments.since,
+            topo_order=arguments.topo_order,
+        )
+        cmd_log.log_commits(command)
+    except BrokenPipeError:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    except (
+        exceptions.NotARepositoryError,
+        exceptions.UnknownRevisionError,
+        exceptions.ObjectNotFoundError,
+        exceptions.CorruptObjectError,
+        exceptions.UnsupportedConfigError,
+    ) as e:
+        LOGGER.error(str(e))
+
+
+def pack_refs(arguments: argparse.Namespace) -> None:  # noqa: ARG001
+    """Handle the pack-refs command by packing the references.
+
+    Args:
+        arguments: Parsed command-line arguments.
+    """
+    from codetrail import cmd_pack_refs  # noqa: PLC0415
+
+    try:
+        cmd_pack_refs.pack_refs(commands.PackRefs())
+    except (
+        exceptions.NotARepositoryError,
+        exceptions.ObjectNotFoundError,
+        exceptions.CorruptObjectError,
+        exceptions.UnsupportedConfigError,
+    ) as e:
+        LOGGER.error(str(e))
+
+
+def branch(arguments: argparse.Namespace) -> None:
+    """Handle the branch command by listing or creating branches.
+
+    Args:
+        arguments: Parsed command-line arguments containing the name and options.
+    """
+    from codetrail import cmd_branch  # noqa: PLC0415
+
+    try:
+        if arguments.list or arguments.name is None:
+            cmd_branch.list_branches(commands.ListBranches(pattern=arguments.name))
+        else:
+            command = commands.CreateBranch(
+                name=arguments.name,
+                start_point=arguments.start_point,
+            )
+            cmd_branch.create_branch(command)
+    except (
+        exceptions.NotARepositoryError,
+        exceptions.InvalidReferenceError,
+        exceptions.UnknownRevisionError,
+        exceptions.ObjectNotFoundError,
+        exceptions.CorruptObjectError,
+        exceptions.UnsupportedConfigError,
+    ) as e:
+        LOGGER.error(str(e))
+
+
+def checkout(arguments: argparse.Namespace) -> None:
+    """Handle the checkout command by switching the work tree.
+
+    Args:
+        arguments: Parsed command-line arguments containing the revision.
+    """
+    from codetrail import cmd_checkout  # noqa: PLC0415
+
+    try:
+        command = commands.CheckoutRevision(revision=arguments.revision)
+        cmd_checkout.checkout_revision(command)
+    except (
+        exceptions.NotARepositoryError,
+        exceptions.UnknownRevisionError,
+        exceptions.CheckoutConflictError,
+        exceptions.ObjectNotFoundError,
+        exceptions.CorruptObjectError,
+        exceptions.CorruptIndexError,
+        exceptions.UnsupportedConfigError,
+    ) as e:
+        LOGGER.error(str(e))
+
+
+def upload_pack(arguments: argparse.Namespace) -> None:
+    """Handle the upload-pack command by serving a fetch of the repository.
+
+    Standard output carries the protocol, so errors are reported to the client as
+    an error packet instead of being logged, unless serving a socket.
+
+    Args:
+        arguments: Parsed command-line arguments containing the repository path.
+    """
+    from codetrail import cmd_upload_pack  # noqa: PLC0415
+    from codetrail import transfer  # noqa: PLC0415
+
+    try:
+        command = commands.UploadPack(
+            directory=arguments.directory,
+            listen=arguments.listen,
+        )
+        cmd_upload_pack.upload_pack(command)
+    except (
+        exceptions.NotARepositoryError,
+        exceptions.MissingConfigurationFileError,
+        exceptions.ProtocolError,
+        exceptions.InvalidFilterError,
+        exceptions.ObjectNotFoundError,
+        exceptions.CorruptObjectError,
+        exceptions.UnsupportedConfigError,
+    ) as e:
+        if arguments.listen is None:
+            transfer.write_error(sys.stdout.buffer, str(e))
+        else:
+            LOGGER.error(str(e))
+
+
+def fetch(arguments: argparse.Namespace) -> None:
+    """Handle the fetch command by fetching from another repository, or every remote.
+
+    Args:
+        arguments: Parsed command-line arguments containing the remote.
+    """
+    from codetrail import cmd_fetch  # noqa: PLC0415
+
+    if not arguments.all and arguments.remote is None:
+        LOGGER.error("Name a remote to fetch from, or fetch --all.")
+        return
+    upload_pack = None
+    if arguments.upload_pack is not None:
+        upload_pack = shlex.split(arguments.upload_pack)
+    try:
+        if arguments.all:
+            cmd_fetch.fetch_all(
+                commands.FetchAll(jobs=arguments.jobs, upload_pack=upload_pack),
+            )
+        else:
+            cmd_fetch.fetch_remote(
+                commands.FetchRemote(
+                    remote=arguments.remote,
+                    name=arguments.name,
+                    upload_pack=upload_pack,
+                ),
+            )
+    except (
+        exceptions.NotARepositoryError,
+        exceptions.ProtocolError,
+        exceptions.ObjectNotFoundError,
+        exceptions.CorruptObjectError,
+        exceptions.UnsupportedConfigError,
+    ) as e:
+        LOGGER.error(str(e))
+
+
+def clone(arguments: argparse.Namespace) -> None:
+    """Handle the clone command by copying another repository.
+
+    Args:
+        arguments: Parsed command-line arguments containing the remote and filter.
+    """
+    from codetrail import cmd_clone  # noqa: PLC0415
+
+    upload_pack = None
+    if arguments.upload_pack is not None:
+        upload_pack = shlex.split(arguments.upload_pack)
+    try:
+        command = commands.CloneRepository(
+            remote=arguments.remote,
+            directory=arguments.directory,
+            filter_spec=arguments.filter_spec,
+            upload_pack=upload_pack,
+        )
+        cmd_clone.clone_repository(command)
+    except (
+        exceptions.ExistingRepositoryError,
+        exceptions.InvalidFilterError,
+        exceptions.ProtocolError,
+        exceptions.ObjectNotFoundError,
+        exceptions.CorruptObjectError,
+        exceptions.UnsupportedConfigError,
+        NotADirectoryError,
+    ) as e:
+        LOGGER.error(str(e))
+
+
+def remote(arguments: argparse.Namespace) -> None:
+    """Handle the remote command by listing or adding remotes.
+
+    Args:
+        arguments: Parsed command-line arguments containing the name and URL.
+    """
+    from codetrail import cmd_remote  # noqa: PLC0415
+
+    if arguments.name is not None and arguments.url is None:
+        LOGGER.error(f"The remote '{arguments.name}' needs a URL.")
+        return
+    try:
+        if arguments.name is None:
+            cmd_remote.list_remotes(commands.ListRemotes())
+        else:
+            command = commands.AddRemote(name=arguments.name, url=arguments.url)
+            cmd_remote.add_remote(command)
+    except (
+        exceptions.NotARepositoryError,
+        exceptions.InvalidReferenceError,
+    ) as e:
+        LOGGER.error(str(e))
+
+
 def config(arguments: argparse.Namespace) -> None:
     """Handle the config management command.
 
@@ -49,7 +368,7 @@ def config(arguments: argparse.Namespace) -> None:
     """
     try:
         run_config(arguments)
-    except exceptions.UnsupportedConfigError as e:
+    except (exceptions.UnsupportedConfigError, exceptions.ConfigLockError) as e:
         LOGGER.error(str(e))
 
 
@@ -62,15 +381,20 @@ def run_config(arguments: argparse.Namespace) -> None:
     Raises:
         InvalidCommandError: In case of an incorrect command.
     """
+    from codetrail import cmd_config  # noqa: PLC0415
+
     match arguments.command:
         case "set":
-            cmd_config.set_config(
-                commands.SetConfig(key=arguments.key[0], value=arguments.value[0]),
-            )
+            entries = cmd_config.pair_entries(arguments.entries)
+            if arguments.stdin:
+                entries.update(cmd_config.parse_entries(sys.stdin))
+            cmd_config.set_config_entries(commands.SetConfigEntries(entries=entries))
         case "get":
             cmd_config.get_config(commands.GetConfig(key=arguments.key[0]))
         case "list":
-            cmd_config.list_config(commands.ListConfig())
+            cmd_config.list_config(
+                commands.ListConfig(show_origin=arguments.show_origin),
+            )
         case "unset":
             cmd_config.unset_config(commands.UnsetConfig(key=arguments.key[0]))
         case "edit":
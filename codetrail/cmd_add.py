@@ -0,0 +1,182 @@
+"""This module holds the logic to stage files.
+
+Usage:
+    codetrail add <path>...
+"""
+
+import os
+from collections.abc import Callable
+from collections.abc import Iterator
+from pathlib import Path
+from pathlib import PurePosixPath
+
+from codetrail import chunking
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import hashing
+from codetrail import ignore
+from codetrail import index
+from codetrail import models
+from codetrail import utils
+from codetrail import walker
+from codetrail.conf import DEFAULT_CODETRAIL_DIRECTORY
+from codetrail.conf import LOGGER
+
+
+def add_paths(command: commands.AddPaths) -> None:
+    """Stage files in the index, hashing only those whose stat data changed.
+
+    Directories are staged recursively, skipping untracked paths matched by
+    `.codetrailignore` files. Tracked files that no longer exist under a given path
+    are removed from the index. Files are hashed by a pool of `core.workers`
+    processes. Files of at least `core.chunkthreshold` bytes, or matching a pattern
+    of `core.chunkpatterns`, are stored as content-defined chunks.
+
+    Args:
+        command: The command responsible for staging files.
+
+    Raises:
+        UnmatchedPathError: If a path matches no file and is not tracked.
+    """
+    repo_path = utils.find_repository_path(command.default_path) or command.default_path
+    repository = models.CodetrailRepository(repo_path)
+    work_tree = repository.work_tree.resolve()
+    staging = index.StagingIndex(repository.index_path)
+
+    files: list[tuple[Path, str]] = []
+    directories: list[tuple[Path, str]] = []
+    for path in command.paths:
+        target = absolute_path(path)
+        relative = relative_path(target, work_tree)
+        if target.is_dir() and not target.is_symlink():
+            directories.append((target, relative))
+        elif target.is_symlink() or target.exists():
+            files.append((target, relative))
+        elif relative in staging:
+            staging.remove(relative)
+        else:
+            msg = f"Path '{path}' did not match any files"
+            raise exceptions.UnmatchedPathError(msg)
+
+    seen: set[str] = set()
+    skip = ignore_filter(work_tree, staging)
+
+    def walk() -> Iterator[tuple[Path, str]]:
+        for file, name in files:
+            seen.add(name)
+            yield file, name
+        for directory, _ in directories:
+            for file in iter_files(directory, skip):
+                name = relative_path(file, work_tree)
+                seen.add(name)
+                yield file, name
+
+    workers = repository.get_core_int("workers", os.cpu_count() or 1)
+    policy = chunking.ChunkPolicy.parse(
+        repository.get_core_int("chunkthreshold", 0),
+        repository.get_core_str("chunkpatterns", ""),
+    )
+    pipeline = hashing.AddPipeline(
+        repository.objects,
+        staging,
+        workers,
+        policy=policy,
+    )
+    hashed = pipeline.run(walk())
+
+    for _, relative in directories:
+        prefix = "" if relative == "." else f"{relative}/"
+        for entry in list(staging):
+            if entry.path.startswith(prefix) and entry.path not in seen:
+                staging.remove(entry.path)
+
+    staging.write()
+    LOGGER.info(f"Staged {len(staging)} paths, {hashed} hashed.")
+
+
+def iter_files(
+    directory: Path,
+    skip: Callable[[os.DirEntry[str]], bool] | None = None,
+) -> Iterator[Path]:
+    """Iterate over the files below a directory, skipping the repository directory.
+
+    Args:
+        directory: The directory to walk.
+        skip: A predicate selecting further entries to skip.
+
+    Yields:
+        The path of every regular file and symlink.
+    """
+    for entry in walker.walk_tree(
+        directory,
+        exclude={DEFAULT_CODETRAIL_DIRECTORY},
+        skip=skip,
+    ):
+        if not entry.is_dir(follow_symlinks=False):
+            yield Path(entry.path)
+
+
+def ignore_filter(
+    work_tree: Path,
+    staging: index.StagingIndex,
+) -> Callable[[os.DirEntry[str]], bool]:
+    """Build a walker predicate skipping ignored paths that are not tracked.
+
+    Tracked files stay staged even when an ignore pattern matches them, so
+    directories holding tracked files are still walked.
+
+    Args:
+        work_tree: The resolved work tree.
+        staging: The staging index.
+
+    Returns:
+        The predicate, true for entries the walker should skip.
+    """
+    matcher = ignore.IgnoreMatcher(work_tree)
+    tracked_directories = {
+        parent.as_posix()
+        for entry in staging
+        for parent in PurePosixPath(entry.path).parents
+    }
+    prefix = f"{work_tree}{os.sep}"
+
+    def skip(entry: os.DirEntry[str]) -> bool:
+        name = entry.path.removeprefix(prefix).replace(os.sep, "/")
+        is_dir = entry.is_dir(follow_symlinks=False)
+        tracked = name in tracked_directories if is_dir else name in staging
+        return not tracked and matcher.is_ignored(name, is_dir=is_dir)
+
+    return skip
+
+
+def absolute_path(path: str | Path) -> Path:
+    """Make a path absolute, resolving symlinks in its parents but not the path.
+
+    Args:
+        path: The path given by the user.
+
+    Returns:
+        The absolute path.
+    """
+    absolute = Path(os.path.normpath(Path(path).absolute()))
+    return absolute.parent.resolve() / absolute.name
+
+
+def relative_path(path: Path, work_tree: Path) -> str:
+    """Get the POSIX path of a file relative to the work tree.
+
+    Args:
+        path: The absolute path of the file.
+        work_tree: The resolved work tree.
+
+    Returns:
+        The relative POSIX path.
+
+    Raises:
+        PathOutsideRepositoryError: If the path is not inside the work tree.
+    """
+    try:
+        return path.relative_to(work_tree).as_posix()
+    except ValueError as e:
+        msg = f"Path '{path}' is outside repository at '{work_tree}'"
+        raise exceptions.PathOutsideRepositoryError(msg) from e
@@ -0,0 +1,74 @@
+"""This module holds the logic to list and create branches.
+
+Usage:
+    codetrail branch [-l | --list] [<pattern>]
+    codetrail branch <name> [<start-point>]
+"""
+
+import fnmatch
+import sys
+
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import history
+from codetrail import models
+from codetrail import refs
+from codetrail import utils
+from codetrail.conf import HEAD_FILE
+from codetrail.conf import LOGGER
+
+HEADS_PREFIX = "refs/heads/"
+
+
+def list_branches(command: commands.ListBranches) -> None:
+    """Write the branches to standard output, marking the current one.
+
+    Only the loose files under `refs/heads/` and the packed records of branches
+    are read, so the tags of the repository cost nothing.
+
+    Args:
+        command: The command responsible for listing the branches.
+    """
+    repo_path = utils.find_repository_path(command.default_path) or command.default_path
+    repository = models.CodetrailRepository(repo_path)
+
+    head = refs.read_loose_ref(repository.repo_dir, HEAD_FILE) or ""
+    current = head.removeprefix(refs.SYMBOLIC_PREFIX)
+    lines = []
+    for name, _ in refs.iter_refs(repository.repo_dir, HEADS_PREFIX):
+        branch = name.removeprefix(HEADS_PREFIX)
+        if command.pattern is None or fnmatch.fnmatchcase(branch, command.pattern):
+            lines.append(f"{'*' if name == current else ' '} {branch}\n")
+    sys.stdout.write("".join(lines))
+
+
+def create_branch(command: commands.CreateBranch) -> None:
+    """Create a branch pointing to a commit.
+
+    Args:
+        command: The command responsible for creating the branch.
+
+    Raises:
+        InvalidReferenceError: If the name is invalid or the branch exists.
+        UnknownRevisionError: If the start point names no commit.
+    """
+    repo_path = utils.find_repository_path(command.default_path) or command.default_path
+    repository = models.CodetrailRepository(repo_path)
+    repo_dir = repository.repo_dir
+
+    name = f"{HEADS_PREFIX}{command.name}"
+    if not refs.is_valid_ref_name(name):
+        msg = f"'{command.name}' is not a valid branch name"
+        raise exceptions.InvalidReferenceError(msg)
+    if refs.read_ref(repo_dir, name) is not None:
+        msg = f"A branch named '{command.name}' already exists"
+        raise exceptions.InvalidReferenceError(msg)
+
+    oid = refs.resolve_revision(repo_dir, command.start_point)
+    if oid is None:
+        msg = f"Revision '{command.start_point}' does not name any commit"
+        raise exceptions.UnknownRevisionError(msg)
+    oid = history.peel(repository.objects, oid)
+
+    refs.write_ref(repo_dir, name, oid)
+    LOGGER.info(f"Created branch '{command.name}' at {oid[:7]}.")
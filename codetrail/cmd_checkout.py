@@ -0,0 +1,75 @@
+"""This module holds the logic to switch the work tree to a branch or a commit.
+
+Usage:
+    codetrail checkout <branch>
+    codetrail checkout <revision>
+"""
+
+import os
+
+from codetrail import checkout
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import history
+from codetrail import index
+from codetrail import models
+from codetrail import refs
+from codetrail import utils
+from codetrail.cmd_branch import HEADS_PREFIX
+from codetrail.conf import HEAD_FILE
+from codetrail.conf import LOGGER
+
+
+def checkout_revision(command: commands.CheckoutRevision) -> None:
+    """Switch the work tree and the index to a branch or a commit.
+
+    Only the paths that differ between the index and the target tree are written,
+    by a pool of `core.workers` threads. A branch name makes `HEAD` point to the
+    branch; any other revision detaches `HEAD` at its commit.
+
+    Args:
+        command: The command responsible for the checkout.
+
+    Raises:
+        UnknownRevisionError: If the revision names no commit.
+    """
+    repo_path = utils.find_repository_path(command.default_path) or command.default_path
+    repository = models.CodetrailRepository(repo_path)
+    repo_dir = repository.repo_dir
+    store = repository.objects
+
+    branch = f"{HEADS_PREFIX}{command.revision}"
+    is_branch = (
+        command.revision != HEAD_FILE and refs.read_ref(repo_dir, branch) is not None
+    )
+    if is_branch:
+        oid = refs.resolve_ref(repo_dir, branch)
+    else:
+        oid = refs.resolve_revision(repo_dir, command.revision)
+    if oid is None:
+        msg = f"Revision '{command.revision}' does not name any commit"
+        raise exceptions.UnknownRevisionError(msg)
+    oid = history.peel(store, oid)
+
+    head = refs.resolve_ref(repo_dir)
+    base = history.read_commit(store, head).tree if head is not None else None
+    target = history.read_commit(store, oid).tree
+
+    workers = repository.get_core_int("workers", os.cpu_count() or 1)
+    staging = index.StagingIndex(repository.index_path)
+    result = checkout.checkout_tree(
+        store,
+        staging,
+        repository.work_tree,
+        base,
+        target,
+        workers=workers,
+    )
+
+    if is_branch:
+        refs.write_symbolic_ref(repo_dir, HEAD_FILE, branch)
+        LOGGER.info(f"Switched to branch '{command.revision}'.")
+    else:
+        refs.write_ref(repo_dir, HEAD_FILE, oid)
+        LOGGER.info(f"HEAD is now at {oid[:7]}.")
+    LOGGER.info(f"Wrote {result.written} files, removed {result.removed}.")
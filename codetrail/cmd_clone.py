@@ -0,0 +1,90 @@
+"""This module holds the logic to clone a repository.
+
+Usage:
+    codetrail clone <remote> [<directory>] [--filter <spec>] [--upload-pack <command>]
+"""
+
+import functools
+import os
+import shlex
+from pathlib import Path
+
+from codetrail import checkout
+from codetrail import cmd_init
+from codetrail import commands
+from codetrail import configuration
+from codetrail import history
+from codetrail import index
+from codetrail import models
+from codetrail import refs
+from codetrail import remotes
+from codetrail import transfer
+from codetrail.cmd_branch import HEADS_PREFIX
+from codetrail.cmd_fetch import fetch_refs
+from codetrail.cmd_fetch import log_progress
+from codetrail.conf import DEFAULT_REMOTE_NAME
+from codetrail.conf import HEAD_FILE
+from codetrail.conf import LOGGER
+
+
+def clone_repository(command: commands.CloneRepository) -> None:
+    """Copy another repository into a new one and check out its current branch.
+
+    The remote is recorded as `origin`, so `fetch --all` fetches from it. With a
+    filter, the new repository is a partial clone: the blobs the filter leaves out
+    are not fetched, and the remote is recorded as the promisor remote that sends
+    them when they are first read. Checking out the current branch then
+    fetches its missing blobs in a single batch.
+
+    Args:
+        command: The command responsible for the clone.
+    """
+    if command.filter_spec is not None:
+        transfer.parse_filter(command.filter_spec)
+    remote = Path(command.remote).absolute()
+    directory = command.directory or remote.name
+    cmd_init.initialize_repository(commands.InitializeRepository(path=directory))
+
+    settings = {}
+    if command.upload_pack is not None:
+        settings["uploadpack"] = shlex.join(command.upload_pack)
+    if command.filter_spec is not None:
+        settings["promisorremote"] = str(remote)
+        settings["partialclonefilter"] = command.filter_spec
+    if settings:
+        config_path = models.CodetrailRepository(directory).config_path
+        with configuration.transaction(config_path) as config:
+            for option, value in settings.items():
+                config.set("core", option, value)
+
+    repository = models.CodetrailRepository(directory)
+    remotes.write_remote(repository.repo_dir, DEFAULT_REMOTE_NAME, str(remote))
+    result = fetch_refs(
+        repository,
+        str(remote),
+        name=DEFAULT_REMOTE_NAME,
+        upload_pack=repository.upload_pack,
+        filter_spec=command.filter_spec,
+        progress=functools.partial(log_progress, DEFAULT_REMOTE_NAME),
+    )
+    LOGGER.info(f"Received {result.received} objects from {remote}.")
+
+    head = result.advertisement.head
+    oid = result.advertisement.refs.get(head) if head is not None else None
+    if head is None or oid is None:
+        LOGGER.info("The remote HEAD names no branch, nothing to check out.")
+        return
+    refs.write_ref(repository.repo_dir, head, oid)
+    refs.write_symbolic_ref(repository.repo_dir, HEAD_FILE, head)
+    written = checkout.checkout_tree(
+        repository.objects,
+        index.StagingIndex(repository.index_path),
+        repository.work_tree,
+        None,
+        history.read_commit(repository.objects, oid).tree,
+        workers=repository.get_core_int("workers", os.cpu_count() or 1),
+    )
+    LOGGER.info(
+        f"Checked out branch '{head.removeprefix(HEADS_PREFIX)}', "
+        f"wrote {written.written} files.",
+    )
@@ -0,0 +1,35 @@
+"""This module holds the logic to write the commit graph.
+
+Usage:
+    codetrail commit-graph write
+"""
+
+from codetrail import commands
+from codetrail import commit_graph
+from codetrail import models
+from codetrail import refs
+from codetrail import utils
+from codetrail.conf import LOGGER
+
+
+def write_commit_graph(command: commands.WriteCommitGraph) -> None:
+    """Add the history reachable from the references to the commit graph.
+
+    Commits already in the graph are not read again, so writing after a few new
+    commits only inflates those commits.
+
+    Args:
+        command: The command responsible for writing the commit graph.
+    """
+    repo_path = utils.find_repository_path(command.default_path) or command.default_path
+    repository = models.CodetrailRepository(repo_path)
+    store = repository.objects
+
+    added = commit_graph.write_commit_graph(store, refs.ref_tips(repository.repo_dir))
+    if not added:
+        LOGGER.info("Commit graph is up to date.")
+        return
+
+    graph = store.commit_graph
+    total = len(graph) if graph is not None else added
+    LOGGER.info(f"Added {added} commits to the commit graph ({total} in total).")
@@ -2,16 +2,20 @@
 
 Usage:
     codetrail config <command>
+    codetrail config set <key> <value> [<key> <value>...]
+    codetrail config set --stdin < entries
 """
 
 import configparser
+from collections.abc import Iterable
 
 from codetrail import commands
+from codetrail import configuration
 from codetrail import exceptions
 from codetrail import models
 from codetrail import utils
+from codetrail.conf import CONFIG_OPTIONS
 from codetrail.conf import CONFIG_SECTIONS
-from codetrail.conf import CONFIG_USER_OPTIONS
 from codetrail.conf import LOGGER
 
 
@@ -20,6 +24,18 @@ def set_config(command: commands.SetConfig) -> None:
 
     Args:
         command: The command responsible for setting a config value.
+    """
+    set_config_entries(commands.SetConfigEntries(entries={command.key: command.value}))
+
+
+def set_config_entries(command: commands.SetConfigEntries) -> None:
+    """Set several configuration values in one transaction.
+
+    Every key is validated before the configuration is locked, and the file is
+    parsed and written once whatever the number of values.
+
+    Args:
+        command: The command responsible for setting config values.
 
     Raises:
         UnsupportedConfigError: In case of an unsupported configuration.
@@ -27,17 +43,87 @@ def set_config(command: commands.SetConfig) -> None:
     repo_path = utils.find_repository_path(command.default_path) or command.default_path
     repository = models.CodetrailRepository(repo_path)
 
-    if command.section not in CONFIG_SECTIONS:
-        msg = f"Unknown section '{command.section}', choose from '{CONFIG_SECTIONS}'"
+    if not command.entries:
+        msg = "No configuration values to set"
         raise exceptions.UnsupportedConfigError(msg)
+    updates = [(*split_key(key), value) for key, value in command.entries.items()]
+
+    with configuration.transaction(repository.config_path) as config:
+        for section, option, value in updates:
+            if not config.has_section(section):
+                config.add_section(section)
+            config.set(section, option, value)
+
+    for key, value in command.entries.items():
+        LOGGER.info(f"{key} = {value}")
+
+
+def split_key(key: str) -> tuple[str, str]:
+    """Split a configuration key into a supported section and option.
+
+    Args:
+        key: The key e.g 'user.name'.
+
+    Returns:
+        The section and the option.
+
+    Raises:
+        UnsupportedConfigError: If the section or the option is not supported.
+    """
+    section, _, option = key.partition(".")
+    if section not in CONFIG_SECTIONS:
+        msg = f"Unknown section '{section}', choose from '{CONFIG_SECTIONS}'"
+        raise exceptions.UnsupportedConfigError(msg)
+
+    options = CONFIG_OPTIONS[section]
+    if option not in options:
+        msg = f"Unknown option '{option}', choose from '{options}'"
+        raise exceptions.UnsupportedConfigError(msg)
+    return section, option
+
 
-    if command.section in CONFIG_SECTIONS and command.option not in CONFIG_USER_OPTIONS:
-        msg = f"Unknown option '{command.option}', choose from '{CONFIG_USER_OPTIONS}'"
+def pair_entries(values: list[str]) -> dict[str, str]:
+    """Pair command line values into configuration entries.
+
+    Args:
+        values: The keys and values, alternating e.g ['user.name', 'Me'].
+
+    Returns:
+        The value of each key.
+
+    Raises:
+        UnsupportedConfigError: If a key has no value.
+    """
+    if len(values) % 2:
+        msg = f"Key '{values[-1]}' has no value"
         raise exceptions.UnsupportedConfigError(msg)
+    return dict(zip(values[::2], values[1::2], strict=True))
 
-    repository.config.set(command.section, command.option, command.value)
-    utils.write_to_config_file(repository.config_path, repository.config)
-    LOGGER.info(f"{command.key} = {command.value}")
+
+def parse_entries(lines: Iterable[str]) -> dict[str, str]:
+    """Parse configuration entries given one per line as 'key value'.
+
+    Blank lines are skipped, and the value runs to the end of the line.
+
+    Args:
+        lines: The lines to parse.
+
+    Returns:
+        The value of each key.
+
+    Raises:
+        UnsupportedConfigError: If a line has no value.
+    """
+    entries = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        key, *value = line.strip().split(maxsplit=1)
+        if not value:
+            msg = f"Key '{key}' has no value"
+            raise exceptions.UnsupportedConfigError(msg)
+        entries[key] = value[0]
+    return entries
 
 
 def get_config(command: commands.GetConfig) -> None:
@@ -67,8 +153,8 @@ def get_config(command: commands.GetConfig) -> None:
 def list_config(command: commands.ListConfig) -> None:
     """List all configuration values.
 
-    This function lists all configuration values from the repository configuration file.
-    in the format: section.option = value
+    This function lists the merged values of the system, global and repository
+    configuration files in the format: section.option = value
 
     Args:
         command: The command responsible for listing all config values.
@@ -76,10 +162,9 @@ def list_config(command: commands.ListConfig) -> None:
     repo_path = utils.find_repository_path(command.default_path) or command.default_path
     repository = models.CodetrailRepository(repo_path)
 
-    for section in repository.config.sections():
-        for option in repository.config.options(section):
-            value = repository.config.get(section, option)
-            LOGGER.info(f"{section}.{option} = {value}")
+    for section, option, entry in repository.config.items():
+        origin = f"{entry.layer}:{entry.path}\t" if command.show_origin else ""
+        LOGGER.info(f"{origin}{section}.{option} = {entry.value}")
 
 
 def unset_config(command: commands.UnsetConfig) -> None:
@@ -94,18 +179,18 @@ def unset_config(command: commands.UnsetConfig) -> None:
     repo_path = utils.find_repository_path(command.default_path) or command.default_path
     repository = models.CodetrailRepository(repo_path)
 
-    try:
-        repository.config.remove_option(command.section, command.option)
-    except configparser.NoSectionError as e:
-        msg = f"Unknown section '{command.section}', choose from '{CONFIG_SECTIONS}'"
-        raise exceptions.UnsupportedConfigError(msg) from e
-    else:
-        if command.option not in CONFIG_USER_OPTIONS:
+    with configuration.transaction(repository.config_path) as config:
+        try:
+            config.remove_option(command.section, command.option)
+        except configparser.NoSectionError as e:
             msg = (
-                f"Unknown option '{command.option}', "
-                f"choose from '{CONFIG_USER_OPTIONS}'"
+                f"Unknown section '{command.section}', choose from '{CONFIG_SECTIONS}'"
             )
+            raise exceptions.UnsupportedConfigError(msg) from e
+
+        options = CONFIG_OPTIONS.get(command.section, [])
+        if command.option not in options:
+            msg = f"Unknown option '{command.option}', choose from '{options}'"
             raise exceptions.UnsupportedConfigError(msg)
 
-        utils.write_to_config_file(repository.config_path, repository.config)
-        LOGGER.info(f"Removed {command.key}")
+    LOGGER.info(f"Removed {command.key}")
@@ -0,0 +1,266 @@
+"""This module holds the logic to fetch objects and references from a repository.
+
+Usage:
+    codetrail fetch <remote> [--name <name>] [--upload-pack <command>]
+    codetrail fetch --all [--jobs <n>] [--upload-pack <command>]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import models
+from codetrail import refs
+from codetrail import remotes
+from codetrail import session
+from codetrail import transfer
+from codetrail import utils
+from codetrail.cmd_branch import HEADS_PREFIX
+from codetrail.conf import DEFAULT_FETCH_PARALLEL
+from codetrail.conf import LOGGER
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Mapping
+    from collections.abc import Sequence
+    from pathlib import Path
+
+TAGS_PREFIX = "refs/tags/"
+REMOTES_PREFIX = "refs/remotes/"
+
+
+class FetchResult(NamedTuple):
+    """The outcome of a fetch.
+
+    Attributes:
+        advertisement: The references and capabilities advertised by the remote.
+        updates: The hex object ID written to each local reference, by name.
+        received: The number of objects received.
+    """
+
+    advertisement: transfer.Advertisement
+    updates: dict[str, str]
+    received: int
+
+
+def fetch_remote(command: commands.FetchRemote) -> None:
+    """Fetch the branches and tags of another repository.
+
+    The remote repository is served by an `upload-pack` subprocess. Only the
+    objects missing locally are sent: the local commits are offered newest first,
+    starting with those the remote advertised, until the remote recognizes them.
+    Remote branches are stored under `refs/remotes/<name>/`, and remote tags are
+    created when no local tag has their name. A partial clone keeps leaving out
+    the blobs its `core.partialclonefilter` filter leaves out.
+
+    Args:
+        command: The command responsible for the fetch.
+    """
+    repo_path = utils.find_repository_path(command.default_path) or command.default_path
+    repository = models.CodetrailRepository(repo_path)
+
+    result = fetch_refs(
+        repository,
+        command.remote,
+        name=command.name,
+        upload_pack=command.upload_pack or repository.upload_pack,
+        filter_spec=repository.get_core_str("partialclonefilter", "") or None,
+        progress=functools.partial(log_progress, command.name),
+    )
+    LOGGER.info(f"Fetched {result.received} objects from {command.remote}.")
+
+
+def fetch_all(command: commands.FetchAll) -> None:
+    """Fetch from every remote of the repository at once.
+
+    The fetches run concurrently on an asyncio event loop, each in a worker thread
+    with its own connection, at most `core.fetchparallel` at a time unless the
+    command sets its own limit. A remote failing is reported without stopping the
+    fetches from the others.
+
+    Args:
+        command: The command responsible for the fetches.
+    """
+    repo_path = utils.find_repository_path(command.default_path) or command.default_path
+    repository = models.CodetrailRepository(repo_path)
+    urls = remotes.read_remotes(repository.repo_dir)
+    if not urls:
+        LOGGER.info("No remotes to fetch from.")
+        return
+
+    jobs = command.jobs or repository.get_core_int(
+        "fetchparallel",
+        DEFAULT_FETCH_PARALLEL,
+    )
+    fetches = {
+        name: functools.partial(
+            fetch_refs,
+            models.CodetrailRepository(repo_path),
+            url,
+            name=name,
+            upload_pack=command.upload_pack or repository.upload_pack,
+            filter_spec=repository.get_core_str("partialclonefilter", "") or None,
+            progress=functools.partial(log_progress, name),
+        )
+        for name, url in urls.items()
+    }
+    results = asyncio.run(run_concurrently(fetches, max(jobs, 1)))
+
+    received = 0
+    for name, result in results.items():
+        if isinstance(result, BaseException):
+            LOGGER.error(f"Could not fetch from {name}: {result}")
+        else:
+            received += result.received
+    LOGGER.info(f"Fetched {received} objects from {len(urls)} remotes.")
+
+
+async def run_concurrently(
+    fetches: Mapping[str, Callable[[], FetchResult]],
+    jobs: int,
+) -> dict[str, FetchResult | BaseException]:
+    """Run blocking fetches concurrently in worker threads.
+
+    Args:
+        fetches: The fetch of every remote, by name.
+        jobs: The maximum number of fetches running at the same time.
+
+    Returns:
+        The result of every fetch, by name: the fetch result, or the protocol,
+        object, connection or end of stream error it raised. Any other error is
+        raised once every fetch is over.
+    """
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results = await asyncio.gather(
+            *(loop.run_in_executor(executor, fetch) for fetch in fetches.values()),
+            return_exceptions=True,
+        )
+    for result in results:
+        if isinstance(result, BaseException) and not isinstance(
+            result,
+            (
+                exceptions.ProtocolError,
+                exceptions.ObjectNotFoundError,
+                exceptions.CorruptObjectError,
+                OSError,
+                EOFError,
+            ),
+        ):
+            raise result
+    return dict(zip(fetches, results, strict=True))
+
+
+def log_progress(name: str, message: str) -> None:
+    """Log a progress message of a remote.
+
+    Args:
+        name: The remote name.
+        message: The message.
+    """
+    LOGGER.info(f"{name}: {message}")
+
+
+def fetch_refs(  # noqa: PLR0913
+    repository: models.CodetrailRepository,
+    remote: str,
+    *,
+    name: str,
+    upload_pack: Sequence[str],
+    filter_spec: str | None = None,
+    progress: Callable[[str], None] | None = None,
+) -> FetchResult:
+    """Fetch the missing objects of the references of a remote, then update them.
+
+    The remote is reached through the session of the process with it, so fetching
+    again reuses its connection. Thin packs are only asked for when every object
+    the remote may use as a delta base is stored locally, i.e. outside partial
+    clones.
+
+    Args:
+        repository: The local repository.
+        remote: The path of the remote repository.
+        name: The name the remote-tracking branches are stored under.
+        upload_pack: The command serving the remote repository, given its path.
+        filter_spec: The filter leaving blobs out, see `transfer.parse_filter`.
+        progress: The function the progress messages of the remote are passed to.
+
+    Returns:
+        The advertisement, the references written and the number of objects.
+
+    Raises:
+        ProtocolError: If the remote does not support the filter.
+    """
+    repo_dir = repository.repo_dir
+    store = repository.objects
+
+    remote_session = session.open_session(remote, upload_pack)
+    advertisement = remote_session.list_refs()
+    if filter_spec is not None and transfer.FILTER not in advertisement.capabilities:
+        msg = f"The remote {remote} does not support object filters"
+        raise exceptions.ProtocolError(msg)
+    updates = tracking_updates(repo_dir, name, advertisement)
+    wants = [
+        oid for oid in dict.fromkeys(updates.values()) if not store.has_object(oid)
+    ]
+    known = [*advertisement.refs.values(), *advertisement.peeled.values()]
+    negotiator = transfer.Negotiator(store, refs.ref_tips(repo_dir), known)
+    pack = remote_session.fetch(
+        store,
+        wants,
+        negotiator,
+        thin=filter_spec is None and store.promisor is None,
+        filter_spec=filter_spec,
+        progress=progress,
+    )
+
+    written = {}
+    for ref, oid in updates.items():
+        if refs.resolve_ref(repo_dir, ref) != oid:
+            refs.write_ref(repo_dir, ref, oid)
+            written[ref] = oid
+            LOGGER.info(f"Updated {ref} to {oid[:7]}.")
+    count = 0
+    if pack is not None:
+        count = len(pack)
+        pack.close()
+    return FetchResult(advertisement, written, count)
+
+
+def tracking_updates(
+    repo_dir: Path,
+    name: str,
+    advertisement: transfer.Advertisement,
+) -> dict[str, str]:
+    """Map the references advertised by a remote to the local references to write.
+
+    Every branch maps to a remote-tracking branch, and every tag to the tag of the
+    same name unless it already exists. Invalid names are ignored.
+
+    Args:
+        repo_dir: The local repository directory.
+        name: The name of the remote.
+        advertisement: The references advertised by the remote.
+
+    Returns:
+        The hex object ID each local reference must hold, by name.
+    """
+    updates = {}
+    for ref, oid in advertisement.refs.items():
+        if ref.startswith(HEADS_PREFIX):
+            local = f"{REMOTES_PREFIX}{name}/{ref.removeprefix(HEADS_PREFIX)}"
+            if refs.is_valid_ref_name(local):
+                updates[local] = oid
+        elif (
+            ref.startswith(TAGS_PREFIX)
+            and refs.is_valid_ref_name(ref)
+            and refs.read_ref(repo_dir, ref) is None
+        ):
+            updates[ref] = oid
+    return updates
@@ -8,6 +8,7 @@ from configparser import ConfigParser
 from pathlib import Path
 
 from codetrail import commands
+from codetrail import configuration
 from codetrail import exceptions
 from codetrail import models
 from codetrail import utils
@@ -18,6 +19,7 @@ from codetrail.conf import DEFAULT_REPOSITORY_HEAD
 from codetrail.conf import DESCRIPTION_FILE
 from codetrail.conf import HEAD_FILE
 from codetrail.conf import LOGGER
+from codetrail.conf import OBJECTS_DIRECTORY
 
 
 def initialize_repository(command: commands.InitializeRepository) -> None:
@@ -49,7 +51,8 @@ def initialize_repository(command: commands.InitializeRepository) -> None:
     make_initial_directories(repository.repo_dir)
     make_initial_files(repository.repo_dir)
     write_to_initial_files(repository.repo_dir)
-    write_to_initial_config(repository.config_path, repository.config)
+    write_to_initial_config(repository.config_path, ConfigParser())
+    utils.clear_repository_cache()
 
     LOGGER.info(f"Initialized new repository at {repository.abs_work_tree}.")
     LOGGER.info(f"New codetrail directory at {repository.abs_repo_dir}.")
@@ -61,7 +64,7 @@ def make_initial_directories(path: Path) -> None:
     Args:
         path: The repository path.
     """
-    utils.make_directory(path / "objects")
+    utils.make_directory(path / OBJECTS_DIRECTORY)
     utils.make_directory(path / "refs/tags")
     utils.make_directory(path / "refs/heads")
 
@@ -99,4 +102,4 @@ def write_to_initial_config(path: Path, config: ConfigParser) -> None:
     """
     for section in CONFIG_SECTIONS:
         config.add_section(section)
-    utils.write_to_config_file(path, config)
+    configuration.write_config(path, config)
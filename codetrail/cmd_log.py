@@ -0,0 +1,124 @@
+"""This module holds the logic to show the commit history.
+
+Usage:
+    codetrail log [-n <number>] [--since <date>] [--topo-order] [<revision>]
+"""
+
+import itertools
+import sys
+from collections.abc import Iterable
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import TextIO
+
+from codetrail import commands
+from codetrail import commits
+from codetrail import exceptions
+from codetrail import history
+from codetrail import models
+from codetrail import refs
+from codetrail import utils
+from codetrail.conf import LOG_BUFFER_SIZE
+
+TIMEZONE_LENGTH = 5
+
+
+def log_commits(command: commands.LogCommits) -> None:
+    """Write the history of a revision to standard output, newest first.
+
+    The history is walked lazily and the walk stops as soon as the count or date
+    limit is reached.
+
+    Args:
+        command: The command responsible for showing the history.
+
+    Raises:
+        UnknownRevisionError: If the revision names no commit.
+    """
+    repo_path = utils.find_repository_path(command.default_path) or command.default_path
+    repository = models.CodetrailRepository(repo_path)
+
+    oid = refs.resolve_revision(repository.repo_dir, command.revision)
+    if oid is None:
+        msg = f"Revision '{command.revision}' does not name any commit"
+        raise exceptions.UnknownRevisionError(msg)
+
+    entries = history.iter_history(
+        repository.objects,
+        [oid],
+        since=command.since,
+        topo_order=command.topo_order,
+    )
+    if command.max_count is not None:
+        entries = itertools.islice(entries, command.max_count)
+    write_buffered(sys.stdout, itertools.starmap(format_commit, entries))
+
+
+def write_buffered(
+    stream: TextIO,
+    chunks: Iterable[str],
+    buffer_size: int = LOG_BUFFER_SIZE,
+) -> None:
+    """Write chunks of text in large writes.
+
+    The first chunk is written on its own so it shows up without waiting for a
+    full buffer.
+
+    Args:
+        stream: The stream to write to.
+        chunks: The chunks of text.
+        buffer_size: The number of characters buffered before a write.
+    """
+    buffer: list[str] = []
+    size, limit = 0, 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            stream.write("".join(buffer))
+            stream.flush()
+            buffer.clear()
+            size, limit = 0, buffer_size
+    if buffer:
+        stream.write("".join(buffer))
+        stream.flush()
+
+
+def format_date(signature: str) -> str:
+    """Format the time of a signature in the timezone it was made in.
+
+    Args:
+        signature: The author or committer signature.
+
+    Returns:
+        The date e.g 'Tue Nov 14 22:13:20 2023 +0000'.
+    """
+    _, timestamp, offset = commits.split_signature(signature)
+    zone = UTC
+    if len(offset) == TIMEZONE_LENGTH and offset[0] in "+-" and offset[1:].isdigit():
+        delta = timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5]))
+        zone = timezone(-delta if offset[0] == "-" else delta)
+    date = datetime.fromtimestamp(timestamp, zone)
+    return f"{date:%a %b} {date.day} {date:%H:%M:%S %Y} {offset}"
+
+
+def format_commit(oid: str, commit: commits.Commit) -> str:
+    """Format a commit for the log.
+
+    Args:
+        oid: The hex ID of the commit.
+        commit: The commit.
+
+    Returns:
+        The commit header and its indented message, followed by a blank line.
+    """
+    identity = commits.split_signature(commit.author)[0]
+    message = "".join(f"    {line}\n" for line in commit.message.splitlines())
+    return (
+        f"commit {oid}\n"
+        f"Author: {identity}\n"
+        f"Date:   {format_date(commit.author)}\n"
+        f"\n{message}\n"
+    )
@@ -0,0 +1,50 @@
+"""This module holds the logic to pack references.
+
+Usage:
+    codetrail pack-refs
+"""
+
+from codetrail import commands
+from codetrail import history
+from codetrail import models
+from codetrail import packed_refs
+from codetrail import refs
+from codetrail import utils
+from codetrail.conf import LOGGER
+from codetrail.conf import PACKED_REFS_FILE
+
+
+def pack_refs(command: commands.PackRefs) -> None:
+    """Move every loose reference into the packed-refs file.
+
+    Annotated tags are recorded with the commit they point to. References that
+    are already packed with the same value are not read again. Symbolic references
+    stay loose.
+
+    Args:
+        command: The command responsible for packing the references.
+    """
+    repo_path = utils.find_repository_path(command.default_path) or command.default_path
+    repository = models.CodetrailRepository(repo_path)
+    repo_dir = repository.repo_dir
+    store = repository.objects
+
+    existing = refs.packed_refs(repo_dir)
+    known = {record.name: record for record in existing or ()}
+    records = []
+    for name, oid in refs.iter_refs(repo_dir):
+        record = known.get(name)
+        if record is None or record.oid != oid:
+            peeled = None
+            if store.read_object(oid).obj_type == "tag":
+                peeled = history.peel(store, oid)
+            record = packed_refs.PackedRef(name, oid, peeled)
+        records.append(record)
+    packed_refs.write_packed_refs(repo_dir / PACKED_REFS_FILE, records)
+
+    packed = {record.name: record.oid for record in records}
+    for name, value in list(refs.iter_loose_refs(repo_dir)):
+        if packed.get(name) == value:
+            refs.delete_loose_ref(repo_dir, name)
+
+    LOGGER.info(f"Packed {len(records)} references.")
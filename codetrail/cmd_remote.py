@@ -0,0 +1,55 @@
+"""This module holds the logic to list and add remotes.
+
+Usage:
+    codetrail remote
+    codetrail remote <name> <url>
+"""
+
+import sys
+from pathlib import Path
+
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import models
+from codetrail import remotes
+from codetrail import utils
+from codetrail.conf import LOGGER
+
+
+def list_remotes(command: commands.ListRemotes) -> None:
+    """Write the name and URL of every remote to standard output.
+
+    Args:
+        command: The command responsible for listing the remotes.
+    """
+    repo_path = utils.find_repository_path(command.default_path) or command.default_path
+    repository = models.CodetrailRepository(repo_path)
+
+    lines = [
+        f"{name}\t{url}\n"
+        for name, url in remotes.read_remotes(repository.repo_dir).items()
+    ]
+    sys.stdout.write("".join(lines))
+
+
+def add_remote(command: commands.AddRemote) -> None:
+    """Record a remote to fetch from.
+
+    A relative URL is recorded as an absolute path, so the remote is found from
+    anywhere in the work tree.
+
+    Args:
+        command: The command responsible for adding the remote.
+
+    Raises:
+        InvalidReferenceError: If the name is invalid or the remote exists.
+    """
+    repo_path = utils.find_repository_path(command.default_path) or command.default_path
+    repository = models.CodetrailRepository(repo_path)
+
+    if command.name in remotes.read_remotes(repository.repo_dir):
+        msg = f"A remote named '{command.name}' already exists"
+        raise exceptions.InvalidReferenceError(msg)
+    url = str(Path(command.url).absolute())
+    remotes.write_remote(repository.repo_dir, command.name, url)
+    LOGGER.info(f"Added remote '{command.name}' for {url}.")
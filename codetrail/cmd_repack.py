@@ -0,0 +1,79 @@
+"""This module holds the logic to pack repository objects.
+
+Usage:
+    codetrail repack [--window <n>] [--depth <n>] [-b | --write-bitmap]
+"""
+
+from codetrail import commands
+from codetrail import models
+from codetrail import packs
+from codetrail import reachability
+from codetrail import refs
+from codetrail import utils
+from codetrail.conf import DEFAULT_PACK_DEPTH
+from codetrail.conf import DEFAULT_PACK_WINDOW
+from codetrail.conf import LOGGER
+
+
+def repack_repository(command: commands.RepackRepository) -> None:
+    """Pack every object of the repository into a single pack.
+
+    Objects are written in recency order from the references, so the objects
+    reachable from a commit sit together in the pack and in its bitmaps.
+    Loose objects and previous packs are removed once the new pack is in place.
+    Blobs stored as chunks stay loose manifests so their chunks stay shared; only
+    the chunks are packed.
+    With `write_bitmap`, reachability bitmaps are computed for the new pack before
+    it replaces the previous ones.
+
+    Args:
+        command: The command responsible for repacking the repository.
+    """
+    repo_path = utils.find_repository_path(command.default_path) or command.default_path
+    repository = models.CodetrailRepository(repo_path)
+    store = repository.objects
+
+    window = command.window
+    if window is None:
+        window = repository.get_core_int("packwindow", DEFAULT_PACK_WINDOW)
+    depth = command.depth
+    if depth is None:
+        depth = repository.get_core_int("packdepth", DEFAULT_PACK_DEPTH)
+
+    loose = [oid for oid in store.iter_loose_objects() if not store.is_chunked(oid)]
+    old_packs = store.packs
+    if not loose and (
+        not old_packs or (len(old_packs) == 1 and not command.write_bitmap)
+    ):
+        LOGGER.info("Nothing to pack.")
+        return
+
+    oids = set(loose)
+    for pack in old_packs:
+        oids.update(pack)
+
+    tips = refs.ref_tips(repository.repo_dir)
+    writer = packs.PackWriter(store, window=window, depth=depth)
+    new_pack = writer.write(
+        store.pack_directory,
+        reachability.recency_order(store, tips, oids),
+    )
+    bitmaps = None
+    if command.write_bitmap:
+        bitmaps = reachability.write_pack_bitmaps(store, new_pack, tips)
+
+    store.reload_packs()
+    for pack in old_packs:
+        if pack.pack_path != new_pack.pack_path:
+            pack.pack_path.unlink()
+            pack.index_path.unlink()
+            pack.bitmap_path.unlink(missing_ok=True)
+    for oid in loose:
+        store.remove_loose_object(oid)
+
+    count = len(new_pack)
+    new_pack.close()
+
+    LOGGER.info(f"Packed {count} objects into {new_pack.pack_path.name}.")
+    if bitmaps is not None:
+        LOGGER.info(f"Wrote {bitmaps} reachability bitmaps.")
@@ -0,0 +1,106 @@
+"""This module holds the logic to serve a fetch of the repository.
+
+Usage:
+    codetrail upload-pack <directory>
+    codetrail upload-pack --listen <socket> <directory>
+"""
+
+import contextlib
+import socketserver
+import sys
+from pathlib import Path
+from typing import BinaryIO
+from typing import cast
+
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import models
+from codetrail import transfer
+from codetrail.conf import DEFAULT_PACK_DEPTH
+from codetrail.conf import DEFAULT_PACK_WINDOW
+from codetrail.conf import LOGGER
+
+
+def upload_pack(command: commands.UploadPack) -> None:
+    """Serve a fetch of a repository over standard input and output, or a socket.
+
+    Standard output carries the protocol, so nothing else is written to it. With a
+    socket, the repository is checked first, then every connection is served in a
+    thread until the process is interrupted, and the socket is removed on exit.
+
+    Args:
+        command: The command responsible for serving the fetch.
+    """
+    if command.listen is None:
+        serve_repository(command.directory, sys.stdin.buffer, sys.stdout.buffer)
+        return
+    models.CodetrailRepository(command.directory)
+    with UploadPackServer(command.listen, command.directory) as server:
+        LOGGER.info(f"Serving {command.directory} on {command.listen}.")
+        try:
+            with contextlib.suppress(KeyboardInterrupt):
+                server.serve_forever()
+        finally:
+            Path(command.listen).unlink(missing_ok=True)
+
+
+def serve_repository(directory: str, input_stream: BinaryIO, output: BinaryIO) -> int:
+    """Serve a fetch of a repository, or every request of a session.
+
+    Args:
+        directory: The work tree of the repository.
+        input_stream: The stream the client writes to.
+        output: The stream the client reads from.
+
+    Returns:
+        The number of objects sent.
+    """
+    repository = models.CodetrailRepository(directory)
+    return transfer.serve_upload_pack(
+        repository.objects,
+        repository.repo_dir,
+        input_stream,
+        output,
+        window=repository.get_core_int("packwindow", DEFAULT_PACK_WINDOW),
+        depth=repository.get_core_int("packdepth", DEFAULT_PACK_DEPTH),
+    )
+
+
+class UploadPackServer(socketserver.ThreadingUnixStreamServer):
+    """A server of a repository on a Unix socket, one thread per connection.
+
+    Attributes:
+        directory: The work tree of the repository to serve.
+    """
+
+    daemon_threads = True
+    directory: str
+
+    def __init__(self, path: str, directory: str) -> None:
+        """Bind the socket.
+
+        Args:
+            path: The path of the socket, which must not exist.
+            directory: The work tree of the repository to serve.
+        """
+        self.directory = directory
+        super().__init__(path, _UploadPackHandler)
+
+
+class _UploadPackHandler(socketserver.StreamRequestHandler):
+    server: UploadPackServer
+
+    def handle(self) -> None:
+        input_stream = cast("BinaryIO", self.rfile)
+        output = cast("BinaryIO", self.wfile)
+        try:
+            serve_repository(self.server.directory, input_stream, output)
+        except (
+            exceptions.NotARepositoryError,
+            exceptions.MissingConfigurationFileError,
+            exceptions.ProtocolError,
+            exceptions.InvalidFilterError,
+            exceptions.ObjectNotFoundError,
+            exceptions.CorruptObjectError,
+        ) as e:
+            transfer.write_error(output, str(e))
@@ -2,28 +2,132 @@
 
 Commands are responsible for encapsulating data required to perform specific operations.
 Each command inherits from the `BaseCommand` class, which serves as a base for
-validation and serialization using Pydantic.
+validation using Pydantic.
+
+Importing Pydantic costs more than running most commands, so commands are plain
+classes and Pydantic is only imported when a value does not already have its
+declared type and needs to be coerced or rejected.
 """
 
+import types
+import typing
 from functools import cached_property
 from pathlib import Path
-
-import pydantic
+from typing import Any
 
 from codetrail.conf import DEFAULT_CURRENT_PATH
+from codetrail.conf import DEFAULT_REMOTE_NAME
+
+
+def _has_type(value: Any, annotation: Any) -> bool:
+    origin = typing.get_origin(annotation)
+    if origin in {types.UnionType, typing.Union}:
+        return any(_has_type(value, member) for member in typing.get_args(annotation))
+    if origin is list:
+        (member,) = typing.get_args(annotation)
+        return isinstance(value, list) and all(
+            _has_type(item, member) for item in value
+        )
+    if origin is dict:
+        key_type, value_type = typing.get_args(annotation)
+        return isinstance(value, dict) and all(
+            _has_type(key, key_type) and _has_type(item, value_type)
+            for key, item in value.items()
+        )
+    if annotation is None or annotation is type(None):
+        return value is None
+    if annotation is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(annotation, type) and isinstance(value, annotation)
+
+
+_FIELDS: dict[type, dict[str, Any]] = {}
+
+
+def _fields(command: type) -> dict[str, Any]:
+    if command not in _FIELDS:
+        _FIELDS[command] = {
+            name: annotation
+            for klass in reversed(command.__mro__)
+            for name, annotation in vars(klass).get("__annotations__", {}).items()
+        }
+    return _FIELDS[command]
 
 
-class BaseCommand(pydantic.BaseModel):
+def _validate(value: Any, annotation: Any) -> Any:
+    import pydantic  # noqa: PLC0415
+
+    return pydantic.TypeAdapter(annotation).validate_python(value)
+
+
+class BaseCommand:
     """The base class for all commands.
 
-    This class provides validation and serialization capabilities
-    for any commands that inherit from it. It uses Pydantic's `BaseModel`
-    to ensure that command data adheres to the defined schema.
+    This class provides validation for any commands that inherit from it. Fields
+    are declared as annotated class attributes, optionally with a default value.
+    Values that do not match their annotation are validated with Pydantic, which
+    coerces the value or raises a `pydantic.ValidationError`.
 
     Attributes:
         None: This is a base class with no predefined attributes.
     """
 
+    def __init__(self, **values: Any) -> None:
+        """Initialize a command from its field values.
+
+        Args:
+            values: The value of each field.
+
+        Raises:
+            TypeError: If a field is unknown or a required field is missing.
+        """
+        fields = _fields(type(self))
+        unknown = values.keys() - fields.keys()
+        if unknown:
+            msg = f"Unknown fields {sorted(unknown)} for {type(self).__name__}"
+            raise TypeError(msg)
+
+        for name, annotation in fields.items():
+            if name in values:
+                value = values[name]
+            elif hasattr(type(self), name):
+                value = getattr(type(self), name)
+            else:
+                msg = f"Missing field '{name}' for {type(self).__name__}"
+                raise TypeError(msg)
+            if not _has_type(value, annotation):
+                value = _validate(value, annotation)
+            setattr(self, name, value)
+
+    def fields(self) -> dict[str, Any]:
+        """Get the field values of the command.
+
+        Returns:
+            The value of each field.
+        """
+        return {name: getattr(self, name) for name in _fields(type(self))}
+
+    def __eq__(self, other: object) -> bool:
+        """Compare two commands by type and field values.
+
+        Returns:
+            True if both commands have the same type and values.
+        """
+        if not isinstance(other, BaseCommand) or type(other) is not type(self):
+            return NotImplemented
+        return self.fields() == other.fields()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        """Represent the command with its field values.
+
+        Returns:
+            The representation of the command.
+        """
+        values = ", ".join(f"{name}={value!r}" for name, value in self.fields().items())
+        return f"{type(self).__name__}({values})"
+
     @cached_property
     def default_path(self) -> str:
         """Get the default repository path.
@@ -44,6 +148,16 @@ class InitializeRepository(BaseCommand):
     path: str | Path
 
 
+class AddPaths(BaseCommand):
+    """Command to stage files in the index.
+
+    Attributes:
+        paths (list[str | Path]): The files or directories to stage.
+    """
+
+    paths: list[str | Path]
+
+
 class BaseConfigCommand(BaseCommand):
     """The base class for all configuration commands.
 
@@ -89,6 +203,16 @@ class SetConfig(BaseConfigCommand):
     value: str
 
 
+class SetConfigEntries(BaseCommand):
+    """Command to set several configuration values in one transaction.
+
+    Attributes:
+        entries (dict[str, str]): The value of each key, applied in order.
+    """
+
+    entries: dict[str, str]
+
+
 class GetConfig(BaseConfigCommand):
     """Command to get a configuration value with key.
 
@@ -101,10 +225,11 @@ class ListConfig(BaseConfigCommand):
     """Command to list all configuration values.
 
     Attributes:
-        None: This command has no specific attributes.
+        show_origin (bool): Whether to show the file each value comes from.
     """
 
     key: str = ""
+    show_origin: bool = False
 
 
 class UnsetConfig(BaseConfigCommand):
@@ -113,3 +238,162 @@ class UnsetConfig(BaseConfigCommand):
     Attributes:
         key (str): The key to unset the value from.
     """
+
+
+class RepackRepository(BaseCommand):
+    """Command to pack the objects of a repository.
+
+    Attributes:
+        window (int | None): The number of objects considered as delta bases.
+        depth (int | None): The maximum length of a delta chain.
+        write_bitmap (bool): Whether to write reachability bitmaps for the pack.
+    """
+
+    window: int | None = None
+    depth: int | None = None
+    write_bitmap: bool = False
+
+
+class WriteCommitGraph(BaseCommand):
+    """Command to write the commit graph of a repository.
+
+    Attributes:
+        None: The history reachable from every reference is written.
+    """
+
+
+class LogCommits(BaseCommand):
+    """Command to show the history of a revision.
+
+    Attributes:
+        revision (str): The revision to walk from.
+        max_count (int | None): The maximum number of commits to show.
+        since (int | None): The unix time of the oldest commit to show.
+        topo_order (bool): Whether to show no parent before all of its children.
+    """
+
+    revision: str = "HEAD"
+    max_count: int | None = None
+    since: int | None = None
+    topo_order: bool = False
+
+
+class PackRefs(BaseCommand):
+    """Command to move the loose references into the packed-refs file.
+
+    Attributes:
+        None: Every reference holding an object ID is packed.
+    """
+
+
+class ListBranches(BaseCommand):
+    """Command to list the branches.
+
+    Attributes:
+        pattern (str | None): The shell pattern the listed branches match.
+    """
+
+    pattern: str | None = None
+
+
+class CreateBranch(BaseCommand):
+    """Command to create a branch.
+
+    Attributes:
+        name (str): The branch name, without the `refs/heads/` prefix.
+        start_point (str): The revision the branch points to.
+    """
+
+    name: str
+    start_point: str = "HEAD"
+
+
+class CheckoutRevision(BaseCommand):
+    """Command to switch the work tree to a branch or a commit.
+
+    Attributes:
+        revision (str): The branch to switch to, or the revision to detach at.
+    """
+
+    revision: str
+
+
+class UploadPack(BaseCommand):
+    """Command to serve a fetch of a repository over standard input and output.
+
+    Attributes:
+        directory (str): The work tree of the repository to serve.
+        listen (str | None): The path of a Unix socket to serve every connection
+            of, instead of standard input and output.
+    """
+
+    directory: str
+    listen: str | None = None
+
+
+class FetchRemote(BaseCommand):
+    """Command to fetch the branches and tags of another repository.
+
+    Attributes:
+        remote (str): The path of the repository to fetch from.
+        name (str): The name the remote-tracking branches are stored under.
+        upload_pack (list[str] | None): The command serving the remote repository,
+            given its path. None for the `core.uploadpack` command.
+    """
+
+    remote: str
+    name: str = DEFAULT_REMOTE_NAME
+    upload_pack: list[str] | None = None
+
+
+class FetchAll(BaseCommand):
+    """Command to fetch from every remote of the repository at once.
+
+    Attributes:
+        jobs (int | None): The maximum number of remotes fetched from at the same
+            time. None for the `core.fetchparallel` option.
+        upload_pack (list[str] | None): The command serving the remote repositories,
+            given their path. None for the `core.uploadpack` command.
+    """
+
+    jobs: int | None = None
+    upload_pack: list[str] | None = None
+
+
+class ListRemotes(BaseCommand):
+    """Command to list the remotes.
+
+    Attributes:
+        None: Every remote is listed, in name order.
+    """
+
+
+class AddRemote(BaseCommand):
+    """Command to record a remote.
+
+    Attributes:
+        name (str): The remote name, which its remote-tracking branches use.
+        url (str): The path of the remote repository, or of the socket serving it.
+    """
+
+    name: str
+    url: str
+
+
+class CloneRepository(BaseCommand):
+    """Command to copy another repository into a new one.
+
+    Attributes:
+        remote (str): The path of the repository to clone.
+        directory (str | None): The work tree of the new repository, None for the
+            last component of the remote path.
+        filter_spec (str | None): The filter leaving blobs out e.g 'blob:none',
+            making the new repository a partial clone.
+        upload_pack (list[str] | None): The command serving the remote repository,
+            given its path. None to run the `upload-pack` command of this program.
+    """
+
+    remote: str
+    directory: str | None = None
+    filter_spec: str | None = None
+    upload_pack: list[str] | None = None
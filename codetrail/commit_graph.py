@@ -0,0 +1,461 @@
+"""This module holds the commit-graph file.
+
+Walking history by reading commit objects costs one lookup and one inflation per
+commit. The commit graph at `.codetrail/objects/info/commit-graph` stores what a
+walk needs, the parents, root tree, commit time and generation number of every
+commit, in fixed-width records that are memory-mapped and read in place.
+
+Graph layout::
+
+    signature (4) | version (4)
+    fanout: 256 x 4-byte cumulative counts of IDs by first byte
+    object IDs: N x 20 bytes, sorted
+    commit data: N x (tree ID (20) | parent (4) | parent (4) | generation (4)
+                      | commit time (8))
+    extra edges: M x 4 bytes
+    SHA-1 of everything above (20)
+
+Parents are stored as positions in the sorted ID list. A commit without a first or
+second parent stores `NO_PARENT` instead. For a commit with more than two parents
+the second parent field holds `EXTRA_EDGES` or'ed with the position of its other
+parents in the extra edges list, the last of which has `LAST_EDGE` set.
+
+The generation number of a root commit is 1, and that of any other commit is one
+more than the highest generation of its parents. A commit can only be an ancestor
+of commits with a higher generation, which lets ancestry queries stop early.
+"""
+
+from __future__ import annotations
+
+import bisect
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+from typing import Self
+
+from codetrail import commits
+from codetrail import exceptions
+from codetrail import objects
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from types import TracebackType
+
+GRAPH_SIGNATURE = b"CTCG"
+GRAPH_VERSION = 1
+GRAPH_HEADER = struct.Struct(">4sI")
+FANOUT = struct.Struct(">256I")
+FANOUT_ENTRY = struct.Struct(">I")
+COMMIT_DATA = struct.Struct(">20sIIIq")
+EDGE = struct.Struct(">I")
+GENERATION = struct.Struct(">I")
+GENERATION_OFFSET = 28
+OID_SIZE = 20
+CHECKSUM_SIZE = 20
+
+NO_PARENT = 0x70000000
+EXTRA_EDGES = 0x80000000
+LAST_EDGE = 0x80000000
+POSITION_MASK = 0x7FFFFFFF
+DIRECT_PARENTS = 2
+
+
+class GraphEntry(NamedTuple):
+    """The record of a commit in the graph.
+
+    Attributes:
+        tree: The hex ID of the root tree.
+        parents: The graph positions of the parents, in order.
+        generation: The generation number.
+        commit_time: The unix time the commit was made.
+    """
+
+    tree: str
+    parents: tuple[int, ...]
+    generation: int
+    commit_time: int
+
+
+class _ObjectIds:
+    """A sequence view of the sorted object IDs, for use with `bisect`."""
+
+    def __init__(self, view: memoryview) -> None:
+        self.view = view
+        self._count = len(view) // OID_SIZE
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> bytes:
+        start = position * OID_SIZE
+        return self.view[start : start + OID_SIZE].tobytes()
+
+
+class CommitGraph:
+    """A memory-mapped commit-graph file.
+
+    Attributes:
+        path: The path of the commit-graph file.
+    """
+
+    path: Path
+
+    def __init__(self, path: Path) -> None:
+        """Map a commit graph and validate its layout.
+
+        Args:
+            path: The path of the commit-graph file.
+
+        Raises:
+            CorruptObjectError: If the file is not a supported commit graph.
+        """
+        self.path = path
+        with path.open("rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        fanout_end = GRAPH_HEADER.size + FANOUT.size
+        if len(self._view) < fanout_end + CHECKSUM_SIZE:
+            self.close()
+            msg = f"{path.name} is truncated"
+            raise exceptions.CorruptObjectError(msg)
+        signature, version = GRAPH_HEADER.unpack_from(self._view)
+        if signature != GRAPH_SIGNATURE or version != GRAPH_VERSION:
+            self.close()
+            msg = f"{path.name} is not a supported commit graph"
+            raise exceptions.CorruptObjectError(msg)
+
+        self._count = self._bucket_end(0xFF)
+        oids_end = fanout_end + self._count * OID_SIZE
+        data_end = oids_end + self._count * COMMIT_DATA.size
+        edges_size = len(self._view) - CHECKSUM_SIZE - data_end
+        if edges_size < 0 or edges_size % EDGE.size:
+            self.close()
+            msg = f"{path.name} does not match its fanout table"
+            raise exceptions.CorruptObjectError(msg)
+        self._oids = _ObjectIds(self._view[fanout_end:oids_end])
+        self._data = self._view[oids_end:data_end]
+        self._edges = self._view[data_end : data_end + edges_size]
+
+    def _bucket_end(self, first_byte: int) -> int:
+        offset = GRAPH_HEADER.size + first_byte * FANOUT_ENTRY.size
+        (count,) = FANOUT_ENTRY.unpack_from(self._view, offset)
+        return int(count)
+
+    def __len__(self) -> int:
+        """Get the number of commits in the graph.
+
+        Returns:
+            The commit count.
+        """
+        return self._count
+
+    def __contains__(self, oid: str) -> bool:
+        """Check whether a commit is in the graph.
+
+        Args:
+            oid: The hex object ID.
+
+        Returns:
+            True if the commit is in the graph, False otherwise.
+        """
+        return self.position(oid) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the commit IDs in sorted order.
+
+        Yields:
+            The hex object IDs.
+        """
+        for position in range(self._count):
+            yield self._oids[position].hex()
+
+    def position(self, oid: str) -> int | None:
+        """Find the graph position of a commit.
+
+        Args:
+            oid: The hex object ID.
+
+        Returns:
+            The position of the commit, None if it is not in the graph.
+        """
+        key = bytes.fromhex(oid)
+        low = self._bucket_end(key[0] - 1) if key[0] else 0
+        high = self._bucket_end(key[0])
+        position = bisect.bisect_left(self._oids, key, low, high)
+        if position < high and self._oids[position] == key:
+            return position
+        return None
+
+    def oid(self, position: int) -> str:
+        """Get the commit ID stored at a graph position.
+
+        Args:
+            position: The graph position.
+
+        Returns:
+            The hex object ID.
+        """
+        return self._oids[position].hex()
+
+    def generation(self, position: int) -> int:
+        """Get the generation number of the commit at a graph position.
+
+        Args:
+            position: The graph position.
+
+        Returns:
+            The generation number.
+        """
+        offset = position * COMMIT_DATA.size + GENERATION_OFFSET
+        (generation,) = GENERATION.unpack_from(self._data, offset)
+        return int(generation)
+
+    def entry(self, position: int) -> GraphEntry:
+        """Get the record of the commit at a graph position.
+
+        Args:
+            position: The graph position.
+
+        Returns:
+            The tree, parents, generation and commit time of the commit.
+        """
+        tree, first, second, generation, commit_time = COMMIT_DATA.unpack_from(
+            self._data,
+            position * COMMIT_DATA.size,
+        )
+        parents: list[int] = []
+        if first != NO_PARENT:
+            parents.append(first)
+        if second & EXTRA_EDGES:
+            edge = second & POSITION_MASK
+            while True:
+                (value,) = EDGE.unpack_from(self._edges, edge * EDGE.size)
+                parents.append(value & POSITION_MASK)
+                if value & LAST_EDGE:
+                    break
+                edge += 1
+        elif second != NO_PARENT:
+            parents.append(second)
+        return GraphEntry(tree.hex(), tuple(parents), generation, commit_time)
+
+    def lookup(self, oid: str) -> GraphEntry:
+        """Get the record of a commit.
+
+        Args:
+            oid: The hex object ID.
+
+        Returns:
+            The tree, parents, generation and commit time of the commit.
+
+        Raises:
+            ObjectNotFoundError: If the commit is not in the graph.
+        """
+        position = self.position(oid)
+        if position is None:
+            msg = f"Commit '{oid}' is not in the commit graph"
+            raise exceptions.ObjectNotFoundError(msg)
+        return self.entry(position)
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        """Check whether a commit is reachable from another.
+
+        Commits with a generation no higher than the ancestor's are never walked
+        past, so the walk only visits the history between the two commits.
+
+        Args:
+            ancestor: The hex ID of the possible ancestor.
+            descendant: The hex ID of the commit to walk from.
+
+        Returns:
+            True if `ancestor` is `descendant` or one of its ancestors.
+
+        Raises:
+            ObjectNotFoundError: If either commit is not in the graph.
+        """
+        target = self.position(ancestor)
+        start = self.position(descendant)
+        if target is None or start is None:
+            missing = ancestor if target is None else descendant
+            msg = f"Commit '{missing}' is not in the commit graph"
+            raise exceptions.ObjectNotFoundError(msg)
+
+        floor = self.generation(target)
+        stack, seen = [start], {start}
+        while stack:
+            position = stack.pop()
+            if position == target:
+                return True
+            entry = self.entry(position)
+            if entry.generation <= floor:
+                continue
+            for parent in entry.parents:
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+        return False
+
+    def close(self) -> None:
+        """Release the views and unmap the graph."""
+        if hasattr(self, "_oids"):
+            self._oids.view.release()
+            self._data.release()
+            self._edges.release()
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self) -> Self:
+        """Enter the context manager.
+
+        Returns:
+            The graph itself.
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Unmap the graph when leaving the context manager."""
+        self.close()
+
+
+class _Record(NamedTuple):
+    tree: str
+    parents: tuple[str, ...]
+    commit_time: int
+
+
+def _read_new_commits(
+    store: objects.ObjectStore,
+    tips: Iterable[str],
+    graph: CommitGraph | None,
+) -> dict[str, _Record]:
+    records: dict[str, _Record] = {}
+    stack = list(tips)
+    while stack:
+        oid = stack.pop()
+        if oid in records or (graph is not None and oid in graph):
+            continue
+        raw = store.read_object(oid)
+        if raw.obj_type == "tag":
+            stack.append(commits.tag_target(raw.data))
+        elif raw.obj_type == "commit":
+            commit = commits.Commit.parse(raw.data)
+            records[oid] = _Record(commit.tree, commit.parents, commit.commit_time)
+            stack.extend(commit.parents)
+    return records
+
+
+def _generations(
+    records: dict[str, _Record],
+    known: dict[str, int],
+) -> dict[str, int]:
+    generations = dict(known)
+    for oid in records:
+        stack = [oid]
+        while stack:
+            current = stack[-1]
+            if current in generations:
+                stack.pop()
+                continue
+            parents = records[current].parents
+            missing = [parent for parent in parents if parent not in generations]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            generations[current] = 1 + max(
+                (generations[parent] for parent in parents),
+                default=0,
+            )
+    return generations
+
+
+def write_commit_graph(store: objects.ObjectStore, tips: Iterable[str]) -> int:
+    """Add the history of some commits to the commit graph of a store.
+
+    Only commits missing from the current graph are read from the object store, and
+    the graph is left untouched when there are none.
+
+    Args:
+        store: The object store holding the commits.
+        tips: The hex IDs of the commits, or tags of commits, to walk from.
+
+    Returns:
+        The number of commits added to the graph.
+    """
+    graph = store.commit_graph
+    records = _read_new_commits(store, tips, graph)
+    if not records:
+        return 0
+
+    known: dict[str, int] = {}
+    if graph is not None:
+        for position in range(len(graph)):
+            oid = graph.oid(position)
+            entry = graph.entry(position)
+            parents = tuple(graph.oid(parent) for parent in entry.parents)
+            records[oid] = _Record(entry.tree, parents, entry.commit_time)
+            known[oid] = entry.generation
+    generations = _generations(records, known)
+
+    path = store.commit_graph_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _write_graph(path, records, generations)
+    store.reload_commit_graph()
+    return len(records) - len(known)
+
+
+def _write_graph(
+    path: Path,
+    records: dict[str, _Record],
+    generations: dict[str, int],
+) -> None:
+    ordered = sorted(records)
+    positions = {oid: position for position, oid in enumerate(ordered)}
+    counts = [0] * 256
+    for oid in ordered:
+        counts[int(oid[:2], 16)] += 1
+    fanout, total = [], 0
+    for count in counts:
+        total += count
+        fanout.append(total)
+
+    buffer = bytearray(GRAPH_HEADER.pack(GRAPH_SIGNATURE, GRAPH_VERSION))
+    buffer += FANOUT.pack(*fanout)
+    for oid in ordered:
+        buffer += bytes.fromhex(oid)
+    edges: list[int] = []
+    for oid in ordered:
+        record = records[oid]
+        parents = [positions[parent] for parent in record.parents]
+        first = parents[0] if parents else NO_PARENT
+        if len(parents) > DIRECT_PARENTS:
+            second = EXTRA_EDGES | len(edges)
+            edges.extend(parents[1:-1])
+            edges.append(LAST_EDGE | parents[-1])
+        else:
+            second = parents[1] if len(parents) == DIRECT_PARENTS else NO_PARENT
+        buffer += COMMIT_DATA.pack(
+            bytes.fromhex(record.tree),
+            first,
+            second,
+            generations[oid],
+            record.commit_time,
+        )
+    for edge in edges:
+        buffer += EDGE.pack(edge)
+    buffer += objects.new_hasher(buffer).digest()
+
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix="tmp_graph_")
+    with os.fdopen(fd, "wb") as file:
+        file.write(buffer)
+    Path(temporary).replace(path)
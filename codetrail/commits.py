@@ -0,0 +1,151 @@
+"""This module holds the commit and tag object formats.
+
+A commit is a header block of `key value` lines followed by a blank line and the
+message::
+
+    tree <tree ID>
+    parent <parent ID>      (zero or more)
+    author <name> <<email>> <unix time> <timezone>
+    committer <name> <<email>> <unix time> <timezone>
+
+    <message>
+
+Tags use the same header block, with an `object` line naming the tagged object.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from codetrail import exceptions
+
+
+def parse_headers(data: bytes) -> tuple[list[tuple[str, str]], str]:
+    """Split the content of a commit or tag into its headers and message.
+
+    Args:
+        data: The object content.
+
+    Returns:
+        The key and value of every header line, in order, and the message.
+
+    Raises:
+        CorruptObjectError: If a header line has no value.
+    """
+    text = data.decode()
+    block, _, message = text.partition("\n\n")
+    headers = []
+    for line in block.splitlines():
+        key, separator, value = line.partition(" ")
+        if not separator:
+            msg = f"Malformed header line {line!r}"
+            raise exceptions.CorruptObjectError(msg)
+        headers.append((key, value))
+    return headers, message
+
+
+def split_signature(signature: str) -> tuple[str, int, str]:
+    """Split an author or committer signature into its parts.
+
+    Args:
+        signature: The signature e.g 'Chill Guy <chill@guy.com> 1700000000 +0000'.
+
+    Returns:
+        The identity, the unix time in seconds and the timezone offset.
+
+    Raises:
+        CorruptObjectError: If the signature has no time.
+    """
+    try:
+        identity, timestamp, timezone = signature.rsplit(" ", 2)
+        return identity, int(timestamp), timezone
+    except ValueError as e:
+        msg = f"Malformed signature {signature!r}"
+        raise exceptions.CorruptObjectError(msg) from e
+
+
+class Commit(NamedTuple):
+    """A decoded commit object.
+
+    Attributes:
+        tree: The hex ID of the root tree.
+        parents: The hex IDs of the parent commits, in order.
+        author: The author signature.
+        committer: The committer signature.
+        message: The commit message.
+    """
+
+    tree: str
+    parents: tuple[str, ...]
+    author: str
+    committer: str
+    message: str
+
+    @property
+    def commit_time(self) -> int:
+        """Get the unix time the commit was made."""
+        return split_signature(self.committer)[1]
+
+    @classmethod
+    def parse(cls, data: bytes) -> Commit:
+        """Decode the content of a commit object.
+
+        Args:
+            data: The object content.
+
+        Returns:
+            The decoded commit.
+
+        Raises:
+            CorruptObjectError: If the tree or a signature is missing.
+        """
+        headers, message = parse_headers(data)
+        values: dict[str, str] = {}
+        parents = []
+        for key, value in headers:
+            if key == "parent":
+                parents.append(value)
+            else:
+                values.setdefault(key, value)
+        try:
+            return cls(
+                values["tree"],
+                tuple(parents),
+                values["author"],
+                values["committer"],
+                message,
+            )
+        except KeyError as e:
+            msg = f"Commit has no '{e.args[0]}' header"
+            raise exceptions.CorruptObjectError(msg) from None
+
+    def encode(self) -> bytes:
+        """Encode the commit as object content.
+
+        Returns:
+            The object content.
+        """
+        lines = [f"tree {self.tree}"]
+        lines.extend(f"parent {parent}" for parent in self.parents)
+        lines.extend((f"author {self.author}", f"committer {self.committer}"))
+        return ("\n".join(lines) + "\n\n" + self.message).encode()
+
+
+def tag_target(data: bytes) -> str:
+    """Get the ID of the object a tag points to.
+
+    Args:
+        data: The content of the tag object.
+
+    Returns:
+        The hex ID of the tagged object.
+
+    Raises:
+        CorruptObjectError: If the tag has no `object` header.
+    """
+    headers, _ = parse_headers(data)
+    for key, value in headers:
+        if key == "object":
+            return value
+    msg = "Tag has no 'object' header"
+    raise exceptions.CorruptObjectError(msg)
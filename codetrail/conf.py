@@ -47,10 +47,83 @@ DEFAULT_REPOSITORY_DESCRIPTION = (
 DEFAULT_REPOSITORY_HEAD = "ref: refs/heads/master"
 
 CONFIG_FILE = "config"
+LOCK_SUFFIX = ".lock"
+OBJECTS_DIRECTORY = "objects"
+PACK_DIRECTORY = "pack"
+INFO_DIRECTORY = "info"
+COMMIT_GRAPH_FILE = "commit-graph"
+PACKED_REFS_FILE = "packed-refs"
+REMOTES_DIRECTORY = "remotes"
 HEAD_FILE = "HEAD"
 DESCRIPTION_FILE = "description"
+INDEX_FILE = "index"
+IGNORE_FILE = ".codetrailignore"
 
 DEFAULT_CURRENT_PATH = "."
 
+REPOSITORY_DIR_ENVIRONMENT = "CODETRAIL_DIR"
+CEILING_DIRECTORIES_ENVIRONMENT = "CODETRAIL_CEILING_DIRECTORIES"
+
 CONFIG_SECTIONS = ["user", "core"]
 CONFIG_USER_OPTIONS = ["name", "email"]
+CONFIG_CORE_OPTIONS = [
+    "packwindow",
+    "packdepth",
+    "workers",
+    "objectcachelimit",
+    "deltabasecachelimit",
+    "chunkthreshold",
+    "chunkpatterns",
+    "uploadpack",
+    "promisorremote",
+    "partialclonefilter",
+    "fetchparallel",
+]
+CONFIG_OPTIONS = {"user": CONFIG_USER_OPTIONS, "core": CONFIG_CORE_OPTIONS}
+SYSTEM_CONFIG_FILE = "/etc/codetrailconfig"
+GLOBAL_CONFIG_FILE = ".codetrailconfig"
+SYSTEM_CONFIG_ENVIRONMENT = "CODETRAIL_CONFIG_SYSTEM"
+GLOBAL_CONFIG_ENVIRONMENT = "CODETRAIL_CONFIG_GLOBAL"
+CONFIG_LOCK_TIMEOUT = 10.0
+CONFIG_LOCK_RETRY_INTERVAL = 0.01
+
+OBJECT_TYPES = ["blob", "tree", "commit", "tag"]
+OBJECT_CHUNK_SIZE = 64 * 1024
+OBJECT_COMPRESSION_LEVEL = 6
+PACK_BIG_FILE_THRESHOLD = 8 * 1024 * 1024
+DEFAULT_PACK_WINDOW = 10
+DEFAULT_PACK_DEPTH = 50
+ADD_BATCH_SIZE = 64
+LOG_BUFFER_SIZE = 64 * 1024
+DIFF_COST_LIMIT = 1024
+BITMAP_COMMIT_INTERVAL = 100
+OBJECT_CACHE_LIMIT = 32 * 1024 * 1024
+DELTA_BASE_CACHE_LIMIT = 96 * 1024 * 1024
+CHUNK_MIN_SIZE = 16 * 1024
+CHUNK_AVERAGE_SIZE = 64 * 1024
+CHUNK_MAX_SIZE = 256 * 1024
+CHUNK_READ_SIZE = 4 * 1024 * 1024
+PKT_LINE_LIMIT = 65520
+NEGOTIATION_BATCH_SIZE = 32
+NEGOTIATION_MAX_IN_VAIN = 256
+NEGOTIATION_WINDOW = 2
+UPLOAD_PACK_COMMAND = (sys.executable, "-m", "codetrail", "upload-pack")
+DEFAULT_REMOTE_NAME = "origin"
+DEFAULT_FETCH_PARALLEL = 8
+
+WALK_PRUNED_DIRECTORIES = frozenset(
+    {
+        ".git",
+        ".hg",
+        ".svn",
+        ".mypy_cache",
+        ".nox",
+        ".pytest_cache",
+        ".ruff_cache",
+        ".tox",
+        ".venv",
+        "__pycache__",
+        "node_modules",
+        "venv",
+    },
+)
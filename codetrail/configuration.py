@@ -0,0 +1,446 @@
+"""This module holds the parsed configuration cache.
+
+Parsing `.codetrail/config` on every repository construction gets expensive as the
+file grows and as library users open repositories repeatedly. Parsed files are kept
+in a process-wide cache keyed on their path, modification time and size, and shared
+between readers as read-only views. Writing a file through `write_config` drops its
+entry; edits made by other processes change the key and are picked up on the next
+read.
+
+Configuration is read from three layers, each overriding the previous one: the
+system file, the global file of the user and the local file of the repository. The
+layers are merged into a `LayeredConfig` that records the origin of every value and
+is memoized until one of the layer files changes.
+
+Writes are transactions: they take `config.lock` with an exclusive create, read the
+current file, write the new content into the lock file, fsync it and rename it over
+the configuration. Concurrent writers wait for the lock, so none of their changes
+are lost, and readers only ever see a complete file.
+"""
+
+from __future__ import annotations
+
+import configparser
+import contextlib
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from codetrail import exceptions
+from codetrail.conf import CONFIG_LOCK_RETRY_INTERVAL
+from codetrail.conf import CONFIG_LOCK_TIMEOUT
+from codetrail.conf import GLOBAL_CONFIG_ENVIRONMENT
+from codetrail.conf import GLOBAL_CONFIG_FILE
+from codetrail.conf import LOCK_SUFFIX
+from codetrail.conf import SYSTEM_CONFIG_ENVIRONMENT
+from codetrail.conf import SYSTEM_CONFIG_FILE
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+
+
+class ConfigView:
+    """A read-only view of a parsed configuration file.
+
+    The view offers the reading methods of `configparser.ConfigParser`, raising the
+    same exceptions. Use `copy` to get a parser that can be modified and written.
+    """
+
+    def __init__(self, parser: configparser.ConfigParser) -> None:
+        """Wrap a parser, which must not be modified afterwards.
+
+        Args:
+            parser: The parsed configuration.
+        """
+        self._parser = parser
+
+    def sections(self) -> list[str]:
+        """Get the section names.
+
+        Returns:
+            The section names, in file order.
+        """
+        return self._parser.sections()
+
+    def has_section(self, section: str) -> bool:
+        """Check whether a section exists.
+
+        Args:
+            section: The section name.
+
+        Returns:
+            True if the section exists, False otherwise.
+        """
+        return self._parser.has_section(section)
+
+    def options(self, section: str) -> list[str]:
+        """Get the option names of a section.
+
+        Args:
+            section: The section name.
+
+        Returns:
+            The option names, in file order.
+        """
+        return self._parser.options(section)
+
+    def has_option(self, section: str, option: str) -> bool:
+        """Check whether an option is set.
+
+        Args:
+            section: The section name.
+            option: The option name.
+
+        Returns:
+            True if the option is set, False otherwise.
+        """
+        return self._parser.has_option(section, option)
+
+    def get(self, section: str, option: str) -> str:
+        """Get the value of an option.
+
+        Args:
+            section: The section name.
+            option: The option name.
+
+        Returns:
+            The value of the option.
+        """
+        return self._parser.get(section, option)
+
+    def getint(self, section: str, option: str, *, fallback: int) -> int:
+        """Get the value of an integer option.
+
+        Args:
+            section: The section name.
+            option: The option name.
+            fallback: The value returned when the option is not set.
+
+        Returns:
+            The value of the option.
+        """
+        return self._parser.getint(section, option, fallback=fallback)
+
+    def copy(self) -> configparser.ConfigParser:
+        """Copy the configuration into a new parser that may be modified.
+
+        Returns:
+            The new parser.
+        """
+        parser = configparser.ConfigParser()
+        parser.read_dict(self._parser)
+        return parser
+
+
+_EMPTY_VIEW = ConfigView(configparser.ConfigParser())
+
+
+class _CacheKey(NamedTuple):
+    mtime_ns: int
+    size: int
+
+
+_CACHE: dict[Path, tuple[_CacheKey, ConfigView]] = {}
+
+
+def read_config(path: Path) -> ConfigView:
+    """Read a configuration file, reusing the parsed view while it is unchanged.
+
+    Args:
+        path: The path of the configuration file.
+
+    Returns:
+        The shared read-only view, a shared empty view if the file does not exist.
+    """
+    path = path.absolute()
+    try:
+        status = path.stat()
+    except FileNotFoundError:
+        _CACHE.pop(path, None)
+        return _EMPTY_VIEW
+
+    key = _CacheKey(status.st_mtime_ns, status.st_size)
+    cached = _CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    view = ConfigView(_parse_config(path))
+    _CACHE[path] = (key, view)
+    return view
+
+
+def _parse_config(path: Path) -> configparser.ConfigParser:
+    parser = configparser.ConfigParser()
+    parser.read(path)
+    return parser
+
+
+class ConfigValue(NamedTuple):
+    """A configuration value and where it came from.
+
+    Attributes:
+        value: The raw value.
+        layer: The name of the layer that set it, e.g 'global'.
+        path: The file of that layer.
+    """
+
+    value: str
+    layer: str
+    path: Path
+
+
+class LayeredConfig:
+    """A read-only merge of the configuration layers.
+
+    Values of later layers override those of earlier layers. Lookups are a dictionary
+    access and raise the exceptions of `configparser.ConfigParser`.
+    """
+
+    def __init__(self, layers: Iterable[tuple[str, Path, ConfigView]] = ()) -> None:
+        """Merge configuration layers.
+
+        Args:
+            layers: The name, path and view of each layer, lowest priority first.
+        """
+        self._values: dict[str, dict[str, ConfigValue]] = {}
+        for layer, path, view in layers:
+            for section in view.sections():
+                values = self._values.setdefault(section, {})
+                for option in view.options(section):
+                    values[option] = ConfigValue(view.get(section, option), layer, path)
+
+    def sections(self) -> list[str]:
+        """Get the section names.
+
+        Returns:
+            The section names, in the order they were first seen.
+        """
+        return list(self._values)
+
+    def has_section(self, section: str) -> bool:
+        """Check whether a section exists in any layer.
+
+        Args:
+            section: The section name.
+
+        Returns:
+            True if the section exists, False otherwise.
+        """
+        return section in self._values
+
+    def options(self, section: str) -> list[str]:
+        """Get the option names of a section.
+
+        Args:
+            section: The section name.
+
+        Returns:
+            The option names, in the order they were first seen.
+
+        Raises:
+            NoSectionError: If the section does not exist.
+        """
+        if section not in self._values:
+            raise configparser.NoSectionError(section)
+        return list(self._values[section])
+
+    def has_option(self, section: str, option: str) -> bool:
+        """Check whether an option is set in any layer.
+
+        Args:
+            section: The section name.
+            option: The option name.
+
+        Returns:
+            True if the option is set, False otherwise.
+        """
+        return option in self._values.get(section, {})
+
+    def origin(self, section: str, option: str) -> ConfigValue:
+        """Get the value of an option along with the layer that set it.
+
+        Args:
+            section: The section name.
+            option: The option name.
+
+        Returns:
+            The value and its origin.
+
+        Raises:
+            NoSectionError: If the section does not exist.
+            NoOptionError: If the option is not set.
+        """
+        if section not in self._values:
+            raise configparser.NoSectionError(section)
+        try:
+            return self._values[section][option]
+        except KeyError:
+            raise configparser.NoOptionError(option, section) from None
+
+    def get(self, section: str, option: str) -> str:
+        """Get the value of an option.
+
+        Args:
+            section: The section name.
+            option: The option name.
+
+        Returns:
+            The value of the option.
+        """
+        return self.origin(section, option).value
+
+    def getint(self, section: str, option: str, *, fallback: int) -> int:
+        """Get the value of an integer option.
+
+        Args:
+            section: The section name.
+            option: The option name.
+            fallback: The value returned when the option is not set.
+
+        Returns:
+            The value of the option.
+        """
+        entry = self._values.get(section, {}).get(option)
+        return fallback if entry is None else int(entry.value)
+
+    def items(self) -> Iterator[tuple[str, str, ConfigValue]]:
+        """Iterate over every value.
+
+        Yields:
+            The section, option and value with its origin.
+        """
+        for section, values in self._values.items():
+            for option, value in values.items():
+                yield section, option, value
+
+
+def config_layers(local_path: Path) -> list[tuple[str, Path]]:
+    """Get the configuration files of a repository, lowest priority first.
+
+    The system and global files can be moved with the `CODETRAIL_CONFIG_SYSTEM` and
+    `CODETRAIL_CONFIG_GLOBAL` environment variables.
+
+    Args:
+        local_path: The configuration file of the repository.
+
+    Returns:
+        The name and path of each layer.
+    """
+    system = os.environ.get(SYSTEM_CONFIG_ENVIRONMENT, SYSTEM_CONFIG_FILE)
+    global_ = (
+        os.environ.get(GLOBAL_CONFIG_ENVIRONMENT) or Path.home() / GLOBAL_CONFIG_FILE
+    )
+    return [("system", Path(system)), ("global", Path(global_)), ("local", local_path)]
+
+
+_MERGED: dict[tuple[Path, ...], tuple[tuple[ConfigView, ...], LayeredConfig]] = {}
+
+
+def read_layered_config(local_path: Path) -> LayeredConfig:
+    """Read the merged configuration of a repository.
+
+    Each layer is revalidated with a single `stat()`, and the merge is reused as long
+    as no layer changed.
+
+    Args:
+        local_path: The configuration file of the repository.
+
+    Returns:
+        The shared merged view.
+    """
+    layers = config_layers(local_path)
+    paths = tuple(path.absolute() for _, path in layers)
+    views = tuple(read_config(path) for path in paths)
+    cached = _MERGED.get(paths)
+    if cached is not None and all(
+        view is old for view, old in zip(views, cached[0], strict=True)
+    ):
+        return cached[1]
+
+    merged = LayeredConfig(
+        (layer, path, view)
+        for (layer, _), path, view in zip(layers, paths, views, strict=True)
+    )
+    _MERGED[paths] = (views, merged)
+    return merged
+
+
+def _acquire_lock(lock_path: Path, timeout: float) -> int:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            if time.monotonic() >= deadline:
+                msg = (
+                    f"Unable to lock '{lock_path}': another process is writing the "
+                    "configuration. If none is running, remove the lock file."
+                )
+                raise exceptions.ConfigLockError(msg) from None
+            time.sleep(CONFIG_LOCK_RETRY_INTERVAL)
+
+
+@contextlib.contextmanager
+def transaction(
+    path: Path,
+    timeout: float = CONFIG_LOCK_TIMEOUT,
+) -> Generator[configparser.ConfigParser]:
+    """Update a configuration file atomically under its lock.
+
+    The file is parsed again under the lock rather than read from the cache, which
+    cannot tell a rewrite of the same size within the same modification time. The
+    changes made to the yielded parser are written when the block exits normally,
+    and discarded if it raises. A `ConfigLockError` is raised if the lock
+    is still held by another writer after the timeout.
+
+    Args:
+        path: The path of the configuration file.
+        timeout: The number of seconds to wait for another writer's lock.
+
+    Yields:
+        A parser holding the current configuration.
+    """
+    lock_path = path.with_name(f"{path.name}{LOCK_SUFFIX}")
+    descriptor = _acquire_lock(lock_path, timeout)
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            config = _parse_config(path)
+            yield config
+            config.write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        lock_path.replace(path)
+    except BaseException:
+        lock_path.unlink(missing_ok=True)
+        raise
+    finally:
+        invalidate(path)
+
+
+def write_config(path: Path, config: configparser.ConfigParser) -> None:
+    """Replace a configuration file atomically under its lock.
+
+    Args:
+        path: The path of the configuration file.
+        config: The configuration to write.
+    """
+    with transaction(path) as current:
+        current.clear()
+        current.read_dict(config)
+
+
+def invalidate(path: Path | None = None) -> None:
+    """Drop the cached view of a configuration file.
+
+    Args:
+        path: The path of the configuration file, None to drop every view.
+    """
+    if path is None:
+        _CACHE.clear()
+        _MERGED.clear()
+    else:
+        _CACHE.pop(path.absolute(), None)
@@ -0,0 +1,180 @@
+"""This module holds the EWAH compressed bitmap format.
+
+A bitmap over the objects of a pack is mostly long runs of set or unset bits, so it
+is stored as a sequence of 64-bit words where each marker word describes a run of
+clean words, all zeros or all ones, followed by a number of literal words::
+
+    bit size (4) | word count (4)
+    words: word count x 8 bytes
+    position of the last marker word (4)
+
+A marker word holds the value of its clean words in bit 0, the length of the run
+in bits 1 to 32 and the number of literal words that follow in bits 33 to 63.
+
+In memory a bitmap is a plain `int` with bit `i` set when position `i` is in the
+set, so union, intersection and difference are single C-level operations over the
+whole bitmap.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import TYPE_CHECKING
+
+from codetrail import exceptions
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+
+EWAH_HEADER = struct.Struct(">II")
+MARKER_POSITION = struct.Struct(">I")
+WORD_SIZE = 8
+WORD_BITS = 64
+CLEAN_ZERO = 0
+CLEAN_ONE = (1 << WORD_BITS) - 1
+RUN_LENGTH_SHIFT = 1
+LITERAL_COUNT_SHIFT = 33
+MAX_RUN_LENGTH = (1 << 32) - 1
+MAX_LITERAL_COUNT = (1 << 31) - 1
+
+
+def from_positions(positions: Iterable[int]) -> int:
+    """Build a bitmap from the positions it holds.
+
+    Args:
+        positions: The positions, in any order.
+
+    Returns:
+        The bitmap.
+    """
+    buffer = bytearray()
+    for position in positions:
+        byte = position >> 3
+        if byte >= len(buffer):
+            buffer.extend(bytes(byte + 1 - len(buffer)))
+        buffer[byte] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def positions(bitmap: int) -> Iterator[int]:
+    """Iterate over the positions held by a bitmap.
+
+    Args:
+        bitmap: The bitmap.
+
+    Yields:
+        The set positions, in increasing order.
+    """
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        if byte:
+            yield from (byte_index * 8 + bit for bit in range(8) if byte >> bit & 1)
+
+
+def encode(bitmap: int, size: int) -> bytes:
+    """Compress a bitmap.
+
+    Args:
+        bitmap: The bitmap, with no position at or past `size`.
+        size: The number of bits covered by the bitmap.
+
+    Returns:
+        The EWAH encoding of the bitmap.
+    """
+    count = (size + WORD_BITS - 1) // WORD_BITS
+    words = struct.unpack(f"<{count}Q", bitmap.to_bytes(count * WORD_SIZE, "little"))
+    encoded: list[int] = []
+    last_marker = 0
+    index = 0
+    while index < count:
+        last_marker = len(encoded)
+        encoded.append(0)
+        clean = words[index]
+        run = 0
+        if clean in {CLEAN_ZERO, CLEAN_ONE}:
+            while index < count and words[index] == clean and run < MAX_RUN_LENGTH:
+                run += 1
+                index += 1
+        start = index
+        while (
+            index < count
+            and words[index] not in {CLEAN_ZERO, CLEAN_ONE}
+            and index - start < MAX_LITERAL_COUNT
+        ):
+            index += 1
+        encoded.extend(words[start:index])
+        encoded[last_marker] = (
+            int(clean == CLEAN_ONE)
+            | run << RUN_LENGTH_SHIFT
+            | (index - start) << LITERAL_COUNT_SHIFT
+        )
+    return (
+        EWAH_HEADER.pack(size, len(encoded))
+        + struct.pack(f">{len(encoded)}Q", *encoded)
+        + MARKER_POSITION.pack(last_marker)
+    )
+
+
+def span(data: bytes | memoryview, offset: int = 0) -> int:
+    """Find where an encoded bitmap ends, without decoding it.
+
+    Args:
+        data: The buffer holding the encoded bitmap.
+        offset: The offset where the encoded bitmap starts.
+
+    Returns:
+        The offset just past the encoded bitmap.
+
+    Raises:
+        CorruptObjectError: If the encoded bitmap is truncated.
+    """
+    if offset + EWAH_HEADER.size > len(data):
+        msg = "EWAH bitmap is truncated"
+        raise exceptions.CorruptObjectError(msg)
+    _, count = EWAH_HEADER.unpack_from(data, offset)
+    end = offset + EWAH_HEADER.size + count * WORD_SIZE + MARKER_POSITION.size
+    if end > len(data):
+        msg = "EWAH bitmap is truncated"
+        raise exceptions.CorruptObjectError(msg)
+    return int(end)
+
+
+def decode(data: bytes | memoryview, offset: int = 0) -> tuple[int, int, int]:
+    """Decompress a bitmap.
+
+    Args:
+        data: The buffer holding the encoded bitmap.
+        offset: The offset where the encoded bitmap starts.
+
+    Returns:
+        The bitmap, the number of bits it covers and the offset just past it.
+
+    Raises:
+        CorruptObjectError: If the encoded bitmap is truncated or inconsistent.
+    """
+    end = span(data, offset)
+    size, count = EWAH_HEADER.unpack_from(data, offset)
+    words = struct.unpack_from(f">{count}Q", data, offset + EWAH_HEADER.size)
+    expected = (size + WORD_BITS - 1) // WORD_BITS
+    chunks = []
+    total = 0
+    index = 0
+    while index < count:
+        marker = words[index]
+        run = marker >> RUN_LENGTH_SHIFT & MAX_RUN_LENGTH
+        literals = marker >> LITERAL_COUNT_SHIFT
+        total += run + literals
+        if total > expected or index + 1 + literals > count:
+            msg = "EWAH bitmap does not match its size"
+            raise exceptions.CorruptObjectError(msg)
+        chunks.append((b"\xff" if marker & 1 else b"\0") * (run * WORD_SIZE))
+        literal_words = words[index + 1 : index + 1 + literals]
+        chunks.append(struct.pack(f"<{literals}Q", *literal_words))
+        index += 1 + literals
+
+    bitmap = int.from_bytes(b"".join(chunks), "little")
+    if bitmap >> size:
+        msg = "EWAH bitmap does not match its size"
+        raise exceptions.CorruptObjectError(msg)
+    return bitmap, int(size), end
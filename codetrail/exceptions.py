@@ -19,3 +19,51 @@ class MissingConfigurationFileError(Exception):
 
 class UnsupportedConfigError(Exception):
     """Exception raise when configuration an invalid section or option."""
+
+
+class ConfigLockError(Exception):
+    """Exception raised when the configuration lock cannot be taken."""
+
+
+class InvalidObjectTypeError(Exception):
+    """Exception raised when an object has an unsupported type."""
+
+
+class ObjectNotFoundError(Exception):
+    """Exception raised when an object is missing from the object store."""
+
+
+class CorruptObjectError(Exception):
+    """Exception raised when a stored object cannot be decoded."""
+
+
+class UnknownRevisionError(Exception):
+    """Exception raised when a revision names no object."""
+
+
+class InvalidReferenceError(Exception):
+    """Exception raised when a reference name is invalid or already taken."""
+
+
+class CorruptIndexError(Exception):
+    """Exception raised when the staging index cannot be decoded."""
+
+
+class UnmatchedPathError(Exception):
+    """Exception raised when a path matches no file in the work tree."""
+
+
+class PathOutsideRepositoryError(Exception):
+    """Exception raised when a path is outside the repository work tree."""
+
+
+class CheckoutConflictError(Exception):
+    """Exception raised when a checkout would overwrite changes in the work tree."""
+
+
+class ProtocolError(Exception):
+    """Exception raised when a transfer peer sends an unexpected or error message."""
+
+
+class InvalidFilterError(Exception):
+    """Exception raised when an object filter is not supported."""
@@ -0,0 +1,274 @@
+"""This module holds the parallel hashing pipeline used by `add`.
+
+Staging a large directory runs in three stages:
+
+1. The caller walks the work tree and yields paths; files whose index entry is
+   still fresh are dropped here, before any hashing happens.
+2. A process pool hashes and compresses the remaining files in batches. Workers
+   write each object to a temporary file in the object store but do not publish it.
+3. A single writer thread renames the prepared objects into place and records
+   their index entries. It starts once the first batch is submitted: with the
+   `fork` start method that launches every worker, and a process forked while
+   another thread runs can deadlock.
+
+Files removed after the walk, before they are hashed, are skipped.
+
+Files selected by the chunk policy are split into content-defined chunks by the
+workers, see `codetrail.chunking`. Chunks are published as soon as they are
+written, since they are content-addressed, and only the manifest of each file waits
+for the writer.
+
+Batches are handed to the writer in submission order, whatever order the workers
+finish in, so the resulting index is the same for any number of workers.
+"""
+
+from __future__ import annotations
+
+import io
+import itertools
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from codetrail import chunking
+from codetrail import index
+from codetrail import objects
+from codetrail.conf import ADD_BATCH_SIZE
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+
+HashResult = tuple[index.IndexEntry, Path]
+
+
+def hash_file(
+    store: objects.ObjectStore,
+    file: Path,
+    name: str,
+    policy: chunking.ChunkPolicy | None = None,
+) -> HashResult:
+    """Hash and compress a file into a prepared, unpublished object.
+
+    Args:
+        store: The object store receiving the blob.
+        file: The absolute path of the file.
+        name: The POSIX path relative to the work tree.
+        policy: The files stored as chunks. Symlinks are always stored whole.
+
+    Returns:
+        The index entry of the file and the temporary file holding its blob.
+    """
+    status = file.lstat()
+    if index.normalize_mode(status.st_mode) == index.MODE_SYMLINK:
+        target = str(file.readlink()).encode()
+        oid, temporary = store.prepare_stream("blob", io.BytesIO(target), len(target))
+    else:
+        with file.open("rb") as stream:
+            status = os.fstat(stream.fileno())
+            chunked = policy is not None and policy.applies(name, status.st_size)
+            oid, temporary = store.prepare_stream(
+                "blob",
+                stream,
+                status.st_size,
+                chunked=chunked,
+            )
+    return index.IndexEntry.from_stat(name, oid, status), temporary
+
+
+def hash_batch(
+    store_path: Path,
+    batch: list[tuple[Path, str]],
+    policy: chunking.ChunkPolicy | None = None,
+) -> list[HashResult]:
+    """Hash a batch of files, as run by a worker process.
+
+    Args:
+        store_path: The objects directory.
+        batch: The absolute path and relative name of each file.
+        policy: The files stored as chunks.
+
+    Returns:
+        The index entry and prepared object of each file, in batch order.
+    """
+    store = objects.ObjectStore(store_path)
+    results: list[HashResult] = []
+    try:
+        for file, name in batch:
+            results.append(hash_file(store, file, name, policy))
+    except BaseException:
+        discard(results)
+        raise
+    return results
+
+
+def discard(results: Iterable[HashResult]) -> None:
+    """Remove the temporary files of prepared objects that will not be committed.
+
+    Args:
+        results: The hash results to discard.
+    """
+    for _, temporary in results:
+        temporary.unlink(missing_ok=True)
+
+
+class AddPipeline:
+    """Hash files into the object store and index using a pool of processes.
+
+    Attributes:
+        store: The object store receiving the blobs.
+        staging: The staging index receiving the entries.
+        workers: The number of worker processes, 1 to hash in-process.
+        batch_size: The number of files hashed per task.
+        policy: The files stored as chunks.
+    """
+
+    store: objects.ObjectStore
+    staging: index.StagingIndex
+    workers: int
+    batch_size: int
+    policy: chunking.ChunkPolicy
+
+    def __init__(
+        self,
+        store: objects.ObjectStore,
+        staging: index.StagingIndex,
+        workers: int,
+        batch_size: int = ADD_BATCH_SIZE,
+        *,
+        policy: chunking.ChunkPolicy | None = None,
+    ) -> None:
+        """Initialize an add pipeline.
+
+        Args:
+            store: The object store receiving the blobs.
+            staging: The staging index receiving the entries.
+            workers: The number of worker processes, 1 to hash in-process.
+            batch_size: The number of files hashed per task.
+            policy: The files stored as chunks.
+        """
+        self.store = store
+        self.staging = staging
+        self.workers = max(workers, 1)
+        self.batch_size = max(batch_size, 1)
+        self.policy = policy or chunking.ChunkPolicy()
+
+    def _stale(self, files: Iterable[tuple[Path, str]]) -> Iterator[tuple[Path, str]]:
+        for file, name in files:
+            try:
+                status = file.lstat()
+            except FileNotFoundError:
+                continue
+            if not self.staging.is_fresh(name, status):
+                yield file, name
+
+    def _batches(
+        self,
+        files: Iterable[tuple[Path, str]],
+    ) -> Iterator[list[tuple[Path, str]]]:
+        batch = []
+        for item in self._stale(files):
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _commit(self, results: list[HashResult]) -> None:
+        for position, (entry, temporary) in enumerate(results):
+            try:
+                self.store.commit_prepared(entry.oid, temporary)
+            except BaseException:
+                discard(results[position:])
+                raise
+            self.staging.add(entry)
+
+    def run(self, files: Iterable[tuple[Path, str]]) -> int:
+        """Hash every file whose index entry is stale.
+
+        Work that fits in a single batch is hashed in-process, since starting the
+        pool would cost more than it saves.
+
+        Args:
+            files: The absolute path and relative name of each file, in walk order.
+
+        Returns:
+            The number of files hashed.
+        """
+        batches = self._batches(files)
+        first = list(itertools.islice(batches, 2))
+        batches = itertools.chain(first, batches)
+        if self.workers > 1 and len(first) > 1:
+            return self._run_parallel(batches)
+
+        hashed = 0
+        for batch in batches:
+            results = hash_batch(self.store.path, batch, self.policy)
+            self._commit(results)
+            hashed += len(results)
+        return hashed
+
+    def _run_parallel(self, batches: Iterator[list[tuple[Path, str]]]) -> int:
+        results: queue.Queue[list[HashResult] | None] = queue.Queue(self.workers * 2)
+        errors: list[BaseException] = []
+        writer = threading.Thread(target=self._write, args=(results, errors))
+
+        pending: deque[Future[list[HashResult]]] = deque()
+        hashed = 0
+        try:
+            with ProcessPoolExecutor(self.workers) as pool:
+                for batch in batches:
+                    if errors:
+                        break
+                    future = pool.submit(
+                        hash_batch,
+                        self.store.path,
+                        batch,
+                        self.policy,
+                    )
+                    pending.append(future)
+                    if writer.ident is None:
+                        writer.start()
+                    while len(pending) > self.workers * 2 and not errors:
+                        hashed += self._hand_over(pending.popleft(), results)
+                while pending and not errors:
+                    hashed += self._hand_over(pending.popleft(), results)
+        finally:
+            for future in pending:
+                if not future.cancel() and future.exception() is None:
+                    discard(future.result())
+            results.put(None)
+            if writer.ident is not None:
+                writer.join()
+        if errors:
+            raise errors[0]
+        return hashed
+
+    @staticmethod
+    def _hand_over(
+        future: Future[list[HashResult]],
+        results: queue.Queue[list[HashResult] | None],
+    ) -> int:
+        batch = future.result()
+        results.put(batch)
+        return len(batch)
+
+    def _write(
+        self,
+        results: queue.Queue[list[HashResult] | None],
+        errors: list[BaseException],
+    ) -> None:
+        while (batch := results.get()) is not None:
+            if errors:
+                discard(batch)
+                continue
+            try:
+                self._commit(batch)
+            except BaseException as e:  # noqa: BLE001
+                errors.append(e)
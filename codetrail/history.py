@@ -0,0 +1,204 @@
+"""This module holds the history walker.
+
+Commits are produced lazily from a priority queue keyed on commit time, newest
+first, so a caller that stops iterating never pays for the rest of the history.
+The queue only holds the frontier of the walk: the parents of the commits produced
+so far that have not been produced themselves.
+
+When a commit graph is present, the commit time of a queued parent is read from
+the graph, and a commit object is only inflated once it is produced.
+
+In topological order, no commit is produced before all of its children, and a line
+of history is followed to its end before the next one starts. A second walk counts
+the children of every commit, in decreasing generation order, only as deep as the
+commits about to be produced: a child always has a higher generation than its
+parents, so once that walk has passed a commit's generation its count is final.
+With a commit graph, that walk reads no commit object. Commits missing from the
+graph have an unknown generation, higher than any other, so without a graph every
+commit is counted before the first one is produced.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from codetrail import commits
+from codetrail import exceptions
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+
+    from codetrail.objects import ObjectStore
+
+UNKNOWN_GENERATION = 2**32
+
+
+class _Node(NamedTuple):
+    generation: int
+    commit_time: int
+    parents: tuple[str, ...]
+
+
+def read_commit(store: ObjectStore, oid: str) -> commits.Commit:
+    """Read a commit, peeling tags that point to one.
+
+    Args:
+        store: The object store holding the commit.
+        oid: The hex ID of the commit or tag.
+
+    Returns:
+        The decoded commit.
+
+    Raises:
+        CorruptObjectError: If the object is neither a commit nor a tag of one.
+    """
+    raw = store.read_object(oid)
+    while raw.obj_type == "tag":
+        raw = store.read_object(commits.tag_target(raw.data))
+    if raw.obj_type != "commit":
+        msg = f"Object '{oid}' is a {raw.obj_type}, not a commit"
+        raise exceptions.CorruptObjectError(msg)
+    return commits.Commit.parse(raw.data)
+
+
+def peel(store: ObjectStore, oid: str) -> str:
+    """Get the commit a tag points to.
+
+    Args:
+        store: The object store holding the object.
+        oid: The hex ID of a commit or tag.
+
+    Returns:
+        The hex ID of the commit.
+    """
+    raw = store.read_object(oid)
+    while raw.obj_type == "tag":
+        oid = commits.tag_target(raw.data)
+        raw = store.read_object(oid)
+    return oid
+
+
+def iter_history(
+    store: ObjectStore,
+    tips: Iterable[str],
+    *,
+    since: int | None = None,
+    topo_order: bool = False,
+) -> Iterator[tuple[str, commits.Commit]]:
+    """Walk the history of some commits, newest first.
+
+    Args:
+        store: The object store holding the commits.
+        tips: The hex IDs of the commits, or tags of commits, to walk from.
+        since: The unix time of the oldest commit to produce, None for no limit.
+        topo_order: Whether to produce the commits in topological order instead.
+
+    Yields:
+        The hex ID and content of every reachable commit, by decreasing commit
+        time. Commits with the same time come in the order they were reached. In
+        topological order, every commit comes after all of its children, and
+        commits older than `since` are left out along with the history only they
+        lead to.
+    """
+    if topo_order:
+        yield from _iter_topo_order(store, tips, since)
+        return
+    graph = store.commit_graph
+    order = itertools.count()
+    queue: list[tuple[int, int, str]] = []
+    pending: dict[str, commits.Commit] = {}
+    seen: set[str] = set()
+
+    def push(oid: str) -> None:
+        if oid in seen:
+            return
+        seen.add(oid)
+        position = graph.position(oid) if graph is not None else None
+        if position is not None and graph is not None:
+            commit_time = graph.entry(position).commit_time
+        else:
+            pending[oid] = read_commit(store, oid)
+            commit_time = pending[oid].commit_time
+        heapq.heappush(queue, (-commit_time, next(order), oid))
+
+    for tip in tips:
+        push(peel(store, tip))
+
+    while queue:
+        commit_time, _, oid = heapq.heappop(queue)
+        if since is not None and -commit_time < since:
+            return
+        commit = pending.pop(oid, None) or read_commit(store, oid)
+        for parent in commit.parents:
+            push(parent)
+        yield oid, commit
+
+
+def _iter_topo_order(
+    store: ObjectStore,
+    tips: Iterable[str],
+    since: int | None,
+) -> Iterator[tuple[str, commits.Commit]]:
+    graph = store.commit_graph
+    nodes: dict[str, _Node] = {}
+    pending: dict[str, commits.Commit] = {}
+
+    def node(oid: str) -> _Node:
+        if oid not in nodes:
+            position = graph.position(oid) if graph is not None else None
+            if position is not None and graph is not None:
+                entry = graph.entry(position)
+                parents = tuple(graph.oid(parent) for parent in entry.parents)
+                nodes[oid] = _Node(entry.generation, entry.commit_time, parents)
+            else:
+                commit = pending[oid] = read_commit(store, oid)
+                nodes[oid] = _Node(
+                    UNKNOWN_GENERATION,
+                    commit.commit_time,
+                    commit.parents,
+                )
+        return nodes[oid]
+
+    def included(oid: str) -> bool:
+        return since is None or node(oid).commit_time >= since
+
+    order = itertools.count()
+    frontier: list[tuple[int, int, str]] = []
+    children: dict[str, int] = {}
+
+    def reach(oid: str) -> None:
+        if oid not in children:
+            children[oid] = 0
+            heapq.heappush(frontier, (-node(oid).generation, next(order), oid))
+
+    def count_children(generation: int) -> None:
+        while frontier and -frontier[0][0] >= generation:
+            _, _, oid = heapq.heappop(frontier)
+            for parent in node(oid).parents:
+                if included(parent):
+                    reach(parent)
+                    children[parent] += 1
+
+    peeled = dict.fromkeys(peel(store, tip) for tip in tips)
+    starts = [oid for oid in peeled if included(oid)]
+    for oid in starts:
+        reach(oid)
+    if starts:
+        count_children(min(node(oid).generation for oid in starts))
+    ready = [oid for oid in reversed(starts) if not children[oid]]
+
+    while ready:
+        oid = ready.pop()
+        commit = pending.pop(oid) if oid in pending else read_commit(store, oid)
+        yield oid, commit
+        for parent in reversed(node(oid).parents):
+            if not included(parent):
+                continue
+            count_children(node(parent).generation)
+            children[parent] -= 1
+            if not children[parent]:
+                ready.append(parent)
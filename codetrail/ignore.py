@@ -0,0 +1,230 @@
+"""This module holds the `.codetrailignore` matcher.
+
+Any directory of the work tree may hold a `.codetrailignore` file with one pattern
+per line, using the gitignore syntax:
+
+- Blank lines and lines starting with `#` are skipped.
+- `!` re-includes paths excluded by an earlier pattern.
+- A trailing `/` matches directories only.
+- A pattern with a `/` at its start or in its middle is relative to the directory of
+  the ignore file; any other pattern matches a name at any depth below it.
+- `*` and `?` do not match `/`, while `**` matches across directories.
+
+The patterns of an ignore file are compiled once into a single regex, so matching a
+path costs one regex match per ignore file instead of one `fnmatch` per pattern.
+Patterns from deeper ignore files take precedence, and the last matching pattern of
+a file wins. Nothing below an ignored directory can be re-included.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from codetrail.conf import IGNORE_FILE
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+
+class IgnoreRule(NamedTuple):
+    """A parsed ignore pattern.
+
+    Attributes:
+        regex: The regex matching the paths the pattern applies to.
+        negated: Whether the pattern re-includes paths.
+        directory_only: Whether the pattern matches directories only.
+    """
+
+    regex: str
+    negated: bool
+    directory_only: bool
+
+
+def translate(pattern: str) -> str:
+    """Translate a glob pattern into a regex without capturing groups.
+
+    Args:
+        pattern: The glob pattern, relative to the directory of its ignore file.
+
+    Returns:
+        The regex matching the paths of the pattern.
+    """
+    parts = []
+    position, length = 0, len(pattern)
+    while position < length:
+        char = pattern[position]
+        position += 1
+        if char == "*" and pattern.startswith("*", position):
+            position += 1
+            if pattern.startswith("/", position):
+                position += 1
+                parts.append("(?:.*/)?")
+            else:
+                parts.append(".*")
+        elif char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[" and (end := pattern.find("]", position + 1)) != -1:
+            members = re.sub(r"([\\\[])", r"\\\1", pattern[position:end])
+            if members.startswith("!"):
+                members = f"^{members[1:]}"
+            parts.append(f"(?!/)[{members}]")
+            position = end + 1
+        elif char == "\\" and position < length:
+            parts.append(re.escape(pattern[position]))
+            position += 1
+        else:
+            parts.append(re.escape(char))
+    return "".join(parts)
+
+
+def parse_rules(lines: Iterable[str]) -> list[IgnoreRule]:
+    """Parse the lines of an ignore file.
+
+    Args:
+        lines: The lines of the ignore file.
+
+    Returns:
+        The rules, in file order.
+    """
+    rules = []
+    for line in lines:
+        pattern = line.rstrip()
+        if not pattern or pattern.startswith("#"):
+            continue
+        negated = pattern.startswith("!")
+        pattern = pattern.removeprefix("!")
+        directory_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        if not pattern:
+            continue
+        regex = translate(pattern)
+        if not anchored:
+            regex = f"(?:.*/)?{regex}"
+        rules.append(IgnoreRule(regex, negated, directory_only))
+    return rules
+
+
+def _combine(rules: Iterable[tuple[int, IgnoreRule]]) -> re.Pattern[str] | None:
+    # Later patterns win, so they come first in the alternation and the first
+    # alternative that matches names the deciding pattern.
+    alternatives = [f"(?P<r{number}>{rule.regex})" for number, rule in rules]
+    if not alternatives:
+        return None
+    return re.compile("|".join(reversed(alternatives)), re.DOTALL)
+
+
+class IgnoreRules:
+    """The compiled patterns of one ignore file."""
+
+    def __init__(self, rules: list[IgnoreRule]) -> None:
+        """Compile the patterns of an ignore file.
+
+        Args:
+            rules: The rules of the ignore file, in file order.
+        """
+        self._negated = [rule.negated for rule in rules]
+        self._files = _combine(
+            (number, rule)
+            for number, rule in enumerate(rules)
+            if not rule.directory_only
+        )
+        self._directories = _combine(enumerate(rules))
+
+    def match(self, path: str, *, is_dir: bool) -> bool | None:
+        """Match a path against the patterns.
+
+        Args:
+            path: The POSIX path relative to the directory of the ignore file.
+            is_dir: Whether the path is a directory.
+
+        Returns:
+            True if the path is ignored, False if it is re-included, None if no
+            pattern matches it.
+        """
+        regex = self._directories if is_dir else self._files
+        found = regex.fullmatch(path) if regex else None
+        if found is None or found.lastgroup is None:
+            return None
+        return not self._negated[int(found.lastgroup[1:])]
+
+
+class IgnoreMatcher:
+    """Decide which paths of a work tree are ignored.
+
+    Ignore files are read and compiled the first time a path below their directory
+    is matched, and the result of every directory is cached.
+
+    Attributes:
+        work_tree: The root of the work tree.
+    """
+
+    work_tree: Path
+
+    def __init__(self, work_tree: Path) -> None:
+        """Initialize a matcher for a work tree.
+
+        Args:
+            work_tree: The root of the work tree.
+        """
+        self.work_tree = work_tree
+        self._rules: dict[str, IgnoreRules | None] = {}
+        self._directories: dict[str, bool] = {}
+
+    def rules(self, directory: str) -> IgnoreRules | None:
+        """Get the compiled patterns of a directory's ignore file.
+
+        Args:
+            directory: The POSIX path of the directory, "" for the work tree root.
+
+        Returns:
+            The compiled patterns, None if the directory has no ignore file.
+        """
+        if directory not in self._rules:
+            path = self.work_tree / directory / IGNORE_FILE
+            try:
+                lines = path.read_text(encoding="utf-8").splitlines()
+            except (FileNotFoundError, NotADirectoryError):
+                self._rules[directory] = None
+            else:
+                self._rules[directory] = IgnoreRules(parse_rules(lines))
+        return self._rules[directory]
+
+    def is_ignored(self, path: str, *, is_dir: bool) -> bool:
+        """Check whether a path is ignored, directly or through a parent directory.
+
+        Args:
+            path: The POSIX path relative to the work tree.
+            is_dir: Whether the path is a directory.
+
+        Returns:
+            True if the path is ignored, False otherwise.
+        """
+        parent = path.rpartition("/")[0]
+        if parent and self._is_directory_ignored(parent):
+            return True
+        return self._match(path, is_dir=is_dir)
+
+    def _is_directory_ignored(self, directory: str) -> bool:
+        if directory not in self._directories:
+            self._directories[directory] = self.is_ignored(directory, is_dir=True)
+        return self._directories[directory]
+
+    def _match(self, path: str, *, is_dir: bool) -> bool:
+        parents = path.split("/")[:-1]
+        for depth in range(len(parents), -1, -1):
+            directory = "/".join(parents[:depth])
+            rules = self.rules(directory)
+            if rules is None:
+                continue
+            relative = path[len(directory) + 1 :] if directory else path
+            result = rules.match(relative, is_dir=is_dir)
+            if result is not None:
+                return result
+        return False
@@ -0,0 +1,262 @@
+"""This module holds the binary staging index.
+
+The index at `.codetrail/index` records every tracked path with its blob ID and the
+stat data of the file when it was hashed. A file whose stat data is unchanged does
+not need to be read or hashed again.
+
+Index layout::
+
+    signature (4) | version (4) | entry count (4)
+    entries, sorted by path:
+        ctime_ns (8) | mtime_ns (8) | inode (8) | size (8) | mode (4)
+        object ID (20) | path length (2) | path (UTF-8)
+    SHA-1 of everything above (20)
+"""
+
+from __future__ import annotations
+
+import os
+import stat
+import struct
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from codetrail import exceptions
+from codetrail import objects
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+INDEX_SIGNATURE = b"CTIX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct(">4sII")
+INDEX_ENTRY = struct.Struct(">qqQQI20sH")
+CHECKSUM_SIZE = 20
+
+MODE_FILE = 0o100644
+MODE_EXECUTABLE = 0o100755
+MODE_SYMLINK = 0o120000
+MODE_TREE = 0o040000
+
+
+class IndexEntry(NamedTuple):
+    """A tracked path in the staging index.
+
+    Attributes:
+        path: The POSIX path relative to the work tree.
+        oid: The hex ID of the blob holding the content.
+        mode: The normalized file mode.
+        size: The file size when it was hashed.
+        mtime_ns: The modification time when it was hashed.
+        ctime_ns: The status change time when it was hashed.
+        inode: The inode number when it was hashed.
+    """
+
+    path: str
+    oid: str
+    mode: int
+    size: int
+    mtime_ns: int
+    ctime_ns: int
+    inode: int
+
+    @classmethod
+    def from_stat(cls, path: str, oid: str, status: os.stat_result) -> IndexEntry:
+        """Create an entry from the stat data of a hashed file.
+
+        Args:
+            path: The POSIX path relative to the work tree.
+            oid: The hex ID of the blob holding the content.
+            status: The stat result of the file.
+
+        Returns:
+            The index entry.
+        """
+        return cls(
+            path,
+            oid,
+            normalize_mode(status.st_mode),
+            status.st_size,
+            status.st_mtime_ns,
+            status.st_ctime_ns,
+            status.st_ino,
+        )
+
+
+def normalize_mode(st_mode: int) -> int:
+    """Reduce a file mode to one of the modes tracked by the index.
+
+    Args:
+        st_mode: The mode from a stat result.
+
+    Returns:
+        The symlink, executable or regular file mode.
+    """
+    if stat.S_ISLNK(st_mode):
+        return MODE_SYMLINK
+    if st_mode & stat.S_IXUSR:
+        return MODE_EXECUTABLE
+    return MODE_FILE
+
+
+def _decode_entries(body: bytes, count: int) -> Iterator[IndexEntry]:
+    position = INDEX_HEADER.size
+    for _ in range(count):
+        ctime, mtime, inode, size, mode, oid, length = INDEX_ENTRY.unpack_from(
+            body,
+            position,
+        )
+        position += INDEX_ENTRY.size
+        path = body[position : position + length].decode()
+        position += length
+        yield IndexEntry(path, oid.hex(), mode, size, mtime, ctime, inode)
+
+
+class StagingIndex:
+    """The staging index of a repository.
+
+    Attributes:
+        path: The path of the index file.
+        timestamp_ns: The modification time of the index file when it was read.
+    """
+
+    path: Path
+    timestamp_ns: int
+
+    def __init__(self, path: Path) -> None:
+        """Load the staging index, or start an empty one if it does not exist.
+
+        Args:
+            path: The path of the index file.
+        """
+        self.path = path
+        self.timestamp_ns = 0
+        self._entries: dict[str, IndexEntry] = {}
+        if path.exists():
+            self._read()
+
+    def _read(self) -> None:
+        data = self.path.read_bytes()
+        self.timestamp_ns = self.path.stat().st_mtime_ns
+        if len(data) < INDEX_HEADER.size + CHECKSUM_SIZE:
+            msg = "The index file is truncated"
+            raise exceptions.CorruptIndexError(msg)
+        body, checksum = data[:-CHECKSUM_SIZE], data[-CHECKSUM_SIZE:]
+        if objects.new_hasher(body).digest() != checksum:
+            msg = "The index file checksum does not match its content"
+            raise exceptions.CorruptIndexError(msg)
+
+        signature, version, count = INDEX_HEADER.unpack_from(body)
+        if signature != INDEX_SIGNATURE or version != INDEX_VERSION:
+            msg = "The index file has an unsupported format"
+            raise exceptions.CorruptIndexError(msg)
+
+        for entry in _decode_entries(body, count):
+            self._entries[entry.path] = entry
+
+    def write(self) -> None:
+        """Write the index atomically, with entries sorted by path."""
+        buffer = bytearray(
+            INDEX_HEADER.pack(INDEX_SIGNATURE, INDEX_VERSION, len(self._entries)),
+        )
+        for entry in self:
+            encoded = entry.path.encode()
+            buffer += INDEX_ENTRY.pack(
+                entry.ctime_ns,
+                entry.mtime_ns,
+                entry.inode,
+                entry.size,
+                entry.mode,
+                bytes.fromhex(entry.oid),
+                len(encoded),
+            )
+            buffer += encoded
+        buffer += objects.new_hasher(buffer).digest()
+
+        fd, temporary = tempfile.mkstemp(dir=self.path.parent, prefix="tmp_index_")
+        with os.fdopen(fd, "wb") as file:
+            file.write(buffer)
+        Path(temporary).replace(self.path)
+        self.timestamp_ns = self.path.stat().st_mtime_ns
+
+    def __len__(self) -> int:
+        """Get the number of tracked paths.
+
+        Returns:
+            The entry count.
+        """
+        return len(self._entries)
+
+    def __contains__(self, path: str) -> bool:
+        """Check whether a path is tracked.
+
+        Args:
+            path: The POSIX path relative to the work tree.
+
+        Returns:
+            True if the path has an entry, False otherwise.
+        """
+        return path in self._entries
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        """Iterate over the entries sorted by path.
+
+        Yields:
+            The index entries.
+        """
+        for path in sorted(self._entries):
+            yield self._entries[path]
+
+    def get(self, path: str) -> IndexEntry | None:
+        """Get the entry of a path.
+
+        Args:
+            path: The POSIX path relative to the work tree.
+
+        Returns:
+            The entry, None if the path is not tracked.
+        """
+        return self._entries.get(path)
+
+    def add(self, entry: IndexEntry) -> None:
+        """Add or replace the entry of a path.
+
+        Args:
+            entry: The index entry.
+        """
+        self._entries[entry.path] = entry
+
+    def remove(self, path: str) -> None:
+        """Stop tracking a path.
+
+        Args:
+            path: The POSIX path relative to the work tree.
+        """
+        self._entries.pop(path, None)
+
+    def is_fresh(self, path: str, status: os.stat_result) -> bool:
+        """Check whether a file is unchanged since it was hashed into the index.
+
+        Files modified in the same clock tick the index was written are never
+        considered fresh, since a later change in that tick would not alter
+        their stat data.
+
+        Args:
+            path: The POSIX path relative to the work tree.
+            status: The current stat result of the file.
+
+        Returns:
+            True if the stat data matches the entry, False otherwise.
+        """
+        entry = self._entries.get(path)
+        return (
+            entry is not None
+            and entry.mtime_ns < self.timestamp_ns
+            and entry.mtime_ns == status.st_mtime_ns
+            and entry.ctime_ns == status.st_ctime_ns
+            and entry.size == status.st_size
+            and entry.inode == status.st_ino
+            and entry.mode == normalize_mode(status.st_mode)
+        )
@@ -0,0 +1,447 @@
+"""This module holds the line diff engine.
+
+Lines are interned to integer IDs once, so the algorithms compare machine
+integers held in `array('i')` buffers instead of strings. Every region is first
+trimmed of its common prefix and suffix, which is all the work needed for the
+common case of a few edits in a large file.
+
+Three algorithms are available:
+
+- `myers`: the greedy O((N+M)D) algorithm, in its linear-space form that splits
+  every region on the middle snake of its shortest edit script.
+- `patience`: anchors the diff on lines that occur exactly once on each side,
+  taking the longest increasing run of them, and diffs the gaps in between.
+- `histogram`: anchors the diff on the longest common run around the line with
+  the fewest occurrences, which handles repeated lines better than `patience`.
+
+Both anchored algorithms fall back to `myers` for regions without anchors. Myers
+gives up on a region once its edit distance exceeds the cost limit and reports
+the whole region as replaced, so pathological inputs cost O((N+M) x limit).
+"""
+
+from __future__ import annotations
+
+import bisect
+from array import array
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from codetrail.conf import DIFF_COST_LIMIT
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Hashable
+    from collections.abc import Iterator
+    from collections.abc import Sequence
+
+HISTOGRAM_MAX_OCCURRENCES = 64
+DEFAULT_CONTEXT = 3
+
+
+class Edit(NamedTuple):
+    """A region of lines replaced between two sequences.
+
+    Either side may be empty, for pure insertions and deletions.
+
+    Attributes:
+        old_start: The first old line of the region.
+        old_end: The old line after the region.
+        new_start: The first new line of the region.
+        new_end: The new line after the region.
+    """
+
+    old_start: int
+    old_end: int
+    new_start: int
+    new_end: int
+
+
+class Region(NamedTuple):
+    """A pair of line ranges still to be diffed."""
+
+    old_start: int
+    old_end: int
+    new_start: int
+    new_end: int
+
+
+if TYPE_CHECKING:
+    Splitter = Callable[[array[int], array[int], Region, int], list[Region] | None]
+
+
+def intern_lines(
+    old: Sequence[Hashable],
+    new: Sequence[Hashable],
+) -> tuple[array[int], array[int]]:
+    """Map the lines of two sequences to integer IDs shared by both.
+
+    Args:
+        old: The old lines.
+        new: The new lines.
+
+    Returns:
+        The line IDs of each sequence.
+    """
+    ids: dict[Hashable, int] = {}
+    return (
+        array("i", [ids.setdefault(line, len(ids)) for line in old]),
+        array("i", [ids.setdefault(line, len(ids)) for line in new]),
+    )
+
+
+def diff_lines(
+    old: Sequence[Hashable],
+    new: Sequence[Hashable],
+    *,
+    algorithm: str = "myers",
+    cost_limit: int = DIFF_COST_LIMIT,
+) -> list[Edit]:
+    """Compute the edits turning one sequence of lines into another.
+
+    Args:
+        old: The old lines.
+        new: The new lines.
+        algorithm: One of `myers`, `patience` or `histogram`.
+        cost_limit: The edit distance above which a Myers region is reported as
+            replaced as a whole.
+
+    Returns:
+        The edits, in order, with no two edits adjacent.
+
+    Raises:
+        ValueError: If the algorithm is unknown.
+    """
+    if algorithm not in ALGORITHMS:
+        msg = f"Unknown diff algorithm '{algorithm}', choose from {sorted(ALGORITHMS)}"
+        raise ValueError(msg)
+    split = ALGORITHMS[algorithm]
+    a, b = intern_lines(old, new)
+
+    edits: list[Edit] = []
+    stack = [Region(0, len(a), 0, len(b))]
+    while stack:
+        region = _trim(a, b, stack.pop())
+        if region.old_start == region.old_end or region.new_start == region.new_end:
+            if region.old_start < region.old_end or region.new_start < region.new_end:
+                _append(edits, Edit(*region))
+            continue
+        parts = split(a, b, region, cost_limit)
+        if parts is None:
+            _append(edits, Edit(*region))
+        else:
+            stack.extend(reversed(parts))
+    return edits
+
+
+def _append(edits: list[Edit], edit: Edit) -> None:
+    if edits and edits[-1].old_end == edit.old_start:
+        if edits[-1].new_end == edit.new_start:
+            edits[-1] = Edit(
+                edits[-1].old_start,
+                edit.old_end,
+                edits[-1].new_start,
+                edit.new_end,
+            )
+            return
+    edits.append(edit)
+
+
+def _trim(a: array[int], b: array[int], region: Region) -> Region:
+    old_start, old_end, new_start, new_end = region
+    while old_start < old_end and new_start < new_end and a[old_start] == b[new_start]:
+        old_start += 1
+        new_start += 1
+    while (
+        old_start < old_end and new_start < new_end and a[old_end - 1] == b[new_end - 1]
+    ):
+        old_end -= 1
+        new_end -= 1
+    return Region(old_start, old_end, new_start, new_end)
+
+
+class _Search:
+    """The furthest reaching paths of a Myers search in one direction."""
+
+    def __init__(self, old: array[int], new: array[int], max_cost: int) -> None:
+        self.old = old
+        self.new = new
+        self.offset = max_cost
+        self.furthest = array("i", [-1]) * (2 * max_cost + 2)
+        self.furthest[max_cost + 1] = 0
+        self.low = self.high = 0
+
+    def reach(self, k: int) -> int:
+        """Get how far the path on a diagonal reaches.
+
+        Args:
+            k: The diagonal, the difference between the old and new positions.
+
+        Returns:
+            The old position the path reaches, -1 if it was never reached.
+        """
+        index = self.offset + k
+        return self.furthest[index] if 0 <= index < len(self.furthest) else -1
+
+    def advance(self, cost: int) -> Iterator[tuple[int, int, int]]:
+        """Extend the paths by one edit.
+
+        Args:
+            cost: The number of edits of the paths after this step.
+
+        Yields:
+            The diagonal and end point of every path still inside the region.
+        """
+        furthest, offset = self.furthest, self.offset
+        old, new = self.old, self.new
+        for k in range(-cost + self.low, cost + 1 - self.high, 2):
+            if k == -cost or (
+                k != cost and furthest[offset + k - 1] < furthest[offset + k + 1]
+            ):
+                x = furthest[offset + k + 1]
+            else:
+                x = furthest[offset + k - 1] + 1
+            y = x - k
+            while x < len(old) and y < len(new) and old[x] == new[y]:
+                x += 1
+                y += 1
+            furthest[offset + k] = x
+            if x > len(old):
+                self.high += 2
+            elif y > len(new):
+                self.low += 2
+            else:
+                yield k, x, y
+
+
+def _myers(
+    a: array[int],
+    b: array[int],
+    region: Region,
+    cost_limit: int,
+) -> list[Region] | None:
+    # Search from both ends at once until the paths overlap; the overlap is the
+    # middle snake, which splits the region in two halves of about half the cost.
+    old = a[region.old_start : region.old_end]
+    new = b[region.new_start : region.new_end]
+    max_cost = (len(old) + len(new) + 1) // 2
+    forward = _Search(old, new, max_cost)
+    backward = _Search(old[::-1], new[::-1], max_cost)
+    delta = len(old) - len(new)
+    odd = delta % 2 != 0
+
+    for cost in range(min(max_cost, cost_limit + 1)):
+        for k, x, y in forward.advance(cost):
+            reverse_x = backward.reach(delta - k)
+            if odd and reverse_x != -1 and x >= len(old) - reverse_x:
+                return _split(region, x, y)
+        for k, x, _ in backward.advance(cost):
+            forward_x = forward.reach(delta - k)
+            if not odd and forward_x != -1 and forward_x >= len(old) - x:
+                return _split(region, forward_x, forward_x - delta + k)
+    return None
+
+
+def _split(region: Region, x: int, y: int) -> list[Region]:
+    old_middle = region.old_start + x
+    new_middle = region.new_start + y
+    return [
+        Region(region.old_start, old_middle, region.new_start, new_middle),
+        Region(old_middle, region.old_end, new_middle, region.new_end),
+    ]
+
+
+def _anchored(
+    region: Region,
+    anchors: list[tuple[int, int]],
+) -> list[Region]:
+    parts = []
+    old_position, new_position = region.old_start, region.new_start
+    for old_anchor, new_anchor in anchors:
+        parts.append(Region(old_position, old_anchor, new_position, new_anchor))
+        old_position, new_position = old_anchor + 1, new_anchor + 1
+    parts.append(Region(old_position, region.old_end, new_position, region.new_end))
+    return parts
+
+
+def _patience(
+    a: array[int],
+    b: array[int],
+    region: Region,
+    cost_limit: int,
+) -> list[Region] | None:
+    old_positions: dict[int, int] = {}
+    for position in range(region.old_start, region.old_end):
+        line = a[position]
+        old_positions[line] = -1 if line in old_positions else position
+    new_positions: dict[int, int] = {}
+    for position in range(region.new_start, region.new_end):
+        line = b[position]
+        if old_positions.get(line, -1) != -1:
+            new_positions[line] = -1 if line in new_positions else position
+
+    candidates = sorted(
+        (old_positions[line], position)
+        for line, position in new_positions.items()
+        if position != -1
+    )
+    if not candidates:
+        return _myers(a, b, region, cost_limit)
+    return _anchored(region, _longest_increasing(candidates))
+
+
+def _longest_increasing(candidates: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    # Patience sorting on the new positions: `tails[n]` is the smallest new
+    # position ending an increasing run of length n + 1.
+    tails: list[int] = []
+    tail_indices: list[int] = []
+    previous = [-1] * len(candidates)
+    for number, (_, new_position) in enumerate(candidates):
+        pile = bisect.bisect_left(tails, new_position)
+        if pile:
+            previous[number] = tail_indices[pile - 1]
+        if pile == len(tails):
+            tails.append(new_position)
+            tail_indices.append(number)
+        else:
+            tails[pile] = new_position
+            tail_indices[pile] = number
+
+    run = []
+    number = tail_indices[-1]
+    while number != -1:
+        run.append(candidates[number])
+        number = previous[number]
+    return run[::-1]
+
+
+def _histogram(
+    a: array[int],
+    b: array[int],
+    region: Region,
+    cost_limit: int,
+) -> list[Region] | None:
+    occurrences: dict[int, list[int]] = {}
+    for position in range(region.old_start, region.old_end):
+        occurrences.setdefault(a[position], []).append(position)
+
+    # The best run has the rarest line, then the most lines; ties go to the run
+    # nearest the middle of the region so the recursion stays balanced.
+    middle = region.old_start + region.old_end
+    best: tuple[tuple[int, int, int], Region] | None = None
+    new_position = region.new_start
+    while new_position < region.new_end:
+        positions = occurrences.get(b[new_position], ())
+        count = len(positions)
+        next_position = new_position + 1
+        if 0 < count <= HISTOGRAM_MAX_OCCURRENCES and (
+            best is None or count <= best[0][0]
+        ):
+            for old_position in positions:
+                common = _common_run(a, b, region, old_position, new_position)
+                rank = (
+                    count,
+                    common.old_start - common.old_end,
+                    abs(common.old_start + common.old_end - middle),
+                )
+                if best is None or rank < best[0]:
+                    best = (rank, common)
+                next_position = max(next_position, common.new_end)
+        new_position = next_position
+
+    if best is None:
+        return _myers(a, b, region, cost_limit)
+    common = best[1]
+    return [
+        Region(region.old_start, common.old_start, region.new_start, common.new_start),
+        Region(common.old_end, region.old_end, common.new_end, region.new_end),
+    ]
+
+
+def _common_run(
+    a: array[int],
+    b: array[int],
+    region: Region,
+    old_position: int,
+    new_position: int,
+) -> Region:
+    old_start, new_start = old_position, new_position
+    while (
+        old_start > region.old_start
+        and new_start > region.new_start
+        and a[old_start - 1] == b[new_start - 1]
+    ):
+        old_start -= 1
+        new_start -= 1
+    old_end, new_end = old_position + 1, new_position + 1
+    while (
+        old_end < region.old_end
+        and new_end < region.new_end
+        and a[old_end] == b[new_end]
+    ):
+        old_end += 1
+        new_end += 1
+    return Region(old_start, old_end, new_start, new_end)
+
+
+ALGORITHMS: dict[str, Splitter] = {
+    "myers": _myers,
+    "patience": _patience,
+    "histogram": _histogram,
+}
+
+
+def unified_diff(
+    old: Sequence[str],
+    new: Sequence[str],
+    edits: Sequence[Edit],
+    context: int = DEFAULT_CONTEXT,
+) -> Iterator[str]:
+    """Format edits as the hunks of a unified diff.
+
+    Args:
+        old: The old lines, each ending with a newline except maybe the last.
+        new: The new lines, each ending with a newline except maybe the last.
+        edits: The edits from `diff_lines`.
+        context: The number of unchanged lines shown around each edit.
+
+    Yields:
+        The lines of every hunk, starting with its `@@` header.
+    """
+    groups: list[list[Edit]] = []
+    for edit in edits:
+        if groups and edit.old_start - groups[-1][-1].old_end <= 2 * context:
+            groups[-1].append(edit)
+        else:
+            groups.append([edit])
+
+    for group in groups:
+        old_start = max(group[0].old_start - context, 0)
+        old_end = min(group[-1].old_end + context, len(old))
+        new_start = group[0].new_start - (group[0].old_start - old_start)
+        new_end = group[-1].new_end + (old_end - group[-1].old_end)
+        yield (
+            f"@@ -{_hunk_range(old_start, old_end)} "
+            f"+{_hunk_range(new_start, new_end)} @@\n"
+        )
+        position = old_start
+        for edit in group:
+            yield from _lines(" ", old[position : edit.old_start])
+            yield from _lines("-", old[edit.old_start : edit.old_end])
+            yield from _lines("+", new[edit.new_start : edit.new_end])
+            position = edit.old_end
+        yield from _lines(" ", old[position:old_end])
+
+
+def _hunk_range(start: int, end: int) -> str:
+    length = end - start
+    if length == 1:
+        return str(start + 1)
+    return f"{start + 1 if length else start},{length}"
+
+
+def _lines(prefix: str, lines: Sequence[str]) -> Iterator[str]:
+    for line in lines:
+        if line.endswith("\n"):
+            yield f"{prefix}{line}"
+        else:
+            yield f"{prefix}{line}\n\\ No newline at end of file\n"
@@ -1,12 +1,24 @@
 """This package contains the domain model logic."""
 
-import configparser
+from __future__ import annotations
+
+import shlex
 from functools import cached_property
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+from codetrail import configuration
 from codetrail import exceptions
 from codetrail.conf import CONFIG_FILE
 from codetrail.conf import DEFAULT_CODETRAIL_DIRECTORY
+from codetrail.conf import DELTA_BASE_CACHE_LIMIT
+from codetrail.conf import INDEX_FILE
+from codetrail.conf import OBJECT_CACHE_LIMIT
+from codetrail.conf import OBJECTS_DIRECTORY
+from codetrail.conf import UPLOAD_PACK_COMMAND
+
+if TYPE_CHECKING:
+    from codetrail.objects import ObjectStore
 
 
 class CodetrailRepository:
@@ -20,6 +32,7 @@ class CodetrailRepository:
     work_tree: Path
     repo_dir: Path
     config_path: Path
+    config: configuration.LayeredConfig
 
     def __init__(self, path: Path | str, *, strict: bool = True) -> None:
         """Initialize a codetrail repository object.
@@ -34,7 +47,7 @@ class CodetrailRepository:
         """
         self.work_tree = Path(path)
         self.repo_dir = self.work_tree / DEFAULT_CODETRAIL_DIRECTORY
-        self.config = configparser.ConfigParser()
+        self.config = configuration.LayeredConfig()
 
         if strict and not self.repo_dir.is_dir():
             msg = "There is no repository in the path!"
@@ -44,11 +57,44 @@ class CodetrailRepository:
         config_exists = self.config_path.exists() and self.config_path.is_file()
 
         if strict and config_exists:
-            self.config.read(self.config_path)
+            self.config = configuration.read_layered_config(self.config_path)
         elif strict:
             msg = "The configuration file is missing or it is not a valid file."
             raise exceptions.MissingConfigurationFileError(msg)
 
+    def get_core_int(self, option: str, fallback: int) -> int:
+        """Get an integer option from the `core` configuration section.
+
+        Args:
+            option: The option name e.g 'packwindow'.
+            fallback: The value used when the option is not set.
+
+        Returns:
+            The configured value, or the fallback.
+
+        Raises:
+            UnsupportedConfigError: If the configured value is not an integer.
+        """
+        try:
+            return self.config.getint("core", option, fallback=fallback)
+        except ValueError as e:
+            msg = f"Option 'core.{option}' must be an integer"
+            raise exceptions.UnsupportedConfigError(msg) from e
+
+    def get_core_str(self, option: str, fallback: str) -> str:
+        """Get a string option from the `core` configuration section.
+
+        Args:
+            option: The option name e.g 'chunkpatterns'.
+            fallback: The value used when the option is not set.
+
+        Returns:
+            The configured value, or the fallback.
+        """
+        if not self.config.has_option("core", option):
+            return fallback
+        return self.config.get("core", option)
+
     @cached_property
     def abs_work_tree(self) -> Path:
         """Get the absolute path of work tree."""
@@ -58,3 +104,47 @@ class CodetrailRepository:
     def abs_repo_dir(self) -> Path:
         """Get the absolute path of repository dir."""
         return self.repo_dir.absolute()
+
+    @cached_property
+    def index_path(self) -> Path:
+        """Get the path of the staging index."""
+        return self.repo_dir / INDEX_FILE
+
+    @cached_property
+    def objects(self) -> ObjectStore:
+        """Get the object store of the repository.
+
+        Its caches are sized by the `core.objectcachelimit` and
+        `core.deltabasecachelimit` options, in bytes. In a partial clone, missing
+        objects are fetched from the `core.promisorremote` repository.
+        """
+        from codetrail.objects import ObjectStore  # noqa: PLC0415
+
+        promisor = None
+        remote = self.get_core_str("promisorremote", "")
+        if remote:
+            from codetrail.promisor import PromisorRemote  # noqa: PLC0415
+
+            promisor = PromisorRemote(remote, self.upload_pack)
+        return ObjectStore(
+            self.repo_dir / OBJECTS_DIRECTORY,
+            object_cache_limit=self.get_core_int(
+                "objectcachelimit",
+                OBJECT_CACHE_LIMIT,
+            ),
+            delta_base_cache_limit=self.get_core_int(
+                "deltabasecachelimit",
+                DELTA_BASE_CACHE_LIMIT,
+            ),
+            promisor=promisor,
+        )
+
+    @cached_property
+    def upload_pack(self) -> list[str]:
+        """Get the command serving remote repositories, given their path.
+
+        It is read from the `core.uploadpack` option, split like a shell command,
+        and defaults to the `upload-pack` command of this program.
+        """
+        command = self.get_core_str("uploadpack", "")
+        return shlex.split(command) if command else list(UPLOAD_PACK_COMMAND)
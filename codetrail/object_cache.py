@@ -0,0 +1,142 @@
+"""This module holds the in-process object caches.
+
+Walking history or diffing trees reads the same commits and trees over and over,
+and every read of a deltified pack entry applies its whole delta chain. An
+`ObjectCache` keeps recently used objects in memory up to a byte limit, evicting the
+least recently used ones first.
+
+An object store has two caches, sized by the `core.objectcachelimit` and
+`core.deltabasecachelimit` options:
+
+- the object cache holds the objects read fully into memory, by object ID;
+- the delta-base cache holds the objects rebuilt while resolving delta chains, by
+  pack and offset, so reading a delta starts from its nearest cached base instead
+  of the root of its chain.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable
+
+    from codetrail.objects import RawObject
+
+
+class CacheStats(NamedTuple):
+    """The counters of an object cache.
+
+    Attributes:
+        hits: The number of lookups that found an object.
+        misses: The number of lookups that found nothing.
+        evictions: The number of objects evicted to stay under the limit.
+        size: The number of content bytes currently held.
+        entries: The number of objects currently held.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    entries: int
+
+
+class ObjectCache:
+    """A least recently used cache of objects bounded by their content size.
+
+    Lookups and insertions are safe to call from several threads.
+
+    Attributes:
+        limit: The maximum number of content bytes held, 0 to disable the cache.
+    """
+
+    limit: int
+
+    def __init__(self, limit: int) -> None:
+        """Create an empty cache.
+
+        Args:
+            limit: The maximum number of content bytes held, 0 to disable the cache.
+        """
+        self.limit = limit
+        self._entries: OrderedDict[Hashable, RawObject] = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        """Get the number of cached objects.
+
+        Returns:
+            The entry count.
+        """
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> RawObject | None:
+        """Look up an object, marking it as the most recently used.
+
+        Args:
+            key: The key the object was cached under.
+
+        Returns:
+            The object, None if it is not cached.
+        """
+        with self._lock:
+            raw = self._entries.get(key)
+            if raw is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return raw
+
+    def put(self, key: Hashable, raw: RawObject) -> None:
+        """Cache an object, evicting the least recently used ones over the limit.
+
+        Objects larger than the limit are not cached, nor is anything when the
+        limit is 0.
+
+        Args:
+            key: The key to cache the object under.
+            raw: The object.
+        """
+        size = len(raw.data)
+        if not self.limit or size > self.limit:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.data)
+            self._entries[key] = raw
+            self._size += size
+            while self._size > self.limit:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.data)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached object, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> CacheStats:
+        """Get the counters of the cache.
+
+        Returns:
+            The hit, miss and eviction counts and the current size.
+        """
+        with self._lock:
+            return CacheStats(
+                self._hits,
+                self._misses,
+                self._evictions,
+                self._size,
+                len(self._entries),
+            )
@@ -0,0 +1,708 @@
+"""This module holds the content-addressed object store.
+
+Objects are stored loose under `.codetrail/objects/<xx>/<rest-of-id>`, where the
+object ID is the SHA-1 of a NUL-terminated `<type> <size>` header followed by the
+content, and the file holds the zlib-compressed header and content.
+
+Content is always hashed and compressed in fixed-size chunks so large blobs never
+sit fully in memory, and objects are written to a temporary file first and then
+renamed into place so concurrent writers cannot produce torn objects.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import tempfile
+import zlib
+from collections import deque
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import BinaryIO
+from typing import NamedTuple
+from typing import Self
+
+from codetrail import chunking
+from codetrail import commit_graph
+from codetrail import exceptions
+from codetrail import packs
+from codetrail.conf import COMMIT_GRAPH_FILE
+from codetrail.conf import DELTA_BASE_CACHE_LIMIT
+from codetrail.conf import INFO_DIRECTORY
+from codetrail.conf import OBJECT_CACHE_LIMIT
+from codetrail.conf import OBJECT_CHUNK_SIZE
+from codetrail.conf import OBJECT_COMPRESSION_LEVEL
+from codetrail.conf import OBJECT_TYPES
+from codetrail.conf import PACK_DIRECTORY
+from codetrail.object_cache import ObjectCache
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from types import TracebackType
+
+    from codetrail.commit_graph import CommitGraph
+    from codetrail.packs import Pack
+    from codetrail.promisor import PromisorRemote
+
+OBJECT_HEADER_LIMIT = 64
+MANIFEST_TYPE = "manifest"
+
+
+class RawObject(NamedTuple):
+    """An object read fully into memory.
+
+    Attributes:
+        obj_type: The object type e.g 'blob'.
+        data: The object content without the header.
+    """
+
+    obj_type: str
+    data: bytes
+
+
+def object_header(obj_type: str, size: int) -> bytes:
+    """Build the header that prefixes an object's content before hashing.
+
+    Args:
+        obj_type: The object type e.g 'blob'.
+        size: The size of the content in bytes.
+
+    Returns:
+        The encoded header.
+
+    Raises:
+        InvalidObjectTypeError: If the object type is not supported.
+    """
+    if obj_type not in OBJECT_TYPES:
+        msg = f"Unknown object type '{obj_type}', choose from '{OBJECT_TYPES}'"
+        raise exceptions.InvalidObjectTypeError(msg)
+    return f"{obj_type} {size}\0".encode()
+
+
+def new_hasher(data: bytes | bytearray = b"") -> hashlib._Hash:
+    """Create the hash used for object IDs and file checksums.
+
+    Args:
+        data: Initial content to hash.
+
+    Returns:
+        A SHA-1 hasher.
+    """
+    return hashlib.sha1(data, usedforsecurity=False)
+
+
+def hash_object(obj_type: str, data: bytes) -> str:
+    """Compute the object ID of in-memory content without storing it.
+
+    Args:
+        obj_type: The object type e.g 'tree'.
+        data: The object content.
+
+    Returns:
+        The hex object ID.
+    """
+    hasher = new_hasher()
+    hasher.update(object_header(obj_type, len(data)))
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def stream_size(stream: BinaryIO) -> int:
+    """Get the number of bytes left in a seekable stream.
+
+    Args:
+        stream: The stream to measure.
+
+    Returns:
+        The number of bytes between the current position and the end.
+    """
+    position = stream.tell()
+    end = stream.seek(0, io.SEEK_END)
+    stream.seek(position)
+    return end - position
+
+
+class ObjectStream:
+    """A read-only stream over the content of a stored object.
+
+    The object is inflated lazily, one chunk at a time, so only a bounded amount of
+    memory is used regardless of object size.
+    """
+
+    obj_type: str
+    size: int
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        chunk_size: int = OBJECT_CHUNK_SIZE,
+        *,
+        header: tuple[str, int] | None = None,
+        buffered: bytes = b"",
+    ) -> None:
+        """Open an object stream and parse its header.
+
+        The stream owns the file, which is closed if the header cannot be parsed.
+
+        Args:
+            file: The open compressed object file.
+            chunk_size: The number of compressed bytes read at a time.
+            header: The object type and size, when the data has no header to parse.
+            buffered: Content that is already inflated and precedes the file data.
+        """
+        self._file = file
+        self._chunk_size = chunk_size
+        self._inflater = zlib.decompressobj()
+        self._buffer = bytearray(buffered)
+
+        if header is None:
+            try:
+                header = self._parse_header()
+            except BaseException:
+                file.close()
+                raise
+        self.obj_type, self.size = header
+        self._remaining = self.size
+
+    @classmethod
+    def from_bytes(cls, obj_type: str, data: bytes) -> Self:
+        """Create a stream over content that is already in memory.
+
+        Args:
+            obj_type: The object type e.g 'blob'.
+            data: The object content.
+
+        Returns:
+            A stream over the content.
+        """
+        return cls(io.BytesIO(), header=(obj_type, len(data)), buffered=data)
+
+    def _fill(self) -> bool:
+        compressed = self._inflater.unconsumed_tail
+        if not compressed:
+            compressed = self._file.read(self._chunk_size)
+        if not compressed:
+            self._buffer += self._inflater.flush()
+            return False
+        self._buffer += self._inflater.decompress(compressed, self._chunk_size)
+        return True
+
+    def _parse_header(self) -> tuple[str, int]:
+        raw_header = self._read_header()
+        try:
+            obj_type, size = raw_header.decode().split(" ")
+            return obj_type, int(size)
+        except ValueError as e:
+            msg = f"Malformed object header {raw_header!r}"
+            raise exceptions.CorruptObjectError(msg) from e
+
+    def _read_header(self) -> bytes:
+        while b"\0" not in self._buffer:
+            if len(self._buffer) > OBJECT_HEADER_LIMIT or not self._fill():
+                msg = "Object header is missing"
+                raise exceptions.CorruptObjectError(msg)
+        end = self._buffer.index(b"\0")
+        header = bytes(self._buffer[:end])
+        del self._buffer[: end + 1]
+        return header
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to `size` bytes of content, or everything left if negative.
+
+        Args:
+            size: The maximum number of bytes to return.
+
+        Returns:
+            The content read, empty once the object is exhausted.
+
+        Raises:
+            CorruptObjectError: If the content is shorter than the header claims.
+        """
+        wanted = self._remaining if size < 0 else min(size, self._remaining)
+        while len(self._buffer) < wanted and self._fill():
+            pass
+        if len(self._buffer) < wanted:
+            msg = "Object content is shorter than its header"
+            raise exceptions.CorruptObjectError(msg)
+        data = bytes(self._buffer[:wanted])
+        del self._buffer[:wanted]
+        self._remaining -= wanted
+        return data
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Iterate over the content in chunks.
+
+        Yields:
+            Successive chunks of the object content.
+        """
+        while chunk := self.read(self._chunk_size):
+            yield chunk
+
+    def close(self) -> None:
+        """Close the underlying object file."""
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        """Enter the context manager.
+
+        Returns:
+            The stream itself.
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the stream when leaving the context manager."""
+        self.close()
+
+
+class ChunkedObjectStream(ObjectStream):
+    """A read-only stream over a blob stored as content-defined chunks.
+
+    Chunks are read from the store one at a time, as the content is consumed, and
+    are not kept in the object cache.
+    """
+
+    def __init__(
+        self,
+        store: ObjectStore,
+        chunks: list[tuple[str, int]],
+        chunk_size: int = OBJECT_CHUNK_SIZE,
+    ) -> None:
+        """Open a stream over the chunks of a blob.
+
+        Args:
+            store: The object store holding the chunks.
+            chunks: The hex object ID and size of every chunk, in order.
+            chunk_size: The number of bytes yielded at a time when iterating.
+        """
+        size = sum(chunk_size for _, chunk_size in chunks)
+        super().__init__(io.BytesIO(), chunk_size, header=("blob", size))
+        self._store = store
+        self._chunks = deque(chunks)
+
+    def _fill(self) -> bool:
+        if not self._chunks:
+            return False
+        oid, size = self._chunks.popleft()
+        with self._store.open_object(oid) as stream:
+            data = stream.read()
+        if len(data) != size:
+            msg = f"Chunk '{oid}' holds {len(data)} bytes instead of {size}"
+            raise exceptions.CorruptObjectError(msg)
+        self._buffer += data
+        return True
+
+
+class ObjectStore:
+    """A content-addressed store of loose and packed objects.
+
+    Attributes:
+        path: The objects directory e.g `.codetrail/objects`.
+        chunk_size: The number of bytes hashed and compressed at a time.
+        object_cache: The cache of the objects read fully into memory.
+        delta_base_cache: The cache of the delta bases rebuilt from the packs.
+        promisor: The remote that sends missing objects on demand, None unless the
+            store belongs to a partial clone.
+    """
+
+    path: Path
+    chunk_size: int
+    object_cache: ObjectCache
+    delta_base_cache: ObjectCache
+    promisor: PromisorRemote | None
+
+    def __init__(
+        self,
+        path: Path,
+        chunk_size: int = OBJECT_CHUNK_SIZE,
+        *,
+        object_cache_limit: int = OBJECT_CACHE_LIMIT,
+        delta_base_cache_limit: int = DELTA_BASE_CACHE_LIMIT,
+        promisor: PromisorRemote | None = None,
+    ) -> None:
+        """Initialize an object store.
+
+        Args:
+            path: The objects directory.
+            chunk_size: The number of bytes hashed and compressed at a time.
+            object_cache_limit: The content bytes held by the object cache.
+            delta_base_cache_limit: The content bytes held by the delta-base cache.
+            promisor: The remote that sends missing objects on demand.
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        self.object_cache = ObjectCache(object_cache_limit)
+        self.delta_base_cache = ObjectCache(delta_base_cache_limit)
+        self.promisor = promisor
+
+    def object_path(self, oid: str) -> Path:
+        """Get the path of a loose object.
+
+        Args:
+            oid: The hex object ID.
+
+        Returns:
+            The path where the object is (or would be) stored.
+        """
+        return self.path / oid[:2] / oid[2:]
+
+    @property
+    def pack_directory(self) -> Path:
+        """Get the directory holding the packs."""
+        return self.path / PACK_DIRECTORY
+
+    @cached_property
+    def packs(self) -> list[Pack]:
+        """Get the packs of the store, newest first."""
+        paths = sorted(
+            self.pack_directory.glob("pack-*.pack"),
+            key=lambda path: path.stat().st_mtime_ns,
+            reverse=True,
+        )
+        return [packs.Pack(path, self.delta_base_cache) for path in paths]
+
+    def _load_new_packs(self) -> bool:
+        """Load the packs added since the packs were listed, e.g. by another process.
+
+        The loaded packs are kept open, so streams reading them are not disturbed.
+
+        Returns:
+            True if a pack was added, False otherwise.
+        """
+        loaded = {pack.pack_path for pack in self.packs}
+        paths = sorted(
+            (
+                path
+                for path in self.pack_directory.glob("pack-*.pack")
+                if path not in loaded
+            ),
+            key=lambda path: path.stat().st_mtime_ns,
+            reverse=True,
+        )
+        self.packs[:0] = [packs.Pack(path, self.delta_base_cache) for path in paths]
+        return bool(paths)
+
+    def reload_packs(self) -> None:
+        """Close the loaded packs so they are listed again on next access."""
+        for pack in self.__dict__.pop("packs", []):
+            pack.close()
+        self.delta_base_cache.clear()
+
+    @property
+    def commit_graph_path(self) -> Path:
+        """Get the path of the commit-graph file."""
+        return self.path / INFO_DIRECTORY / COMMIT_GRAPH_FILE
+
+    @cached_property
+    def commit_graph(self) -> CommitGraph | None:
+        """Get the commit graph of the store, None if it has not been written."""
+        try:
+            return commit_graph.CommitGraph(self.commit_graph_path)
+        except FileNotFoundError:
+            return None
+
+    def reload_commit_graph(self) -> None:
+        """Close the commit graph so it is mapped again on next access."""
+        graph = self.__dict__.pop("commit_graph", None)
+        if graph is not None:
+            graph.close()
+
+    def find_pack(self, oid: str) -> Pack | None:
+        """Find the pack holding an object.
+
+        Args:
+            oid: The hex object ID.
+
+        Returns:
+            The pack holding the object, None if it is not packed.
+        """
+        return next((pack for pack in self.packs if oid in pack), None)
+
+    def has_object(self, oid: str) -> bool:
+        """Check whether an object is stored, packed or loose.
+
+        Args:
+            oid: The hex object ID.
+
+        Returns:
+            True if the object exists, False otherwise.
+        """
+        return self.find_pack(oid) is not None or self.object_path(oid).is_file()
+
+    def iter_loose_objects(self) -> Iterator[str]:
+        """Iterate over the IDs of the loose objects.
+
+        Yields:
+            The hex object IDs.
+        """
+        for directory in sorted(self.path.glob("[0-9a-f][0-9a-f]")):
+            for file in sorted(directory.iterdir()):
+                yield directory.name + file.name
+
+    def remove_loose_object(self, oid: str) -> None:
+        """Remove a loose object, and its fan-out directory once empty.
+
+        Args:
+            oid: The hex object ID.
+        """
+        path = self.object_path(oid)
+        path.unlink(missing_ok=True)
+        if not any(path.parent.iterdir()):
+            path.parent.rmdir()
+
+    def write_blob(
+        self,
+        stream: BinaryIO,
+        size: int | None = None,
+        *,
+        chunked: bool = False,
+    ) -> str:
+        """Store the content of a binary stream as a blob.
+
+        Args:
+            stream: The stream to read content from, e.g an open file.
+            size: The number of bytes to store. Defaults to the rest of the stream.
+            chunked: Whether to store the blob as content-defined chunks.
+
+        Returns:
+            The hex object ID of the blob.
+        """
+        return self.write_stream("blob", stream, size, chunked=chunked)
+
+    def write_object(self, obj_type: str, data: bytes) -> str:
+        """Store in-memory content as an object.
+
+        Args:
+            obj_type: The object type e.g 'tree'.
+            data: The object content.
+
+        Returns:
+            The hex object ID.
+        """
+        return self.write_stream(obj_type, io.BytesIO(data), len(data))
+
+    def write_stream(
+        self,
+        obj_type: str,
+        stream: BinaryIO,
+        size: int | None = None,
+        *,
+        chunked: bool = False,
+    ) -> str:
+        """Hash, compress and store the content of a stream as an object.
+
+        The content is processed in chunks into a temporary file which is then
+        renamed to its content address.
+
+        Args:
+            obj_type: The object type e.g 'blob'.
+            stream: The stream to read content from.
+            size: The number of bytes to store. Defaults to the rest of the stream.
+            chunked: Whether to store the blob as content-defined chunks.
+
+        Returns:
+            The hex object ID.
+        """
+        oid, temporary = self.prepare_stream(obj_type, stream, size, chunked=chunked)
+        self.commit_prepared(oid, temporary)
+        return oid
+
+    def prepare_stream(
+        self,
+        obj_type: str,
+        stream: BinaryIO,
+        size: int | None = None,
+        *,
+        chunked: bool = False,
+    ) -> tuple[str, Path]:
+        """Hash and compress a stream into a temporary file without storing it.
+
+        This lets the expensive part of a write happen elsewhere, e.g in a worker
+        process, while `commit_prepared` publishes the object.
+
+        A chunked blob is split into content-defined chunks, see
+        `codetrail.chunking`. Every chunk is stored at once as a blob of its own,
+        unless the store already holds it, and the temporary file holds the manifest
+        listing the chunks. The blob keeps the ID it would have if stored whole.
+
+        Args:
+            obj_type: The object type e.g 'blob'.
+            stream: The stream to read content from.
+            size: The number of bytes to store. Defaults to the rest of the stream.
+            chunked: Whether to store the blob as content-defined chunks.
+
+        Returns:
+            The hex object ID and the temporary file holding the object.
+
+        Raises:
+            InvalidObjectTypeError: If a chunked object is not a blob.
+        """
+        size = stream_size(stream) if size is None else size
+        header = object_header(obj_type, size)
+        if chunked and obj_type != "blob":
+            msg = f"Only blobs can be chunked, not '{obj_type}'"
+            raise exceptions.InvalidObjectTypeError(msg)
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        if chunked:
+            return self._prepare_chunked(stream, size)
+        fd, temporary = tempfile.mkstemp(dir=self.path, prefix="tmp_obj_")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                oid = self._deflate(header, stream, size, file)
+        except BaseException:
+            Path(temporary).unlink(missing_ok=True)
+            raise
+        return oid, Path(temporary)
+
+    def _prepare_chunked(self, stream: BinaryIO, size: int) -> tuple[str, Path]:
+        hasher = new_hasher(object_header("blob", size))
+        chunks = []
+        for chunk in chunking.iter_chunks(stream, size):
+            hasher.update(chunk)
+            chunk_oid = hash_object("blob", chunk)
+            if not self.has_object(chunk_oid):
+                self.write_object("blob", chunk)
+            chunks.append((chunk_oid, len(chunk)))
+
+        stored = sum(chunk_size for _, chunk_size in chunks)
+        if stored != size:
+            msg = f"Stream ended {size - stored} bytes short of {size}"
+            raise exceptions.CorruptObjectError(msg)
+        manifest = chunking.encode_manifest(chunks)
+        header = f"{MANIFEST_TYPE} {len(manifest)}\0".encode()
+
+        fd, temporary = tempfile.mkstemp(dir=self.path, prefix="tmp_obj_")
+        with os.fdopen(fd, "wb") as file:
+            file.write(zlib.compress(header + manifest, OBJECT_COMPRESSION_LEVEL))
+        return hasher.hexdigest(), Path(temporary)
+
+    def is_chunked(self, oid: str) -> bool:
+        """Check whether a loose object is a blob stored as chunks.
+
+        Args:
+            oid: The hex object ID.
+
+        Returns:
+            True if the loose object holds a chunk manifest, False otherwise.
+        """
+        try:
+            file = self.object_path(oid).open("rb")
+        except FileNotFoundError:
+            return False
+        with ObjectStream(file, self.chunk_size) as stream:
+            return stream.obj_type == MANIFEST_TYPE
+
+    def commit_prepared(self, oid: str, temporary: Path) -> None:
+        """Rename a prepared temporary file to its content address.
+
+        Args:
+            oid: The hex object ID.
+            temporary: The temporary file returned by `prepare_stream`.
+        """
+        destination = self.object_path(oid)
+        try:
+            if destination.exists():
+                temporary.unlink()
+                return
+            destination.parent.mkdir(exist_ok=True)
+            temporary.chmod(0o444)
+            temporary.replace(destination)
+        except BaseException:
+            temporary.unlink(missing_ok=True)
+            raise
+
+    def _deflate(
+        self,
+        header: bytes,
+        stream: BinaryIO,
+        size: int,
+        file: BinaryIO,
+    ) -> str:
+        hasher = new_hasher()
+        deflater = zlib.compressobj(OBJECT_COMPRESSION_LEVEL)
+        hasher.update(header)
+        file.write(deflater.compress(header))
+
+        remaining = size
+        while remaining:
+            chunk = stream.read(min(self.chunk_size, remaining))
+            if not chunk:
+                msg = f"Stream ended {remaining} bytes short of {size}"
+                raise exceptions.CorruptObjectError(msg)
+            hasher.update(chunk)
+            file.write(deflater.compress(chunk))
+            remaining -= len(chunk)
+
+        file.write(deflater.flush())
+        return hasher.hexdigest()
+
+    def open_object(self, oid: str) -> ObjectStream:
+        """Open a stored object for streaming reads.
+
+        An object neither packed nor loose may be in a pack written since the packs
+        were listed, such as by a concurrent fetch, so new packs are loaded and the
+        object looked up again. An object still missing from a partial clone is
+        fetched from the promisor remote first.
+
+        Args:
+            oid: The hex object ID.
+
+        Returns:
+            A stream over the object content.
+
+        Raises:
+            ObjectNotFoundError: If the object is not stored.
+        """
+        raw = self.object_cache.get(oid)
+        if raw is not None:
+            return ObjectStream.from_bytes(raw.obj_type, raw.data)
+        pack = self.find_pack(oid)
+        if pack is not None:
+            return pack.open_object(oid, self.chunk_size)
+        try:
+            file = self.object_path(oid).open("rb")
+        except FileNotFoundError as e:
+            if self._load_new_packs():
+                return self.open_object(oid)
+            if self.promisor is not None and self.promisor.fetch(self, [oid]):
+                return self.open_object(oid)
+            msg = f"Object '{oid}' not found"
+            raise exceptions.ObjectNotFoundError(msg) from e
+        stream = ObjectStream(file, self.chunk_size)
+        if stream.obj_type != MANIFEST_TYPE:
+            return stream
+        with stream:
+            chunks = chunking.parse_manifest(stream.read())
+        return ChunkedObjectStream(self, chunks, self.chunk_size)
+
+    def read_object(self, oid: str) -> RawObject:
+        """Read a stored object fully into memory.
+
+        Use `open_object` for blobs that may be large. Objects read are kept in the
+        object cache.
+
+        Args:
+            oid: The hex object ID.
+
+        Returns:
+            The object type and content.
+        """
+        raw = self.object_cache.get(oid)
+        if raw is not None:
+            return raw
+        pack = self.find_pack(oid)
+        if pack is not None:
+            raw = pack.read_object(oid)
+        else:
+            with self.open_object(oid) as stream:
+                raw = RawObject(stream.obj_type, stream.read())
+        self.object_cache.put(oid, raw)
+        return raw
@@ -0,0 +1,205 @@
+"""This module holds the reachability bitmaps of a pack.
+
+A pack can have a sidecar `.bitmap` file holding, for a selection of its commits,
+the set of objects reachable from that commit as a bitmap over the pack: bit `i`
+is set when the object of the `i`-th entry of the pack is reachable. Finding the
+objects reachable from one commit but not from another then takes a few bitwise
+operations instead of a walk over every commit and tree.
+
+Bits follow the order of the entries rather than that of the object IDs, which is
+random: a pack written in recency order, see `reachability.recency_order`, keeps
+the objects reachable from a commit, and the objects of a type, in long runs that
+the EWAH encoding compresses.
+
+Bitmap layout::
+
+    signature (4) | version (4) | pack checksum (20) | bitmap count (4)
+    type bitmaps: one EWAH bitmap per object type, in `OBJECT_TYPES` order
+    bitmaps: N x (index position of the commit (4) | EWAH bitmap)
+    SHA-1 of everything above (20)
+
+Bitmaps are only valid for the pack whose checksum they hold, and only list
+commits whose whole history and trees are in that pack. See `codetrail.ewah` for
+the bitmap encoding.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import tempfile
+from collections.abc import Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from codetrail import ewah
+from codetrail import exceptions
+from codetrail import objects
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+
+    from codetrail.pack_index import PackIndex
+
+BITMAP_SIGNATURE = b"CTBM"
+BITMAP_VERSION = 2
+BITMAP_HEADER = struct.Struct(">4sI20sI")
+POSITION = struct.Struct(">I")
+CHECKSUM_SIZE = 20
+OBJECT_TYPES = ("commit", "tree", "blob", "tag")
+
+
+class PackBitmaps(Mapping[str, int]):
+    """The reachability bitmaps of a pack, by commit ID.
+
+    Bitmaps are decompressed the first time they are looked up.
+
+    Attributes:
+        path: The path of the `.bitmap` file.
+        index: The index of the pack the bitmaps belong to.
+    """
+
+    path: Path
+    index: PackIndex
+
+    def __init__(self, path: Path, index: PackIndex) -> None:
+        """Read a bitmap file and validate it against its pack.
+
+        Args:
+            path: The path of the `.bitmap` file.
+            index: The index of the pack the bitmaps belong to.
+
+        Raises:
+            CorruptObjectError: If the file is not a supported bitmap file, or was
+                written for another pack.
+        """
+        self.path = path
+        self.index = index
+        data = path.read_bytes()
+        body = data[:-CHECKSUM_SIZE]
+        if (
+            len(data) < BITMAP_HEADER.size + CHECKSUM_SIZE
+            or objects.new_hasher(body).digest() != data[-CHECKSUM_SIZE:]
+        ):
+            msg = f"{path.name} is truncated or corrupt"
+            raise exceptions.CorruptObjectError(msg)
+        signature, version, checksum, count = BITMAP_HEADER.unpack_from(body)
+        if signature != BITMAP_SIGNATURE or version != BITMAP_VERSION:
+            msg = f"{path.name} is not a supported bitmap file"
+            raise exceptions.CorruptObjectError(msg)
+        if checksum != index.checksum():
+            msg = f"{path.name} does not match its pack"
+            raise exceptions.CorruptObjectError(msg)
+
+        self._data = body
+        self._types: dict[str, int] = {}
+        offset = BITMAP_HEADER.size
+        for obj_type in OBJECT_TYPES:
+            self._types[obj_type], offset = self._decode(offset)
+        self._offsets: dict[str, int] = {}
+        for _ in range(count):
+            if offset + POSITION.size > len(body):
+                msg = f"{path.name} is truncated or corrupt"
+                raise exceptions.CorruptObjectError(msg)
+            (position,) = POSITION.unpack_from(body, offset)
+            if position >= len(index):
+                msg = f"{path.name} does not match its pack"
+                raise exceptions.CorruptObjectError(msg)
+            offset += POSITION.size
+            self._offsets[index.oid(position).hex()] = offset
+            offset = ewah.span(body, offset)
+        self._bitmaps: dict[str, int] = {}
+
+    def _decode(self, offset: int) -> tuple[int, int]:
+        bitmap, size, end = ewah.decode(self._data, offset)
+        if size != len(self.index):
+            msg = f"{self.path.name} does not match its pack"
+            raise exceptions.CorruptObjectError(msg)
+        return bitmap, end
+
+    def __getitem__(self, oid: str) -> int:
+        """Get the bitmap of the objects reachable from a commit.
+
+        Args:
+            oid: The hex ID of the commit.
+
+        Returns:
+            The bitmap over the pack positions.
+        """
+        bitmap = self._bitmaps.get(oid)
+        if bitmap is None:
+            bitmap, _ = self._decode(self._offsets[oid])
+            self._bitmaps[oid] = bitmap
+        return bitmap
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the commits that have a bitmap.
+
+        Yields:
+            The hex commit IDs.
+        """
+        yield from self._offsets
+
+    def __len__(self) -> int:
+        """Get the number of commits that have a bitmap.
+
+        Returns:
+            The bitmap count.
+        """
+        return len(self._offsets)
+
+    def type_bitmap(self, obj_type: str) -> int:
+        """Get the bitmap of the objects of a type.
+
+        Args:
+            obj_type: The object type e.g 'blob'.
+
+        Returns:
+            The bitmap over the pack positions.
+        """
+        return self._types[obj_type]
+
+
+def write_bitmaps(
+    path: Path,
+    index: PackIndex,
+    types: Iterable[str],
+    bitmaps: Iterable[tuple[str, int]],
+) -> None:
+    """Write the bitmap file of a pack atomically.
+
+    Args:
+        path: The path of the `.bitmap` file.
+        index: The index of the pack.
+        types: The type of every object of the pack, in pack order.
+        bitmaps: The hex ID and reachability bitmap of every selected commit.
+
+    Raises:
+        ObjectNotFoundError: If a selected commit is not in the pack.
+    """
+    size = len(index)
+    by_type: dict[str, list[int]] = {obj_type: [] for obj_type in OBJECT_TYPES}
+    for position, obj_type in enumerate(types):
+        by_type[obj_type].append(position)
+
+    entries = []
+    for oid, bitmap in bitmaps:
+        commit_position = index.position(bytes.fromhex(oid))
+        if commit_position is None:
+            msg = f"Object '{oid}' not found in {index.path.name}"
+            raise exceptions.ObjectNotFoundError(msg)
+        entries.append(POSITION.pack(commit_position) + ewah.encode(bitmap, size))
+
+    header = (BITMAP_SIGNATURE, BITMAP_VERSION, index.checksum(), len(entries))
+    buffer = bytearray(BITMAP_HEADER.pack(*header))
+    for obj_type in OBJECT_TYPES:
+        buffer += ewah.encode(ewah.from_positions(by_type[obj_type]), size)
+    for entry in entries:
+        buffer += entry
+    buffer += objects.new_hasher(buffer).digest()
+
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix="tmp_bitmap_")
+    with os.fdopen(fd, "wb") as file:
+        file.write(buffer)
+    Path(temporary).replace(path)
@@ -0,0 +1,272 @@
+"""This module holds the memory-mapped pack index.
+
+Every pack has a sidecar `.idx` file so objects can be located without scanning the
+pack. The index is memory-mapped and searched in place, so opening it costs one
+`open()` and one `mmap()` and lookups never build a table of every object ID.
+
+Index layout::
+
+    signature (4) | version (4)
+    fanout: 256 x 4-byte cumulative counts of IDs by first byte
+    object IDs: N x 20 bytes, sorted
+    offsets: N x 8-byte pack offsets, in the same order as the IDs
+    pack checksum (20)
+
+The fanout narrows a lookup to the IDs that share the first byte, and a binary
+search over that slice finds the object in O(log n) page touches.
+
+Besides its sorted position, an object has a position in the pack: the rank of its
+entry among the entries of the pack, which reachability bitmaps number objects by.
+The mapping between the two is rebuilt from the offsets the first time it is used.
+"""
+
+from __future__ import annotations
+
+import bisect
+import mmap
+import os
+import struct
+import tempfile
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Self
+
+from codetrail import exceptions
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from types import TracebackType
+
+INDEX_SIGNATURE = b"CTPI"
+INDEX_VERSION = 2
+INDEX_HEADER = struct.Struct(">4sI")
+FANOUT = struct.Struct(">256I")
+FANOUT_ENTRY = struct.Struct(">I")
+OFFSET = struct.Struct(">Q")
+OID_SIZE = 20
+CHECKSUM_SIZE = 20
+
+
+class _ObjectIds:
+    """A sequence view of the sorted object IDs, for use with `bisect`."""
+
+    def __init__(self, view: memoryview) -> None:
+        self.view = view
+        self._count = len(view) // OID_SIZE
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> bytes:
+        start = position * OID_SIZE
+        return self.view[start : start + OID_SIZE].tobytes()
+
+
+class PackIndex:
+    """A memory-mapped pack index.
+
+    Attributes:
+        path: The path of the `.idx` file.
+    """
+
+    path: Path
+
+    def __init__(self, path: Path) -> None:
+        """Map a pack index and validate its header.
+
+        Args:
+            path: The path of the `.idx` file.
+
+        Raises:
+            CorruptObjectError: If the file is not a supported pack index.
+        """
+        self.path = path
+        with path.open("rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        fanout_end = INDEX_HEADER.size + FANOUT.size
+        if len(self._view) < fanout_end + CHECKSUM_SIZE:
+            self.close()
+            msg = f"{path.name} is truncated"
+            raise exceptions.CorruptObjectError(msg)
+        signature, version = INDEX_HEADER.unpack_from(self._view)
+        if signature != INDEX_SIGNATURE or version != INDEX_VERSION:
+            self.close()
+            msg = f"{path.name} is not a supported pack index"
+            raise exceptions.CorruptObjectError(msg)
+
+        self._count = self._bucket_end(0xFF)
+        oids_end = fanout_end + self._count * OID_SIZE
+        offsets_end = oids_end + self._count * OFFSET.size
+        if len(self._view) != offsets_end + CHECKSUM_SIZE:
+            self.close()
+            msg = f"{path.name} does not match its fanout table"
+            raise exceptions.CorruptObjectError(msg)
+        self._oids = _ObjectIds(self._view[fanout_end:oids_end])
+        self._offsets = self._view[oids_end:offsets_end]
+
+    def _bucket_end(self, first_byte: int) -> int:
+        offset = INDEX_HEADER.size + first_byte * FANOUT_ENTRY.size
+        (count,) = FANOUT_ENTRY.unpack_from(self._view, offset)
+        return int(count)
+
+    def __len__(self) -> int:
+        """Get the number of objects in the index.
+
+        Returns:
+            The object count.
+        """
+        return self._count
+
+    def position(self, oid: bytes) -> int | None:
+        """Find the sorted position of an object ID.
+
+        Args:
+            oid: The binary object ID.
+
+        Returns:
+            The position of the ID, None if it is not indexed.
+        """
+        low = self._bucket_end(oid[0] - 1) if oid[0] else 0
+        high = self._bucket_end(oid[0])
+        position = bisect.bisect_left(self._oids, oid, low, high)
+        if position < high and self._oids[position] == oid:
+            return position
+        return None
+
+    def oid(self, position: int) -> bytes:
+        """Get the object ID stored at a sorted position.
+
+        Args:
+            position: The sorted position.
+
+        Returns:
+            The binary object ID.
+        """
+        return self._oids[position]
+
+    def offset(self, position: int) -> int:
+        """Get the pack offset stored at a sorted position.
+
+        Args:
+            position: The sorted position.
+
+        Returns:
+            The offset of the object's entry in the pack.
+        """
+        (offset,) = OFFSET.unpack_from(self._offsets, position * OFFSET.size)
+        return int(offset)
+
+    @cached_property
+    def pack_order(self) -> list[int]:
+        """Get the sorted positions of the objects, in the order of their entries."""
+        offsets = struct.unpack(f">{self._count}Q", self._offsets)
+        return sorted(range(self._count), key=offsets.__getitem__)
+
+    @cached_property
+    def _pack_positions(self) -> list[int]:
+        pack_positions = [0] * self._count
+        for pack_position, position in enumerate(self.pack_order):
+            pack_positions[position] = pack_position
+        return pack_positions
+
+    def pack_position(self, oid: bytes) -> int | None:
+        """Find the position of an object's entry among the entries of the pack.
+
+        Args:
+            oid: The binary object ID.
+
+        Returns:
+            The pack position of the object, None if it is not indexed.
+        """
+        position = self.position(oid)
+        if position is None:
+            return None
+        return self._pack_positions[position]
+
+    def pack_oid(self, pack_position: int) -> bytes:
+        """Get the object ID of the entry at a pack position.
+
+        Args:
+            pack_position: The pack position.
+
+        Returns:
+            The binary object ID.
+        """
+        return self._oids[self.pack_order[pack_position]]
+
+    def checksum(self) -> bytes:
+        """Get the checksum of the pack the index belongs to.
+
+        Returns:
+            The binary pack checksum.
+        """
+        return self._view[-CHECKSUM_SIZE:].tobytes()
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Iterate over the indexed object IDs in sorted order.
+
+        Yields:
+            The binary object IDs.
+        """
+        for position in range(self._count):
+            yield self._oids[position]
+
+    def close(self) -> None:
+        """Release the views and unmap the index."""
+        if hasattr(self, "_oids"):
+            self._oids.view.release()
+            self._offsets.release()
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self) -> Self:
+        """Enter the context manager.
+
+        Returns:
+            The index itself.
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Unmap the index when leaving the context manager."""
+        self.close()
+
+
+def write_index(
+    path: Path,
+    entries: Iterable[tuple[bytes, int]],
+    checksum: bytes,
+) -> None:
+    """Write a pack index atomically.
+
+    Args:
+        path: The path of the `.idx` file.
+        entries: The binary ID and pack offset of every object, in any order.
+        checksum: The checksum of the pack the index belongs to.
+    """
+    ordered = sorted(entries)
+    counts = [0] * 256
+    for oid, _ in ordered:
+        counts[oid[0]] += 1
+    fanout, total = [], 0
+    for count in counts:
+        total += count
+        fanout.append(total)
+
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix="tmp_idx_")
+    with os.fdopen(fd, "wb") as file:
+        file.write(INDEX_HEADER.pack(INDEX_SIGNATURE, INDEX_VERSION))
+        file.write(FANOUT.pack(*fanout))
+        file.writelines(oid for oid, _ in ordered)
+        file.writelines(OFFSET.pack(offset) for _, offset in ordered)
+        file.write(checksum)
+    Path(temporary).replace(path)
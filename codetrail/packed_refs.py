@@ -0,0 +1,201 @@
+"""This module holds the packed-refs file.
+
+A repository with tens of thousands of tags pays one `open()` per loose reference
+file and a directory scan to list them. The `packed-refs` file holds many
+references in a single sorted text file::
+
+    # pack-refs with: peeled sorted
+    <object ID> <reference name>
+    ^<peeled object ID>
+
+Records are sorted by reference name. A record for an annotated tag is followed
+by a `^` line holding the ID of the commit the tag points to, so listing tags
+with their commits reads no object. The file is memory-mapped and a lookup is a
+binary search over byte offsets, so it touches O(log n) pages.
+
+Loose reference files take precedence over the records of the packed file, see
+`codetrail.refs`.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+from typing import Self
+
+from codetrail import exceptions
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from types import TracebackType
+
+PACKED_REFS_HEADER = b"# pack-refs with: peeled sorted\n"
+PEELED_PREFIX = b"^"
+OID_LENGTH = 40
+
+
+class PackedRef(NamedTuple):
+    """A record of the packed-refs file.
+
+    Attributes:
+        name: The reference name e.g 'refs/tags/v1.0'.
+        oid: The hex ID of the object the reference holds.
+        peeled: The hex ID of the commit an annotated tag points to, None for
+            references to other objects.
+    """
+
+    name: str
+    oid: str
+    peeled: str | None = None
+
+
+class PackedRefs:
+    """A memory-mapped packed-refs file.
+
+    Attributes:
+        path: The path of the packed-refs file.
+    """
+
+    path: Path
+
+    def __init__(self, path: Path) -> None:
+        """Map a packed-refs file and validate its header.
+
+        Args:
+            path: The path of the packed-refs file.
+
+        Raises:
+            CorruptObjectError: If the file is not a sorted packed-refs file.
+        """
+        self.path = path
+        self._data: mmap.mmap | bytes = b""
+        with path.open("rb") as file:
+            if os.fstat(file.fileno()).st_size:
+                self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data and self._data[: len(PACKED_REFS_HEADER)] != PACKED_REFS_HEADER:
+            self.close()
+            msg = f"{path.name} is not a sorted packed-refs file"
+            raise exceptions.CorruptObjectError(msg)
+        self._start = len(PACKED_REFS_HEADER) if self._data else 0
+
+    def _line_end(self, start: int) -> int:
+        end = self._data.find(b"\n", start)
+        return len(self._data) if end == -1 else end + 1
+
+    def _record_start(self, offset: int, low: int) -> int:
+        start = max(low, self._data.rfind(b"\n", low, offset) + 1)
+        if start > low and self._data[start : start + 1] == PEELED_PREFIX:
+            start = max(low, self._data.rfind(b"\n", low, start - 1) + 1)
+        return start
+
+    def _record(self, start: int) -> tuple[PackedRef, int]:
+        end = self._line_end(start)
+        line = self._data[start:end].rstrip(b"\n")
+        if len(line) <= OID_LENGTH + 1 or line[OID_LENGTH : OID_LENGTH + 1] != b" ":
+            msg = f"Malformed line {line!r} in {self.path.name}"
+            raise exceptions.CorruptObjectError(msg)
+        oid = line[:OID_LENGTH].decode()
+        name = line[OID_LENGTH + 1 :].decode()
+        peeled = None
+        if self._data[end : end + 1] == PEELED_PREFIX:
+            peeled_end = self._line_end(end)
+            peeled = self._data[end + 1 : peeled_end].rstrip(b"\n").decode()
+            end = peeled_end
+        return PackedRef(name, oid, peeled), end
+
+    def _seek(self, name: str) -> int:
+        low, high = self._start, len(self._data)
+        while low < high:
+            start = self._record_start((low + high) // 2, low)
+            record, end = self._record(start)
+            if record.name < name:
+                low = end
+            else:
+                high = start
+        return low
+
+    def get(self, name: str) -> PackedRef | None:
+        """Look up a reference.
+
+        Args:
+            name: The reference name e.g 'refs/heads/master'.
+
+        Returns:
+            The record of the reference, None if it is not packed.
+        """
+        start = self._seek(name)
+        if start >= len(self._data):
+            return None
+        record, _ = self._record(start)
+        return record if record.name == name else None
+
+    def iter_prefix(self, prefix: str = "") -> Iterator[PackedRef]:
+        """Iterate over the references whose name starts with a prefix.
+
+        Args:
+            prefix: The name prefix e.g 'refs/heads/'.
+
+        Yields:
+            The records, sorted by name.
+        """
+        start = self._seek(prefix)
+        while start < len(self._data):
+            record, start = self._record(start)
+            if not record.name.startswith(prefix):
+                return
+            yield record
+
+    def __iter__(self) -> Iterator[PackedRef]:
+        """Iterate over every packed reference.
+
+        Yields:
+            The records, sorted by name.
+        """
+        yield from self.iter_prefix()
+
+    def close(self) -> None:
+        """Unmap the file."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b""
+
+    def __enter__(self) -> Self:
+        """Enter the context manager.
+
+        Returns:
+            The packed references themselves.
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Unmap the file when leaving the context manager."""
+        self.close()
+
+
+def write_packed_refs(path: Path, records: Iterable[PackedRef]) -> None:
+    """Write a packed-refs file atomically.
+
+    Args:
+        path: The path of the packed-refs file.
+        records: The references, in any order.
+    """
+    buffer = bytearray(PACKED_REFS_HEADER)
+    for record in sorted(records):
+        buffer += f"{record.oid} {record.name}\n".encode()
+        if record.peeled is not None:
+            buffer += f"^{record.peeled}\n".encode()
+
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix="tmp_packed_refs_")
+    with os.fdopen(fd, "wb") as file:
+        file.write(buffer)
+    Path(temporary).replace(path)
@@ -0,0 +1,971 @@
+"""This module holds the packfile format.
+
+A pack stores many objects in a single file so a repository with hundreds of
+thousands of objects does not need an inode and an `open()` per object. Objects in a
+pack are zlib-compressed and may be stored as a delta against an earlier object in
+the same pack.
+
+Pack layout::
+
+    signature (4) | version (4) | object count (4)
+    entries...
+    SHA-1 of everything above (20)
+
+Each entry starts with a variable-length header holding its type and inflated size.
+Delta entries are followed by the negative offset of their base entry, then by the
+zlib-compressed delta. A delta is a sequence of copy (from base) and insert
+(literal) instructions.
+
+Packs sent over the wire may be thin: their deltas may also name a base by object
+ID, for a base the receiver already has but the pack does not hold. Such entries
+never reach the disk, `index_pack` stores them whole.
+
+Every pack has a sidecar `.idx` file mapping object IDs to entry offsets, see
+`codetrail.pack_index`.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import struct
+import tempfile
+import zlib
+from collections import deque
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import BinaryIO
+from typing import NamedTuple
+
+from codetrail import exceptions
+from codetrail import objects
+from codetrail import pack_bitmaps
+from codetrail import pack_index
+from codetrail.conf import DELTA_BASE_CACHE_LIMIT
+from codetrail.conf import OBJECT_CHUNK_SIZE
+from codetrail.conf import OBJECT_COMPRESSION_LEVEL
+from codetrail.conf import PACK_BIG_FILE_THRESHOLD
+from codetrail.object_cache import ObjectCache
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from collections.abc import Mapping
+
+PACK_SIGNATURE = b"CTPK"
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct(">4sII")
+
+ENTRY_HEADER_LIMIT = 32
+
+TYPE_CODES = {"commit": 1, "tree": 2, "blob": 3, "tag": 4}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+OFS_DELTA = 6
+REF_DELTA = 7
+
+DELTA_BLOCK_SIZE = 16
+MAX_COPY_SIZE = 0xFFFFFF
+MAX_INSERT_SIZE = 0x7F
+
+
+class PackEntry(NamedTuple):
+    """The header of an entry in a pack.
+
+    Attributes:
+        type_code: The entry type code, either an object type or a delta.
+        size: The inflated size of the entry data.
+        data_offset: The offset where the compressed data starts.
+        base_offset: The offset of the delta base, for delta entries.
+    """
+
+    type_code: int
+    size: int
+    data_offset: int
+    base_offset: int | None
+
+
+def encode_varint(value: int) -> bytes:
+    """Encode a non-negative integer as a little-endian base-128 varint.
+
+    Args:
+        value: The integer to encode.
+
+    Returns:
+        The encoded bytes.
+    """
+    out = bytearray()
+    while value > 0x7F:  # noqa: PLR2004
+        out.append(0x80 | (value & 0x7F))
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(data: bytes, position: int) -> tuple[int, int]:
+    """Decode a little-endian base-128 varint.
+
+    Args:
+        data: The buffer to decode from.
+        position: The offset of the first byte.
+
+    Returns:
+        The decoded value and the offset just past it.
+    """
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, position
+
+
+def encode_entry_header(type_code: int, size: int) -> bytes:
+    """Encode the type and inflated size that start a pack entry.
+
+    Args:
+        type_code: The entry type code.
+        size: The inflated size of the entry data.
+
+    Returns:
+        The encoded header.
+    """
+    out = bytearray()
+    byte = (type_code << 4) | (size & 0x0F)
+    size >>= 4
+    while size:
+        out.append(byte | 0x80)
+        byte = size & 0x7F
+        size >>= 7
+    out.append(byte)
+    return bytes(out)
+
+
+def encode_offset(offset: int) -> bytes:
+    """Encode the distance from a delta entry back to its base.
+
+    Args:
+        offset: The positive distance in bytes.
+
+    Returns:
+        The encoded offset.
+    """
+    out = [offset & 0x7F]
+    offset >>= 7
+    while offset:
+        offset -= 1
+        out.append(0x80 | (offset & 0x7F))
+        offset >>= 7
+    return bytes(reversed(out))
+
+
+def decode_entry_header(data: bytes, offset: int) -> PackEntry:
+    """Decode the header of the entry stored at `offset`.
+
+    Args:
+        data: The bytes of the pack starting at `offset`.
+        offset: The offset of the entry in the pack.
+
+    Returns:
+        The decoded entry header.
+    """
+    byte = data[0]
+    type_code = (byte >> 4) & 0x07
+    size = byte & 0x0F
+    shift, position = 4, 1
+    while byte & 0x80:
+        byte = data[position]
+        position += 1
+        size |= (byte & 0x7F) << shift
+        shift += 7
+
+    base_offset = None
+    if type_code == OFS_DELTA:
+        byte = data[position]
+        position += 1
+        distance = byte & 0x7F
+        while byte & 0x80:
+            byte = data[position]
+            position += 1
+            distance = ((distance + 1) << 7) | (byte & 0x7F)
+        base_offset = offset - distance
+
+    return PackEntry(type_code, size, offset + position, base_offset)
+
+
+def read_entry_header(file: BinaryIO, offset: int) -> PackEntry:
+    """Read the header of the entry stored at `offset` in a pack file.
+
+    Args:
+        file: The open pack file.
+        offset: The offset of the entry.
+
+    Returns:
+        The decoded entry header.
+    """
+    file.seek(offset)
+    return decode_entry_header(file.read(ENTRY_HEADER_LIMIT), offset)
+
+
+def _common_length(base: bytes, base_offset: int, target: bytes, offset: int) -> int:
+    limit = min(len(base) - base_offset, len(target) - offset, MAX_COPY_SIZE)
+    length, step = 0, 4096
+    while step:
+        while length + step <= limit and (
+            base[base_offset + length : base_offset + length + step]
+            == target[offset + length : offset + length + step]
+        ):
+            length += step
+        step //= 8
+    return length
+
+
+def _emit_insert(out: bytearray, literal: bytes) -> None:
+    for start in range(0, len(literal), MAX_INSERT_SIZE):
+        chunk = literal[start : start + MAX_INSERT_SIZE]
+        out.append(len(chunk))
+        out += chunk
+
+
+def _emit_copy(out: bytearray, offset: int, size: int) -> None:
+    opcode, arguments = 0x80, bytearray()
+    for bit, value, width in ((0, offset, 4), (4, size, 3)):
+        for i in range(width):
+            byte = (value >> (8 * i)) & 0xFF
+            if byte:
+                opcode |= 1 << (bit + i)
+                arguments.append(byte)
+    out.append(opcode)
+    out += arguments
+
+
+def create_delta(base: bytes, target: bytes) -> bytes:
+    """Encode `target` as copy and insert instructions against `base`.
+
+    The base is indexed by fixed-size blocks, and every position in the target is
+    looked up in that index. Matches are extended in both directions and emitted as
+    copies, everything in between as literal inserts.
+
+    Args:
+        base: The content the delta is computed against.
+        target: The content the delta reproduces.
+
+    Returns:
+        The encoded delta.
+    """
+    out = bytearray(encode_varint(len(base)) + encode_varint(len(target)))
+    blocks: dict[bytes, int] = {}
+    for start in range(0, len(base) - DELTA_BLOCK_SIZE + 1, DELTA_BLOCK_SIZE):
+        blocks.setdefault(base[start : start + DELTA_BLOCK_SIZE], start)
+
+    position = literal_start = 0
+    last_block = len(target) - DELTA_BLOCK_SIZE
+    while position <= last_block:
+        base_offset = blocks.get(target[position : position + DELTA_BLOCK_SIZE])
+        if base_offset is None:
+            position += 1
+            continue
+
+        while (
+            position > literal_start
+            and base_offset > 0
+            and base[base_offset - 1] == target[position - 1]
+        ):
+            position -= 1
+            base_offset -= 1
+
+        length = _common_length(base, base_offset, target, position)
+        _emit_insert(out, target[literal_start:position])
+        _emit_copy(out, base_offset, length)
+        position += length
+        literal_start = position
+
+    _emit_insert(out, target[literal_start:])
+    return bytes(out)
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Reconstruct content from its base and a delta.
+
+    Args:
+        base: The content the delta was computed against.
+        delta: The encoded delta.
+
+    Returns:
+        The reconstructed content.
+
+    Raises:
+        CorruptObjectError: If the delta does not match the base or is malformed.
+    """
+    base_size, position = decode_varint(delta, 0)
+    target_size, position = decode_varint(delta, position)
+    if base_size != len(base):
+        msg = f"Delta expects a {base_size} byte base, got {len(base)} bytes"
+        raise exceptions.CorruptObjectError(msg)
+
+    out = bytearray()
+    while position < len(delta):
+        opcode = delta[position]
+        position += 1
+        if opcode & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if opcode & (1 << i):
+                    offset |= delta[position] << (8 * i)
+                    position += 1
+            for i in range(3):
+                if opcode & (1 << (4 + i)):
+                    size |= delta[position] << (8 * i)
+                    position += 1
+            out += base[offset : offset + (size or 0x10000)]
+        elif opcode:
+            out += delta[position : position + opcode]
+            position += opcode
+        else:
+            msg = "Delta contains a reserved instruction"
+            raise exceptions.CorruptObjectError(msg)
+
+    if len(out) != target_size:
+        msg = f"Delta produced {len(out)} bytes instead of {target_size}"
+        raise exceptions.CorruptObjectError(msg)
+    return bytes(out)
+
+
+def _inflate(file: BinaryIO, size: int) -> bytes:
+    inflater = zlib.decompressobj()
+    out = bytearray()
+    while len(out) < size and not inflater.eof:
+        compressed = inflater.unconsumed_tail or file.read(OBJECT_CHUNK_SIZE)
+        if not compressed:
+            break
+        out += inflater.decompress(compressed, size - len(out))
+    if len(out) != size:
+        msg = f"Pack entry inflated to {len(out)} bytes instead of {size}"
+        raise exceptions.CorruptObjectError(msg)
+    return bytes(out)
+
+
+class Pack:
+    """A pack and its index.
+
+    Attributes:
+        pack_path: The path of the `.pack` file.
+        index_path: The path of the `.idx` file.
+        bitmap_path: The path of the optional `.bitmap` file.
+    """
+
+    pack_path: Path
+    index_path: Path
+    bitmap_path: Path
+
+    def __init__(
+        self,
+        pack_path: Path,
+        delta_base_cache: ObjectCache | None = None,
+    ) -> None:
+        """Open a pack by mapping its index.
+
+        Args:
+            pack_path: The path of the `.pack` file.
+            delta_base_cache: The cache of the objects rebuilt while resolving delta
+                chains, None to rebuild every chain from its root.
+        """
+        self.pack_path = pack_path
+        self.index_path = pack_path.with_suffix(".idx")
+        self.bitmap_path = pack_path.with_suffix(".bitmap")
+        self.index = pack_index.PackIndex(self.index_path)
+        self.delta_base_cache = delta_base_cache
+
+    def __contains__(self, oid: str) -> bool:
+        """Check whether the pack holds an object.
+
+        Args:
+            oid: The hex object ID.
+
+        Returns:
+            True if the object is in the pack, False otherwise.
+        """
+        return self.index.position(bytes.fromhex(oid)) is not None
+
+    def __len__(self) -> int:
+        """Get the number of objects in the pack.
+
+        Returns:
+            The object count.
+        """
+        return len(self.index)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the IDs of the objects in the pack.
+
+        Yields:
+            The hex object IDs in sorted order.
+        """
+        for oid in self.index:
+            yield oid.hex()
+
+    def offset(self, oid: str) -> int:
+        """Get the offset of an object's entry in the pack.
+
+        Args:
+            oid: The hex object ID.
+
+        Returns:
+            The entry offset.
+
+        Raises:
+            ObjectNotFoundError: If the object is not in the pack.
+        """
+        position = self.index.position(bytes.fromhex(oid))
+        if position is None:
+            msg = f"Object '{oid}' not found in {self.pack_path.name}"
+            raise exceptions.ObjectNotFoundError(msg)
+        return self.index.offset(position)
+
+    @cached_property
+    def bitmaps(self) -> pack_bitmaps.PackBitmaps | None:
+        """Get the reachability bitmaps of the pack, None if it has none."""
+        try:
+            return pack_bitmaps.PackBitmaps(self.bitmap_path, self.index)
+        except FileNotFoundError:
+            return None
+
+    def object_types(self) -> Iterator[str]:
+        """Iterate over the types of the objects in the pack.
+
+        Delta entries are resolved by following their chain of entry headers, so
+        no object is inflated.
+
+        Yields:
+            The type of every object, in pack order.
+        """
+        types: dict[int, int] = {}
+        with self.pack_path.open("rb") as file:
+            for position in self.index.pack_order:
+                chain = []
+                offset = self.index.offset(position)
+                while offset not in types:
+                    chain.append(offset)
+                    entry = read_entry_header(file, offset)
+                    if entry.base_offset is None:
+                        types[offset] = entry.type_code
+                        break
+                    offset = entry.base_offset
+                type_code = types[offset]
+                for link in chain:
+                    types[link] = type_code
+                yield TYPE_NAMES[type_code]
+
+    def close(self) -> None:
+        """Unmap the pack index."""
+        self.index.close()
+
+    def _cached_base(self, offset: int) -> objects.RawObject | None:
+        if self.delta_base_cache is None:
+            return None
+        return self.delta_base_cache.get((self.pack_path, offset))
+
+    def _cache_base(self, offset: int, raw: objects.RawObject) -> None:
+        if self.delta_base_cache is not None:
+            self.delta_base_cache.put((self.pack_path, offset), raw)
+
+    def read_object(self, oid: str) -> objects.RawObject:
+        """Read an object from the pack, resolving its delta chain.
+
+        The chain is followed down to its root or to the nearest base held by the
+        delta-base cache, and every base rebuilt on the way up is cached.
+
+        Args:
+            oid: The hex object ID.
+
+        Returns:
+            The object type and content.
+        """
+        offset = self.offset(oid)
+        with self.pack_path.open("rb") as file:
+            chain: list[tuple[int, PackEntry]] = []
+            raw = self._cached_base(offset)
+            while raw is None:
+                entry = read_entry_header(file, offset)
+                if entry.base_offset is None:
+                    file.seek(entry.data_offset)
+                    data = _inflate(file, entry.size)
+                    raw = objects.RawObject(TYPE_NAMES[entry.type_code], data)
+                    if chain:
+                        self._cache_base(offset, raw)
+                    break
+                chain.append((offset, entry))
+                offset = entry.base_offset
+                raw = self._cached_base(offset)
+
+            while chain:
+                delta_offset, delta_entry = chain.pop()
+                file.seek(delta_entry.data_offset)
+                data = apply_delta(raw.data, _inflate(file, delta_entry.size))
+                raw = objects.RawObject(raw.obj_type, data)
+                if chain:
+                    self._cache_base(delta_offset, raw)
+        return raw
+
+    def open_object(
+        self,
+        oid: str,
+        chunk_size: int = OBJECT_CHUNK_SIZE,
+    ) -> objects.ObjectStream:
+        """Open an object in the pack for streaming reads.
+
+        Whole objects are inflated lazily from the pack file; deltified objects are
+        small by construction and are reconstructed in memory.
+
+        Args:
+            oid: The hex object ID.
+            chunk_size: The number of compressed bytes read at a time.
+
+        Returns:
+            A stream over the object content.
+        """
+        offset = self.offset(oid)
+        with contextlib.ExitStack() as stack:
+            file = stack.enter_context(self.pack_path.open("rb"))
+            entry = read_entry_header(file, offset)
+            if entry.base_offset is None:
+                file.seek(entry.data_offset)
+                header = (TYPE_NAMES[entry.type_code], entry.size)
+                stream = objects.ObjectStream(file, chunk_size, header=header)
+                stack.pop_all()
+                return stream
+
+        obj = self.read_object(oid)
+        return objects.ObjectStream.from_bytes(obj.obj_type, obj.data)
+
+
+class _Candidate(NamedTuple):
+    oid: str
+    obj_type: str
+    data: bytes
+    depth: int
+
+
+class _Delta(NamedTuple):
+    base: str
+    size: int
+    compressed: bytes
+
+
+class PackWriter:
+    """Write objects from an object store into a new pack.
+
+    Objects are sorted by type and decreasing size so that similar objects sit next
+    to each other, and each object is deltified against the best of the previous
+    `window` objects of the same type. `write` then lays the entries out in the
+    order it is given, moving the base of a delta before it, while `write_stream`
+    keeps the delta order.
+
+    Attributes:
+        store: The object store to read objects from.
+        window: The number of previous objects considered as delta bases.
+        depth: The maximum length of a delta chain.
+    """
+
+    store: objects.ObjectStore
+    window: int
+    depth: int
+
+    def __init__(self, store: objects.ObjectStore, window: int, depth: int) -> None:
+        """Initialize a pack writer.
+
+        Args:
+            store: The object store to read objects from.
+            window: The number of previous objects considered as delta bases.
+            depth: The maximum length of a delta chain.
+        """
+        self.store = store
+        self.window = window
+        self.depth = depth
+
+    def _sorted_objects(self, oids: Iterable[str]) -> list[tuple[str, str, int]]:
+        headers = []
+        for oid in set(oids):
+            with self.store.open_object(oid) as stream:
+                headers.append((stream.obj_type, stream.size, oid))
+        headers.sort(key=lambda header: (header[0], -header[1], header[2]))
+        return [(oid, obj_type, size) for obj_type, size, oid in headers]
+
+    def _best_delta(
+        self,
+        data: bytes,
+        candidates: deque[_Candidate],
+    ) -> tuple[_Candidate, bytes] | None:
+        best = None
+        max_size = len(data) // 2
+        for candidate in candidates:
+            if candidate.depth >= self.depth:
+                continue
+            if len(data) - len(candidate.data) >= max_size:
+                continue
+            delta = create_delta(candidate.data, data)
+            if len(delta) < max_size:
+                best, max_size = (candidate, delta), len(delta)
+        return best
+
+    def write(self, pack_directory: Path, oids: Iterable[str]) -> Pack:
+        """Write the given objects into a new pack and index.
+
+        Args:
+            pack_directory: The directory where the pack is created.
+            oids: The IDs of the objects to pack, in the order their entries are
+                written, e.g `reachability.recency_order`.
+
+        Returns:
+            The new pack.
+        """
+        pack_directory.mkdir(parents=True, exist_ok=True)
+        order = list(dict.fromkeys(oids))
+        entries = self._sorted_objects(order)
+        deltas = self._find_deltas(entries, {})
+        headers = {oid: (oid, obj_type, size) for oid, obj_type, size in entries}
+        fd, temporary = tempfile.mkstemp(dir=pack_directory, prefix="tmp_pack_")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                output = _PackOutput(file)
+                offsets = self._write_entries(
+                    output,
+                    [headers[oid] for oid in order],
+                    deltas,
+                )
+                checksum = output.finish()
+            return _install(pack_directory, Path(temporary), offsets, checksum)
+        except BaseException:
+            Path(temporary).unlink(missing_ok=True)
+            raise
+
+    def write_stream(
+        self,
+        file: BinaryIO,
+        oids: Iterable[str],
+        bases: Mapping[str, str] | None = None,
+    ) -> int:
+        """Write the given objects as a pack to a stream that cannot seek, e.g a pipe.
+
+        With `bases`, the pack is thin: an object may be stored as a delta against
+        its suggested base, which the receiver must already have.
+
+        Args:
+            file: The stream receiving the pack.
+            oids: The IDs of the objects to pack.
+            bases: The hex ID of an object outside the pack suggested as the delta
+                base of each object.
+
+        Returns:
+            The number of objects written.
+        """
+        entries = self._sorted_objects(oids)
+        deltas = self._find_deltas(entries, bases or {})
+        output = _PackOutput(file)
+        self._write_entries(output, entries, deltas)
+        output.finish()
+        return len(entries)
+
+    def _find_deltas(
+        self,
+        entries: list[tuple[str, str, int]],
+        bases: Mapping[str, str],
+    ) -> dict[str, _Delta]:
+        deltas: dict[str, _Delta] = {}
+        window: deque[_Candidate] = deque(maxlen=max(self.window, 0))
+        for oid, obj_type, size in entries:
+            if size > PACK_BIG_FILE_THRESHOLD:
+                continue
+            if window and window[-1].obj_type != obj_type:
+                window.clear()
+            data = self.store.read_object(oid).data
+            best = self._best_delta(data, window)
+            thin = self._thin_delta(data, bases.get(oid), best)
+            depth = 0
+            if thin is not None:
+                base_oid, delta = thin
+                deltas[oid] = _Delta(base_oid, len(delta), _compress(delta))
+            elif best is not None:
+                base, delta = best
+                deltas[oid] = _Delta(base.oid, len(delta), _compress(delta))
+                depth = base.depth + 1
+            window.append(_Candidate(oid, obj_type, data, depth))
+        return deltas
+
+    def _write_entries(
+        self,
+        output: _PackOutput,
+        entries: list[tuple[str, str, int]],
+        deltas: Mapping[str, _Delta],
+    ) -> dict[str, int]:
+        output.write(PACK_HEADER.pack(PACK_SIGNATURE, PACK_VERSION, len(entries)))
+        headers = {entry[0]: entry for entry in entries}
+        offsets: dict[str, int] = {}
+        for entry in entries:
+            chain = [entry]
+            while (delta := deltas.get(chain[-1][0])) is not None and (
+                delta.base in headers and delta.base not in offsets
+            ):
+                chain.append(headers[delta.base])
+            for link in reversed(chain):
+                if link[0] not in offsets:
+                    offsets[link[0]] = output.offset
+                    self._write_entry(output, link, deltas.get(link[0]), offsets)
+        return offsets
+
+    def _write_entry(
+        self,
+        output: _PackOutput,
+        entry: tuple[str, str, int],
+        delta: _Delta | None,
+        offsets: Mapping[str, int],
+    ) -> None:
+        oid, obj_type, size = entry
+        if delta is None and size > PACK_BIG_FILE_THRESHOLD:
+            self._write_streamed(output, oid, obj_type, size)
+        elif delta is None:
+            data = self.store.read_object(oid).data
+            output.write(encode_entry_header(TYPE_CODES[obj_type], len(data)))
+            output.write(_compress(data))
+        elif delta.base in offsets:
+            output.write(encode_entry_header(OFS_DELTA, delta.size))
+            output.write(encode_offset(offsets[oid] - offsets[delta.base]))
+            output.write(delta.compressed)
+        else:
+            output.write(encode_entry_header(REF_DELTA, delta.size))
+            output.write(bytes.fromhex(delta.base))
+            output.write(delta.compressed)
+
+    def _thin_delta(
+        self,
+        data: bytes,
+        base_oid: str | None,
+        best: tuple[_Candidate, bytes] | None,
+    ) -> tuple[str, bytes] | None:
+        if base_oid is None:
+            return None
+        delta = create_delta(self.store.read_object(base_oid).data, data)
+        limit = len(data) // 2 if best is None else len(best[1])
+        return (base_oid, delta) if len(delta) < limit else None
+
+    def _write_streamed(
+        self,
+        output: _PackOutput,
+        oid: str,
+        obj_type: str,
+        size: int,
+    ) -> None:
+        output.write(encode_entry_header(TYPE_CODES[obj_type], size))
+        deflater = zlib.compressobj(OBJECT_COMPRESSION_LEVEL)
+        with self.store.open_object(oid) as stream:
+            for chunk in stream:
+                output.write(deflater.compress(chunk))
+        output.write(deflater.flush())
+
+
+def _compress(data: bytes) -> bytes:
+    return zlib.compress(data, OBJECT_COMPRESSION_LEVEL)
+
+
+class _PackOutput:
+    """A pack being written front to back, tracking its size and checksum."""
+
+    def __init__(self, file: BinaryIO) -> None:
+        self.file = file
+        self.offset = 0
+        self.hasher = objects.new_hasher()
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+        self.hasher.update(data)
+        self.offset += len(data)
+
+    def finish(self) -> bytes:
+        checksum = self.hasher.digest()
+        self.file.write(checksum)
+        return checksum
+
+
+def _install(
+    pack_directory: Path,
+    temporary: Path,
+    offsets: Mapping[str, int],
+    checksum: bytes,
+) -> Pack:
+    name = f"pack-{checksum.hex()}"
+    pack_index.write_index(
+        pack_directory / f"{name}.idx",
+        ((bytes.fromhex(oid), offset) for oid, offset in offsets.items()),
+        checksum,
+    )
+    temporary.replace(pack_directory / f"{name}.pack")
+    return Pack(pack_directory / f"{name}.pack")
+
+
+class _PackInput:
+    """A pack being read front to back from a stream, tracking its checksum."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        self.offset = 0
+        self.hasher = objects.new_hasher()
+        self._buffer = bytearray()
+
+    def _fill(self) -> None:
+        chunk = self.stream.read(OBJECT_CHUNK_SIZE)
+        if not chunk:
+            msg = f"Pack stream ended after {self.offset} bytes"
+            raise exceptions.CorruptObjectError(msg)
+        self._buffer += chunk
+
+    def _consume(self, data: bytes) -> None:
+        self.hasher.update(data)
+        self.offset += len(data)
+
+    def read(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            self._fill()
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self._consume(data)
+        return data
+
+    def read_entry_header(self) -> tuple[PackEntry, str | None]:
+        offset = self.offset
+        header = self.read(1)
+        while header[-1] & 0x80:
+            header += self.read(1)
+        type_code = (header[0] >> 4) & 0x07
+        base_oid = None
+        if type_code == OFS_DELTA:
+            header += self.read(1)
+            while header[-1] & 0x80:
+                header += self.read(1)
+        elif type_code == REF_DELTA:
+            base_oid = self.read(20).hex()
+        return decode_entry_header(header, offset), base_oid
+
+    def inflate(self, size: int) -> tuple[bytes, bytes]:
+        inflater = zlib.decompressobj()
+        data = bytearray()
+        compressed = bytearray()
+        while not inflater.eof and len(data) <= size:
+            if not self._buffer:
+                self._fill()
+            available = bytes(self._buffer)
+            data += inflater.decompress(available, size + 1 - len(data))
+            rest = len(inflater.unconsumed_tail) + len(inflater.unused_data)
+            used = available[: len(available) - rest]
+            del self._buffer[: len(used)]
+            compressed += used
+            self._consume(used)
+        if not inflater.eof or len(data) != size:
+            msg = f"Pack entry at {self.offset} does not inflate to {size} bytes"
+            raise exceptions.CorruptObjectError(msg)
+        return bytes(data), bytes(compressed)
+
+
+def _read_written(file: BinaryIO, offset: int) -> objects.RawObject:
+    entry = read_entry_header(file, offset)
+    file.seek(entry.data_offset)
+    data = _inflate(file, entry.size)
+    if entry.base_offset is None:
+        return objects.RawObject(TYPE_NAMES[entry.type_code], data)
+    base = _read_written(file, entry.base_offset)
+    return objects.RawObject(base.obj_type, apply_delta(base.data, data))
+
+
+def index_pack(store: objects.ObjectStore, stream: BinaryIO) -> Pack | None:
+    """Store a pack received as a stream into the object store, with its index.
+
+    The stream is read once, front to back. Entries are copied as received, except
+    the deltas of a thin pack against objects outside the pack, which are resolved
+    against the object store and stored whole, so the stored pack is
+    self-contained; a base the store lacks raises `ObjectNotFoundError`. Every
+    object is hashed to build the index.
+
+    Args:
+        store: The object store receiving the pack.
+        stream: The stream to read the pack from, positioned at its start.
+
+    Returns:
+        The new pack, None if the stream held an empty pack.
+
+    Raises:
+        CorruptObjectError: If the stream is not a valid pack.
+    """
+    source = _PackInput(stream)
+    signature, version, count = PACK_HEADER.unpack(source.read(PACK_HEADER.size))
+    if signature != PACK_SIGNATURE or version != PACK_VERSION:
+        msg = f"Unsupported pack signature {signature!r} version {version}"
+        raise exceptions.CorruptObjectError(msg)
+    if not count:
+        _check_trailer(source)
+        return None
+
+    store.pack_directory.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=store.pack_directory, prefix="tmp_pack_")
+    try:
+        with os.fdopen(fd, "w+b") as file:
+            offsets, checksum = _copy_entries(store, source, file, count)
+        pack = _install(store.pack_directory, Path(temporary), offsets, checksum)
+    except BaseException:
+        Path(temporary).unlink(missing_ok=True)
+        raise
+    store.reload_packs()
+    return pack
+
+
+def _copy_entries(
+    store: objects.ObjectStore,
+    source: _PackInput,
+    file: BinaryIO,
+    count: int,
+) -> tuple[dict[str, int], bytes]:
+    output = _PackOutput(file)
+    output.write(PACK_HEADER.pack(PACK_SIGNATURE, PACK_VERSION, count))
+    offsets: dict[str, int] = {}
+    moved: dict[int, int] = {}
+    resolved = ObjectCache(DELTA_BASE_CACHE_LIMIT)
+
+    for _ in range(count):
+        received = source.offset
+        entry, base_oid = source.read_entry_header()
+        data, compressed = source.inflate(entry.size)
+        offset = output.offset
+        if entry.type_code in TYPE_NAMES:
+            raw = objects.RawObject(TYPE_NAMES[entry.type_code], data)
+            output.write(encode_entry_header(entry.type_code, entry.size) + compressed)
+        elif base_oid is not None and base_oid not in offsets:
+            base = store.read_object(base_oid)
+            raw = objects.RawObject(base.obj_type, apply_delta(base.data, data))
+            output.write(encode_entry_header(TYPE_CODES[raw.obj_type], len(raw.data)))
+            output.write(zlib.compress(raw.data, OBJECT_COMPRESSION_LEVEL))
+        else:
+            if base_oid is not None:
+                base_offset = offsets[base_oid]
+            elif entry.base_offset in moved:
+                base_offset = moved[entry.base_offset]
+            else:
+                msg = f"Pack entry at {received} has no base in the pack"
+                raise exceptions.CorruptObjectError(msg)
+            base = resolved.get(base_offset) or _read_written(file, base_offset)
+            file.seek(0, os.SEEK_END)
+            raw = objects.RawObject(base.obj_type, apply_delta(base.data, data))
+            output.write(encode_entry_header(OFS_DELTA, entry.size))
+            output.write(encode_offset(offset - base_offset) + compressed)
+        offsets[objects.hash_object(raw.obj_type, raw.data)] = offset
+        moved[received] = offset
+        resolved.put(offset, raw)
+
+    _check_trailer(source)
+    return offsets, output.finish()
+
+
+def _check_trailer(source: _PackInput) -> None:
+    expected = source.hasher.digest()
+    if source.read(len(expected)) != expected:
+        msg = "Pack stream checksum mismatch"
+        raise exceptions.CorruptObjectError(msg)
@@ -1,84 +1,431 @@
-"""This module holds the parser for command line options."""
+"""This module holds the parser for command line options.
+
+Only the parser of the requested command is built, so every command does not pay
+for building the parsers of all the others.
+"""
 
 import argparse
+from collections.abc import Callable
+from datetime import datetime
+
+SubParsers = argparse._SubParsersAction  # noqa: SLF001
+
+
+def add_init_parser(subparsers: SubParsers) -> None:
+    """Add the `init` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    init = subparsers.add_parser("init", help="Initialize a new, empty repository.")
+    init.add_argument(
+        "path",
+        metavar="directory",
+        nargs="?",
+        default=".",
+        help="Where to create the repository.",
+    )
+
+
+def add_add_parser(subparsers: SubParsers) -> None:
+    """Add the `add` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    add = subparsers.add_parser("add", help="Stage files for the next commit.")
+    add.add_argument(
+        "paths",
+        metavar="path",
+        nargs="+",
+        help="The files or directories to stage.",
+    )
+
+
+def add_config_parser(subparsers: SubParsers) -> None:
+    """Add the `config` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    config = subparsers.add_parser(
+        "config",
+        help="Manage repository configuration settings.",
+    )
+
+    config_subparsers = config.add_subparsers(title="Commands", dest="command")
+    config_subparsers.required = True
+
+    # ~ Set
+    set_ = config_subparsers.add_parser("set", help="Set config values")
+    set_.add_argument(
+        "entries",
+        metavar="key value",
+        help="The keys and the configuration values they will hold.",
+        type=str,
+        nargs="*",
+    )
+    set_.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Also read 'key value' lines from standard input.",
+    )
+    # ~ Get
+    get = config_subparsers.add_parser("get", help="Get a config value")
+    get.add_argument(
+        "key",
+        metavar="key",
+        help="The name of the key that holds the configuration value.",
+        type=str,
+        nargs=1,
+    )
+    # ~ List
+    list_ = config_subparsers.add_parser("list", help="List all config values")
+    list_.add_argument(
+        "--show-origin",
+        action="store_true",
+        help="Show the configuration file each value comes from.",
+    )
+    # ~ Unset
+    unset = config_subparsers.add_parser("unset", help="Unset a config value")
+    unset.add_argument(
+        "key",
+        metavar="key",
+        help="The name of the key that holds the configuration value.",
+        type=str,
+        nargs=1,
+    )
+    # ~ Edit
+    edit = config_subparsers.add_parser("edit", help="Edit the config file.")
+    edit.add_argument(
+        "key",
+        metavar="key",
+        help="The name of the key that will hold the configuration value.",
+        type=str,
+        nargs=1,
+    )
+    edit.add_argument(
+        "value",
+        metavar="value",
+        help="The new value of the configuration setting.",
+        type=str,
+        nargs=1,
+    )
+
+
+def add_repack_parser(subparsers: SubParsers) -> None:
+    """Add the `repack` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    repack = subparsers.add_parser(
+        "repack",
+        help="Pack loose objects into a single delta-compressed pack.",
+    )
+    repack.add_argument(
+        "--window",
+        metavar="n",
+        help="The number of objects considered as delta bases (core.packwindow).",
+        type=int,
+    )
+    repack.add_argument(
+        "--depth",
+        metavar="n",
+        help="The maximum length of a delta chain (core.packdepth).",
+        type=int,
+    )
+    repack.add_argument(
+        "-b",
+        "--write-bitmap",
+        action="store_true",
+        help="Write reachability bitmaps to speed up object enumeration.",
+    )
+
+
+def add_commit_graph_parser(subparsers: SubParsers) -> None:
+    """Add the `commit-graph` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    commit_graph = subparsers.add_parser(
+        "commit-graph",
+        help="Manage the commit graph used to speed up history walks.",
+    )
+    commit_graph_subparsers = commit_graph.add_subparsers(
+        title="Commands",
+        dest="action",
+    )
+    commit_graph_subparsers.required = True
+    commit_graph_subparsers.add_parser(
+        "write",
+        help="Add the history reachable from every reference to the commit graph.",
+    )
+
+
+def parse_date(value: str) -> int:
+    """Parse a date given on the command line.
+
+    Args:
+        value: An ISO 8601 date or date and time, in local time unless it has an
+            offset, or a unix time.
+
+    Returns:
+        The unix time in seconds.
+
+    Raises:
+        ArgumentTypeError: If the value is not a date.
+    """
+    if value.isdigit():
+        return int(value)
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError as e:
+        msg = f"invalid date: '{value}'"
+        raise argparse.ArgumentTypeError(msg) from e
+    return int(date.astimezone().timestamp())
+
+
+def add_log_parser(subparsers: SubParsers) -> None:
+    """Add the `log` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    log = subparsers.add_parser("log", help="Show the commit history.")
+    log.add_argument(
+        "revision",
+        nargs="?",
+        default="HEAD",
+        help="The commit, branch or tag to start from.",
+    )
+    log.add_argument(
+        "-n",
+        "--max-count",
+        metavar="number",
+        help="Show at most this many commits.",
+        type=int,
+    )
+    log.add_argument(
+        "--since",
+        metavar="date",
+        help="Show commits made after this date.",
+        type=parse_date,
+    )
+    log.add_argument(
+        "--topo-order",
+        action="store_true",
+        help="Show no parent before all its children.",
+    )
+
+
+def add_pack_refs_parser(subparsers: SubParsers) -> None:
+    """Add the `pack-refs` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    subparsers.add_parser(
+        "pack-refs",
+        help="Move the loose references into the sorted packed-refs file.",
+    )
+
+
+def add_branch_parser(subparsers: SubParsers) -> None:
+    """Add the `branch` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    branch = subparsers.add_parser("branch", help="List or create branches.")
+    branch.add_argument(
+        "-l",
+        "--list",
+        action="store_true",
+        help="List the branches, optionally those matching a shell pattern.",
+    )
+    branch.add_argument(
+        "name",
+        nargs="?",
+        help="The branch to create, or the pattern to list with --list.",
+    )
+    branch.add_argument(
+        "start_point",
+        nargs="?",
+        default="HEAD",
+        metavar="start-point",
+        help="The revision the new branch points to.",
+    )
+
+
+def add_checkout_parser(subparsers: SubParsers) -> None:
+    """Add the `checkout` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    checkout = subparsers.add_parser(
+        "checkout",
+        help="Switch the work tree to a branch or a commit.",
+    )
+    checkout.add_argument(
+        "revision",
+        help="The branch to switch to, or the revision to detach HEAD at.",
+    )
+
+
+def add_upload_pack_parser(subparsers: SubParsers) -> None:
+    """Add the `upload-pack` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    upload_pack = subparsers.add_parser(
+        "upload-pack",
+        help="Serve a fetch of a repository over standard input and output.",
+    )
+    upload_pack.add_argument("directory", help="The work tree of the repository.")
+    upload_pack.add_argument(
+        "--listen",
+        metavar="socket",
+        help="Serve every connection to a Unix socket until interrupted.",
+    )
+
+
+def add_fetch_parser(subparsers: SubParsers) -> None:
+    """Add the `fetch` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    fetch = subparsers.add_parser(
+        "fetch",
+        help="Fetch the branches and tags of another repository.",
+    )
+    fetch.add_argument(
+        "remote",
+        nargs="?",
+        help="The path of the repository to fetch from.",
+    )
+    fetch.add_argument(
+        "--all",
+        action="store_true",
+        help="Fetch from every remote at once.",
+    )
+    fetch.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="The maximum number of remotes fetched from at the same time.",
+    )
+    fetch.add_argument(
+        "--name",
+        default="origin",
+        help="The name the remote-tracking branches are stored under.",
+    )
+    fetch.add_argument(
+        "--upload-pack",
+        metavar="command",
+        help="The command serving the remote repository, given its path.",
+    )
+
+
+def add_clone_parser(subparsers: SubParsers) -> None:
+    """Add the `clone` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    clone = subparsers.add_parser(
+        "clone",
+        help="Copy another repository into a new one.",
+    )
+    clone.add_argument("remote", help="The path of the repository to clone.")
+    clone.add_argument(
+        "directory",
+        nargs="?",
+        help="The work tree of the new repository, by default named after the remote.",
+    )
+    clone.add_argument(
+        "--filter",
+        dest="filter_spec",
+        metavar="spec",
+        help="Leave blobs out and fetch them on demand: blob:none or blob:limit=<n>.",
+    )
+    clone.add_argument(
+        "--upload-pack",
+        metavar="command",
+        help="The command serving the remote repository, given its path.",
+    )
+
+
+def add_remote_parser(subparsers: SubParsers) -> None:
+    """Add the `remote` command parser.
+
+    Args:
+        subparsers: The subparsers of the main parser.
+    """
+    remote = subparsers.add_parser("remote", help="List or add remotes.")
+    remote.add_argument("name", nargs="?", help="The remote to add.")
+    remote.add_argument(
+        "url",
+        nargs="?",
+        help="The path of the remote repository, or of the socket serving it.",
+    )
+
+
+PARSER_BUILDERS: dict[str, Callable[[SubParsers], None]] = {
+    "init": add_init_parser,
+    "add": add_add_parser,
+    "config": add_config_parser,
+    "repack": add_repack_parser,
+    "commit-graph": add_commit_graph_parser,
+    "log": add_log_parser,
+    "pack-refs": add_pack_refs_parser,
+    "branch": add_branch_parser,
+    "checkout": add_checkout_parser,
+    "upload-pack": add_upload_pack_parser,
+    "fetch": add_fetch_parser,
+    "clone": add_clone_parser,
+    "remote": add_remote_parser,
+}
+
+
+def build_parser(command: str | None = None) -> argparse.ArgumentParser:
+    """Build the command line parser.
+
+    Args:
+        command: The command about to be parsed. All command parsers are built when
+            it is None or unknown, so help and error messages list every command.
+
+    Returns:
+        The argument parser.
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog="Codetrail",
+        description="Version Control inspired by Git.",
+        epilog="Text at the bottom of help",
+    )
+    arg_subparsers = arg_parser.add_subparsers(title="Commands", dest="command")
+    arg_subparsers.required = True
+
+    if command in PARSER_BUILDERS:
+        PARSER_BUILDERS[command](arg_subparsers)
+    else:
+        for builder in PARSER_BUILDERS.values():
+            builder(arg_subparsers)
+    return arg_parser
+
+
+def parse_arguments(arguments: list[str]) -> argparse.Namespace:
+    """Parse the command line arguments.
+
+    Args:
+        arguments: The command line arguments, without the program name.
 
-arg_parser = argparse.ArgumentParser(
-    prog="Codetrail",
-    description="Version Control inspired by Git.",
-    epilog="Text at the bottom of help",
-)
-
-arg_subparsers = arg_parser.add_subparsers(title="Commands", dest="command")
-arg_subparsers.required = True
-
-# INIT COMMAND
-init = arg_subparsers.add_parser("init", help="Initialize a new, empty repository.")
-init.add_argument(
-    "path",
-    metavar="directory",
-    nargs="?",
-    default=".",
-    help="Where to create the repository.",
-)
-
-# CONFIG COMMAND
-config = arg_subparsers.add_parser(
-    "config",
-    help="Manage repository configuration settings.",
-)
-
-config_subparsers = config.add_subparsers(title="Commands", dest="command")
-config_subparsers.required = True
-
-# ~ Set
-set_ = config_subparsers.add_parser("set", help="Set a config value")
-set_.add_argument(
-    "key",
-    metavar="key",
-    help="The name of the key that will hold the configuration value.",
-    type=str,
-    nargs=1,
-)
-set_.add_argument(
-    "value",
-    metavar="value",
-    help="The value of the configuration setting.",
-    type=str,
-    nargs=1,
-)
-# ~ Get
-get = config_subparsers.add_parser("get", help="Get a config value")
-get.add_argument(
-    "key",
-    metavar="key",
-    help="The name of the key that holds the configuration value.",
-    type=str,
-    nargs=1,
-)
-# ~ List
-list_ = config_subparsers.add_parser("list", help="List all config values")
-# ~ Unset
-unset = config_subparsers.add_parser("unset", help="Unset a config value")
-unset.add_argument(
-    "key",
-    metavar="key",
-    help="The name of the key that holds the configuration value.",
-    type=str,
-    nargs=1,
-)
-# ~ Edit
-edit = config_subparsers.add_parser("edit", help="Edit the config file.")
-edit.add_argument(
-    "key",
-    metavar="key",
-    help="The name of the key that will hold the configuration value.",
-    type=str,
-    nargs=1,
-)
-edit.add_argument(
-    "value",
-    metavar="value",
-    help="The new value of the configuration setting.",
-    type=str,
-    nargs=1,
-)
+    Returns:
+        The parsed arguments.
+    """
+    command = arguments[0] if arguments else None
+    return build_parser(command).parse_args(arguments)
@@ -0,0 +1,94 @@
+"""This module holds the lazy fetching of a partial clone.
+
+A clone made with a filter, e.g. `--filter=blob:none`, has every commit and tree
+but only the blobs the filter let through. The remote it was cloned from is
+recorded as its promisor remote, in the `core.promisorremote` option: every object
+missing from the repository is one the remote promised to send on demand.
+
+The object store fetches a missing object when it is first opened. Callers that
+know which objects they are about to read, e.g. a checkout, fetch them up front in
+a single batch instead of one request per object. Requests go through the session
+of the process with the remote, so they share one connection.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING
+
+from codetrail import exceptions
+from codetrail import session
+from codetrail import transfer
+from codetrail.conf import UPLOAD_PACK_COMMAND
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Sequence
+
+    from codetrail import packs
+    from codetrail.objects import ObjectStore
+
+
+class PromisorRemote:
+    """The remote that sends the objects a partial clone left out.
+
+    Fetches are serialized, so threads missing the same object fetch it once.
+
+    Attributes:
+        remote: The path of the remote repository.
+        upload_pack: The command serving the remote repository, given its path.
+        fetched: The number of objects fetched so far.
+    """
+
+    remote: str
+    upload_pack: Sequence[str]
+    fetched: int
+
+    def __init__(
+        self,
+        remote: str,
+        upload_pack: Sequence[str] = UPLOAD_PACK_COMMAND,
+    ) -> None:
+        """Record the promisor remote of a repository.
+
+        Args:
+            remote: The path of the remote repository.
+            upload_pack: The command serving the remote repository, given its path.
+        """
+        self.remote = remote
+        self.upload_pack = upload_pack
+        self.fetched = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, store: ObjectStore, oids: Iterable[str]) -> int:
+        """Fetch the objects missing from a store, in one batch.
+
+        Args:
+            store: The object store of the partial clone.
+            oids: The hex IDs of the objects about to be read.
+
+        Returns:
+            The number of objects fetched.
+
+        Raises:
+            ObjectNotFoundError: If the remote cannot send a missing object.
+        """
+        with self._lock:
+            missing = [oid for oid in dict.fromkeys(oids) if not store.has_object(oid)]
+            if not missing:
+                return 0
+            try:
+                pack = self._fetch_pack(store, missing)
+            except exceptions.ProtocolError as e:
+                msg = f"Object '{missing[0]}' not found, promisor remote failed: {e}"
+                raise exceptions.ObjectNotFoundError(msg) from e
+            count = len(pack) if pack is not None else 0
+            if pack is not None:
+                pack.close()
+            self.fetched += count
+            return count
+
+    def _fetch_pack(self, store: ObjectStore, oids: list[str]) -> packs.Pack | None:
+        remote_session = session.open_session(self.remote, self.upload_pack)
+        negotiator = transfer.Negotiator(store, ())
+        return remote_session.fetch(store, oids, negotiator, thin=False)
@@ -0,0 +1,476 @@
+"""This module holds object enumeration over the object graph.
+
+Commits point to their tree and parents, trees to their blobs and subtrees, and
+tags to the tagged object. Enumerating the objects reachable from some tips but
+not from others, e.g. what a fetch must send, is a walk of that graph.
+
+When a pack has reachability bitmaps, the walk stops at every commit that has one
+and ORs its bitmap in, so a walk from a bitmapped commit reads no object at all.
+Only the objects added since the pack was written are walked, and the difference
+with what the other side has is a bitwise operation. Bitmaps stay small when the
+pack is written in `recency_order`.
+
+Without bitmaps, `missing_objects` avoids walking the whole history of what the
+other side has: commits are walked newest first only until the two sides meet, and
+each tree is compared to the tree of the first parent, so only changed entries are
+read.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+from typing import TYPE_CHECKING
+
+from codetrail import commits
+from codetrail import ewah
+from codetrail import history
+from codetrail import pack_bitmaps
+from codetrail import tree_diff
+from codetrail import trees
+from codetrail.conf import BITMAP_COMMIT_INTERVAL
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+    from collections.abc import Mapping
+
+    from codetrail.objects import ObjectStore
+    from codetrail.objects import RawObject
+    from codetrail.pack_index import PackIndex
+    from codetrail.packs import Pack
+
+
+def references(raw: RawObject) -> list[tuple[str, str | None]]:
+    """List the objects an object points to.
+
+    Args:
+        raw: The object.
+
+    Returns:
+        The hex ID and, when known without reading it, the type of every object
+        the object points to.
+    """
+    if raw.obj_type == "commit":
+        commit = commits.Commit.parse(raw.data)
+        edges: list[tuple[str, str | None]] = [(commit.tree, "tree")]
+        edges.extend((parent, "commit") for parent in commit.parents)
+        return edges
+    if raw.obj_type == "tree":
+        return [
+            (entry.oid, "tree" if entry.is_tree else "blob")
+            for entry in trees.parse_tree(raw.data)
+        ]
+    if raw.obj_type == "tag":
+        return [(commits.tag_target(raw.data), None)]
+    return []
+
+
+class _Reach:
+    """The set of objects reachable from the tips added so far.
+
+    Objects of the pack are held as pack positions, those outside it as IDs.
+    """
+
+    def __init__(
+        self,
+        store: ObjectStore,
+        index: PackIndex | None = None,
+        bitmaps: Mapping[str, int] | None = None,
+    ) -> None:
+        self.store = store
+        self.index = index
+        self.bitmaps = bitmaps or {}
+        self.bitmap = 0
+        self.positions: set[int] = set()
+        self.others: set[str] = set()
+
+    def _visit(self, oid: str) -> bool:
+        position = None
+        if self.index is not None:
+            position = self.index.pack_position(bytes.fromhex(oid))
+        if position is None:
+            if oid in self.others:
+                return False
+            self.others.add(oid)
+            return True
+        if position in self.positions or self.bitmap >> position & 1:
+            return False
+        bitmap = self.bitmaps.get(oid)
+        if bitmap is not None:
+            self.bitmap |= bitmap
+            return False
+        self.positions.add(position)
+        return True
+
+    def add(self, tips: Iterable[str]) -> None:
+        """Add the objects reachable from some tips.
+
+        Args:
+            tips: The hex IDs of the objects to walk from.
+        """
+        stack: list[tuple[str, str | None]] = [(tip, None) for tip in tips]
+        while stack:
+            oid, obj_type = stack.pop()
+            if self._visit(oid) and obj_type != "blob":
+                stack.extend(references(self.store.read_object(oid)))
+
+    def pack_bitmap(self) -> int:
+        """Get the reached objects of the pack as a bitmap.
+
+        Returns:
+            The bitmap over the pack positions.
+        """
+        if self.positions:
+            self.bitmap |= ewah.from_positions(self.positions)
+            self.positions.clear()
+        return self.bitmap
+
+
+def enumerate_objects(
+    store: ObjectStore,
+    wants: Iterable[str],
+    haves: Iterable[str] = (),
+) -> set[str]:
+    """Find the objects reachable from some tips but not from others.
+
+    The bitmaps of the newest pack that has some are used when there is one,
+    otherwise every reachable commit and tree is read.
+
+    Args:
+        store: The object store holding the objects.
+        wants: The hex IDs of the objects to walk from.
+        haves: The hex IDs of the objects whose history is excluded.
+
+    Returns:
+        The hex IDs of the objects reachable from `wants` but not from `haves`.
+    """
+    pack = next((pack for pack in store.packs if pack.bitmaps is not None), None)
+    index = pack.index if pack is not None else None
+    reach = _Reach(store, index, pack.bitmaps if pack is not None else None)
+
+    reach.add(haves)
+    excluded_bitmap = reach.pack_bitmap()
+    excluded_others = set(reach.others)
+    reach.add(wants)
+
+    found = reach.others - excluded_others
+    if index is not None:
+        bitmap = reach.pack_bitmap() & ~excluded_bitmap
+        found.update(
+            index.pack_oid(position).hex() for position in ewah.positions(bitmap)
+        )
+    return found
+
+
+def _peel(store: ObjectStore, oid: str, tags: set[str]) -> tuple[str, str]:
+    raw = store.read_object(oid)
+    while raw.obj_type == "tag":
+        tags.add(oid)
+        oid = commits.tag_target(raw.data)
+        raw = store.read_object(oid)
+    return oid, raw.obj_type
+
+
+def _walk_tree(
+    store: ObjectStore,
+    tree: str,
+    old_tree: str | None,
+    found: set[str],
+) -> None:
+    if tree == old_tree or tree in found:
+        return
+    found.add(tree)
+    old = {}
+    if old_tree is not None:
+        old = {entry.name: entry for entry in trees.read_tree(store, old_tree)}
+    for entry in trees.read_tree(store, tree):
+        previous = old.get(entry.name)
+        if previous is not None and previous.oid == entry.oid:
+            continue
+        if entry.is_tree:
+            base = previous.oid if previous is not None and previous.is_tree else None
+            _walk_tree(store, entry.oid, base, found)
+        else:
+            found.add(entry.oid)
+
+
+def _walk_commits(
+    store: ObjectStore,
+    wants: Iterable[str],
+    haves: Iterable[str],
+) -> Iterator[tuple[str, commits.Commit]]:
+    order = itertools.count()
+    queue: list[tuple[int, int, str]] = []
+    pending: dict[str, commits.Commit] = {}
+    excluded: dict[str, bool] = {}
+
+    def push(oid: str, *, exclude: bool) -> None:
+        if oid in excluded:
+            excluded[oid] = excluded[oid] or exclude
+            return
+        excluded[oid] = exclude
+        pending[oid] = history.read_commit(store, oid)
+        heapq.heappush(queue, (-pending[oid].commit_time, next(order), oid))
+
+    for oid in haves:
+        push(oid, exclude=True)
+    for oid in wants:
+        push(oid, exclude=False)
+
+    while not all(excluded[oid] for _, _, oid in queue):
+        _, _, oid = heapq.heappop(queue)
+        commit = pending.pop(oid)
+        for parent in commit.parents:
+            push(parent, exclude=excluded[oid])
+        if not excluded[oid]:
+            yield oid, commit
+
+
+def missing_objects(
+    store: ObjectStore,
+    wants: Iterable[str],
+    haves: Iterable[str] = (),
+) -> set[str]:
+    """Find the objects to send to a receiver that has some commits.
+
+    With bitmaps, this is `enumerate_objects`. Otherwise commits are walked newest
+    first from both sides until only commits reachable from `haves` are left, and
+    the tree of every other commit is compared to the tree of its first parent.
+    The work done is proportional to the size of the change rather than to the
+    size of the history, at the cost of listing again an object the receiver has
+    at another path.
+
+    Args:
+        store: The object store holding the objects.
+        wants: The hex IDs of the objects to send, with their history.
+        haves: The hex IDs of commits, or tags of commits, the receiver has.
+
+    Returns:
+        The hex IDs of the objects to send.
+    """
+    if any(pack.bitmaps is not None for pack in store.packs):
+        return enumerate_objects(store, wants, haves)
+
+    found: set[str] = set()
+    tips = []
+    for want in wants:
+        oid, obj_type = _peel(store, want, found)
+        if obj_type == "commit":
+            tips.append(oid)
+        elif obj_type == "tree":
+            _walk_tree(store, oid, None, found)
+        else:
+            found.add(oid)
+    bases = []
+    for have in haves:
+        oid, obj_type = _peel(store, have, set())
+        if obj_type == "commit":
+            bases.append(oid)
+
+    for oid, commit in _walk_commits(store, tips, bases):
+        found.add(oid)
+        parent = commit.parents[0] if commit.parents else None
+        old_tree = history.read_commit(store, parent).tree if parent else None
+        _walk_tree(store, commit.tree, old_tree, found)
+    return found
+
+
+def filter_blobs(store: ObjectStore, oids: Iterable[str], limit: int) -> set[str]:
+    """Leave the blobs of at least some size out of a set of objects.
+
+    The objects of the newest pack with bitmaps are told apart from blobs by its
+    blob type bitmap, so only the blobs of that pack are opened, and only when
+    `limit` is not 0. Other objects are opened to read their header.
+
+    Args:
+        store: The object store holding the objects.
+        oids: The hex IDs of the objects.
+        limit: The size in bytes from which blobs are left out, 0 for every blob.
+
+    Returns:
+        The hex IDs of the objects kept.
+    """
+    pack = next((pack for pack in store.packs if pack.bitmaps is not None), None)
+    index = pack.index if pack is not None else None
+    blobs: set[int] = set()
+    if pack is not None and pack.bitmaps is not None:
+        blobs = set(ewah.positions(pack.bitmaps.type_bitmap("blob")))
+
+    kept = set()
+    for oid in oids:
+        position = None
+        if index is not None:
+            position = index.pack_position(bytes.fromhex(oid))
+        if position is not None and position not in blobs:
+            kept.add(oid)
+            continue
+        if position is not None and not limit:
+            continue
+        with store.open_object(oid) as stream:
+            if stream.obj_type != "blob" or stream.size < limit:
+                kept.add(oid)
+    return kept
+
+
+def recency_order(
+    store: ObjectStore,
+    tips: Iterable[str],
+    oids: Iterable[str],
+) -> list[str]:
+    """Order objects so that the objects reachable from a commit form runs.
+
+    Objects are grouped by type, in `pack_bitmaps.OBJECT_TYPES` order. Commits
+    come newest first, trees and blobs in the order the trees of those commits
+    first reach them, tags in the order of `tips`. Objects reachable from no tip
+    come last, by ID. Only the commits and trees being ordered are read.
+
+    Args:
+        store: The object store holding the objects.
+        tips: The hex IDs of the commits or tags to walk from.
+        oids: The hex IDs of the objects to order.
+
+    Returns:
+        The hex IDs of the objects, e.g for `PackWriter.write`.
+    """
+    remaining = set(oids)
+    groups: dict[str, list[str]] = {t: [] for t in pack_bitmaps.OBJECT_TYPES}
+
+    def take(oid: str, obj_type: str) -> bool:
+        if oid not in remaining:
+            return False
+        remaining.remove(oid)
+        groups[obj_type].append(oid)
+        return True
+
+    heads = []
+    for tip in tips:
+        tags: set[str] = set()
+        oid, obj_type = _peel(store, tip, tags)
+        for tag in tags:
+            take(tag, "tag")
+        if obj_type == "commit":
+            heads.append(oid)
+        elif obj_type != "tree":
+            take(oid, obj_type)
+        else:
+            _take_tree(store, oid, take)
+    for oid, commit in history.iter_history(store, heads):
+        if take(oid, "commit"):
+            _take_tree(store, commit.tree, take)
+
+    ordered = [oid for group in groups.values() for oid in group]
+    return ordered + sorted(remaining)
+
+
+def _take_tree(
+    store: ObjectStore,
+    tree: str,
+    take: Callable[[str, str], bool],
+) -> None:
+    stack = [tree]
+    while stack:
+        oid = stack.pop()
+        if not take(oid, "tree"):
+            continue
+        subtrees = []
+        for entry in trees.read_tree(store, oid):
+            if entry.is_tree:
+                subtrees.append(entry.oid)
+            else:
+                take(entry.oid, "blob")
+        stack.extend(reversed(subtrees))
+
+
+def thin_bases(
+    store: ObjectStore,
+    wants: Iterable[str],
+    haves: Iterable[str],
+) -> dict[str, str]:
+    """Suggest delta bases a receiver has for the files of some commits.
+
+    The tree of every wanted commit is compared to the tree of the newest commit
+    the receiver has, and the old blob of every modified file is suggested as the
+    base of the new one, see `PackWriter.write_stream`.
+
+    Args:
+        store: The object store holding the objects.
+        wants: The hex IDs of the commits, or tags of commits, to send.
+        haves: The hex IDs of the commits, or tags of commits, the receiver has.
+
+    Returns:
+        The hex ID of the suggested base of each new blob.
+    """
+    have_commits = [history.read_commit(store, oid) for oid in haves]
+    if not have_commits:
+        return {}
+    newest = max(have_commits, key=lambda commit: commit.commit_time)
+
+    bases: dict[str, str] = {}
+    for want in wants:
+        oid, obj_type = _peel(store, want, set())
+        if obj_type != "commit":
+            continue
+        tree = history.read_commit(store, oid).tree
+        for change in tree_diff.diff_trees(store, newest.tree, tree):
+            if change.old is not None and change.new is not None:
+                bases.setdefault(change.new.oid, change.old.oid)
+    return bases
+
+
+def _select_commits(
+    store: ObjectStore,
+    pack: Pack,
+    tips: Iterable[str],
+    interval: int,
+) -> list[str]:
+    heads = set()
+    for tip in tips:
+        oid = history.peel(store, tip)
+        if store.read_object(oid).obj_type == "commit":
+            heads.add(oid)
+    selected = []
+    walked = (oid for oid, _ in history.iter_history(store, heads) if oid in pack)
+    for count, oid in enumerate(walked):
+        if oid in heads or count % interval == 0:
+            selected.append(oid)
+    return selected
+
+
+def write_pack_bitmaps(
+    store: ObjectStore,
+    pack: Pack,
+    tips: Iterable[str],
+    interval: int = BITMAP_COMMIT_INTERVAL,
+) -> int:
+    """Compute and write the reachability bitmaps of a pack.
+
+    Every commit that a tip resolves to is selected, as well as one commit out of
+    every `interval` in the history, newest first. Bitmaps are computed oldest
+    first so each walk stops at the bitmaps of the selected ancestors. Commits
+    reaching objects outside the pack get no bitmap.
+
+    Args:
+        store: The object store holding the pack.
+        pack: The pack to write bitmaps for.
+        tips: The hex IDs of the commits or tags to select.
+        interval: The number of commits between two selected commits.
+
+    Returns:
+        The number of bitmaps written.
+    """
+    bitmaps: dict[str, int] = {}
+    for oid in reversed(_select_commits(store, pack, tips, interval)):
+        reach = _Reach(store, pack.index, bitmaps)
+        reach.add([oid])
+        if not reach.others:
+            bitmaps[oid] = reach.pack_bitmap()
+
+    pack_bitmaps.write_bitmaps(
+        pack.bitmap_path,
+        pack.index,
+        pack.object_types(),
+        bitmaps.items(),
+    )
+    return len(bitmaps)
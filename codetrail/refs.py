@@ -0,0 +1,283 @@
+"""This module holds the references of a repository.
+
+References are loose files under `.codetrail/refs/` holding a commit ID, e.g
+`refs/heads/master`, or records of the `packed-refs` file. A loose file takes
+precedence over the packed record of the same name. `HEAD` and other symbolic
+references hold `ref: <name>` instead, naming the reference they point to.
+
+The packed-refs file is mapped once per process and kept until it changes on disk,
+so a lookup that misses the loose files costs one `stat()` and a binary search.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from codetrail import packed_refs as packed
+from codetrail.conf import HEAD_FILE
+from codetrail.conf import PACKED_REFS_FILE
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+REFS_DIRECTORY = "refs"
+SYMBOLIC_PREFIX = "ref: "
+MAX_SYMBOLIC_DEPTH = 5
+OID_LENGTH = 40
+HEX_DIGITS = frozenset("0123456789abcdef")
+INVALID_NAME = re.compile(
+    r"(^|/)[.-]|\.\.|//|@\{|[\x00-\x20\x7f~^:?*\[\\]|[/.]$|\.lock$",
+)
+
+_PACKED_REFS: dict[Path, tuple[tuple[int, int, int], packed.PackedRefs]] = {}
+
+
+def packed_refs(repo_dir: Path) -> packed.PackedRefs | None:
+    """Get the packed references of a repository.
+
+    The file is mapped on first use and mapped again when its inode, size or
+    modification time changes.
+
+    Args:
+        repo_dir: The repository directory.
+
+    Returns:
+        The packed references, None if the repository has no packed-refs file.
+    """
+    path = repo_dir / PACKED_REFS_FILE
+    cached = _PACKED_REFS.get(path)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        stat = None
+    key = (stat.st_ino, stat.st_size, stat.st_mtime_ns) if stat else None
+    if cached is not None:
+        if cached[0] == key:
+            return cached[1]
+        del _PACKED_REFS[path]
+        cached[1].close()
+    if key is None:
+        return None
+    records = packed.PackedRefs(path)
+    _PACKED_REFS[path] = (key, records)
+    return records
+
+
+def clear_ref_cache() -> None:
+    """Unmap the packed-refs files mapped by `packed_refs`."""
+    for _, records in _PACKED_REFS.values():
+        records.close()
+    _PACKED_REFS.clear()
+
+
+def read_loose_ref(repo_dir: Path, name: str) -> str | None:
+    """Read the raw value of a loose reference file.
+
+    Args:
+        repo_dir: The repository directory.
+        name: The reference name e.g 'refs/heads/master'.
+
+    Returns:
+        The stripped content of the file, None if it does not exist.
+    """
+    try:
+        return (repo_dir / name).read_text(encoding="utf-8").strip()
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return None
+
+
+def read_ref(repo_dir: Path, name: str) -> str | None:
+    """Read the raw value of a reference, loose or packed.
+
+    Args:
+        repo_dir: The repository directory.
+        name: The reference name e.g 'refs/heads/master'.
+
+    Returns:
+        The stripped content of the reference, None if it does not exist.
+    """
+    value = read_loose_ref(repo_dir, name)
+    if value is not None or not name.startswith(f"{REFS_DIRECTORY}/"):
+        return value
+    records = packed_refs(repo_dir)
+    record = records.get(name) if records is not None else None
+    return record.oid if record is not None else None
+
+
+def write_ref(repo_dir: Path, name: str, oid: str) -> None:
+    """Write a loose reference atomically.
+
+    Args:
+        repo_dir: The repository directory.
+        name: The reference name e.g 'refs/heads/master'.
+        oid: The hex object ID the reference holds.
+    """
+    _write_loose_ref(repo_dir, name, oid)
+
+
+def write_symbolic_ref(repo_dir: Path, name: str, target: str) -> None:
+    """Write a symbolic reference atomically.
+
+    Args:
+        repo_dir: The repository directory.
+        name: The reference name e.g 'HEAD'.
+        target: The name of the reference it points to e.g 'refs/heads/master'.
+    """
+    _write_loose_ref(repo_dir, name, f"{SYMBOLIC_PREFIX}{target}")
+
+
+def _write_loose_ref(repo_dir: Path, name: str, value: str) -> None:
+    path = repo_dir / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=repo_dir, prefix="tmp_ref_")
+    with os.fdopen(fd, "w", encoding="utf-8") as file:
+        file.write(f"{value}\n")
+    Path(temporary).replace(path)
+
+
+def delete_loose_ref(repo_dir: Path, name: str) -> None:
+    """Remove a loose reference file and the directories it leaves empty.
+
+    The `refs/heads` and `refs/tags` directories are kept.
+
+    Args:
+        repo_dir: The repository directory.
+        name: The reference name e.g 'refs/heads/topic/one'.
+    """
+    path = repo_dir / name
+    path.unlink(missing_ok=True)
+    root = repo_dir / REFS_DIRECTORY
+    kept = {root, root / "heads", root / "tags"}
+    for parent in path.parents:
+        if parent in kept or not parent.is_relative_to(root):
+            return
+        try:
+            parent.rmdir()
+        except OSError:
+            return
+
+
+def is_valid_ref_name(name: str) -> bool:
+    """Check whether a name can be used for a reference.
+
+    Args:
+        name: The reference name e.g 'refs/heads/topic'.
+
+    Returns:
+        True unless a component starts with `.` or `-`, the name holds `..`,
+        `//`, `@{`, a control character, a space, a backslash or one of `~^:?*[`,
+        or it ends with `/`, `.` or `.lock`.
+    """
+    return bool(name) and INVALID_NAME.search(name) is None
+
+
+def resolve_ref(repo_dir: Path, name: str = HEAD_FILE) -> str | None:
+    """Resolve a reference to an object ID, following symbolic references.
+
+    Args:
+        repo_dir: The repository directory.
+        name: The reference name, `HEAD` by default.
+
+    Returns:
+        The hex object ID, None if the reference or its target does not exist.
+    """
+    for _ in range(MAX_SYMBOLIC_DEPTH):
+        value = read_ref(repo_dir, name)
+        if value is None or not value.startswith(SYMBOLIC_PREFIX):
+            return value or None
+        name = value.removeprefix(SYMBOLIC_PREFIX)
+    return None
+
+
+def iter_loose_refs(
+    repo_dir: Path,
+    prefix: str = f"{REFS_DIRECTORY}/",
+) -> Iterator[tuple[str, str]]:
+    """Iterate over the loose reference files under a directory.
+
+    Args:
+        repo_dir: The repository directory.
+        prefix: The directory prefix of the names e.g 'refs/heads/'.
+
+    Yields:
+        The name and raw value of every loose reference, sorted by name.
+    """
+    for path in sorted((repo_dir / prefix).rglob("*")):
+        if not path.is_file():
+            continue
+        name = path.relative_to(repo_dir).as_posix()
+        value = read_loose_ref(repo_dir, name)
+        if value:
+            yield name, value
+
+
+def iter_refs(
+    repo_dir: Path,
+    prefix: str = f"{REFS_DIRECTORY}/",
+) -> Iterator[tuple[str, str]]:
+    """Iterate over the references that hold an object ID.
+
+    Only the packed records under the prefix are read, and only the loose files
+    under the prefix directory are listed.
+
+    Args:
+        repo_dir: The repository directory.
+        prefix: The directory prefix of the names e.g 'refs/heads/'.
+
+    Yields:
+        The name and hex object ID of every reference, sorted by name.
+    """
+    records = packed_refs(repo_dir)
+    merged = {}
+    if records is not None:
+        merged = {record.name: record.oid for record in records.iter_prefix(prefix)}
+    for name, value in iter_loose_refs(repo_dir, prefix):
+        if value.startswith(SYMBOLIC_PREFIX):
+            merged.pop(name, None)
+        else:
+            merged[name] = value
+    yield from sorted(merged.items())
+
+
+def ref_tips(repo_dir: Path) -> list[str]:
+    """List the objects held by every reference and by `HEAD`.
+
+    Args:
+        repo_dir: The repository directory.
+
+    Returns:
+        The hex object IDs, in reference name order with `HEAD` last.
+    """
+    tips = [oid for _, oid in iter_refs(repo_dir)]
+    head = resolve_ref(repo_dir)
+    if head is not None:
+        tips.append(head)
+    return tips
+
+
+def resolve_revision(repo_dir: Path, revision: str) -> str | None:
+    """Resolve a revision to an object ID.
+
+    A revision is a full object ID, `HEAD`, a reference name such as
+    `refs/heads/master`, or a short tag or branch name, tags first.
+
+    Args:
+        repo_dir: The repository directory.
+        revision: The revision to resolve.
+
+    Returns:
+        The hex object ID, None if the revision names nothing.
+    """
+    if len(revision) == OID_LENGTH and set(revision) <= HEX_DIGITS:
+        return revision
+    if revision == HEAD_FILE or revision.startswith(f"{REFS_DIRECTORY}/"):
+        return resolve_ref(repo_dir, revision)
+    for prefix in ("refs/tags/", "refs/heads/"):
+        oid = resolve_ref(repo_dir, f"{prefix}{revision}")
+        if oid is not None:
+            return oid
+    return None
@@ -0,0 +1,76 @@
+"""This module holds the remotes recorded in a repository.
+
+Every remote is a file named after it in the `remotes` directory of the repository,
+holding a `URL: <path>` line, the path of the remote repository or of the socket
+serving it. `fetch --all` fetches from every remote, and `clone` records the
+repository it copied as `origin`.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from codetrail import exceptions
+from codetrail import refs
+from codetrail.conf import REMOTES_DIRECTORY
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+URL_PREFIX = "URL: "
+
+
+def is_valid_remote_name(name: str) -> bool:
+    """Check whether a name can name a remote.
+
+    Args:
+        name: The remote name.
+
+    Returns:
+        True if the name is a single valid reference name component.
+    """
+    return "/" not in name and refs.is_valid_ref_name(f"refs/remotes/{name}")
+
+
+def read_remotes(repo_dir: Path) -> dict[str, str]:
+    """Read the remotes of a repository.
+
+    Files without a URL line are ignored.
+
+    Args:
+        repo_dir: The repository directory.
+
+    Returns:
+        The URL of every remote, by name, in name order.
+    """
+    directory = repo_dir / REMOTES_DIRECTORY
+    if not directory.is_dir():
+        return {}
+    remotes = {}
+    for path in sorted(directory.iterdir()):
+        if not path.is_file() or not is_valid_remote_name(path.name):
+            continue
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.startswith(URL_PREFIX):
+                remotes[path.name] = line.removeprefix(URL_PREFIX).strip()
+                break
+    return remotes
+
+
+def write_remote(repo_dir: Path, name: str, url: str) -> None:
+    """Record a remote, replacing any remote of the same name.
+
+    Args:
+        repo_dir: The repository directory.
+        name: The remote name.
+        url: The path of the remote repository, or of the socket serving it.
+
+    Raises:
+        InvalidReferenceError: If the name is not a valid remote name.
+    """
+    if not is_valid_remote_name(name):
+        msg = f"'{name}' is not a valid remote name"
+        raise exceptions.InvalidReferenceError(msg)
+    directory = repo_dir / REMOTES_DIRECTORY
+    directory.mkdir(exist_ok=True)
+    (directory / name).write_text(f"{URL_PREFIX}{url}\n", encoding="utf-8")
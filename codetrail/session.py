@@ -0,0 +1,218 @@
+"""This module holds the sessions kept open with remote repositories.
+
+Connecting to a remote starts an `upload-pack` server, or connects to the socket
+serving it, and reads its advertisement. A process often talks to the same remote
+more than once, e.g. a partial clone fetches the blobs of its checkout right after
+the clone, and every fetch from a partial clone may fetch more blobs. A session
+keeps one connection per remote open for the whole process and sends every request
+over it, see the session requests of the `transfer` protocol. Requests are
+pipelined: the session line and the first request follow the advertisement without
+waiting, and a fetch sends its first haves along with its wants. Packs are received
+on sidebands, which also carry the progress messages of the server.
+
+A server that does not support sessions is connected to again for every fetch.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextlib
+import threading
+from typing import TYPE_CHECKING
+
+from codetrail import transfer
+from codetrail.conf import UPLOAD_PACK_COMMAND
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Generator
+    from collections.abc import Sequence
+    from typing import BinaryIO
+
+    from codetrail import packs
+    from codetrail.objects import ObjectStore
+
+
+class RemoteSession:
+    """The connection to a remote repository, reused across requests.
+
+    Requests are serialized, so threads may share a session. A request failing half
+    way closes the connection, and the next request opens a new one.
+
+    Attributes:
+        remote: The path of the remote repository, or of the socket serving it.
+        upload_pack: The command serving the remote repository, given its path.
+        connections: The number of connections opened so far.
+    """
+
+    remote: str
+    upload_pack: Sequence[str]
+    connections: int
+
+    def __init__(
+        self,
+        remote: str,
+        upload_pack: Sequence[str] = UPLOAD_PACK_COMMAND,
+    ) -> None:
+        """Prepare a session with a remote, connecting on the first request.
+
+        Args:
+            remote: The path of the remote repository, or of the socket serving it.
+            upload_pack: The command serving the remote repository, given its path.
+        """
+        self.remote = remote
+        self.upload_pack = upload_pack
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._stack: contextlib.ExitStack | None = None
+        self._streams: tuple[BinaryIO, BinaryIO] | None = None
+        self._capabilities: frozenset[str] = frozenset()
+        self._advertisement: transfer.Advertisement | None = None
+
+    @property
+    def reusable(self) -> bool:
+        """Check whether the connection is open and carries several requests."""
+        return self._streams is not None and transfer.SESSION in self._capabilities
+
+    def list_refs(self) -> transfer.Advertisement:
+        """Get the references and capabilities the remote advertises now.
+
+        Returns:
+            The advertisement.
+        """
+        with self._lock:
+            if self._advertisement is None and not self.reusable:
+                self._connect()
+            if self._advertisement is not None:
+                advertisement, self._advertisement = self._advertisement, None
+                return advertisement
+            source, sink = self._open_streams()
+            with self._closing_on_error():
+                transfer.write_pkt_line(sink, f"{transfer.LS_REFS}\n")
+                transfer.write_flush(sink)
+                return transfer.read_advertisement(source)
+
+    def fetch(  # noqa: PLR0913
+        self,
+        store: ObjectStore,
+        wants: Sequence[str],
+        negotiator: transfer.Negotiator,
+        *,
+        thin: bool = True,
+        filter_spec: str | None = None,
+        progress: Callable[[str], None] | None = None,
+    ) -> packs.Pack | None:
+        """Fetch objects from the remote, see `transfer.fetch_pack`.
+
+        Args:
+            store: The object store receiving the objects.
+            wants: The hex IDs of the objects to fetch, with their history.
+            negotiator: The commits to offer as haves.
+            thin: Whether the remote may send deltas against objects of the store.
+            filter_spec: The filter leaving blobs out of the pack.
+            progress: The function the progress messages of the remote are passed
+                to.
+
+        Returns:
+            The received pack, None if nothing was fetched.
+        """
+        with self._lock:
+            source, sink = self._open_streams()
+            self._advertisement = None
+            reusable = self.reusable
+            with self._closing_on_error():
+                if reusable:
+                    transfer.write_pkt_line(sink, f"{transfer.FETCH}\n")
+                pack = transfer.fetch_pack(
+                    store,
+                    source,
+                    sink,
+                    wants,
+                    negotiator,
+                    thin=thin,
+                    filter_spec=filter_spec,
+                    sideband=transfer.SIDE_BAND in self._capabilities,
+                    progress=progress,
+                )
+            if not reusable:
+                self._close()
+            return pack
+
+    def close(self) -> None:
+        """Close the connection, ending the session on the server."""
+        with self._lock:
+            self._close()
+
+    def _open_streams(self) -> tuple[BinaryIO, BinaryIO]:
+        if self._streams is None:
+            return self._connect()
+        return self._streams
+
+    def _connect(self) -> tuple[BinaryIO, BinaryIO]:
+        self._close()
+        with contextlib.ExitStack() as stack:
+            source, sink = stack.enter_context(
+                transfer.connect(self.remote, self.upload_pack),
+            )
+            advertisement = transfer.read_advertisement(source)
+            if transfer.SESSION in advertisement.capabilities:
+                transfer.write_pkt_line(sink, f"{transfer.SESSION}\n")
+                transfer.write_flush(sink)
+            self._stack = stack.pop_all()
+        self._streams = (source, sink)
+        self._capabilities = advertisement.capabilities
+        self._advertisement = advertisement
+        self.connections += 1
+        return self._streams
+
+    def _close(self) -> None:
+        stack, self._stack = self._stack, None
+        self._streams = None
+        self._capabilities = frozenset()
+        self._advertisement = None
+        if stack is not None:
+            stack.close()
+
+    @contextlib.contextmanager
+    def _closing_on_error(self) -> Generator[None]:
+        try:
+            yield
+        except BaseException:
+            self._close()
+            raise
+
+
+_sessions: dict[tuple[str, tuple[str, ...]], RemoteSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def open_session(
+    remote: str,
+    upload_pack: Sequence[str] = UPLOAD_PACK_COMMAND,
+) -> RemoteSession:
+    """Get the session of the process with a remote, created on first use.
+
+    Args:
+        remote: The path of the remote repository, or of the socket serving it.
+        upload_pack: The command serving the remote repository, given its path.
+
+    Returns:
+        The session.
+    """
+    key = (remote, tuple(upload_pack))
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = RemoteSession(remote, upload_pack)
+        return _sessions[key]
+
+
+def close_sessions() -> None:
+    """Close every session of the process, e.g. before it exits."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for remote_session in sessions:
+        remote_session.close()
+
+
+atexit.register(close_sessions)
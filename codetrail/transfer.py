@@ -0,0 +1,778 @@
+"""This module holds the pack transfer protocol.
+
+A fetch runs between a client and an `upload-pack` server connected by a pair of
+pipes, e.g. the standard input and output of a subprocess, so no network is
+needed. Every message is a pkt-line: four hex digits holding the length of the
+line, themselves included, then the payload. `0000` is a flush packet ending a
+section, and a line starting with `ERR ` reports an error and ends the session.
+
+1. The server advertises its references, one `<oid> <name>` line each. Annotated
+   tags are followed by a `<commit> <name>^{}` line, read from the packed-refs file
+   when possible. The first line also carries the server capabilities after a NUL.
+2. The client sends a `want <oid>` line for every object it lacks, then a flush.
+   The first line also carries the capabilities the client selected, and a
+   `filter <spec>` line may follow the wants to leave blobs out of the pack, see
+   `parse_filter`. A client that wants nothing only sends the flush. The server
+   answers with a flush, or with an error if it does not have a wanted object.
+3. The client sends its commits newest first, as `have <oid>` lines in batches
+   ended by a flush. The server answers every batch with an `ACK <oid>` line for
+   each commit it has, then a flush. The client skips the ancestors of
+   acknowledged commits, and sends `done` once it has nothing left to offer.
+   The client does not wait for the answer to its wants before sending haves,
+   and keeps `NEGOTIATION_WINDOW` batches in flight, so a round trip is paid
+   once per window rather than once per batch.
+4. The server sends a single pack of the objects reachable from the wants but not
+   from the acknowledged commits. With the `thin-pack` capability, the pack may
+   hold deltas against objects of the acknowledged commits. With the `side-band`
+   capability, the pack is split into pkt-lines starting with the byte 1, between
+   which lines starting with the byte 2 carry progress messages, and a flush ends
+   it.
+
+The pack holds what changed between the two sides and is found without walking
+their common history, so the cost of a fetch follows the size of the change.
+
+A client may keep the connection for several requests instead: it answers the
+advertisement with a `session` section, then sends requests until it closes the
+connection. An `ls-refs` request is answered with a new advertisement, and a
+request starting with a `fetch` line followed by the wants runs steps 2 to 4.
+Session fetches must ask for `side-band`, whose flush tells where the pack ends.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import heapq
+import itertools
+import socket
+import subprocess  # noqa: S404
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+from typing import cast
+
+from codetrail import exceptions
+from codetrail import history
+from codetrail import packs
+from codetrail import reachability
+from codetrail import refs
+from codetrail.conf import HEAD_FILE
+from codetrail.conf import NEGOTIATION_BATCH_SIZE
+from codetrail.conf import NEGOTIATION_MAX_IN_VAIN
+from codetrail.conf import NEGOTIATION_WINDOW
+from codetrail.conf import PKT_LINE_LIMIT
+from codetrail.conf import UPLOAD_PACK_COMMAND
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Generator
+    from collections.abc import Iterable
+    from collections.abc import Sequence
+    from typing import BinaryIO
+
+    from codetrail import commits
+    from codetrail.objects import ObjectStore
+
+FLUSH_PACKET = b"0000"
+PEELED_SUFFIX = "^{}"
+CAPABILITIES_NAME = "capabilities^{}"
+SYMREF_PREFIX = "symref=HEAD:"
+THIN_PACK = "thin-pack"
+SIDE_BAND = "side-band"
+SESSION = "session"
+FILTER = "filter"
+LS_REFS = "ls-refs"
+FETCH = "fetch"
+PACK_BAND = 1
+PROGRESS_BAND = 2
+FILTER_SIZE_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3}
+ZERO_ID = "0" * 40
+
+
+class Advertisement(NamedTuple):
+    """The references and capabilities advertised by a server.
+
+    Attributes:
+        refs: The hex object ID of every reference, by name.
+        peeled: The hex ID of the commit every annotated tag points to, by name.
+        capabilities: The capabilities of the server.
+    """
+
+    refs: dict[str, str]
+    peeled: dict[str, str]
+    capabilities: frozenset[str]
+
+    @property
+    def head(self) -> str | None:
+        """Get the branch the server `HEAD` points to, None if it is detached."""
+        for capability in self.capabilities:
+            if capability.startswith(SYMREF_PREFIX):
+                return capability.removeprefix(SYMREF_PREFIX)
+        return None
+
+
+def write_pkt_line(file: BinaryIO, data: bytes | str) -> None:
+    """Write a pkt-line.
+
+    Args:
+        file: The stream to write to.
+        data: The payload, encoded as UTF-8 when given as text.
+
+    Raises:
+        ProtocolError: If the payload does not fit in a pkt-line.
+    """
+    payload = data.encode() if isinstance(data, str) else data
+    if len(payload) > PKT_LINE_LIMIT:
+        msg = f"Payload of {len(payload)} bytes does not fit in a pkt-line"
+        raise exceptions.ProtocolError(msg)
+    file.write(f"{len(payload) + 4:04x}".encode() + payload)
+
+
+def write_flush(file: BinaryIO) -> None:
+    """Write a flush packet and push everything written to the peer.
+
+    Args:
+        file: The stream to write to.
+    """
+    file.write(FLUSH_PACKET)
+    file.flush()
+
+
+def write_error(file: BinaryIO, message: str) -> None:
+    """Report an error to the peer, ending the session.
+
+    Args:
+        file: The stream to write to.
+        message: The error message.
+    """
+    write_pkt_line(file, f"ERR {message}")
+    file.flush()
+
+
+def read_pkt_line(file: BinaryIO) -> bytes | None:
+    """Read a pkt-line.
+
+    Args:
+        file: The stream to read from.
+
+    Returns:
+        The payload, None for a flush packet.
+
+    Raises:
+        ProtocolError: If the stream ends, the line is malformed or the peer
+            reported an error.
+    """
+    header = file.read(4)
+    if not header:
+        msg = "Connection closed by the peer"
+        raise exceptions.ProtocolError(msg)
+    return _read_payload(file, header)
+
+
+def _read_payload(file: BinaryIO, header: bytes) -> bytes | None:
+    try:
+        length = int(header, 16)
+    except ValueError as e:
+        msg = f"Malformed pkt-line header {header!r}"
+        raise exceptions.ProtocolError(msg) from e
+    if not length:
+        return None
+    payload = file.read(length - 4)
+    if len(payload) != length - 4:
+        msg = "Connection closed in the middle of a pkt-line"
+        raise exceptions.ProtocolError(msg)
+    if payload.startswith(b"ERR "):
+        raise exceptions.ProtocolError(payload[4:].decode().rstrip("\n"))
+    return payload
+
+
+def read_section(file: BinaryIO) -> list[str]:
+    """Read the pkt-lines up to the next flush packet.
+
+    Args:
+        file: The stream to read from.
+
+    Returns:
+        The payloads, decoded and without their trailing newline.
+    """
+    lines = []
+    while (line := read_pkt_line(file)) is not None:
+        lines.append(line.decode().rstrip("\n"))
+    return lines
+
+
+def read_request(file: BinaryIO) -> list[str] | None:
+    """Read the next request of a session.
+
+    Args:
+        file: The stream to read from.
+
+    Returns:
+        The lines of the request as `read_section` returns them, None if the client
+        closed the connection instead.
+    """
+    header = file.read(4)
+    if not header:
+        return None
+    first = _read_payload(file, header)
+    if first is None:
+        return []
+    return [first.decode().rstrip("\n"), *read_section(file)]
+
+
+class SidebandWriter:
+    """A stream multiplexing a pack and progress messages on sidebands.
+
+    Attributes:
+        file: The stream the pkt-lines are written to.
+        written: The number of pack bytes written so far.
+    """
+
+    file: BinaryIO
+    written: int
+
+    def __init__(self, file: BinaryIO) -> None:
+        """Start writing on sidebands.
+
+        Args:
+            file: The stream the pkt-lines are written to.
+        """
+        self.file = file
+        self.written = 0
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> None:
+        """Write pack data, sent in pkt-lines as large as possible.
+
+        Args:
+            data: The bytes to write.
+        """
+        self._buffer += data
+        self.written += len(data)
+        while len(self._buffer) >= PKT_LINE_LIMIT - 1:
+            self._send(PKT_LINE_LIMIT - 1)
+
+    def progress(self, message: str) -> None:
+        """Send a progress message after the pack data written so far.
+
+        Args:
+            message: The message, without a trailing newline.
+        """
+        self._send(len(self._buffer))
+        write_pkt_line(self.file, bytes([PROGRESS_BAND]) + f"{message}\n".encode())
+        self.file.flush()
+
+    def close(self) -> None:
+        """Send the remaining pack data and the flush packet ending the pack."""
+        self._send(len(self._buffer))
+        write_flush(self.file)
+
+    def _send(self, size: int) -> None:
+        if size:
+            write_pkt_line(self.file, bytes([PACK_BAND]) + self._buffer[:size])
+            del self._buffer[:size]
+
+
+class SidebandReader:
+    """A stream reading the pack multiplexed on sidebands, up to its flush packet.
+
+    Attributes:
+        file: The stream the pkt-lines are read from.
+        progress: The function progress messages are passed to, if any.
+    """
+
+    file: BinaryIO
+    progress: Callable[[str], None] | None
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        progress: Callable[[str], None] | None = None,
+    ) -> None:
+        """Start reading from sidebands.
+
+        Args:
+            file: The stream the pkt-lines are read from.
+            progress: The function progress messages are passed to, if any.
+        """
+        self.file = file
+        self.progress = progress
+        self._buffer = bytearray()
+        self._done = False
+
+    def read(self, size: int) -> bytes:
+        """Read pack data.
+
+        Args:
+            size: The maximum number of bytes to read.
+
+        Returns:
+            At most `size` bytes, fewer if a pkt-line ends first. Empty once the
+            flush packet ending the pack is read.
+
+        Raises:
+            ProtocolError: If a pkt-line is on an unknown sideband.
+        """
+        while not self._buffer and not self._done:
+            line = read_pkt_line(self.file)
+            if line is None:
+                self._done = True
+            elif line[:1] == bytes([PACK_BAND]):
+                self._buffer += line[1:]
+            elif line[:1] == bytes([PROGRESS_BAND]):
+                if self.progress is not None:
+                    self.progress(line[1:].decode().rstrip("\n"))
+            else:
+                msg = f"Unknown sideband in pkt-line {line[:20]!r}"
+                raise exceptions.ProtocolError(msg)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def finish(self) -> None:
+        """Read up to the flush packet, passing on the last progress messages.
+
+        Raises:
+            ProtocolError: If pack data is left.
+        """
+        if self.read(1):
+            msg = "Unexpected data after the end of the pack"
+            raise exceptions.ProtocolError(msg)
+
+
+def parse_filter(spec: str) -> int:
+    """Parse an object filter, which leaves blobs out of the objects sent.
+
+    The filter `blob:none` leaves every blob out, and `blob:limit=<n>[k|m|g]` the
+    blobs of at least `n` bytes, kibibytes, mebibytes or gibibytes.
+
+    Args:
+        spec: The filter specification.
+
+    Returns:
+        The size in bytes from which blobs are left out, 0 for every blob.
+
+    Raises:
+        InvalidFilterError: If the specification is not a supported filter.
+    """
+    if spec == "blob:none":
+        return 0
+    kind, _, value = spec.partition("=")
+    unit = value[-1:].lower() if value[-1:].isalpha() else ""
+    number = value.removesuffix(value[-1:]) if unit else value
+    if kind != "blob:limit" or unit not in FILTER_SIZE_UNITS or not number.isdigit():
+        msg = f"Unsupported object filter '{spec}'"
+        raise exceptions.InvalidFilterError(msg)
+    return int(number) * FILTER_SIZE_UNITS[unit]
+
+
+def advertise_refs(store: ObjectStore, repo_dir: Path, output: BinaryIO) -> None:
+    """Advertise the references and capabilities of a repository.
+
+    Args:
+        store: The object store of the repository.
+        repo_dir: The repository directory.
+        output: The stream to write to.
+    """
+    capabilities = [THIN_PACK, SIDE_BAND, SESSION, FILTER]
+    head = refs.read_ref(repo_dir, HEAD_FILE)
+    if head is not None and head.startswith(refs.SYMBOLIC_PREFIX):
+        capabilities.append(SYMREF_PREFIX + head.removeprefix(refs.SYMBOLIC_PREFIX))
+
+    lines = []
+    head_oid = refs.resolve_ref(repo_dir)
+    if head_oid is not None:
+        lines.append(f"{head_oid} {HEAD_FILE}")
+    records = refs.packed_refs(repo_dir)
+    for name, oid in refs.iter_refs(repo_dir):
+        lines.append(f"{oid} {name}")
+        if not name.startswith("refs/tags/"):
+            continue
+        record = records.get(name) if records is not None else None
+        if record is not None and record.oid == oid:
+            peeled = record.peeled
+        else:
+            peeled = history.peel(store, oid)
+        if peeled is not None and peeled != oid:
+            lines.append(f"{peeled} {name}{PEELED_SUFFIX}")
+
+    first = lines[0] if lines else f"{ZERO_ID} {CAPABILITIES_NAME}"
+    write_pkt_line(output, f"{first}\0{' '.join(capabilities)}\n")
+    for line in lines[1:]:
+        write_pkt_line(output, f"{line}\n")
+    write_flush(output)
+
+
+def read_advertisement(file: BinaryIO) -> Advertisement:
+    """Read the references and capabilities advertised by a server.
+
+    Args:
+        file: The stream to read from.
+
+    Returns:
+        The advertisement.
+    """
+    advertised: dict[str, str] = {}
+    peeled: dict[str, str] = {}
+    capabilities: frozenset[str] = frozenset()
+    for position, line in enumerate(read_section(file)):
+        entry, _, flags = line.partition("\0")
+        if not position:
+            capabilities = frozenset(flags.split())
+        oid, _, name = entry.partition(" ")
+        if name == CAPABILITIES_NAME:
+            continue
+        if name.endswith(PEELED_SUFFIX):
+            peeled[name.removesuffix(PEELED_SUFFIX)] = oid
+        else:
+            advertised[name] = oid
+    return Advertisement(advertised, peeled, capabilities)
+
+
+def serve_upload_pack(  # noqa: PLR0913
+    store: ObjectStore,
+    repo_dir: Path,
+    input_stream: BinaryIO,
+    output: BinaryIO,
+    *,
+    window: int,
+    depth: int,
+) -> int:
+    """Serve a fetch of a repository, or every request of a session.
+
+    Any object the repository holds may be wanted, not only the advertised ones.
+    Wanted objects are sent even when the filter of the client leaves them out.
+
+    Args:
+        store: The object store of the repository.
+        repo_dir: The repository directory.
+        input_stream: The stream the client writes to.
+        output: The stream the client reads from.
+        window: The number of previous objects considered as delta bases.
+        depth: The maximum length of a delta chain.
+
+    Returns:
+        The number of objects sent.
+
+    Raises:
+        ProtocolError: If the client sends an unexpected line or wants an object
+            the repository does not have. The error is not reported to the client.
+    """
+    advertise_refs(store, repo_dir, output)
+    first = read_section(input_stream)
+    if first != [SESSION]:
+        return _serve_fetch(
+            store,
+            input_stream,
+            output,
+            first,
+            window=window,
+            depth=depth,
+        )
+
+    count = 0
+    while (request := read_request(input_stream)) is not None:
+        if request == [LS_REFS]:
+            advertise_refs(store, repo_dir, output)
+        elif request[:1] == [FETCH]:
+            count += _serve_fetch(
+                store,
+                input_stream,
+                output,
+                request[1:],
+                window=window,
+                depth=depth,
+            )
+        else:
+            msg = f"Unknown session request {request[:1]!r}"
+            raise exceptions.ProtocolError(msg)
+    return count
+
+
+def _serve_fetch(  # noqa: PLR0913
+    store: ObjectStore,
+    input_stream: BinaryIO,
+    output: BinaryIO,
+    request: list[str],
+    *,
+    window: int,
+    depth: int,
+) -> int:
+    wants, capabilities, blob_limit = _read_wants(request)
+    if not wants:
+        return 0
+    for oid in wants:
+        if not store.has_object(oid):
+            msg = f"Upload-pack: not our object {oid}"
+            raise exceptions.ProtocolError(msg)
+    write_flush(output)
+
+    common = []
+    acknowledged: list[str] = []
+    while (line := read_pkt_line(input_stream)) != b"done\n":
+        if line is None:
+            for oid in acknowledged:
+                write_pkt_line(output, f"ACK {oid}\n")
+            write_flush(output)
+            acknowledged = []
+            continue
+        oid = _parse_line(line.decode(), "have")
+        if store.has_object(oid) and store.read_object(oid).obj_type == "commit":
+            common.append(oid)
+            acknowledged.append(oid)
+
+    found = reachability.missing_objects(store, wants, common)
+    if blob_limit is not None:
+        found = reachability.filter_blobs(store, found, blob_limit) | set(wants)
+    bases = None
+    if THIN_PACK in capabilities:
+        bases = reachability.thin_bases(store, wants, common)
+    writer = packs.PackWriter(store, window, depth)
+    if SIDE_BAND not in capabilities:
+        count = writer.write_stream(output, found, bases)
+        output.flush()
+        return count
+    sideband = SidebandWriter(output)
+    sideband.progress(f"Counting objects: {len(found)}, done.")
+    count = writer.write_stream(cast("BinaryIO", sideband), found, bases)
+    sideband.progress(f"Total {count} objects, {sideband.written} bytes.")
+    sideband.close()
+    return count
+
+
+def _parse_line(line: str, command: str) -> str:
+    text = line.rstrip("\n")
+    name, _, oid = text.partition(" ")
+    if name != command or len(oid) != len(ZERO_ID):
+        msg = f"Expected a '{command}' line, got {text!r}"
+        raise exceptions.ProtocolError(msg)
+    return oid
+
+
+def _read_wants(
+    lines: list[str],
+) -> tuple[list[str], frozenset[str], int | None]:
+    wants = []
+    capabilities: frozenset[str] = frozenset()
+    blob_limit = None
+    for position, line in enumerate(lines):
+        if line.startswith(f"{FILTER} "):
+            blob_limit = parse_filter(line.removeprefix(f"{FILTER} "))
+            continue
+        words = line.split(" ")
+        wants.append(_parse_line(" ".join(words[:2]), "want"))
+        if not position:
+            capabilities = frozenset(words[2:])
+    return wants, capabilities, blob_limit
+
+
+class Negotiator:
+    """The commits a client offers as haves, newest first.
+
+    The commits the server is known to have are offered first. Once the server
+    acknowledges a commit, its ancestors are no longer offered, and the walk stops
+    when every commit left in the queue is common to both sides.
+
+    Attributes:
+        store: The object store of the client.
+        common: The hex IDs of the commits known to be on the server.
+    """
+
+    store: ObjectStore
+    common: set[str]
+
+    def __init__(
+        self,
+        store: ObjectStore,
+        tips: Iterable[str],
+        known: Iterable[str] = (),
+    ) -> None:
+        """Start offering the history of some commits.
+
+        Args:
+            store: The object store of the client.
+            tips: The hex IDs of the commits, or tags of commits, to offer.
+            known: The hex IDs of commits the server advertised.
+        """
+        self.store = store
+        self.common: set[str] = set()
+        self._known = [
+            oid
+            for oid in dict.fromkeys(known)
+            if store.has_object(oid) and store.read_object(oid).obj_type == "commit"
+        ]
+        self._order = itertools.count()
+        self._queue: list[tuple[int, int, str]] = []
+        self._pending: dict[str, commits.Commit] = {}
+        for tip in tips:
+            oid = history.peel(store, tip)
+            if store.read_object(oid).obj_type == "commit":
+                self._push(oid)
+
+    def _push(self, oid: str) -> None:
+        if oid in self._pending or not self.store.has_object(oid):
+            return
+        commit = history.read_commit(self.store, oid)
+        self._pending[oid] = commit
+        heapq.heappush(self._queue, (-commit.commit_time, next(self._order), oid))
+
+    def acknowledge(self, oid: str) -> None:
+        """Record that the server has a commit, and so all its ancestors.
+
+        The ancestors already walked are marked at once; the others are marked when
+        the walk reaches them.
+
+        Args:
+            oid: The hex ID of the commit.
+        """
+        stack = [oid]
+        while stack:
+            oid = stack.pop()
+            if oid in self.common:
+                continue
+            self.common.add(oid)
+            commit = self._pending.get(oid)
+            if commit is not None:
+                stack.extend(commit.parents)
+
+    def next_batch(self, size: int = NEGOTIATION_BATCH_SIZE) -> list[str]:
+        """Get the next commits to offer.
+
+        Args:
+            size: The maximum number of commits.
+
+        Returns:
+            The hex IDs of the commits, empty once there is nothing left to offer.
+        """
+        batch = self._known[:size]
+        del self._known[:size]
+        for oid in batch:
+            self.acknowledge(oid)
+        while len(batch) < size and any(
+            oid not in self.common for _, _, oid in self._queue
+        ):
+            _, _, oid = heapq.heappop(self._queue)
+            for parent in self._pending[oid].parents:
+                if oid in self.common:
+                    self.common.add(parent)
+                self._push(parent)
+            if oid not in self.common:
+                batch.append(oid)
+        return batch
+
+
+def fetch_pack(  # noqa: PLR0913
+    store: ObjectStore,
+    input_stream: BinaryIO,
+    output: BinaryIO,
+    wants: Sequence[str],
+    negotiator: Negotiator,
+    *,
+    thin: bool = True,
+    filter_spec: str | None = None,
+    sideband: bool = False,
+    progress: Callable[[str], None] | None = None,
+) -> packs.Pack | None:
+    """Fetch objects from a server that has sent its advertisement.
+
+    Args:
+        store: The object store receiving the objects.
+        input_stream: The stream the server writes to.
+        output: The stream the server reads from.
+        wants: The hex IDs of the objects to fetch, with their history.
+        negotiator: The commits to offer as haves.
+        thin: Whether the server may send deltas against objects the client has.
+        filter_spec: The filter leaving blobs out of the pack, see `parse_filter`.
+            The server must advertise the `filter` capability.
+        sideband: Whether to receive the pack on sidebands, which the server must
+            advertise. The stream is then read exactly up to the end of the pack.
+        progress: The function the progress messages of the server are passed to,
+            when receiving on sidebands.
+
+    Returns:
+        The received pack, None if nothing was fetched.
+    """
+    flags = [flag for flag, on in ((THIN_PACK, thin), (SIDE_BAND, sideband)) if on]
+    for position, oid in enumerate(wants):
+        line = f"want {oid}" if position else " ".join([f"want {oid}", *flags])
+        write_pkt_line(output, f"{line}\n")
+    if filter_spec is not None:
+        write_pkt_line(output, f"{FILTER} {filter_spec}\n")
+    write_flush(output)
+    if not wants:
+        return None
+
+    in_flight: deque[int] = deque()
+    in_vain = 0
+    _send_haves(output, negotiator, in_flight, in_vain)
+    read_section(input_stream)
+    while in_flight:
+        size = in_flight.popleft()
+        acknowledged = [_parse_line(line, "ACK") for line in read_section(input_stream)]
+        for oid in acknowledged:
+            negotiator.acknowledge(oid)
+        in_vain = 0 if acknowledged else in_vain + size
+        _send_haves(output, negotiator, in_flight, in_vain)
+    write_pkt_line(output, "done\n")
+    output.flush()
+    if not sideband:
+        return packs.index_pack(store, input_stream)
+    reader = SidebandReader(input_stream, progress)
+    pack = packs.index_pack(store, cast("BinaryIO", reader))
+    reader.finish()
+    return pack
+
+
+def _send_haves(
+    output: BinaryIO,
+    negotiator: Negotiator,
+    in_flight: deque[int],
+    in_vain: int,
+) -> None:
+    while (
+        len(in_flight) < NEGOTIATION_WINDOW
+        and in_vain + sum(in_flight) < NEGOTIATION_MAX_IN_VAIN
+        and (batch := negotiator.next_batch())
+    ):
+        for oid in batch:
+            write_pkt_line(output, f"have {oid}\n")
+        write_flush(output)
+        in_flight.append(len(batch))
+
+
+@contextlib.contextmanager
+def connect(
+    remote: str,
+    upload_pack: Sequence[str] = UPLOAD_PACK_COMMAND,
+) -> Generator[tuple[BinaryIO, BinaryIO]]:
+    """Connect to an upload-pack server for a repository.
+
+    A remote path naming a Unix socket is connected to, see `upload-pack --listen`.
+    Otherwise the server is started as a subprocess speaking over pipes. The
+    server input is closed on exit, which ends the session if it is still
+    running, and the server is waited for.
+
+    Args:
+        remote: The path of the remote repository, or of the socket serving it.
+        upload_pack: The command starting the server, given the path.
+
+    Yields:
+        The stream the server writes to and the stream it reads from.
+    """
+    if Path(remote).is_socket():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(remote)
+            with (
+                connection.makefile("rb") as source,
+                connection.makefile("wb") as sink,
+            ):
+                yield source, sink
+            with contextlib.suppress(OSError):
+                connection.shutdown(socket.SHUT_RDWR)
+        return
+    with subprocess.Popen(  # noqa: S603
+        [*upload_pack, remote],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    ) as process:
+        yield cast("BinaryIO", process.stdout), cast("BinaryIO", process.stdin)
@@ -0,0 +1,143 @@
+"""This module holds the tree diff engine.
+
+Two trees are compared by walking their sorted entry listings side by side, like a
+merge join. Entries with the same name and object ID are skipped without being
+read, so subtrees that did not change are never inflated and the work done is
+proportional to the size of the change, not to the size of the trees.
+
+The staging index is compared to a tree by building the trees of the index in
+memory first. Building them hashes every index entry, but no object is read for
+directories whose tree ID matches.
+"""
+
+from __future__ import annotations
+
+import functools
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from codetrail import trees
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from collections.abc import Iterator
+
+    from codetrail.index import IndexEntry
+    from codetrail.objects import ObjectStore
+    from codetrail.trees import TreeEntry
+
+TreeReader = Callable[[str], list[trees.TreeEntry]]
+
+
+class Change(NamedTuple):
+    """A file that differs between two trees.
+
+    Attributes:
+        path: The POSIX path of the file.
+        old: The entry on the old side, None if the file was added.
+        new: The entry on the new side, None if the file was deleted.
+    """
+
+    path: str
+    old: TreeEntry | None
+    new: TreeEntry | None
+
+    @property
+    def status(self) -> str:
+        """Get the status letter, `A` for added, `D` for deleted or `M` otherwise."""
+        if self.old is None:
+            return "A"
+        if self.new is None:
+            return "D"
+        return "M"
+
+
+def diff_trees(
+    store: ObjectStore,
+    old: str | None,
+    new: str | None,
+) -> Iterator[Change]:
+    """Compare two trees of an object store.
+
+    Args:
+        store: The object store holding the trees.
+        old: The hex ID of the old tree, None for an empty tree.
+        new: The hex ID of the new tree, None for an empty tree.
+
+    Returns:
+        A lazy iterator over the changed files, in path order.
+    """
+    reader = functools.partial(trees.read_tree, store)
+    return _diff(reader, reader, old, new, "")
+
+
+def diff_tree_to_index(
+    store: ObjectStore,
+    tree: str | None,
+    entries: Iterable[IndexEntry],
+) -> Iterator[Change]:
+    """Compare a tree of an object store with the entries of a staging index.
+
+    Args:
+        store: The object store holding the tree.
+        tree: The hex ID of the tree, None for an empty tree.
+        entries: The index entries.
+
+    Returns:
+        A lazy iterator over the changed files, in path order. The index is the new
+        side of every change.
+    """
+    root, index_trees = trees.build_index_trees(entries)
+    reader = functools.partial(trees.read_tree, store)
+    return _diff(reader, index_trees.__getitem__, tree, root, "")
+
+
+def _diff(
+    read_old: TreeReader,
+    read_new: TreeReader,
+    old: str | None,
+    new: str | None,
+    prefix: str,
+) -> Iterator[Change]:
+    if old == new:
+        return
+    old_entries = read_old(old) if old is not None else []
+    new_entries = read_new(new) if new is not None else []
+    for entry, old_entry, new_entry in _join(old_entries, new_entries):
+        if old_entry == new_entry:
+            continue
+        if entry.is_tree:
+            yield from _diff(
+                read_old,
+                read_new,
+                old_entry.oid if old_entry is not None else None,
+                new_entry.oid if new_entry is not None else None,
+                f"{prefix}{entry.name}/",
+            )
+        else:
+            yield Change(f"{prefix}{entry.name}", old_entry, new_entry)
+
+
+def _join(
+    old_entries: list[TreeEntry],
+    new_entries: list[TreeEntry],
+) -> Iterator[tuple[TreeEntry, TreeEntry | None, TreeEntry | None]]:
+    old_position = new_position = 0
+    while old_position < len(old_entries) and new_position < len(new_entries):
+        old_entry = old_entries[old_position]
+        new_entry = new_entries[new_position]
+        if old_entry.sort_key < new_entry.sort_key:
+            yield old_entry, old_entry, None
+            old_position += 1
+        elif new_entry.sort_key < old_entry.sort_key:
+            yield new_entry, None, new_entry
+            new_position += 1
+        else:
+            yield new_entry, old_entry, new_entry
+            old_position += 1
+            new_position += 1
+    for old_entry in old_entries[old_position:]:
+        yield old_entry, old_entry, None
+    for new_entry in new_entries[new_position:]:
+        yield new_entry, None, new_entry
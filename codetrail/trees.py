@@ -0,0 +1,159 @@
+"""This module holds the tree object format.
+
+A tree lists the entries of one directory, each as the octal mode, a space, the
+name, a NUL byte and the binary object ID of a blob or subtree::
+
+    <mode> <name> NUL <object ID (20)>
+
+Entries are sorted by name, with the names of subtrees compared as if they ended
+with `/`. With that order, walking a tree depth-first yields paths in the same
+order as sorting the full paths, which is the order of the staging index.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+
+from codetrail import exceptions
+from codetrail import index
+from codetrail import objects
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+OID_SIZE = 20
+
+
+class TreeEntry(NamedTuple):
+    """An entry of a tree.
+
+    Attributes:
+        mode: The file mode, `MODE_TREE` for subtrees.
+        name: The name of the entry within its directory.
+        oid: The hex ID of the blob or subtree.
+    """
+
+    mode: int
+    name: str
+    oid: str
+
+    @property
+    def is_tree(self) -> bool:
+        """Check whether the entry is a subtree."""
+        return self.mode == index.MODE_TREE
+
+    @property
+    def sort_key(self) -> str:
+        """Get the key that orders the entries of a tree."""
+        return f"{self.name}/" if self.is_tree else self.name
+
+
+def parse_tree(data: bytes) -> list[TreeEntry]:
+    """Decode the content of a tree object.
+
+    Args:
+        data: The object content.
+
+    Returns:
+        The entries of the tree, in tree order.
+
+    Raises:
+        CorruptObjectError: If an entry is truncated or malformed.
+    """
+    entries = []
+    position = 0
+    while position < len(data):
+        space = data.find(b" ", position)
+        nul = data.find(b"\0", space + 1)
+        end = nul + 1 + OID_SIZE
+        if space == -1 or nul == -1 or end > len(data):
+            msg = "Tree entry is truncated"
+            raise exceptions.CorruptObjectError(msg)
+        try:
+            mode = int(data[position:space], 8)
+        except ValueError as e:
+            msg = f"Malformed tree entry mode {data[position:space]!r}"
+            raise exceptions.CorruptObjectError(msg) from e
+        name = data[space + 1 : nul].decode()
+        entries.append(TreeEntry(mode, name, data[nul + 1 : end].hex()))
+        position = end
+    return entries
+
+
+def encode_tree(entries: Iterable[TreeEntry]) -> bytes:
+    """Encode tree entries as object content.
+
+    Args:
+        entries: The entries, in any order.
+
+    Returns:
+        The object content, with entries in tree order.
+    """
+    return b"".join(
+        f"{entry.mode:o} {entry.name}\0".encode() + bytes.fromhex(entry.oid)
+        for entry in sorted(entries, key=lambda entry: entry.sort_key)
+    )
+
+
+def read_tree(store: objects.ObjectStore, oid: str) -> list[TreeEntry]:
+    """Read a tree from an object store.
+
+    Args:
+        store: The object store holding the tree.
+        oid: The hex ID of the tree.
+
+    Returns:
+        The entries of the tree, in tree order.
+
+    Raises:
+        CorruptObjectError: If the object is not a tree.
+    """
+    raw = store.read_object(oid)
+    if raw.obj_type != "tree":
+        msg = f"Object '{oid}' is a {raw.obj_type}, not a tree"
+        raise exceptions.CorruptObjectError(msg)
+    return parse_tree(raw.data)
+
+
+def build_index_trees(
+    entries: Iterable[index.IndexEntry],
+) -> tuple[str, dict[str, list[TreeEntry]]]:
+    """Build the trees of a staging index in memory, without storing them.
+
+    Args:
+        entries: The index entries.
+
+    Returns:
+        The hex ID of the root tree, and the entries of every tree by tree ID.
+    """
+    files: defaultdict[str, list[TreeEntry]] = defaultdict(list)
+    subdirectories: defaultdict[str, set[str]] = defaultdict(set)
+    files[""] = []
+    for entry in entries:
+        parent, _, name = entry.path.rpartition("/")
+        files[parent].append(TreeEntry(entry.mode, name, entry.oid))
+        while parent:
+            grandparent, _, name = parent.rpartition("/")
+            if name in subdirectories[grandparent]:
+                break
+            subdirectories[grandparent].add(name)
+            parent = grandparent
+
+    oids: dict[str, str] = {}
+    trees: dict[str, list[TreeEntry]] = {}
+    deepest_first = sorted(
+        files.keys() | subdirectories.keys(),
+        key=lambda directory: directory.count("/") + 1 if directory else 0,
+        reverse=True,
+    )
+    for directory in deepest_first:
+        tree = list(files.get(directory, ()))
+        for name in subdirectories.get(directory, ()):
+            child = f"{directory}/{name}" if directory else name
+            tree.append(TreeEntry(index.MODE_TREE, name, oids[child]))
+        tree.sort(key=lambda entry: entry.sort_key)
+        oids[directory] = objects.hash_object("tree", encode_tree(tree))
+        trees[oids[directory]] = tree
+    return oids[""], trees
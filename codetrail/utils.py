@@ -1,9 +1,14 @@
 """This module defines the file system operations."""
 
-from configparser import ConfigParser
+import functools
+import os
 from pathlib import Path
 
+from codetrail import walker
+from codetrail.conf import CEILING_DIRECTORIES_ENVIRONMENT
 from codetrail.conf import DEFAULT_CODETRAIL_DIRECTORY
+from codetrail.conf import REPOSITORY_DIR_ENVIRONMENT
+from codetrail.conf import WALK_PRUNED_DIRECTORIES
 
 
 def path_is_directory(path: Path) -> bool:
@@ -52,8 +57,13 @@ def find_repository_path(path: str | Path) -> Path | None:
     """Find the root of the Codetrail repository.
 
     Starts at the given directory and moves upwards until it finds the repository
-    root (a directory containing the `.codetrail` folder).
-    Stops at the user's home directory.
+    root (a directory containing the `.codetrail` folder). Stops at the user's home
+    directory, at a file system boundary, and before entering any directory listed
+    in `CODETRAIL_CEILING_DIRECTORIES`. If `CODETRAIL_DIR` names a `.codetrail`
+    directory, its parent is the repository root and no search is made.
+
+    The result is memoized for the rest of the process, see
+    `clear_repository_cache`.
 
     Args:
         path: The directory to start searching from.
@@ -61,28 +71,90 @@ def find_repository_path(path: str | Path) -> Path | None:
     Returns:
         The Path object representing the repository root.
     """
-    start = Path(path).resolve()
-    home = Path.home()
-    for current in [start, *start.parents]:
+    return _discover_repository(
+        os.path.normpath(Path(path).absolute()),
+        os.environ.get(REPOSITORY_DIR_ENVIRONMENT),
+        os.environ.get(CEILING_DIRECTORIES_ENVIRONMENT, ""),
+        Path.home(),
+    )
+
+
+@functools.cache
+def _discover_repository(
+    start: str,
+    repository_dir: str | None,
+    ceilings: str,
+    home: Path,
+) -> Path | None:
+    if repository_dir:
+        directory = Path(repository_dir).resolve()
+        if directory.name == DEFAULT_CODETRAIL_DIRECTORY and directory.is_dir():
+            return directory.parent
+        return None
+
+    stops = {
+        Path(ceiling).resolve()
+        for ceiling in ceilings.split(os.pathsep)
+        if Path(ceiling).is_absolute()
+    }
+    current = Path(start).resolve()
+    try:
+        device = current.stat().st_dev
+    except OSError:
+        device = None
+    while True:
         if path_is_directory(current / DEFAULT_CODETRAIL_DIRECTORY):
             return current
-        if current == home:
-            break
-    return None
+        parent = current.parent
+        if current in {home, parent} or parent in stops:
+            return None
+        try:
+            parent_device = parent.stat().st_dev
+        except OSError:
+            return None
+        if device is not None and parent_device != device:
+            return None
+        current, device = parent, parent_device
+
+
+def clear_repository_cache() -> None:
+    """Forget the memoized results of `find_repository_path`.
+
+    Call this after creating or removing a repository.
+    """
+    _discover_repository.cache_clear()
 
 
-def find_child_repository_path(path: str | Path) -> Path | None:
+def find_child_repository_path(
+    path: str | Path,
+    max_depth: int | None = None,
+    *,
+    same_filesystem: bool = False,
+) -> Path | None:
     """Find out if any child directory contains a Codetrail repository.
 
+    Heavy directories such as `node_modules` are not searched, symlinks are not
+    followed, and the walk stops at the first repository found.
+
     Args:
         path: The root directory to start checking from.
+        max_depth: The number of directory levels to search, None for no limit.
+        same_filesystem: Whether to stay on the file system of the root directory.
 
     Returns:
         The Path object representing the repository root. None otherwise.
     """
     start = Path(path).resolve()
-    for child in start.rglob(DEFAULT_CODETRAIL_DIRECTORY):
-        return child.parent if path_is_directory(child) else None
+    for entry in walker.walk_tree(
+        start,
+        exclude=WALK_PRUNED_DIRECTORIES,
+        max_depth=max_depth,
+        same_filesystem=same_filesystem,
+    ):
+        if entry.name == DEFAULT_CODETRAIL_DIRECTORY and entry.is_dir(
+            follow_symlinks=False,
+        ):
+            return Path(entry.path).parent
     return None
 
 
@@ -95,14 +167,3 @@ def write_to_file(file_path: Path, content: str) -> None:
     """
     with Path.open(file_path, "w", encoding="utf-8") as file:
         file.write(f"{content}\n")
-
-
-def write_to_config_file(file_path: Path, config: ConfigParser) -> None:
-    """Write content to a configuration file, creating or overwriting it.
-
-    Args:
-        file_path: The path to the file where content will be written.
-        config: The configuration parser instance.
-    """
-    with Path.open(file_path, "w", encoding="utf-8") as file:
-        config.write(file)
@@ -0,0 +1,99 @@
+"""This module holds the directory walker shared by every work tree scan.
+
+The walker is built on `os.scandir`, so the file type of most entries comes from
+the directory listing itself and no extra `stat()` call is made. It is lazy:
+callers that find what they need can stop iterating and the rest of the tree is
+never listed.
+
+Directories are yielded before their children. Excluded and skipped entries are
+neither yielded nor descended into, and unreadable directories are skipped.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Collection
+    from collections.abc import Iterator
+
+
+def walk_tree(  # noqa: PLR0913
+    root: str | Path,
+    *,
+    exclude: Collection[str] = (),
+    skip: Callable[[os.DirEntry[str]], bool] | None = None,
+    max_depth: int | None = None,
+    same_filesystem: bool = False,
+    follow_symlinks: bool = False,
+) -> Iterator[os.DirEntry[str]]:
+    """Walk the entries below a directory, sorted by name within each directory.
+
+    Args:
+        root: The directory to walk.
+        exclude: The names of entries to skip, along with everything below them.
+        skip: A predicate selecting further entries to skip. Skipped directories
+            are never listed.
+        max_depth: The number of directory levels to descend below the root, None
+            for no limit.
+        same_filesystem: Whether to stay on the file system of the root.
+        follow_symlinks: Whether to descend into symlinks to directories. Each
+            directory is visited once, so symlink loops are not followed.
+
+    Yields:
+        The directory entry of every file, directory and symlink.
+    """
+    status = Path(root).stat()
+    device = status.st_dev
+    visited = {(status.st_dev, status.st_ino)}
+    stack = [(os.fspath(root), 0)]
+    while stack:
+        directory, depth = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            if entry.name in exclude or (skip is not None and skip(entry)):
+                continue
+            yield entry
+            if max_depth is not None and depth >= max_depth:
+                continue
+            if _should_descend(
+                entry,
+                device if same_filesystem else None,
+                visited,
+                follow_symlinks=follow_symlinks,
+            ):
+                subdirectories.append(entry.path)
+        stack.extend((path, depth + 1) for path in reversed(subdirectories))
+
+
+def _should_descend(
+    entry: os.DirEntry[str],
+    device: int | None,
+    visited: set[tuple[int, int]],
+    *,
+    follow_symlinks: bool,
+) -> bool:
+    try:
+        if not entry.is_dir(follow_symlinks=follow_symlinks):
+            return False
+        if device is None and not follow_symlinks:
+            return True
+        status = entry.stat(follow_symlinks=follow_symlinks)
+    except OSError:
+        return False
+    if device is not None and status.st_dev != device:
+        return False
+    key = (status.st_dev, status.st_ino)
+    if key in visited:
+        return False
+    visited.add(key)
+    return True
@@ -10,6 +10,37 @@ import pytest
 from codetrail import cmd_init
 from codetrail import commands
 from codetrail import models
+from codetrail import objects
+from codetrail import refs
+from codetrail import session
+from codetrail import utils
+
+
+@pytest.fixture(autouse=True)
+def _clear_repository_cache():
+    """Forget repositories discovered by previous tests."""
+    utils.clear_repository_cache()
+
+
+@pytest.fixture(autouse=True)
+def _clear_ref_cache():
+    """Unmap the packed-refs files mapped during a test."""
+    yield
+    refs.clear_ref_cache()
+
+
+@pytest.fixture(autouse=True)
+def _close_sessions():
+    """Close the connections to remotes opened during a test."""
+    yield
+    session.close_sessions()
+
+
+@pytest.fixture(autouse=True)
+def _isolate_config_layers(tmp_path, monkeypatch):
+    """Keep the system and global configuration of the host out of the tests."""
+    monkeypatch.setenv("CODETRAIL_CONFIG_SYSTEM", str(tmp_path / "system-config"))
+    monkeypatch.setenv("CODETRAIL_CONFIG_GLOBAL", str(tmp_path / "global-config"))
 
 
 @pytest.fixture
@@ -24,6 +55,12 @@ def temporary_dir(tmp_path):
     return directory
 
 
+@pytest.fixture
+def store(temporary_dir):
+    """Provides an empty object store."""
+    return objects.ObjectStore(temporary_dir / "objects")
+
+
 @pytest.fixture
 def temporary_file(temporary_dir):
     """Provide a temporary file.
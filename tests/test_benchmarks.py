@@ -0,0 +1,178 @@
+import json
+
+import pytest
+
+from benchmarks import generator
+from benchmarks import suite
+from benchmarks.__main__ import main
+from codetrail import history
+from codetrail import refs
+
+SPEC = generator.RepositorySpec(files=30, depth=3, sizes="tiny", commits=4, seed=7)
+
+
+@pytest.fixture
+def fast(monkeypatch):
+    """Time every operation in single runs."""
+    monkeypatch.setattr(suite, "MIN_SAMPLE_SECONDS", 0)
+
+
+class TestGenerateFiles:
+    """Tests for `generate_files` function."""
+
+    def test_is_deterministic(self):
+        files = generator.generate_files(SPEC)
+
+        assert generator.generate_files(SPEC) == files
+        assert generator.generate_files(SPEC._replace(seed=8)) != files
+
+    def test_follows_the_spec(self):
+        files = generator.generate_files(SPEC._replace(sizes="source"))
+
+        assert len(files) == 30
+        assert max(path.count("/") for path in files) == 3
+        assert all(512 <= len(content) <= 262144 for content in files.values())
+        assert generator.deepest_directory(files).count("/") == 2
+
+    def test_raises_exception_on_unknown_sizes(self):
+        with pytest.raises(ValueError, match="Unknown size distribution 'huge'"):
+            generator.generate_files(SPEC._replace(sizes="huge"))
+
+
+class TestGenerateRepository:
+    """Tests for `generate_repository` function."""
+
+    def test_generates_the_same_history_for_the_same_spec(self, tmp_path):
+        first = generator.generate_repository(tmp_path / "first", SPEC)
+        second = generator.generate_repository(tmp_path / "second", SPEC)
+
+        tip = refs.resolve_ref(first.repo_dir, "refs/heads/master")
+        assert refs.resolve_ref(second.repo_dir, "refs/heads/master") == tip
+        assert len(list(history.iter_history(first.objects, [tip]))) == 4
+
+    def test_writes_the_files_of_the_last_commit(self, tmp_path):
+        repository = generator.generate_repository(tmp_path / "repository", SPEC)
+
+        files = generator.generate_files(SPEC)
+        changed = [
+            path
+            for path, content in files.items()
+            if (repository.work_tree / path).read_bytes() != content
+        ]
+        assert 0 < len(changed) <= 3
+
+
+class TestMeasure:
+    """Tests for `measure` function."""
+
+    def test_loops_until_a_sample_is_long_enough(self, monkeypatch):
+        monkeypatch.setattr(suite, "MIN_SAMPLE_SECONDS", 0.001)
+
+        measurement = suite.measure(lambda: bytearray(100_000), 3)
+
+        assert measurement.runs == 3
+        assert measurement.loops >= 1
+        assert 0 < measurement.best <= measurement.median
+        assert measurement.peak_bytes >= 100_000
+
+
+@pytest.mark.usefixtures("fast")
+class TestRunSuite:
+    """Tests for `run_suite` function."""
+
+    def test_measures_every_benchmark(self, tmp_path):
+        results = suite.run_suite(tmp_path, SPEC, repeat=1)
+
+        assert results["spec"] == SPEC._asdict()
+        assert list(results["benchmarks"]) == list(suite.BENCHMARKS)
+        assert results["benchmarks"]["log"]["runs"] == 1
+        json.dumps(results)
+
+    def test_raises_exception_on_unknown_benchmark(self, tmp_path):
+        with pytest.raises(ValueError, match="Unknown benchmarks \\['push'\\]"):
+            suite.run_suite(tmp_path, SPEC, ["init", "push"])
+
+
+class TestCheckBudget:
+    """Tests for `check_budget` function."""
+
+    @pytest.fixture
+    def results(self):
+        """Provides the results of a run of two benchmarks."""
+        measurement = {"runs": 1, "loops": 1, "best": 0.1, "median": 0.2}
+        return {
+            "spec": SPEC._asdict(),
+            "benchmarks": {
+                "init": {**measurement, "peak_bytes": 1000},
+                "log": {**measurement, "peak_bytes": 5000},
+            },
+        }
+
+    def test_accepts_the_results_a_budget_was_made_from(self, results):
+        assert suite.check_budget(results, suite.make_budget(results)) == []
+
+    def test_reports_slower_and_larger_benchmarks(self, results):
+        budget = suite.make_budget(results, tolerance=0.5)
+        results["benchmarks"]["init"]["median"] = 0.31
+        results["benchmarks"]["log"]["peak_bytes"] = 7600
+
+        assert suite.check_budget(results, budget) == [
+            "init took 0.310000s, over its budget of 0.200000s by more than 50%",
+            "log allocated 7600 bytes, over its budget of 5000 bytes by more than 50%",
+        ]
+
+    def test_skips_benchmarks_that_did_not_run(self, results):
+        budget = suite.make_budget(results)
+        del results["benchmarks"]["log"]
+
+        assert suite.check_budget(results, budget) == []
+
+    def test_reports_a_budget_for_another_spec(self, results):
+        budget = suite.make_budget(results)
+        results["spec"]["files"] = 10
+
+        (violation,) = suite.check_budget(results, budget)
+        assert violation.startswith("The budget is for the spec")
+
+
+@pytest.mark.usefixtures("fast")
+class TestMain:
+    """Tests for `main` function."""
+
+    arguments = ("--files", "20", "--depth", "2", "--sizes", "tiny", "--commits", "2")
+
+    def test_writes_the_results_and_a_budget(self, tmp_path, capsys):
+        output = tmp_path / "results.json"
+        budget = tmp_path / "budget.json"
+
+        status = main([
+            *self.arguments,
+            "--only",
+            "init",
+            "config_read",
+            "--output",
+            str(output),
+            "--write-budget",
+            str(budget),
+        ])
+
+        assert status == 0
+        assert capsys.readouterr().out == ""
+        results = json.loads(output.read_text(encoding="utf-8"))
+        assert list(results["benchmarks"]) == ["init", "config_read"]
+        assert json.loads(budget.read_text(encoding="utf-8"))["tolerance"] == 0.5
+
+    def test_fails_over_budget(self, tmp_path, capsys):
+        budget = tmp_path / "budget.json"
+        main([*self.arguments, "--only", "init", "--write-budget", str(budget)])
+        limits = json.loads(budget.read_text(encoding="utf-8"))
+        limits["budgets"]["init"]["median"] = 1e-9
+        budget.write_text(json.dumps(limits), encoding="utf-8")
+        capsys.readouterr()
+
+        status = main([*self.arguments, "--only", "init", "--budget", str(budget)])
+
+        assert status == 1
+        captured = capsys.readouterr()
+        assert "init took" in captured.err
+        assert json.loads(captured.out)["benchmarks"]["init"]["runs"] == 5
@@ -0,0 +1,296 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from codetrail import checkout
+from codetrail import exceptions
+from codetrail import index
+from codetrail import trees
+from tests.utils import index_entries
+from tests.utils import write_tree
+
+FILES = {
+    "README": b"readme",
+    "docs/guide.md": b"guide",
+    "src/app/main.py": b"main",
+    "src/lib.py": b"lib",
+}
+
+
+def write_entries(store, entries):
+    """Write the tree of some index entries and return its ID."""
+    root, built = trees.build_index_trees(entries)
+    for tree_entries in built.values():
+        store.write_object("tree", trees.encode_tree(tree_entries))
+    return root
+
+
+@pytest.fixture
+def work_tree(tmp_path):
+    """Provides an empty work tree."""
+    root = tmp_path / "work"
+    root.mkdir()
+    return root
+
+
+@pytest.fixture
+def store(code_repository):
+    """Provides the object store of a repository."""
+    return code_repository.objects
+
+
+@pytest.fixture
+def staging(code_repository):
+    """Provides the empty staging index of a repository."""
+    return index.StagingIndex(code_repository.index_path)
+
+
+@pytest.fixture
+def base(store, staging, work_tree):
+    """Checks out a tree holding `FILES` and returns its ID."""
+    tree = write_tree(store, FILES)
+    checkout.checkout_tree(store, staging, work_tree, None, tree, workers=2)
+    return tree
+
+
+def statuses(changes):
+    return [(change.status, change.path) for change in changes]
+
+
+class TestPlanCheckout:
+    """Tests for `plan_checkout` function."""
+
+    def test_lists_only_differing_paths(self, store, staging, base):
+        target = write_tree(store, {**FILES, "src/lib.py": b"lib 2", "NEW": b"new"})
+
+        assert statuses(checkout.plan_checkout(store, staging, base, target)) == [
+            ("A", "NEW"),
+            ("M", "src/lib.py"),
+        ]
+
+    def test_keeps_staged_paths_the_target_does_not_change(
+        self,
+        store,
+        staging,
+        base,
+    ):
+        (entry,) = index_entries(store, {"README": b"staged"})
+        staging.add(entry)
+        target = write_tree(store, {**FILES, "src/lib.py": b"lib 2"})
+
+        assert statuses(checkout.plan_checkout(store, staging, base, target)) == [
+            ("M", "src/lib.py"),
+        ]
+
+    def test_skips_staged_paths_matching_the_target(self, store, staging, base):
+        (entry,) = index_entries(store, {"README": b"new readme"})
+        staging.add(entry)
+        target = write_tree(store, {**FILES, "README": b"new readme"})
+
+        assert checkout.plan_checkout(store, staging, base, target) == []
+
+    def test_raises_on_staged_paths_the_target_changes(self, store, staging, base):
+        (entry,) = index_entries(store, {"README": b"staged"})
+        staging.add(entry)
+        target = write_tree(store, {**FILES, "README": b"other"})
+
+        with pytest.raises(exceptions.CheckoutConflictError, match="README"):
+            checkout.plan_checkout(store, staging, base, target)
+
+
+class TestCheckWorkTree:
+    """Tests for `check_work_tree` function."""
+
+    def plan(self, store, staging, base, files):
+        target = write_tree(store, files)
+        return checkout.plan_checkout(store, staging, base, target)
+
+    def test_accepts_clean_files_without_reading_them(
+        self,
+        store,
+        staging,
+        base,
+        work_tree,
+    ):
+        changes = self.plan(store, staging, base, {**FILES, "README": b"new"})
+
+        with patch.object(checkout, "_hash") as hasher:
+            checkout.check_work_tree(work_tree, staging, changes)
+            hasher.assert_not_called()
+
+    def test_hashes_files_with_new_stat_data(self, store, staging, base, work_tree):
+        (work_tree / "README").write_bytes(b"readme")
+        changes = self.plan(store, staging, base, {**FILES, "README": b"new"})
+
+        checkout.check_work_tree(work_tree, staging, changes)
+
+    @pytest.mark.parametrize("content", [b"edited", b"other size"])
+    def test_raises_on_local_changes(self, store, staging, base, work_tree, content):
+        (work_tree / "README").write_bytes(content)
+        changes = self.plan(store, staging, base, {**FILES, "README": b"new"})
+
+        with pytest.raises(exceptions.CheckoutConflictError, match="README"):
+            checkout.check_work_tree(work_tree, staging, changes)
+
+    def test_raises_on_untracked_files_in_the_way(
+        self,
+        store,
+        staging,
+        base,
+        work_tree,
+    ):
+        (work_tree / "NEW").write_bytes(b"untracked")
+        changes = self.plan(store, staging, base, {**FILES, "NEW": b"new"})
+
+        with pytest.raises(exceptions.CheckoutConflictError, match="NEW"):
+            checkout.check_work_tree(work_tree, staging, changes)
+
+    def test_raises_on_untracked_files_blocking_a_directory(
+        self,
+        store,
+        staging,
+        base,
+        work_tree,
+    ):
+        (work_tree / "lib").write_bytes(b"untracked")
+        changes = self.plan(store, staging, base, {**FILES, "lib/a/b.py": b"b"})
+
+        with pytest.raises(exceptions.CheckoutConflictError, match="lib/a/b.py"):
+            checkout.check_work_tree(work_tree, staging, changes)
+
+    def test_raises_on_untracked_files_in_a_replaced_directory(
+        self,
+        store,
+        staging,
+        base,
+        work_tree,
+    ):
+        (work_tree / "docs/notes.txt").write_bytes(b"untracked")
+        files = {path: data for path, data in FILES.items() if path != "docs/guide.md"}
+        changes = self.plan(store, staging, base, {**files, "docs": b"a file"})
+
+        with pytest.raises(exceptions.CheckoutConflictError, match="\n    docs$"):
+            checkout.check_work_tree(work_tree, staging, changes)
+
+
+class TestCheckoutTree:
+    """Tests for `checkout_tree` function."""
+
+    def test_writes_the_initial_tree(self, store, staging, work_tree, base):
+        assert {path: (work_tree / path).read_bytes() for path in FILES} == FILES
+        assert [entry.path for entry in staging] == sorted(FILES)
+        assert index.StagingIndex(staging.path).get("README") == staging.get("README")
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_writes_only_changed_files(
+        self,
+        store,
+        staging,
+        work_tree,
+        base,
+        workers,
+    ):
+        untouched = {path: (work_tree / path).stat() for path in FILES}
+        target = write_tree(
+            store,
+            {**FILES, "src/lib.py": b"lib 2", "src/app/new.py": b"new"},
+        )
+
+        result = checkout.checkout_tree(
+            store,
+            staging,
+            work_tree,
+            base,
+            target,
+            workers=workers,
+        )
+
+        assert result == checkout.CheckoutResult(written=2, removed=0)
+        assert (work_tree / "src/lib.py").read_bytes() == b"lib 2"
+        assert (work_tree / "src/app/new.py").read_bytes() == b"new"
+        for path in ("README", "docs/guide.md", "src/app/main.py"):
+            assert (work_tree / path).stat().st_ino == untouched[path].st_ino
+            assert (work_tree / path).stat().st_mtime_ns == untouched[path].st_mtime_ns
+
+    def test_removes_files_and_empty_directories(
+        self,
+        store,
+        staging,
+        work_tree,
+        base,
+    ):
+        target = write_tree(store, {"README": b"readme", "src/lib.py": b"lib"})
+
+        result = checkout.checkout_tree(
+            store,
+            staging,
+            work_tree,
+            base,
+            target,
+            workers=2,
+        )
+
+        assert result == checkout.CheckoutResult(written=0, removed=2)
+        assert not (work_tree / "docs").exists()
+        assert not (work_tree / "src/app").exists()
+        assert (work_tree / "src/lib.py").exists()
+        assert [entry.path for entry in staging] == ["README", "src/lib.py"]
+
+    def test_swaps_files_and_directories(self, store, staging, work_tree, base):
+        files = {"src/lib.py": b"lib", "docs": b"docs", "README/x": b"x"}
+        target = write_tree(store, files)
+
+        checkout.checkout_tree(store, staging, work_tree, base, target, workers=2)
+
+        assert (work_tree / "docs").read_bytes() == b"docs"
+        assert (work_tree / "README/x").read_bytes() == b"x"
+
+    def test_writes_modes_and_symlinks(self, store, staging, work_tree, base):
+        entries = [
+            *index_entries(store, FILES),
+            *index_entries(store, {"run.sh": b"#!/bin/sh\n"}, index.MODE_EXECUTABLE),
+            *index_entries(store, {"link": b"README"}, index.MODE_SYMLINK),
+        ]
+        target = write_entries(store, sorted(entries))
+
+        checkout.checkout_tree(store, staging, work_tree, base, target, workers=2)
+
+        assert os.access(work_tree / "run.sh", os.X_OK)
+        assert (work_tree / "link").readlink().as_posix() == "README"
+        assert staging.get("run.sh").mode == index.MODE_EXECUTABLE
+        assert staging.get("link").mode == index.MODE_SYMLINK
+
+    def test_writes_the_index_once(self, store, staging, work_tree, base):
+        target = write_tree(store, {"README": b"new", "other": b"other"})
+
+        with patch.object(staging, "write", wraps=staging.write) as writer:
+            checkout.checkout_tree(store, staging, work_tree, base, target, workers=4)
+            writer.assert_called_once_with()
+
+    def test_touches_nothing_on_conflict(self, store, staging, work_tree, base):
+        (work_tree / "README").write_bytes(b"edited")
+        target = write_tree(store, {"README": b"new"})
+
+        with (
+            patch.object(staging, "write") as writer,
+            pytest.raises(exceptions.CheckoutConflictError),
+        ):
+            checkout.checkout_tree(store, staging, work_tree, base, target, workers=2)
+
+        writer.assert_not_called()
+        assert (work_tree / "docs/guide.md").exists()
+
+    def test_fetches_missing_blobs_in_one_batch(self, store, staging, work_tree):
+        tree = write_tree(store, FILES)
+        batches = []
+
+        class Promisor:
+            def fetch(self, store, oids):
+                batches.append(sorted(oids))
+                return 0
+
+        store.promisor = Promisor()
+        checkout.checkout_tree(store, staging, work_tree, None, tree, workers=2)
+
+        assert batches == [sorted(entry.oid for entry in index_entries(store, FILES))]
@@ -0,0 +1,122 @@
+import io
+import random
+
+import pytest
+
+from codetrail import chunking
+from codetrail import exceptions
+from codetrail.conf import CHUNK_MAX_SIZE
+from codetrail.conf import CHUNK_MIN_SIZE
+
+
+def random_bytes(size, seed=0):
+    return random.Random(seed).randbytes(size)
+
+
+def chunks_of(data, read_size=chunking.CHUNK_READ_SIZE):
+    return list(chunking.iter_chunks(io.BytesIO(data), len(data), read_size))
+
+
+class TestChunkPolicy:
+    """Tests for `ChunkPolicy` class."""
+
+    def test_parses_patterns_separated_by_commas_or_spaces(self):
+        policy = chunking.ChunkPolicy.parse(-1, "*.bin, assets/*  *.iso")
+        assert policy == chunking.ChunkPolicy(0, ("*.bin", "assets/*", "*.iso"))
+
+    def test_is_false_when_nothing_is_chunked(self):
+        assert not chunking.ChunkPolicy.parse(0, "")
+        assert chunking.ChunkPolicy(threshold=1)
+
+    @pytest.mark.parametrize(
+        ("path", "size", "expected"),
+        [
+            ("data/model.bin", 1, True),
+            ("big.txt", 100, True),
+            ("small.txt", 99, False),
+            ("data/model.BIN", 1, False),
+        ],
+    )
+    def test_applies_by_size_or_pattern(self, path, size, expected):
+        policy = chunking.ChunkPolicy(100, ("*.bin",))
+        assert policy.applies(path, size) is expected
+
+    def test_default_policy_applies_to_nothing(self):
+        assert not chunking.ChunkPolicy().applies("any", 10**12)
+
+
+class TestFindCut:
+    """Tests for `find_cut` function."""
+
+    def test_cuts_short_buffers_at_their_end(self):
+        marks = bytes(CHUNK_MIN_SIZE)
+        assert chunking.find_cut(marks, 0, len(marks)) == CHUNK_MIN_SIZE
+
+    def test_cuts_at_the_maximum_size_without_a_match(self):
+        marks = bytes(2 * CHUNK_MAX_SIZE)
+        assert chunking.find_cut(marks, 10, len(marks)) == 10 + CHUNK_MAX_SIZE
+
+    def test_never_cuts_before_the_minimum_size(self):
+        pattern = chunking.STRICT_PATTERN
+        marks = bytearray(CHUNK_MAX_SIZE)
+        marks[100 : 100 + len(pattern)] = pattern
+        marks[CHUNK_MIN_SIZE : CHUNK_MIN_SIZE + len(pattern)] = pattern
+
+        cut = chunking.find_cut(marks, 0, len(marks))
+
+        assert cut == CHUNK_MIN_SIZE + len(pattern)
+
+
+class TestIterChunks:
+    """Tests for `iter_chunks` function."""
+
+    def test_chunks_rebuild_the_content_within_size_bounds(self):
+        data = random_bytes(2 * 1024 * 1024)
+
+        chunks = chunks_of(data)
+
+        assert b"".join(chunks) == data
+        assert len(chunks) > 1
+        assert all(
+            CHUNK_MIN_SIZE <= len(chunk) <= CHUNK_MAX_SIZE for chunk in chunks[:-1]
+        )
+        assert len(chunks[-1]) <= CHUNK_MAX_SIZE
+
+    def test_boundaries_do_not_depend_on_the_read_size(self):
+        data = random_bytes(1024 * 1024)
+        assert chunks_of(data, read_size=10_000) == chunks_of(data)
+
+    def test_an_insertion_changes_only_nearby_chunks(self):
+        data = random_bytes(2 * 1024 * 1024)
+        middle = len(data) // 2
+        edited = data[:middle] + b"inserted bytes" + data[middle:]
+
+        before = set(chunks_of(data))
+        after = chunks_of(edited)
+
+        assert len([chunk for chunk in after if chunk not in before]) <= 2
+
+    def test_stops_at_the_end_of_a_short_stream(self):
+        data = random_bytes(1000)
+        chunks = list(chunking.iter_chunks(io.BytesIO(data), 5000))
+        assert chunks == [data]
+
+    def test_yields_nothing_for_empty_content(self):
+        assert chunks_of(b"") == []
+
+
+class TestManifest:
+    """Tests for `encode_manifest` and `parse_manifest` functions."""
+
+    def test_round_trips(self):
+        chunks = [("a" * 40, 10), ("b" * 40, 20)]
+
+        data = chunking.encode_manifest(chunks)
+
+        assert data == f"{'a' * 40} 10\n{'b' * 40} 20\n".encode()
+        assert chunking.parse_manifest(data) == chunks
+
+    @pytest.mark.parametrize("data", [b"abc\n", b"abc ten\n", b"a b c\n"])
+    def test_raises_on_malformed_lines(self, data):
+        with pytest.raises(exceptions.CorruptObjectError):
+            chunking.parse_manifest(data)
@@ -1,12 +1,24 @@
 import argparse
+import io
 import logging
 from unittest.mock import patch
 
 import pytest
 
 from codetrail import cli
+from codetrail import cmd_add
+from codetrail import cmd_branch
+from codetrail import cmd_checkout
+from codetrail import cmd_clone
+from codetrail import cmd_commit_graph
 from codetrail import cmd_config
+from codetrail import cmd_fetch
 from codetrail import cmd_init
+from codetrail import cmd_log
+from codetrail import cmd_pack_refs
+from codetrail import cmd_remote
+from codetrail import cmd_repack
+from codetrail import cmd_upload_pack
 from codetrail import commands
 from codetrail import exceptions
 
@@ -26,6 +38,72 @@ class TestRunCommands:
             cli.run("set", argument_namespace)
             mock_run.assert_called_once_with(argument_namespace)
 
+    def test_run_add(self, argument_namespace):
+        """Test `add` command."""
+        with patch.object(cli, "add") as mock_run:
+            cli.run("add", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
+    def test_run_repack(self, argument_namespace):
+        """Test `repack` command."""
+        with patch.object(cli, "repack") as mock_run:
+            cli.run("repack", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
+    def test_run_commit_graph(self, argument_namespace):
+        """Test `commit-graph` command."""
+        with patch.object(cli, "commit_graph") as mock_run:
+            cli.run("commit-graph", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
+    def test_run_log(self, argument_namespace):
+        """Test `log` command."""
+        with patch.object(cli, "log") as mock_run:
+            cli.run("log", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
+    def test_run_pack_refs(self, argument_namespace):
+        """Test `pack-refs` command."""
+        with patch.object(cli, "pack_refs") as mock_run:
+            cli.run("pack-refs", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
+    def test_run_branch(self, argument_namespace):
+        """Test `branch` command."""
+        with patch.object(cli, "branch") as mock_run:
+            cli.run("branch", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
+    def test_run_checkout(self, argument_namespace):
+        """Test `checkout` command."""
+        with patch.object(cli, "checkout") as mock_run:
+            cli.run("checkout", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
+    def test_run_upload_pack(self, argument_namespace):
+        """Test `upload-pack` command."""
+        with patch.object(cli, "upload_pack") as mock_run:
+            cli.run("upload-pack", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
+    def test_run_fetch(self, argument_namespace):
+        """Test `fetch` command."""
+        with patch.object(cli, "fetch") as mock_run:
+            cli.run("fetch", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
+    def test_run_clone(self, argument_namespace):
+        """Test `clone` command."""
+        with patch.object(cli, "clone") as mock_run:
+            cli.run("clone", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
+    def test_run_remote(self, argument_namespace):
+        """Test `remote` command."""
+        with patch.object(cli, "remote") as mock_run:
+            cli.run("remote", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
     def test_raises_exception_on_wrong_command(self, argument_namespace):
         """Test with wrong command."""
         with pytest.raises(exceptions.InvalidCommandError):
@@ -57,6 +135,458 @@ class TestInit:
             assert "Exists" in caplog.text
 
 
+class TestAdd:
+    """Tests for `add` function."""
+
+    def test_calls_add_paths(self, temporary_dir):
+        """Test valid staging of files."""
+        arguments = argparse.Namespace(command="add", paths=[temporary_dir])
+        with patch.object(cmd_add, "add_paths") as mock_add:
+            cli.add(arguments)
+            mock_add.assert_called_once_with(commands.AddPaths(paths=[temporary_dir]))
+
+    def test_logs_on_exception(self, temporary_dir, caplog):
+        """Test logs error."""
+        arguments = argparse.Namespace(command="add", paths=[temporary_dir])
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_add, "add_paths") as mock_add,
+        ):
+            mock_add.side_effect = exceptions.UnmatchedPathError("No match")
+            cli.add(arguments)
+
+            assert "No match" in caplog.text
+
+    @pytest.mark.usefixtures("default_path")
+    def test_logs_unsupported_workers(self, code_repository, caplog):
+        """Test logs a number of workers that is not an integer."""
+        cmd_config.set_config(commands.SetConfig(key="core.workers", value="many"))
+        file = code_repository.work_tree / "a.txt"
+        file.write_text("a\n", encoding="utf-8")
+        with caplog.at_level(logging.ERROR):
+            cli.add(argparse.Namespace(command="add", paths=[file]))
+
+            assert "core.workers" in caplog.text
+
+
+class TestRepack:
+    """Tests for `repack` function."""
+
+    def test_calls_repack_repository(self):
+        """Test valid repacking of the repository."""
+        arguments = argparse.Namespace(
+            command="repack", window=5, depth=None, write_bitmap=True
+        )
+        with patch.object(cmd_repack, "repack_repository") as mock_repack:
+            cli.repack(arguments)
+            mock_repack.assert_called_once_with(
+                commands.RepackRepository(window=5, depth=None, write_bitmap=True),
+            )
+
+    def test_logs_on_exception(self, caplog):
+        """Test logs error."""
+        arguments = argparse.Namespace(
+            command="repack", window=None, depth=None, write_bitmap=False
+        )
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_repack, "repack_repository") as mock_repack,
+        ):
+            mock_repack.side_effect = exceptions.NotARepositoryError("No repo")
+            cli.repack(arguments)
+
+            assert "No repo" in caplog.text
+
+
+class TestCommitGraph:
+    """Tests for `commit_graph` function."""
+
+    def test_calls_write_commit_graph(self):
+        """Test valid writing of the commit graph."""
+        arguments = argparse.Namespace(command="commit-graph", action="write")
+        with patch.object(cmd_commit_graph, "write_commit_graph") as mock_write:
+            cli.commit_graph(arguments)
+            mock_write.assert_called_once_with(commands.WriteCommitGraph())
+
+    def test_logs_on_exception(self, caplog):
+        """Test logs error."""
+        arguments = argparse.Namespace(command="commit-graph", action="write")
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_commit_graph, "write_commit_graph") as mock_write,
+        ):
+            mock_write.side_effect = exceptions.ObjectNotFoundError("No object")
+            cli.commit_graph(arguments)
+
+            assert "No object" in caplog.text
+
+    @pytest.mark.usefixtures("default_path")
+    def test_logs_unsupported_cache_limit(self, code_repository, caplog):
+        """Test logs an object cache limit that is not an integer."""
+        cmd_config.set_config(
+            commands.SetConfig(key="core.objectcachelimit", value="lots"),
+        )
+        arguments = argparse.Namespace(command="commit-graph", action="write")
+        with caplog.at_level(logging.ERROR):
+            cli.commit_graph(arguments)
+
+            assert "core.objectcachelimit" in caplog.text
+
+
+class TestPackRefs:
+    """Tests for `pack_refs` function."""
+
+    def test_calls_pack_refs(self):
+        """Test valid packing of the references."""
+        arguments = argparse.Namespace(command="pack-refs")
+        with patch.object(cmd_pack_refs, "pack_refs") as mock_pack:
+            cli.pack_refs(arguments)
+            mock_pack.assert_called_once_with(commands.PackRefs())
+
+    def test_logs_on_exception(self, caplog):
+        """Test logs error."""
+        arguments = argparse.Namespace(command="pack-refs")
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_pack_refs, "pack_refs") as mock_pack,
+        ):
+            mock_pack.side_effect = exceptions.NotARepositoryError("No repo")
+            cli.pack_refs(arguments)
+
+            assert "No repo" in caplog.text
+
+    @pytest.mark.usefixtures("default_path")
+    def test_logs_unsupported_cache_limit(self, code_repository, caplog):
+        """Test logs a delta base cache limit that is not an integer."""
+        cmd_config.set_config(
+            commands.SetConfig(key="core.deltabasecachelimit", value="lots"),
+        )
+        (code_repository.repo_dir / "refs/heads/master").write_text(
+            code_repository.objects.write_object("blob", b"tip"),
+            encoding="utf-8",
+        )
+        with caplog.at_level(logging.ERROR):
+            cli.pack_refs(argparse.Namespace(command="pack-refs"))
+
+            assert "core.deltabasecachelimit" in caplog.text
+
+
+class TestBranch:
+    """Tests for `branch` function."""
+
+    @pytest.mark.parametrize(
+        ("listing", "name"),
+        [(False, None), (True, None), (True, "feat*")],
+    )
+    def test_calls_list_branches(self, listing, name):
+        """Test listing when no branch is named or with --list."""
+        arguments = argparse.Namespace(
+            command="branch", list=listing, name=name, start_point="HEAD"
+        )
+        with patch.object(cmd_branch, "list_branches") as mock_list:
+            cli.branch(arguments)
+            mock_list.assert_called_once_with(commands.ListBranches(pattern=name))
+
+    def test_calls_create_branch(self):
+        """Test creating a named branch."""
+        arguments = argparse.Namespace(
+            command="branch", list=False, name="topic", start_point="v1"
+        )
+        with patch.object(cmd_branch, "create_branch") as mock_create:
+            cli.branch(arguments)
+            mock_create.assert_called_once_with(
+                commands.CreateBranch(name="topic", start_point="v1"),
+            )
+
+    def test_logs_on_exception(self, caplog):
+        """Test logs error."""
+        arguments = argparse.Namespace(
+            command="branch", list=False, name="topic", start_point="HEAD"
+        )
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_branch, "create_branch") as mock_create,
+        ):
+            mock_create.side_effect = exceptions.InvalidReferenceError("Taken")
+            cli.branch(arguments)
+
+            assert "Taken" in caplog.text
+
+
+class TestCheckout:
+    """Tests for `checkout` function."""
+
+    def test_calls_checkout_revision(self):
+        """Test valid checkout of a revision."""
+        arguments = argparse.Namespace(command="checkout", revision="topic")
+        with patch.object(cmd_checkout, "checkout_revision") as mock_checkout:
+            cli.checkout(arguments)
+            mock_checkout.assert_called_once_with(
+                commands.CheckoutRevision(revision="topic"),
+            )
+
+    def test_logs_on_exception(self, caplog):
+        """Test logs error."""
+        arguments = argparse.Namespace(command="checkout", revision="topic")
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_checkout, "checkout_revision") as mock_checkout,
+        ):
+            mock_checkout.side_effect = exceptions.CheckoutConflictError("Dirty")
+            cli.checkout(arguments)
+
+            assert "Dirty" in caplog.text
+
+
+class TestUploadPack:
+    """Tests for `upload_pack` function."""
+
+    def test_calls_upload_pack(self):
+        """Test valid serving of a repository."""
+        arguments = argparse.Namespace(
+            command="upload-pack", directory="remote", listen=None
+        )
+        with patch.object(cmd_upload_pack, "upload_pack") as mock_upload_pack:
+            cli.upload_pack(arguments)
+            mock_upload_pack.assert_called_once_with(
+                commands.UploadPack(directory="remote"),
+            )
+
+    def test_reports_exception_to_the_client(self, capsysbinary):
+        """Test writes an error packet instead of logging."""
+        arguments = argparse.Namespace(
+            command="upload-pack", directory="remote", listen=None
+        )
+        with patch.object(cmd_upload_pack, "upload_pack") as mock_upload_pack:
+            mock_upload_pack.side_effect = exceptions.NotARepositoryError("Missing")
+            cli.upload_pack(arguments)
+
+        assert capsysbinary.readouterr().out == b"000fERR Missing"
+
+    def test_logs_exception_when_listening(self, capsysbinary, caplog):
+        """Test logs error when standard output does not carry the protocol."""
+        arguments = argparse.Namespace(
+            command="upload-pack", directory="remote", listen="serve.sock"
+        )
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_upload_pack, "upload_pack") as mock_upload_pack,
+        ):
+            mock_upload_pack.side_effect = exceptions.NotARepositoryError("Missing")
+            cli.upload_pack(arguments)
+
+            assert "Missing" in caplog.text
+        assert b"ERR" not in capsysbinary.readouterr().out
+
+
+class TestFetch:
+    """Tests for `fetch` function."""
+
+    def test_calls_fetch_remote(self):
+        """Test valid fetch with a custom upload-pack command."""
+        arguments = argparse.Namespace(
+            command="fetch",
+            remote="../remote",
+            all=False,
+            jobs=None,
+            name="upstream",
+            upload_pack="python -m codetrail upload-pack",
+        )
+        with patch.object(cmd_fetch, "fetch_remote") as mock_fetch:
+            cli.fetch(arguments)
+            mock_fetch.assert_called_once_with(
+                commands.FetchRemote(
+                    remote="../remote",
+                    name="upstream",
+                    upload_pack=["python", "-m", "codetrail", "upload-pack"],
+                ),
+            )
+
+    def test_logs_on_exception(self, caplog):
+        """Test logs error."""
+        arguments = argparse.Namespace(
+            command="fetch",
+            remote="../remote",
+            all=False,
+            jobs=None,
+            name="origin",
+            upload_pack=None,
+        )
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_fetch, "fetch_remote") as mock_fetch,
+        ):
+            mock_fetch.side_effect = exceptions.ProtocolError("Refused")
+            cli.fetch(arguments)
+
+            assert "Refused" in caplog.text
+
+    def test_calls_fetch_all(self):
+        """Test valid fetch from every remote."""
+        arguments = argparse.Namespace(
+            command="fetch",
+            remote=None,
+            all=True,
+            jobs=4,
+            name="origin",
+            upload_pack=None,
+        )
+        with patch.object(cmd_fetch, "fetch_all") as mock_fetch:
+            cli.fetch(arguments)
+            mock_fetch.assert_called_once_with(commands.FetchAll(jobs=4))
+
+    def test_logs_error_without_remote(self, caplog):
+        """Test logs error when neither a remote nor `--all` is given."""
+        arguments = argparse.Namespace(
+            command="fetch",
+            remote=None,
+            all=False,
+            jobs=None,
+            name="origin",
+            upload_pack=None,
+        )
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_fetch, "fetch_remote") as mock_fetch,
+        ):
+            cli.fetch(arguments)
+
+            mock_fetch.assert_not_called()
+            assert "Name a remote to fetch from" in caplog.text
+
+
+class TestRemote:
+    """Tests for `remote` function."""
+
+    def test_calls_list_remotes(self):
+        """Test listing of the remotes."""
+        arguments = argparse.Namespace(command="remote", name=None, url=None)
+        with patch.object(cmd_remote, "list_remotes") as mock_list:
+            cli.remote(arguments)
+            mock_list.assert_called_once_with(commands.ListRemotes())
+
+    def test_calls_add_remote(self):
+        """Test valid remote addition."""
+        arguments = argparse.Namespace(command="remote", name="mirror", url="../m")
+        with patch.object(cmd_remote, "add_remote") as mock_add:
+            cli.remote(arguments)
+            mock_add.assert_called_once_with(
+                commands.AddRemote(name="mirror", url="../m"),
+            )
+
+    def test_logs_error_without_url(self, caplog):
+        """Test logs error when a remote is named without a URL."""
+        arguments = argparse.Namespace(command="remote", name="mirror", url=None)
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_remote, "add_remote") as mock_add,
+        ):
+            cli.remote(arguments)
+
+            mock_add.assert_not_called()
+            assert "The remote 'mirror' needs a URL." in caplog.text
+
+    def test_logs_on_exception(self, caplog):
+        """Test logs error."""
+        arguments = argparse.Namespace(command="remote", name="mirror", url="../m")
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_remote, "add_remote") as mock_add,
+        ):
+            mock_add.side_effect = exceptions.InvalidReferenceError("Exists")
+            cli.remote(arguments)
+
+            assert "Exists" in caplog.text
+
+
+class TestClone:
+    """Tests for `clone` function."""
+
+    def test_calls_clone_repository(self):
+        """Test valid partial clone with a custom upload-pack command."""
+        arguments = argparse.Namespace(
+            command="clone",
+            remote="../remote",
+            directory="copy",
+            filter_spec="blob:none",
+            upload_pack="python -m codetrail upload-pack",
+        )
+        with patch.object(cmd_clone, "clone_repository") as mock_clone:
+            cli.clone(arguments)
+            mock_clone.assert_called_once_with(
+                commands.CloneRepository(
+                    remote="../remote",
+                    directory="copy",
+                    filter_spec="blob:none",
+                    upload_pack=["python", "-m", "codetrail", "upload-pack"],
+                ),
+            )
+
+    def test_logs_on_exception(self, caplog):
+        """Test logs error."""
+        arguments = argparse.Namespace(
+            command="clone",
+            remote="../remote",
+            directory=None,
+            filter_spec="tree:0",
+            upload_pack=None,
+        )
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_clone, "clone_repository") as mock_clone,
+        ):
+            mock_clone.side_effect = exceptions.InvalidFilterError("Unsupported")
+            cli.clone(arguments)
+
+            assert "Unsupported" in caplog.text
+
+
+class TestLog:
+    """Tests for `log` function."""
+
+    @pytest.fixture
+    def arguments(self):
+        return argparse.Namespace(
+            command="log",
+            revision="master",
+            max_count=2,
+            since=None,
+            topo_order=True,
+        )
+
+    def test_calls_log_commits(self, arguments):
+        """Test valid log of the history."""
+        with patch.object(cmd_log, "log_commits") as mock_log:
+            cli.log(arguments)
+            mock_log.assert_called_once_with(
+                commands.LogCommits(revision="master", max_count=2, topo_order=True),
+            )
+
+    def test_logs_on_exception(self, arguments, caplog):
+        """Test logs error."""
+        with (
+            caplog.at_level(logging.ERROR),
+            patch.object(cmd_log, "log_commits") as mock_log,
+        ):
+            mock_log.side_effect = exceptions.UnknownRevisionError("No master")
+            cli.log(arguments)
+
+            assert "No master" in caplog.text
+
+    def test_silences_closed_pipe(self, arguments):
+        """Test output is dropped once the reader is gone."""
+        with (
+            patch.object(cmd_log, "log_commits") as mock_log,
+            patch.object(cli.os, "open", return_value=99),
+            patch.object(cli.os, "dup2") as mock_dup2,
+            patch.object(cli.sys, "stdout") as mock_stdout,
+        ):
+            mock_log.side_effect = BrokenPipeError
+            cli.log(arguments)
+
+            mock_dup2.assert_called_once_with(99, mock_stdout.fileno.return_value)
+
+
 class TestConfig:
     """Tests for `config` function."""
 
@@ -64,15 +594,45 @@ class TestConfig:
         """Test valid setting of the configuration."""
         arguments = argparse.Namespace(
             command="set",
-            key=["user.name"],
-            value=["Chill Guy"],
+            entries=["user.name", "Chill Guy", "user.email", "chill@guy.com"],
+            stdin=False,
         )
-        with patch.object(cmd_config, "set_config") as mock_set_config:
+        with patch.object(cmd_config, "set_config_entries") as mock_set_config:
             cli.config(arguments)
             mock_set_config.assert_called_once_with(
-                commands.SetConfig(key=arguments.key[0], value=arguments.value[0]),
+                commands.SetConfigEntries(
+                    entries={"user.name": "Chill Guy", "user.email": "chill@guy.com"},
+                ),
+            )
+
+    def test_calls_set_config_with_stdin_entries(self, temporary_dir):
+        """Test setting configuration values read from standard input."""
+        arguments = argparse.Namespace(
+            command="set",
+            entries=["user.name", "Chill Guy"],
+            stdin=True,
+        )
+        with (
+            patch.object(cmd_config, "set_config_entries") as mock_set_config,
+            patch("sys.stdin", io.StringIO("user.email chill@guy.com\n")),
+        ):
+            cli.config(arguments)
+            mock_set_config.assert_called_once_with(
+                commands.SetConfigEntries(
+                    entries={"user.name": "Chill Guy", "user.email": "chill@guy.com"},
+                ),
             )
 
+    def test_logs_error_on_unpaired_key(self, temporary_dir, caplog):
+        """Test a key without a value is reported."""
+        arguments = argparse.Namespace(
+            command="set", entries=["user.name"], stdin=False
+        )
+        with patch.object(cmd_config, "set_config_entries") as mock_set_config:
+            cli.config(arguments)
+            mock_set_config.assert_not_called()
+        assert "has no value" in caplog.text
+
     def test_calls_get_config(self, temporary_dir):
         """Test getting of the configuration value."""
         arguments = argparse.Namespace(
@@ -87,7 +647,7 @@ class TestConfig:
 
     def test_calls_list_config(self, temporary_dir):
         """Test listing of the configuration."""
-        arguments = argparse.Namespace(command="list")
+        arguments = argparse.Namespace(command="list", show_origin=False)
         with patch.object(cmd_config, "list_config") as mock_list_config:
             cli.config(arguments)
             mock_list_config.assert_called_once_with(commands.ListConfig())
@@ -117,6 +677,24 @@ class TestConfig:
                 commands.SetConfig(key=arguments.key[0], value=arguments.value[0]),
             )
 
+    def test_run_commit_graph(self, argument_namespace):
+        """Test `commit-graph` command."""
+        with patch.object(cli, "commit_graph") as mock_run:
+            cli.run("commit-graph", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
+    def test_run_log(self, argument_namespace):
+        """Test `log` command."""
+        with patch.object(cli, "log") as mock_run:
+            cli.run("log", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
+    def test_run_checkout(self, argument_namespace):
+        """Test `checkout` command."""
+        with patch.object(cli, "checkout") as mock_run:
+            cli.run("checkout", argument_namespace)
+            mock_run.assert_called_once_with(argument_namespace)
+
     def test_raises_exception_on_wrong_command(self, argument_namespace):
         """Test with wrong command."""
         arguments = argparse.Namespace(
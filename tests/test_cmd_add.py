@@ -0,0 +1,144 @@
+import os
+import random
+from unittest.mock import patch
+
+import pytest
+
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import hashing
+from codetrail import index
+from codetrail import objects
+from codetrail.cmd_add import add_paths
+from codetrail.cmd_config import set_config
+
+
+def make_old(path):
+    """Move a file's modification time well before the index is written."""
+    status = path.lstat()
+    os.utime(path, ns=(status.st_atime_ns, status.st_mtime_ns - 10**10))
+
+
+@pytest.fixture
+def work_tree(code_repository):
+    """Provides a work tree with a few files."""
+    root = code_repository.work_tree
+    (root / "src/pkg").mkdir(parents=True)
+    (root / "README.md").write_text("readme\n", encoding="utf-8")
+    (root / "src/main.py").write_text("print('hi')\n", encoding="utf-8")
+    (root / "src/pkg/mod.py").write_text("x = 1\n", encoding="utf-8")
+    for path in ("README.md", "src/main.py", "src/pkg/mod.py"):
+        make_old(root / path)
+    return root
+
+
+def staged(repository):
+    return index.StagingIndex(repository.index_path)
+
+
+@pytest.mark.usefixtures("default_path")
+class TestAddPaths:
+    """Tests for `add_paths` function."""
+
+    def test_stages_directory_recursively(self, code_repository, work_tree):
+        add_paths(commands.AddPaths(paths=[work_tree]))
+
+        entries = {entry.path: entry for entry in staged(code_repository)}
+        assert sorted(entries) == ["README.md", "src/main.py", "src/pkg/mod.py"]
+        oid = entries["README.md"].oid
+        assert code_repository.objects.read_object(oid) == ("blob", b"readme\n")
+        assert oid == objects.hash_object("blob", b"readme\n")
+
+    def test_stages_single_file(self, code_repository, work_tree):
+        add_paths(commands.AddPaths(paths=[work_tree / "src/main.py"]))
+        assert [entry.path for entry in staged(code_repository)] == ["src/main.py"]
+
+    def test_skips_hashing_unchanged_files(self, code_repository, work_tree):
+        add_paths(commands.AddPaths(paths=[work_tree]))
+
+        with patch.object(hashing, "hash_file") as mock_hash:
+            add_paths(commands.AddPaths(paths=[work_tree]))
+            mock_hash.assert_not_called()
+
+    def test_rehashes_changed_files(self, code_repository, work_tree):
+        add_paths(commands.AddPaths(paths=[work_tree]))
+        (work_tree / "README.md").write_text("new readme\n", encoding="utf-8")
+        make_old(work_tree / "README.md")
+
+        add_paths(commands.AddPaths(paths=[work_tree]))
+
+        entry = staged(code_repository).get("README.md")
+        assert entry.oid == objects.hash_object("blob", b"new readme\n")
+
+    def test_removes_deleted_files(self, code_repository, work_tree):
+        add_paths(commands.AddPaths(paths=[work_tree]))
+        (work_tree / "src/main.py").unlink()
+        (work_tree / "README.md").unlink()
+
+        add_paths(commands.AddPaths(paths=[work_tree / "src"]))
+        add_paths(commands.AddPaths(paths=[work_tree / "README.md"]))
+
+        assert [entry.path for entry in staged(code_repository)] == ["src/pkg/mod.py"]
+
+    def test_stages_symlinks_as_links(self, code_repository, work_tree):
+        (work_tree / "link").symlink_to("README.md")
+        add_paths(commands.AddPaths(paths=[work_tree / "link"]))
+
+        entry = staged(code_repository).get("link")
+        assert entry.mode == index.MODE_SYMLINK
+        assert code_repository.objects.read_object(entry.oid).data == b"README.md"
+
+    def test_raises_exception_on_unmatched_path(self, code_repository, work_tree):
+        with pytest.raises(exceptions.UnmatchedPathError):
+            add_paths(commands.AddPaths(paths=[work_tree / "missing.txt"]))
+
+    def test_raises_exception_on_path_outside_repository(
+        self,
+        code_repository,
+        tmp_path,
+    ):
+        with pytest.raises(exceptions.PathOutsideRepositoryError):
+            add_paths(commands.AddPaths(paths=[tmp_path]))
+
+    def test_skips_ignored_paths(self, code_repository, work_tree):
+        (work_tree / ".codetrailignore").write_text("build/\n*.log\n", encoding="utf-8")
+        (work_tree / "build").mkdir()
+        (work_tree / "build/out.o").write_bytes(b"\0")
+        (work_tree / "src/debug.log").write_text("log\n", encoding="utf-8")
+
+        add_paths(commands.AddPaths(paths=[work_tree]))
+
+        assert [entry.path for entry in staged(code_repository)] == [
+            ".codetrailignore",
+            "README.md",
+            "src/main.py",
+            "src/pkg/mod.py",
+        ]
+
+    def test_keeps_tracked_paths_that_become_ignored(self, code_repository, work_tree):
+        add_paths(commands.AddPaths(paths=[work_tree]))
+        (work_tree / ".codetrailignore").write_text("src/\n", encoding="utf-8")
+        (work_tree / "src/new.py").write_text("y = 2\n", encoding="utf-8")
+
+        add_paths(commands.AddPaths(paths=[work_tree]))
+
+        paths = [entry.path for entry in staged(code_repository)]
+        assert "src/pkg/mod.py" in paths
+        assert "src/new.py" not in paths
+
+    def test_chunks_files_over_the_configured_threshold(
+        self,
+        code_repository,
+        work_tree,
+    ):
+        set_config(commands.SetConfig(key="core.chunkthreshold", value="1000"))
+        data = random.Random(0).randbytes(300 * 1024)
+        (work_tree / "big.bin").write_bytes(data)
+
+        add_paths(commands.AddPaths(paths=[work_tree]))
+
+        store = code_repository.objects
+        entries = {entry.path: entry.oid for entry in staged(code_repository)}
+        assert store.is_chunked(entries["big.bin"])
+        assert not store.is_chunked(entries["README.md"])
+        assert store.read_object(entries["big.bin"]).data == data
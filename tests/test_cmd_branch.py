@@ -0,0 +1,94 @@
+import logging
+
+import pytest
+
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import refs
+from codetrail.cmd_branch import create_branch
+from codetrail.cmd_branch import list_branches
+from codetrail.packed_refs import PackedRef
+from codetrail.packed_refs import write_packed_refs
+from tests.utils import write_commit
+
+
+@pytest.mark.usefixtures("default_path")
+class TestListBranches:
+    """Tests for `list_branches` function."""
+
+    @pytest.fixture(autouse=True)
+    def branches(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        write_packed_refs(
+            repo_dir / "packed-refs",
+            [
+                PackedRef("refs/heads/feature/a", "a" * 40),
+                PackedRef("refs/heads/master", "b" * 40),
+                *(PackedRef(f"refs/tags/v{i}", "c" * 40) for i in range(100)),
+            ],
+        )
+        refs.write_ref(repo_dir, "refs/heads/feature/b", "d" * 40)
+
+    def test_marks_current_branch(self, capsys):
+        list_branches(commands.ListBranches())
+
+        assert capsys.readouterr().out == "  feature/a\n  feature/b\n* master\n"
+
+    def test_filters_by_pattern(self, capsys):
+        list_branches(commands.ListBranches(pattern="feature/*"))
+
+        assert capsys.readouterr().out == "  feature/a\n  feature/b\n"
+
+    def test_reads_no_tag(self, code_repository, capsys, monkeypatch):
+        records = refs.packed_refs(code_repository.repo_dir)
+        assert records is not None
+        seen = []
+        original = records._record  # noqa: SLF001
+
+        def record(start):
+            found = original(start)
+            seen.append(found[0].name)
+            return found
+
+        monkeypatch.setattr(records, "_record", record)
+        list_branches(commands.ListBranches())
+
+        assert sum(name.startswith("refs/tags/") for name in seen) <= 8
+
+
+@pytest.mark.usefixtures("default_path")
+class TestCreateBranch:
+    """Tests for `create_branch` function."""
+
+    def test_creates_branch_at_head(self, code_repository, caplog):
+        commit = write_commit(code_repository.objects)
+        refs.write_ref(code_repository.repo_dir, "refs/heads/master", commit)
+
+        with caplog.at_level(logging.INFO):
+            create_branch(commands.CreateBranch(name="topic"))
+            assert f"Created branch 'topic' at {commit[:7]}." in caplog.text
+
+        assert refs.read_ref(code_repository.repo_dir, "refs/heads/topic") == commit
+
+    def test_peels_tags(self, code_repository):
+        store = code_repository.objects
+        commit = write_commit(store)
+        tag = store.write_object("tag", f"object {commit}\ntype commit\n".encode())
+        refs.write_ref(code_repository.repo_dir, "refs/tags/v1", tag)
+
+        create_branch(commands.CreateBranch(name="release", start_point="v1"))
+
+        assert refs.read_ref(code_repository.repo_dir, "refs/heads/release") == commit
+
+    @pytest.mark.parametrize("name", ["master", "bad..name"])
+    def test_rejects_taken_or_invalid_names(self, code_repository, name):
+        write_packed_refs(
+            code_repository.repo_dir / "packed-refs",
+            [PackedRef("refs/heads/master", "a" * 40)],
+        )
+        with pytest.raises(exceptions.InvalidReferenceError):
+            create_branch(commands.CreateBranch(name=name))
+
+    def test_raises_on_unknown_start_point(self, code_repository):
+        with pytest.raises(exceptions.UnknownRevisionError):
+            create_branch(commands.CreateBranch(name="topic"))
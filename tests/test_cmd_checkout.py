@@ -0,0 +1,85 @@
+import logging
+
+import pytest
+
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import index
+from codetrail import refs
+from codetrail.cmd_checkout import checkout_revision
+from tests.utils import write_commit
+from tests.utils import write_tree
+
+FILES = {"README": b"readme", "src/main.py": b"main"}
+
+
+@pytest.fixture
+def commits(code_repository):
+    """Provides a `topic` and a `feature` branch, with `master` still unborn."""
+    store = code_repository.objects
+    topic = write_commit(store, tree=write_tree(store, FILES))
+    feature = write_commit(
+        store,
+        [topic],
+        tree=write_tree(store, {**FILES, "src/main.py": b"main 2", "NEW": b"new"}),
+    )
+    refs.write_ref(code_repository.repo_dir, "refs/heads/topic", topic)
+    refs.write_ref(code_repository.repo_dir, "refs/heads/feature", feature)
+    return topic, feature
+
+
+@pytest.mark.usefixtures("default_path")
+class TestCheckoutRevision:
+    """Tests for `checkout_revision` function."""
+
+    def test_switches_to_a_branch(self, code_repository, commits, caplog):
+        work_tree = code_repository.work_tree
+
+        with caplog.at_level(logging.INFO):
+            checkout_revision(commands.CheckoutRevision(revision="topic"))
+            assert "Switched to branch 'topic'." in caplog.text
+            assert "Wrote 2 files, removed 0." in caplog.text
+
+        assert (
+            refs.read_ref(code_repository.repo_dir, "HEAD") == "ref: refs/heads/topic"
+        )
+        assert (work_tree / "src/main.py").read_bytes() == b"main"
+        staging = index.StagingIndex(code_repository.index_path)
+        assert [entry.path for entry in staging] == ["README", "src/main.py"]
+
+    def test_writes_only_the_difference(self, code_repository, commits, caplog):
+        checkout_revision(commands.CheckoutRevision(revision="topic"))
+
+        with caplog.at_level(logging.INFO):
+            checkout_revision(commands.CheckoutRevision(revision="feature"))
+            assert "Wrote 2 files, removed 0." in caplog.text
+
+        assert (code_repository.work_tree / "NEW").read_bytes() == b"new"
+
+    def test_detaches_head_at_a_tag(self, code_repository, commits, caplog):
+        _, feature = commits
+        store = code_repository.objects
+        tag = store.write_object("tag", f"object {feature}\ntype commit\n".encode())
+        refs.write_ref(code_repository.repo_dir, "refs/tags/v1", tag)
+
+        with caplog.at_level(logging.INFO):
+            checkout_revision(commands.CheckoutRevision(revision="v1"))
+            assert f"HEAD is now at {feature[:7]}." in caplog.text
+
+        assert refs.read_ref(code_repository.repo_dir, "HEAD") == feature
+
+    def test_raises_on_unknown_revision(self, code_repository):
+        with pytest.raises(exceptions.UnknownRevisionError):
+            checkout_revision(commands.CheckoutRevision(revision="missing"))
+
+    def test_keeps_head_on_conflict(self, code_repository, commits):
+        checkout_revision(commands.CheckoutRevision(revision="topic"))
+        (code_repository.work_tree / "src/main.py").write_bytes(b"edited")
+
+        with pytest.raises(exceptions.CheckoutConflictError, match="src/main.py"):
+            checkout_revision(commands.CheckoutRevision(revision="feature"))
+
+        assert (
+            refs.read_ref(code_repository.repo_dir, "HEAD") == "ref: refs/heads/topic"
+        )
+        assert (code_repository.work_tree / "src/main.py").read_bytes() == b"edited"
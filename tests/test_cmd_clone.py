@@ -0,0 +1,143 @@
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+from codetrail import cmd_init
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import models
+from codetrail import refs
+from codetrail import remotes
+from codetrail import session
+from codetrail.cmd_clone import clone_repository
+from tests.utils import write_commit
+from tests.utils import write_tree
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """Provides a repository whose `master` branch changes a large file 3 times."""
+    path = tmp_path / "remote"
+    cmd_init.initialize_repository(commands.InitializeRepository(path=path))
+    repository = models.CodetrailRepository(path)
+    store = repository.objects
+    oids = []
+    for i in range(3):
+        files = {"data.bin": bytes([i]) * 5000, "README": f"readme {i}".encode()}
+        tree = write_tree(store, files)
+        oids.append(write_commit(store, oids[-1:], timestamp=i + 1, tree=tree))
+    refs.write_ref(repository.repo_dir, "refs/heads/master", oids[-1])
+    return repository
+
+
+class TestCloneRepository:
+    """Tests for `clone_repository` function."""
+
+    def test_clones_and_checks_out_the_current_branch(self, remote, tmp_path, caplog):
+        clone = tmp_path / "clone"
+        master = refs.resolve_ref(remote.repo_dir, "refs/heads/master")
+
+        with caplog.at_level(logging.INFO):
+            clone_repository(
+                commands.CloneRepository(
+                    remote=str(remote.work_tree), directory=str(clone)
+                )
+            )
+            assert "Received 12 objects from" in caplog.text
+            assert "Checked out branch 'master', wrote 2 files." in caplog.text
+
+        repository = models.CodetrailRepository(clone)
+        assert refs.read_ref(repository.repo_dir, "HEAD") == "ref: refs/heads/master"
+        assert refs.resolve_ref(repository.repo_dir, "refs/heads/master") == master
+        assert refs.resolve_ref(repository.repo_dir, "refs/remotes/origin/master") == (
+            master
+        )
+        assert (clone / "data.bin").read_bytes() == bytes([2]) * 5000
+        assert repository.objects.promisor is None
+        assert remotes.read_remotes(repository.repo_dir) == {
+            "origin": str(remote.work_tree),
+        }
+
+    def test_partial_clone_fetches_blobs_on_demand(self, remote, tmp_path):
+        clone = tmp_path / "clone"
+
+        clone_repository(
+            commands.CloneRepository(
+                remote=str(remote.work_tree),
+                directory=str(clone),
+                filter_spec="blob:none",
+            ),
+        )
+
+        assert (clone / "data.bin").read_bytes() == bytes([2]) * 5000
+        repository = models.CodetrailRepository(clone)
+        store = repository.objects
+        assert store.promisor.remote == str(remote.work_tree)
+        assert repository.get_core_str("partialclonefilter", "") == "blob:none"
+        first = remote.objects.write_object("blob", bytes([1]) * 5000)
+        assert not store.has_object(first)
+        assert store.read_object(first).data == bytes([1]) * 5000
+        assert store.promisor.fetched == 1
+        assert session.open_session(str(remote.work_tree)).connections == 1
+
+    def test_blob_limit_keeps_small_blobs(self, remote, tmp_path, caplog):
+        clone = tmp_path / "clone"
+
+        with caplog.at_level(logging.INFO):
+            clone_repository(
+                commands.CloneRepository(
+                    remote=str(remote.work_tree),
+                    directory=str(clone),
+                    filter_spec="blob:limit=1k",
+                ),
+            )
+            assert "Received 9 objects from" in caplog.text
+
+        store = models.CodetrailRepository(clone).objects
+        readme = remote.objects.write_object("blob", b"readme 0")
+        assert store.has_object(readme)
+
+    def test_raises_exception_on_invalid_filter(self, remote, tmp_path):
+        command = commands.CloneRepository(
+            remote=str(remote.work_tree),
+            directory=str(tmp_path / "clone"),
+            filter_spec="tree:0",
+        )
+
+        with pytest.raises(exceptions.InvalidFilterError):
+            clone_repository(command)
+
+        assert not (tmp_path / "clone").exists()
+
+    def test_clones_an_empty_repository(self, tmp_path, caplog):
+        empty = tmp_path / "empty"
+        cmd_init.initialize_repository(commands.InitializeRepository(path=empty))
+
+        with caplog.at_level(logging.INFO):
+            clone_repository(
+                commands.CloneRepository(
+                    remote=str(empty),
+                    directory=str(tmp_path / "clone"),
+                    upload_pack=[sys.executable, "-m", "codetrail", "upload-pack"],
+                ),
+            )
+            assert "nothing to check out" in caplog.text
+
+        repository = models.CodetrailRepository(tmp_path / "clone")
+        assert repository.upload_pack == [
+            sys.executable,
+            "-m",
+            "codetrail",
+            "upload-pack",
+        ]
+
+    def test_names_the_directory_after_the_remote(self, remote, tmp_path, monkeypatch):
+        monkeypatch.setenv("PYTHONPATH", str(Path(__file__).resolve().parent.parent))
+        (tmp_path / "work").mkdir()
+        monkeypatch.chdir(tmp_path / "work")
+
+        clone_repository(commands.CloneRepository(remote=str(remote.work_tree)))
+
+        assert (tmp_path / "work/remote/.codetrail").is_dir()
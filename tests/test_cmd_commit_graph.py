@@ -0,0 +1,42 @@
+import logging
+
+import pytest
+
+from codetrail import commands
+from codetrail.cmd_commit_graph import write_commit_graph
+from tests.utils import write_commit
+
+
+@pytest.mark.usefixtures("default_path")
+class TestWriteCommitGraph:
+    """Tests for `write_commit_graph` function."""
+
+    def test_writes_history_of_every_reference(self, code_repository, caplog):
+        store = code_repository.objects
+        root = write_commit(store)
+        master = write_commit(store, [root])
+        topic = write_commit(store, [root], message="topic\n")
+        repo_dir = code_repository.repo_dir
+        (repo_dir / "refs/heads/master").write_text(master, encoding="utf-8")
+        (repo_dir / "refs/heads/topic").write_text(topic, encoding="utf-8")
+
+        with caplog.at_level(logging.INFO):
+            write_commit_graph(commands.WriteCommitGraph())
+            assert "Added 3 commits to the commit graph (3 in total)." in caplog.text
+
+        store.reload_commit_graph()
+        assert sorted(store.commit_graph) == sorted([root, master, topic])
+
+    def test_includes_detached_head(self, code_repository, caplog):
+        store = code_repository.objects
+        head = write_commit(store)
+        (code_repository.repo_dir / "HEAD").write_text(head, encoding="utf-8")
+
+        with caplog.at_level(logging.INFO):
+            write_commit_graph(commands.WriteCommitGraph())
+            assert "Added 1 commits" in caplog.text
+
+    def test_logs_when_up_to_date(self, code_repository, caplog):
+        with caplog.at_level(logging.INFO):
+            write_commit_graph(commands.WriteCommitGraph())
+            assert "Commit graph is up to date." in caplog.text
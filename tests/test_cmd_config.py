@@ -1,12 +1,18 @@
 import logging
+import threading
+from unittest.mock import patch
 
 import pytest
 
 from codetrail import commands
+from codetrail import configuration
 from codetrail import exceptions
 from codetrail.cmd_config import get_config
 from codetrail.cmd_config import list_config
+from codetrail.cmd_config import pair_entries
+from codetrail.cmd_config import parse_entries
 from codetrail.cmd_config import set_config
+from codetrail.cmd_config import set_config_entries
 from codetrail.cmd_config import unset_config
 
 
@@ -32,6 +38,13 @@ class TestSetConfig:
         assert config_parser.has_option("user", "name")
         assert config_parser.get("user", "name") == "Chill Guy"
 
+    def test_can_set_core_option(self, code_repository, config_parser):
+        """Test sets a core option in config."""
+        set_config(commands.SetConfig(key="core.packwindow", value="20"))
+        config_parser.read(code_repository.config_path)
+
+        assert config_parser.get("core", "packwindow") == "20"
+
     def test_raises_exception_on_unsupported_section(
         self,
         code_repository,
@@ -51,6 +64,99 @@ class TestSetConfig:
             set_config(commands.SetConfig(key="user.names", value="Chill Guy"))
 
 
+@pytest.mark.usefixtures("default_path")
+class TestSetConfigEntries:
+    """Tests for `set_config_entries` function."""
+
+    def test_sets_every_value_in_one_write(self, code_repository, config_parser):
+        """Test several keys are written by a single transaction."""
+        entries = {"user.name": "Chill Guy", "user.email": "chill@guy.com"}
+        with patch.object(
+            configuration,
+            "transaction",
+            wraps=configuration.transaction,
+        ) as mock_transaction:
+            set_config_entries(commands.SetConfigEntries(entries=entries))
+            mock_transaction.assert_called_once()
+
+        config_parser.read(code_repository.config_path)
+        assert dict(config_parser["user"]) == {
+            "name": "Chill Guy",
+            "email": "chill@guy.com",
+        }
+        assert not code_repository.config_path.with_name("config.lock").exists()
+
+    def test_adds_missing_section(self, code_repository, config_parser):
+        """Test a value can be set in a section missing from the file."""
+        code_repository.config_path.write_text("[user]\n", encoding="utf-8")
+
+        set_config_entries(commands.SetConfigEntries(entries={"core.workers": "2"}))
+
+        config_parser.read(code_repository.config_path)
+        assert config_parser.get("core", "workers") == "2"
+
+    def test_writes_nothing_when_a_key_is_invalid(self, code_repository):
+        """Test an invalid key rejects the whole batch."""
+        before = code_repository.config_path.read_bytes()
+        entries = {"user.name": "Chill Guy", "user.names": "Chill Guy"}
+
+        with pytest.raises(exceptions.UnsupportedConfigError):
+            set_config_entries(commands.SetConfigEntries(entries=entries))
+
+        assert code_repository.config_path.read_bytes() == before
+
+    def test_raises_exception_on_empty_batch(self, code_repository):
+        """Test a batch without values is rejected."""
+        with pytest.raises(exceptions.UnsupportedConfigError):
+            set_config_entries(commands.SetConfigEntries(entries={}))
+
+    def test_concurrent_batches_keep_every_value(self, code_repository, config_parser):
+        """Test concurrent writers do not lose each other's values."""
+        batches = [
+            {"user.name": "Chill Guy"},
+            {"user.email": "chill@guy.com"},
+            {"core.workers": "4"},
+            {"core.packwindow": "20", "core.packdepth": "10"},
+        ]
+        threads = [
+            threading.Thread(
+                target=set_config_entries,
+                args=(commands.SetConfigEntries(entries=entries),),
+            )
+            for entries in batches
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        config_parser.read(code_repository.config_path)
+        assert len(config_parser["user"]) == 2
+        assert len(config_parser["core"]) == 3
+
+
+class TestParseEntries:
+    """Tests for `pair_entries` and `parse_entries` functions."""
+
+    def test_pairs_command_line_values(self):
+        assert pair_entries(["user.name", "Me", "core.workers", "2"]) == {
+            "user.name": "Me",
+            "core.workers": "2",
+        }
+
+    def test_parses_lines(self):
+        lines = ["user.name Chill Guy\n", "\n", "  core.workers   2  \n"]
+        assert parse_entries(lines) == {"user.name": "Chill Guy", "core.workers": "2"}
+
+    @pytest.mark.parametrize(
+        "parse",
+        [lambda: pair_entries(["user.name"]), lambda: parse_entries(["user.name\n"])],
+    )
+    def test_raises_exception_on_missing_value(self, parse):
+        with pytest.raises(exceptions.UnsupportedConfigError):
+            parse()
+
+
 @pytest.mark.usefixtures("default_path")
 class TestGetConfig:
     """Tests for `get_config` function."""
@@ -94,6 +200,15 @@ class TestListConfig:
             list_config(commands.ListConfig(key="user.name"))
             assert "user.name = Chill Guy" in caplog.text
 
+    def test_shows_origin_of_values(self, code_repository, tmp_path, caplog):
+        """Test values from the global file are listed with their origin."""
+        global_config = tmp_path / "global-config"
+        global_config.write_text("[user]\nemail = g@guy.com\n", encoding="utf-8")
+
+        with caplog.at_level(logging.INFO):
+            list_config(commands.ListConfig(show_origin=True))
+            assert f"global:{global_config}\tuser.email = g@guy.com" in caplog.text
+
 
 @pytest.mark.usefixtures("default_path")
 class TestUnsetConfig:
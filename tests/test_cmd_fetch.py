@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from codetrail import cmd_fetch
+from codetrail import cmd_init
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import models
+from codetrail import refs
+from codetrail import remotes
+from codetrail import transfer
+from codetrail.cmd_config import set_config
+from codetrail.cmd_fetch import fetch_all
+from codetrail.cmd_fetch import fetch_remote
+from codetrail.cmd_fetch import run_concurrently
+from tests.utils import write_commit
+from tests.utils import write_tree
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """Provides a repository with a `master` branch and an annotated tag."""
+    path = tmp_path / "remote"
+    path.mkdir()
+    cmd_init.initialize_repository(commands.InitializeRepository(path=path))
+    repository = models.CodetrailRepository(path)
+    store = repository.objects
+    first = write_commit(store, tree=write_tree(store, {"README": b"one"}))
+    second = write_commit(store, [first], tree=write_tree(store, {"README": b"two"}))
+    tag = store.write_object(
+        "tag",
+        f"object {first}\ntype commit\ntag v1\n\nmessage\n".encode(),
+    )
+    refs.write_ref(repository.repo_dir, "refs/heads/master", second)
+    refs.write_ref(repository.repo_dir, "refs/tags/v1", tag)
+    return repository
+
+
+@pytest.mark.usefixtures("default_path")
+class TestFetchRemote:
+    """Tests for `fetch_remote` function."""
+
+    def test_fetches_branches_and_tags(self, code_repository, remote, caplog):
+        master = refs.resolve_ref(remote.repo_dir, "refs/heads/master")
+        tag = refs.resolve_ref(remote.repo_dir, "refs/tags/v1")
+
+        with caplog.at_level(logging.INFO):
+            fetch_remote(commands.FetchRemote(remote=str(remote.work_tree)))
+            assert "Fetched 7 objects from" in caplog.text
+            assert f"Updated refs/remotes/origin/master to {master[:7]}." in (
+                caplog.text
+            )
+
+        repo_dir = code_repository.repo_dir
+        assert refs.resolve_ref(repo_dir, "refs/remotes/origin/master") == master
+        assert refs.resolve_ref(repo_dir, "refs/tags/v1") == tag
+        assert code_repository.objects.read_object(master).obj_type == "commit"
+
+    def test_fetches_only_new_objects(self, code_repository, remote, caplog):
+        fetch_remote(commands.FetchRemote(remote=str(remote.work_tree), name="up"))
+        store = remote.objects
+        master = refs.resolve_ref(remote.repo_dir, "refs/heads/master")
+        tip = write_commit(
+            store, [master], tree=write_tree(store, {"README": b"three"})
+        )
+        refs.write_ref(remote.repo_dir, "refs/heads/master", tip)
+
+        with caplog.at_level(logging.INFO):
+            fetch_remote(commands.FetchRemote(remote=str(remote.work_tree), name="up"))
+            assert "Fetched 3 objects from" in caplog.text
+
+        repo_dir = code_repository.repo_dir
+        assert refs.resolve_ref(repo_dir, "refs/remotes/up/master") == tip
+
+    def test_keeps_existing_local_tags(self, code_repository, remote):
+        local = write_commit(code_repository.objects)
+        refs.write_ref(code_repository.repo_dir, "refs/tags/v1", local)
+
+        fetch_remote(commands.FetchRemote(remote=str(remote.work_tree)))
+
+        assert refs.resolve_ref(code_repository.repo_dir, "refs/tags/v1") == local
+
+    def test_fetches_nothing_when_up_to_date(self, code_repository, remote, caplog):
+        command = commands.FetchRemote(remote=str(remote.work_tree))
+        fetch_remote(command)
+        caplog.clear()
+
+        with caplog.at_level(logging.INFO):
+            fetch_remote(command)
+            assert "Fetched 0 objects from" in caplog.text
+            assert "Updated" not in caplog.text
+
+    def test_raises_exception_when_remote_is_not_a_repository(
+        self, code_repository, tmp_path
+    ):
+        command = commands.FetchRemote(
+            remote=str(tmp_path / "missing"),
+            upload_pack=[sys.executable, "-m", "codetrail", "upload-pack"],
+        )
+
+        with pytest.raises(exceptions.ProtocolError, match="no repository"):
+            fetch_remote(command)
+
+    def test_partial_clones_fetch_with_their_filter(
+        self, code_repository, remote, caplog
+    ):
+        set_config(commands.SetConfig(key="core.partialclonefilter", value="blob:none"))
+
+        with caplog.at_level(logging.INFO):
+            fetch_remote(commands.FetchRemote(remote=str(remote.work_tree)))
+            assert "Fetched 5 objects from" in caplog.text
+
+        readme = remote.objects.write_object("blob", b"two")
+        assert not code_repository.objects.has_object(readme)
+
+    def test_raises_exception_when_remote_cannot_filter(self, code_repository, remote):
+        set_config(commands.SetConfig(key="core.partialclonefilter", value="blob:none"))
+        original = transfer.read_advertisement
+
+        def without_capabilities(stream):
+            return original(stream)._replace(capabilities=frozenset())
+
+        with (
+            patch.object(transfer, "read_advertisement", without_capabilities),
+            pytest.raises(exceptions.ProtocolError, match="object filters"),
+        ):
+            fetch_remote(commands.FetchRemote(remote=str(remote.work_tree)))
+
+
+@pytest.fixture
+def mirrors(tmp_path, code_repository):
+    """Provides 20 recorded remotes whose `master` branches all differ."""
+    tips = {}
+    for i in range(20):
+        path = tmp_path / f"mirror{i:02}"
+        cmd_init.initialize_repository(commands.InitializeRepository(path=path))
+        repository = models.CodetrailRepository(path)
+        store = repository.objects
+        tip = write_commit(store, tree=write_tree(store, {"README": f"{i}".encode()}))
+        refs.write_ref(repository.repo_dir, "refs/heads/master", tip)
+        remotes.write_remote(code_repository.repo_dir, path.name, str(path))
+        tips[path.name] = tip
+    return tips
+
+
+@pytest.mark.usefixtures("default_path")
+class TestFetchAll:
+    """Tests for `fetch_all` function."""
+
+    def test_fetches_every_remote(self, code_repository, mirrors, caplog):
+        with caplog.at_level(logging.INFO):
+            fetch_all(commands.FetchAll(jobs=4))
+            assert "Fetched 60 objects from 20 remotes." in caplog.text
+            assert "mirror07: Counting objects: 3, done." in caplog.text
+
+        repo_dir = code_repository.repo_dir
+        for name, tip in mirrors.items():
+            assert refs.resolve_ref(repo_dir, f"refs/remotes/{name}/master") == tip
+            assert code_repository.objects.has_object(tip)
+
+    def test_reads_the_parallelism_from_the_configuration(self, mirrors):
+        set_config(commands.SetConfig(key="core.fetchparallel", value="3"))
+
+        with patch.object(
+            cmd_fetch,
+            "run_concurrently",
+            wraps=run_concurrently,
+        ) as runner:
+            fetch_all(commands.FetchAll())
+
+        assert runner.call_args.args[1] == 3
+        assert list(runner.call_args.args[0]) == list(mirrors)
+
+    def test_reports_failing_remotes_and_fetches_the_others(
+        self, code_repository, mirrors, tmp_path, caplog
+    ):
+        remotes.write_remote(code_repository.repo_dir, "gone", str(tmp_path / "gone"))
+
+        with caplog.at_level(logging.INFO):
+            fetch_all(
+                commands.FetchAll(
+                    upload_pack=[sys.executable, "-m", "codetrail", "upload-pack"],
+                ),
+            )
+            assert "Could not fetch from gone: There is no repository" in caplog.text
+            assert "Fetched 60 objects from 21 remotes." in caplog.text
+
+        assert (
+            refs.resolve_ref(
+                code_repository.repo_dir,
+                "refs/remotes/mirror00/master",
+            )
+            == (mirrors["mirror00"])
+        )
+
+    def test_reports_unreachable_remotes_and_fetches_the_others(
+        self, code_repository, mirrors, caplog
+    ):
+        directory = tempfile.mkdtemp(prefix="ct")
+        stale = str(Path(directory) / "stale.sock")
+        with socket.socket(socket.AF_UNIX) as server:
+            server.bind(stale)
+        remotes.write_remote(code_repository.repo_dir, "stale", stale)
+
+        try:
+            with caplog.at_level(logging.INFO):
+                fetch_all(commands.FetchAll(jobs=4))
+                assert "Could not fetch from stale: " in caplog.text
+                assert "Fetched 60 objects from 21 remotes." in caplog.text
+        finally:
+            shutil.rmtree(directory)
+
+        assert (
+            refs.resolve_ref(
+                code_repository.repo_dir,
+                "refs/remotes/mirror19/master",
+            )
+            == (mirrors["mirror19"])
+        )
+
+    @pytest.mark.usefixtures("code_repository")
+    def test_logs_when_there_is_no_remote(self, caplog):
+        with caplog.at_level(logging.INFO):
+            fetch_all(commands.FetchAll())
+            assert "No remotes to fetch from." in caplog.text
+
+
+class TestRunConcurrently:
+    """Tests for `run_concurrently` function."""
+
+    def test_runs_at_most_the_given_number_of_fetches_at_once(self):
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def fetch(name):
+            with lock:
+                running.append(name)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(name)
+            return name
+
+        fetches = {f"r{i}": lambda i=i: fetch(f"r{i}") for i in range(9)}
+
+        results = asyncio.run(run_concurrently(fetches, 3))
+
+        assert results == {f"r{i}": f"r{i}" for i in range(9)}
+        assert max(peak) == 3
+
+    def test_returns_fetch_errors_and_raises_others(self):
+        error = exceptions.ProtocolError("Refused")
+
+        def refuse():
+            raise error
+
+        def crash():
+            raise KeyError
+
+        def disconnect():
+            raise ConnectionRefusedError
+
+        def hang_up():
+            raise EOFError
+
+        results = asyncio.run(
+            run_concurrently({"a": refuse, "b": disconnect, "c": hang_up}, 2),
+        )
+        assert results["a"] is error
+        assert isinstance(results["b"], ConnectionRefusedError)
+        assert isinstance(results["c"], EOFError)
+        with pytest.raises(KeyError):
+            asyncio.run(run_concurrently({"a": refuse, "b": crash}, 2))
@@ -0,0 +1,119 @@
+import io
+
+import pytest
+
+from codetrail import commands
+from codetrail import commits
+from codetrail import exceptions
+from codetrail.cmd_log import format_commit
+from codetrail.cmd_log import format_date
+from codetrail.cmd_log import log_commits
+from codetrail.cmd_log import write_buffered
+from tests.utils import write_commit
+
+
+@pytest.fixture
+def master(code_repository):
+    """Provides the IDs of three commits on master, oldest first."""
+    store = code_repository.objects
+    oids = [write_commit(store, timestamp=1700000000, message="First\n")]
+    for i in range(1, 3):
+        oids.append(
+            write_commit(store, [oids[-1]], timestamp=1700000000 + i, message=f"{i}\n"),
+        )
+    master = code_repository.repo_dir / "refs/heads/master"
+    master.write_text(oids[-1], encoding="utf-8")
+    return oids
+
+
+@pytest.mark.usefixtures("default_path")
+class TestLogCommits:
+    """Tests for `log_commits` function."""
+
+    def test_shows_history_of_head(self, master, capsys):
+        log_commits(commands.LogCommits())
+
+        output = capsys.readouterr().out
+        assert [line for line in output.splitlines() if line.startswith("commit")] == [
+            f"commit {oid}" for oid in master[::-1]
+        ]
+        assert "Author: Chill Guy <chill@guy.com>\n" in output
+        assert "\n    First\n" in output
+
+    def test_limits_count(self, master, capsys):
+        log_commits(commands.LogCommits(revision="master", max_count=1))
+
+        assert capsys.readouterr().out.count("commit ") == 1
+
+    def test_limits_date(self, master, capsys):
+        log_commits(commands.LogCommits(revision=master[1], since=1700000001))
+
+        output = capsys.readouterr().out
+        assert output.count("commit ") == 1
+        assert f"commit {master[1]}" in output
+
+    def test_shows_children_before_parents_in_topo_order(
+        self,
+        code_repository,
+        capsys,
+    ):
+        store = code_repository.objects
+        base = write_commit(store, timestamp=1)
+        skewed = write_commit(store, [base], timestamp=5)
+        side = write_commit(store, [skewed], timestamp=4)
+        merge = write_commit(store, [skewed, side], timestamp=6)
+
+        log_commits(commands.LogCommits(revision=merge, topo_order=True))
+
+        output = capsys.readouterr().out
+        assert [line for line in output.splitlines() if line.startswith("commit")] == [
+            f"commit {oid}" for oid in (merge, side, skewed, base)
+        ]
+
+    def test_raises_on_unborn_branch(self, code_repository):
+        with pytest.raises(exceptions.UnknownRevisionError):
+            log_commits(commands.LogCommits())
+
+
+class TestWriteBuffered:
+    """Tests for `write_buffered` function."""
+
+    def test_writes_first_chunk_then_full_buffers(self):
+        stream = io.StringIO()
+        writes = []
+        stream.write = writes.append
+
+        write_buffered(stream, ["a", "bb", "cc", "d", "e"], buffer_size=4)
+
+        assert writes == ["a", "bbcc", "de"]
+
+
+class TestFormat:
+    """Tests for the log formatting functions."""
+
+    @pytest.mark.parametrize(
+        ("offset", "expected"),
+        [
+            ("+0000", "Tue Nov 14 22:13:20 2023 +0000"),
+            ("+0130", "Tue Nov 14 23:43:20 2023 +0130"),
+            ("-0500", "Tue Nov 14 17:13:20 2023 -0500"),
+            ("bogus", "Tue Nov 14 22:13:20 2023 bogus"),
+        ],
+    )
+    def test_formats_date_in_its_timezone(self, offset, expected):
+        assert format_date(f"Me <me@me.me> 1700000000 {offset}") == expected
+
+    def test_formats_commit(self):
+        signature = "Me <me@me.me> 1700000000 +0000"
+        commit = commits.Commit("a" * 40, (), signature, signature, "Subject\n\nBody\n")
+
+        assert format_commit("b" * 40, commit) == (
+            f"commit {'b' * 40}\n"
+            "Author: Me <me@me.me>\n"
+            "Date:   Tue Nov 14 22:13:20 2023 +0000\n"
+            "\n"
+            "    Subject\n"
+            "    \n"
+            "    Body\n"
+            "\n"
+        )
@@ -0,0 +1,86 @@
+import logging
+
+import pytest
+
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import refs
+from codetrail.cmd_pack_refs import pack_refs
+from codetrail.packed_refs import PackedRef
+from tests.utils import write_commit
+
+
+@pytest.mark.usefixtures("default_path")
+class TestPackRefs:
+    """Tests for `pack_refs` function."""
+
+    @pytest.fixture
+    def commit(self, code_repository):
+        return write_commit(code_repository.objects)
+
+    def test_moves_loose_references_into_packed_file(
+        self, code_repository, commit, caplog
+    ):
+        repo_dir = code_repository.repo_dir
+        refs.write_ref(repo_dir, "refs/heads/master", commit)
+        refs.write_ref(repo_dir, "refs/heads/topic/one", commit)
+
+        with caplog.at_level(logging.INFO):
+            pack_refs(commands.PackRefs())
+            assert "Packed 2 references." in caplog.text
+
+        assert list(refs.iter_loose_refs(repo_dir)) == []
+        assert not (repo_dir / "refs/heads/topic").exists()
+        assert refs.resolve_ref(repo_dir) == commit
+        assert list(refs.iter_refs(repo_dir)) == [
+            ("refs/heads/master", commit),
+            ("refs/heads/topic/one", commit),
+        ]
+
+    def test_records_peeled_tags(self, code_repository, commit):
+        repo_dir = code_repository.repo_dir
+        tag = code_repository.objects.write_object(
+            "tag", f"object {commit}\ntype commit\ntag v1\n".encode()
+        )
+        refs.write_ref(repo_dir, "refs/tags/v1", tag)
+        refs.write_ref(repo_dir, "refs/tags/light", commit)
+
+        pack_refs(commands.PackRefs())
+
+        records = refs.packed_refs(repo_dir)
+        assert records is not None
+        assert list(records) == [
+            PackedRef("refs/tags/light", commit),
+            PackedRef("refs/tags/v1", tag, commit),
+        ]
+
+    def test_only_reads_new_references(self, code_repository, commit):
+        repo_dir = code_repository.repo_dir
+        refs.write_ref(repo_dir, "refs/heads/master", commit)
+        pack_refs(commands.PackRefs())
+        other = write_commit(code_repository.objects, [commit])
+        refs.write_ref(repo_dir, "refs/heads/topic", other)
+        code_repository.objects.remove_loose_object(commit)
+
+        pack_refs(commands.PackRefs())
+
+        assert dict(refs.iter_refs(repo_dir)) == {
+            "refs/heads/master": commit,
+            "refs/heads/topic": other,
+        }
+
+    def test_keeps_symbolic_references_loose(self, code_repository, commit):
+        repo_dir = code_repository.repo_dir
+        refs.write_ref(repo_dir, "refs/heads/master", commit)
+        (repo_dir / "refs/heads/alias").write_text("ref: refs/heads/master", "utf-8")
+
+        pack_refs(commands.PackRefs())
+
+        assert (repo_dir / "refs/heads/alias").exists()
+        assert refs.resolve_ref(repo_dir, "refs/heads/alias") == commit
+
+    def test_raises_on_missing_object(self, code_repository):
+        refs.write_ref(code_repository.repo_dir, "refs/heads/master", "0" * 40)
+
+        with pytest.raises(exceptions.ObjectNotFoundError):
+            pack_refs(commands.PackRefs())
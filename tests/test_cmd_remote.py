@@ -0,0 +1,56 @@
+import logging
+from pathlib import Path
+
+import pytest
+
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import remotes
+from codetrail.cmd_remote import add_remote
+from codetrail.cmd_remote import list_remotes
+
+
+@pytest.mark.usefixtures("default_path")
+class TestListRemotes:
+    """Tests for `list_remotes` function."""
+
+    def test_lists_names_and_urls(self, code_repository, capsys):
+        remotes.write_remote(code_repository.repo_dir, "upstream", "/srv/upstream")
+        remotes.write_remote(code_repository.repo_dir, "origin", "/srv/origin")
+
+        list_remotes(commands.ListRemotes())
+
+        assert capsys.readouterr().out == (
+            "origin\t/srv/origin\nupstream\t/srv/upstream\n"
+        )
+
+    @pytest.mark.usefixtures("code_repository")
+    def test_lists_nothing_without_remotes(self, capsys):
+        list_remotes(commands.ListRemotes())
+
+        assert capsys.readouterr().out == ""
+
+
+@pytest.mark.usefixtures("default_path")
+class TestAddRemote:
+    """Tests for `add_remote` function."""
+
+    def test_records_an_absolute_url(self, code_repository, caplog):
+        with caplog.at_level(logging.INFO):
+            add_remote(commands.AddRemote(name="mirror", url="../mirror"))
+            assert "Added remote 'mirror'" in caplog.text
+
+        assert remotes.read_remotes(code_repository.repo_dir) == {
+            "mirror": str(Path("../mirror").absolute()),
+        }
+
+    def test_raises_exception_when_the_remote_exists(self, code_repository):
+        remotes.write_remote(code_repository.repo_dir, "origin", "/srv/origin")
+
+        with pytest.raises(exceptions.InvalidReferenceError, match="already exists"):
+            add_remote(commands.AddRemote(name="origin", url="/srv/other"))
+
+    @pytest.mark.usefixtures("code_repository")
+    def test_raises_exception_on_invalid_name(self):
+        with pytest.raises(exceptions.InvalidReferenceError, match="not a valid"):
+            add_remote(commands.AddRemote(name="a/b", url="/srv/other"))
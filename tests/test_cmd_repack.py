@@ -0,0 +1,136 @@
+import io
+import logging
+import random
+
+import pytest
+
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import models
+from codetrail import packs
+from codetrail.cmd_config import set_config
+from codetrail.cmd_repack import repack_repository
+from tests.utils import write_commit
+
+
+@pytest.mark.usefixtures("default_path")
+class TestRepackRepository:
+    """Tests for `repack_repository` function."""
+
+    def test_packs_loose_objects(self, code_repository):
+        store = code_repository.objects
+        oids = [store.write_object("blob", f"blob {i}".encode()) for i in range(5)]
+
+        repack_repository(commands.RepackRepository())
+
+        store.reload_packs()
+        assert list(store.iter_loose_objects()) == []
+        assert len(store.packs) == 1
+        for i, oid in enumerate(oids):
+            assert store.has_object(oid)
+            assert store.read_object(oid).data == f"blob {i}".encode()
+
+    def test_merges_existing_packs_with_new_objects(self, code_repository):
+        store = code_repository.objects
+        first = store.write_object("blob", b"first")
+        repack_repository(commands.RepackRepository())
+        second = store.write_object("blob", b"second")
+
+        repack_repository(commands.RepackRepository(window=0))
+
+        store.reload_packs()
+        assert len(store.packs) == 1
+        assert set(store.packs[0]) == {first, second}
+
+    def test_writes_objects_in_recency_order(self, code_repository):
+        store = code_repository.objects
+        history = [write_commit(store, timestamp=1)]
+        for timestamp in range(2, 5):
+            history.append(write_commit(store, history[-1:], timestamp=timestamp))
+        (code_repository.repo_dir / "refs/heads/master").write_text(
+            history[-1],
+            "utf-8",
+        )
+
+        repack_repository(commands.RepackRepository(window=0))
+
+        pack = models.CodetrailRepository(code_repository.work_tree).objects.packs[0]
+        assert [pack.index.pack_oid(i).hex() for i in range(len(pack))] == [
+            *reversed(history),
+            store.write_object("tree", b""),
+        ]
+
+    def test_writes_bitmaps_for_references(self, code_repository, caplog):
+        store = code_repository.objects
+        head = write_commit(store)
+        (code_repository.repo_dir / "refs/heads/master").write_text(head, "utf-8")
+
+        with caplog.at_level(logging.INFO):
+            repack_repository(commands.RepackRepository(write_bitmap=True))
+            assert "Wrote 1 reachability bitmaps." in caplog.text
+
+        pack = models.CodetrailRepository(code_repository.work_tree).objects.packs[0]
+        assert pack.bitmaps is not None
+        assert list(pack.bitmaps) == [head]
+
+    def test_writes_bitmaps_for_an_existing_pack(self, code_repository):
+        store = code_repository.objects
+        head = write_commit(store)
+        (code_repository.repo_dir / "refs/heads/master").write_text(head, "utf-8")
+        repack_repository(commands.RepackRepository())
+
+        repack_repository(commands.RepackRepository(write_bitmap=True))
+
+        store.reload_packs()
+        assert len(store.packs) == 1
+        assert store.packs[0].bitmaps is not None
+
+    def test_removes_bitmaps_of_replaced_packs(self, code_repository):
+        store = code_repository.objects
+        write_commit(store)
+        repack_repository(commands.RepackRepository(write_bitmap=True))
+        store.reload_packs()
+        old_bitmap = store.packs[0].bitmap_path
+        store.write_object("blob", b"new")
+
+        repack_repository(commands.RepackRepository())
+
+        assert not old_bitmap.exists()
+
+    def test_keeps_chunked_blobs_loose(self, code_repository):
+        store = code_repository.objects
+        data = random.Random(0).randbytes(300 * 1024)
+        oid = store.write_blob(io.BytesIO(data), chunked=True)
+
+        repack_repository(commands.RepackRepository())
+
+        store.reload_packs()
+        assert list(store.iter_loose_objects()) == [oid]
+        assert oid not in store.packs[0]
+        assert store.read_object(oid).data == data
+
+    def test_logs_when_nothing_to_pack(self, code_repository, caplog):
+        with caplog.at_level(logging.INFO):
+            repack_repository(commands.RepackRepository())
+            assert "Nothing to pack." in caplog.text
+
+    def test_reads_window_from_config(self, code_repository):
+        set_config(commands.SetConfig(key="core.packwindow", value="many"))
+        code_repository.objects.write_object("blob", b"data")
+
+        with pytest.raises(exceptions.UnsupportedConfigError):
+            repack_repository(commands.RepackRepository())
+
+    def test_uses_configured_depth(self, code_repository):
+        set_config(commands.SetConfig(key="core.packdepth", value="0"))
+        store = code_repository.objects
+        oids = [store.write_object("blob", b"x" * 1000 + bytes([i])) for i in range(3)]
+
+        repack_repository(commands.RepackRepository())
+
+        pack = models.CodetrailRepository(code_repository.work_tree).objects.packs[0]
+        with pack.pack_path.open("rb") as file:
+            for oid in oids:
+                assert (
+                    packs.read_entry_header(file, pack.offset(oid)).base_offset is None
+                )
@@ -0,0 +1,84 @@
+import io
+import shutil
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import transfer
+from codetrail.cmd_upload_pack import UploadPackServer
+from codetrail.cmd_upload_pack import upload_pack
+
+
+@pytest.fixture
+def socket_path():
+    """Provides a path short enough for a Unix socket."""
+    directory = tempfile.mkdtemp(prefix="ct")
+    yield str(Path(directory) / "serve.sock")
+    shutil.rmtree(directory)
+
+
+class TestUploadPack:
+    """Tests for `upload_pack` function."""
+
+    def test_serves_standard_input_and_output(self, code_repository):
+        stdin = io.TextIOWrapper(io.BytesIO(transfer.FLUSH_PACKET))
+        stdout = io.TextIOWrapper(io.BytesIO())
+
+        with patch.object(sys, "stdin", stdin), patch.object(sys, "stdout", stdout):
+            upload_pack(commands.UploadPack(directory=str(code_repository.work_tree)))
+
+        stdout.buffer.seek(0)
+        advertisement = transfer.read_advertisement(stdout.buffer)
+        assert advertisement.refs == {}
+        assert advertisement.head == "refs/heads/master"
+
+    def test_serves_a_socket_until_interrupted(self, code_repository, socket_path):
+        command = commands.UploadPack(
+            directory=str(code_repository.work_tree),
+            listen=socket_path,
+        )
+
+        with patch.object(
+            UploadPackServer,
+            "serve_forever",
+            side_effect=KeyboardInterrupt,
+        ) as serve:
+            upload_pack(command)
+
+        serve.assert_called_once_with()
+        assert not Path(socket_path).exists()
+
+    def test_raises_exception_before_listening_outside_a_repository(
+        self, tmp_path, socket_path
+    ):
+        command = commands.UploadPack(directory=str(tmp_path), listen=socket_path)
+
+        with pytest.raises(exceptions.NotARepositoryError):
+            upload_pack(command)
+
+        assert not Path(socket_path).exists()
+
+
+class TestUploadPackServer:
+    """Tests for `UploadPackServer` class."""
+
+    def test_reports_errors_to_the_client(self, tmp_path, socket_path):
+        server = UploadPackServer(socket_path, str(tmp_path))
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            with (
+                transfer.connect(socket_path) as (source, _),
+                pytest.raises(exceptions.ProtocolError, match="no repository"),
+            ):
+                transfer.read_advertisement(source)
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
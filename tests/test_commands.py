@@ -1,3 +1,6 @@
+import pydantic
+import pytest
+
 from codetrail import commands
 
 
@@ -10,3 +13,32 @@ def test_set_config_command_returns_section_and_option():
     command = commands.SetConfig(key="user.name", value="chill guy")
     assert command.section == "user"
     assert command.option == "name"
+
+
+def test_command_coerces_values_with_pydantic():
+    command = commands.RepackRepository(window="5")
+    assert command.window == 5
+    assert command.depth is None
+
+
+def test_command_rejects_invalid_values():
+    with pytest.raises(pydantic.ValidationError):
+        commands.RepackRepository(window="five")
+
+
+@pytest.mark.parametrize(
+    "values",
+    [{}, {"key": "user.name", "color": "red"}],
+)
+def test_command_rejects_missing_and_unknown_fields(values):
+    with pytest.raises(TypeError):
+        commands.GetConfig(**values)
+
+
+def test_commands_compare_by_type_and_values():
+    command = commands.GetConfig(key="user.name")
+
+    assert command == commands.GetConfig(key="user.name")
+    assert command != commands.UnsetConfig(key="user.name")
+    assert command != commands.GetConfig(key="user.email")
+    assert repr(command) == "GetConfig(key='user.name')"
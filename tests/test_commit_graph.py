@@ -0,0 +1,188 @@
+from unittest.mock import patch
+
+import pytest
+
+from codetrail import commit_graph
+from codetrail import exceptions
+from codetrail import objects
+from tests.utils import write_commit
+
+
+@pytest.fixture
+def history(store):
+    """Provides a history with a merge and an octopus merge.
+
+    root - a - b ----- merge - octopus
+            \\- c -/           /  /
+                       d ----/  /
+                       e ------/
+    """
+    root = write_commit(store, timestamp=1)
+    a = write_commit(store, [root], timestamp=2)
+    b = write_commit(store, [a], timestamp=3)
+    c = write_commit(store, [a], timestamp=4)
+    merge = write_commit(store, [b, c], timestamp=5)
+    d = write_commit(store, timestamp=6)
+    e = write_commit(store, timestamp=7)
+    octopus = write_commit(store, [merge, d, e], timestamp=8)
+    return {
+        "root": root,
+        "a": a,
+        "b": b,
+        "c": c,
+        "merge": merge,
+        "d": d,
+        "e": e,
+        "octopus": octopus,
+    }
+
+
+class TestWriteCommitGraph:
+    """Tests for `write_commit_graph` function."""
+
+    def test_records_every_reachable_commit(self, store, history):
+        assert commit_graph.write_commit_graph(store, [history["octopus"]]) == 8
+
+        graph = store.commit_graph
+        assert sorted(graph) == sorted(history.values())
+        for name, timestamp in [("root", 1), ("merge", 5), ("octopus", 8)]:
+            assert graph.lookup(history[name]).commit_time == timestamp
+
+    def test_records_parents_in_order(self, store, history):
+        commit_graph.write_commit_graph(store, [history["octopus"]])
+
+        graph = store.commit_graph
+        parents = graph.lookup(history["octopus"]).parents
+        assert [graph.oid(parent) for parent in parents] == [
+            history["merge"],
+            history["d"],
+            history["e"],
+        ]
+        parents = graph.lookup(history["merge"]).parents
+        assert [graph.oid(parent) for parent in parents] == [history["b"], history["c"]]
+        assert graph.lookup(history["root"]).parents == ()
+
+    def test_records_generation_numbers(self, store, history):
+        commit_graph.write_commit_graph(store, [history["octopus"]])
+
+        graph = store.commit_graph
+        generations = {
+            name: graph.lookup(oid).generation for name, oid in history.items()
+        }
+        assert generations == {
+            "root": 1,
+            "a": 2,
+            "b": 3,
+            "c": 3,
+            "merge": 4,
+            "d": 1,
+            "e": 1,
+            "octopus": 5,
+        }
+
+    def test_records_root_tree(self, store, history):
+        commit_graph.write_commit_graph(store, [history["root"]])
+
+        tree = objects.hash_object("tree", b"")
+        assert store.commit_graph.lookup(history["root"]).tree == tree
+
+    def test_peels_tags_and_skips_other_objects(self, store, history):
+        tag = store.write_object(
+            "tag",
+            f"object {history['b']}\ntype commit\ntag v1\n\nRelease\n".encode(),
+        )
+        blob = store.write_object("blob", b"data")
+
+        assert commit_graph.write_commit_graph(store, [tag, blob]) == 3
+
+    def test_only_reads_new_commits(self, store, history):
+        commit_graph.write_commit_graph(store, [history["merge"]])
+        new = write_commit(store, [history["octopus"]], timestamp=9)
+
+        with patch.object(store, "read_object", wraps=store.read_object) as reader:
+            assert commit_graph.write_commit_graph(store, [new]) == 4
+            assert reader.call_count == 4
+
+        graph = store.commit_graph
+        assert len(graph) == 9
+        assert graph.lookup(new).generation == 6
+        assert graph.lookup(history["merge"]).generation == 4
+
+    def test_leaves_graph_untouched_when_up_to_date(self, store, history):
+        commit_graph.write_commit_graph(store, [history["octopus"]])
+        graph = store.commit_graph
+
+        assert commit_graph.write_commit_graph(store, [history["merge"]]) == 0
+        assert store.commit_graph is graph
+
+    def test_raises_on_missing_parent(self, store):
+        orphan = write_commit(store, ["0" * 40])
+
+        with pytest.raises(exceptions.ObjectNotFoundError):
+            commit_graph.write_commit_graph(store, [orphan])
+
+
+class TestCommitGraph:
+    """Tests for `CommitGraph` class."""
+
+    def test_answers_ancestry_queries(self, store, history):
+        commit_graph.write_commit_graph(store, [history["octopus"]])
+        graph = store.commit_graph
+
+        assert graph.is_ancestor(history["root"], history["octopus"])
+        assert graph.is_ancestor(history["c"], history["merge"])
+        assert graph.is_ancestor(history["e"], history["octopus"])
+        assert graph.is_ancestor(history["b"], history["b"])
+        assert not graph.is_ancestor(history["b"], history["c"])
+        assert not graph.is_ancestor(history["octopus"], history["root"])
+        assert not graph.is_ancestor(history["d"], history["merge"])
+
+    def test_stops_walking_below_ancestor_generation(self, store, history):
+        commit_graph.write_commit_graph(store, [history["octopus"]])
+        graph = store.commit_graph
+
+        with patch.object(graph, "entry", wraps=graph.entry) as entry:
+            assert not graph.is_ancestor(history["c"], history["b"])
+            assert entry.call_count == 1
+
+    def test_raises_on_unknown_commit(self, store, history):
+        commit_graph.write_commit_graph(store, [history["b"]])
+        graph = store.commit_graph
+
+        assert history["c"] not in graph
+        with pytest.raises(exceptions.ObjectNotFoundError):
+            graph.lookup(history["c"])
+        with pytest.raises(exceptions.ObjectNotFoundError):
+            graph.is_ancestor(history["c"], history["b"])
+        with pytest.raises(exceptions.ObjectNotFoundError):
+            graph.is_ancestor(history["a"], history["c"])
+
+    def test_finds_ids_at_fanout_edges(self, store):
+        path = store.commit_graph_path
+        path.parent.mkdir(parents=True)
+        records = {
+            oid: commit_graph._Record("a" * 40, (), 0)  # noqa: SLF001
+            for oid in ["00" * 20, "ff" * 20]
+        }
+        commit_graph._write_graph(path, records, dict.fromkeys(records, 1))  # noqa: SLF001
+
+        with commit_graph.CommitGraph(path) as graph:
+            assert graph.position("00" * 20) == 0
+            assert graph.position("ff" * 20) == 1
+            assert graph.position("ff" * 19 + "fe") is None
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            b"CTCG",
+            b"XXXX" + b"\x00\x00\x00\x01" + b"\x00" * 1044,
+            b"CTCG" + b"\x00\x00\x00\x01" + b"\x00\x00\x00\x01" * 256 + b"\x00" * 20,
+        ],
+    )
+    def test_rejects_corrupt_graph(self, store, content):
+        path = store.commit_graph_path
+        path.parent.mkdir(parents=True)
+        path.write_bytes(content)
+
+        with pytest.raises(exceptions.CorruptObjectError):
+            commit_graph.CommitGraph(path)
@@ -0,0 +1,59 @@
+import pytest
+
+from codetrail import commits
+from codetrail import exceptions
+
+COMMIT = (
+    b"tree " + b"a" * 40 + b"\n"
+    b"parent " + b"b" * 40 + b"\n"
+    b"parent " + b"c" * 40 + b"\n"
+    b"author Chill Guy <chill@guy.com> 1700000000 +0100\n"
+    b"committer Chill Guy <chill@guy.com> 1700000042 +0100\n"
+    b"\n"
+    b"Subject\n\nBody\n"
+)
+
+
+class TestCommit:
+    """Tests for `Commit` class."""
+
+    def test_parses_commit(self):
+        commit = commits.Commit.parse(COMMIT)
+
+        assert commit.tree == "a" * 40
+        assert commit.parents == ("b" * 40, "c" * 40)
+        assert commit.author == "Chill Guy <chill@guy.com> 1700000000 +0100"
+        assert commit.commit_time == 1700000042
+        assert commit.message == "Subject\n\nBody\n"
+
+    def test_round_trips(self):
+        assert commits.Commit.parse(COMMIT).encode() == COMMIT
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            b"author a <a> 1 +0000\ncommitter a <a> 1 +0000\n\nmessage",
+            b"tree\n\nmessage",
+        ],
+    )
+    def test_rejects_malformed_commit(self, data):
+        with pytest.raises(exceptions.CorruptObjectError):
+            commits.Commit.parse(data)
+
+    def test_rejects_signature_without_time(self):
+        commit = commits.Commit("a" * 40, (), "me", "me", "")
+
+        with pytest.raises(exceptions.CorruptObjectError):
+            _ = commit.commit_time
+
+
+class TestTagTarget:
+    """Tests for `tag_target` function."""
+
+    def test_returns_tagged_object(self):
+        data = b"object " + b"a" * 40 + b"\ntype commit\ntag v1\n\nRelease\n"
+        assert commits.tag_target(data) == "a" * 40
+
+    def test_rejects_tag_without_object(self):
+        with pytest.raises(exceptions.CorruptObjectError):
+            commits.tag_target(b"type commit\n\nRelease\n")
@@ -0,0 +1,226 @@
+import configparser
+import os
+import threading
+
+import pytest
+
+from codetrail import configuration
+from codetrail import exceptions
+
+
+@pytest.fixture
+def config_file(temporary_dir):
+    """Provides a configuration file with a user name."""
+    path = temporary_dir / "config"
+    path.write_text(
+        "[user]\nname = Chill Guy\n\n[core]\nworkers = 4\n", encoding="utf-8"
+    )
+    return path
+
+
+def touch_later(path):
+    """Move the modification time of a file forward by a second."""
+    status = path.stat()
+    os.utime(path, ns=(status.st_atime_ns, status.st_mtime_ns + 10**9))
+
+
+class TestReadConfig:
+    """Tests for `read_config` function."""
+
+    def test_reads_values(self, config_file):
+        view = configuration.read_config(config_file)
+
+        assert view.sections() == ["user", "core"]
+        assert view.has_section("user")
+        assert view.options("user") == ["name"]
+        assert view.has_option("user", "name")
+        assert view.get("user", "name") == "Chill Guy"
+        assert view.getint("core", "workers", fallback=1) == 4
+        assert view.getint("core", "packwindow", fallback=1) == 1
+
+    def test_raises_parser_exceptions(self, config_file):
+        view = configuration.read_config(config_file)
+
+        with pytest.raises(configparser.NoSectionError):
+            view.get("users", "name")
+        with pytest.raises(configparser.NoOptionError):
+            view.get("user", "email")
+
+    def test_shares_unchanged_views(self, config_file):
+        view = configuration.read_config(config_file)
+        assert configuration.read_config(config_file) is view
+
+    def test_rereads_changed_files(self, config_file):
+        view = configuration.read_config(config_file)
+        config_file.write_text("[user]\nname = Other Guy\n", encoding="utf-8")
+        touch_later(config_file)
+
+        changed = configuration.read_config(config_file)
+
+        assert changed is not view
+        assert changed.get("user", "name") == "Other Guy"
+
+    def test_returns_empty_view_for_missing_file(self, config_file):
+        configuration.read_config(config_file)
+        config_file.unlink()
+
+        assert configuration.read_config(config_file).sections() == []
+
+
+class TestWriteConfig:
+    """Tests for `write_config` function."""
+
+    def test_invalidates_cached_view(self, config_file):
+        view = configuration.read_config(config_file)
+        config = view.copy()
+        config.set("user", "name", "Tiny Guy")
+
+        configuration.write_config(config_file, config)
+
+        assert view.get("user", "name") == "Chill Guy"
+        assert configuration.read_config(config_file).get("user", "name") == "Tiny Guy"
+
+    def test_invalidate_drops_every_view(self, config_file):
+        view = configuration.read_config(config_file)
+        configuration.invalidate()
+        assert configuration.read_config(config_file) is not view
+
+
+class TestTransaction:
+    """Tests for `transaction` function."""
+
+    def test_commits_changes_atomically(self, config_file):
+        view = configuration.read_config(config_file)
+        with configuration.transaction(config_file) as config:
+            config.set("user", "name", "Tiny Guy")
+            assert config_file.with_name("config.lock").exists()
+            assert configuration.read_config(config_file) is view
+
+        assert configuration.read_config(config_file).get("user", "name") == "Tiny Guy"
+        assert not config_file.with_name("config.lock").exists()
+
+    def test_reads_a_rewrite_with_the_same_time_and_size(self, config_file):
+        configuration.read_config(config_file)
+        status = config_file.stat()
+        config_file.write_text(
+            "[user]\nname = Chill Man\n\n[core]\nworkers = 4\n", encoding="utf-8"
+        )
+        os.utime(config_file, ns=(status.st_atime_ns, status.st_mtime_ns))
+        assert config_file.stat().st_size == status.st_size
+
+        with configuration.transaction(config_file) as config:
+            config.set("user", "email", "chill@guy.com")
+
+        view = configuration.read_config(config_file)
+        assert view.get("user", "name") == "Chill Man"
+        assert view.get("user", "email") == "chill@guy.com"
+
+    def test_discards_changes_on_error(self, config_file):
+        before = config_file.read_bytes()
+        with (
+            pytest.raises(RuntimeError),
+            configuration.transaction(config_file) as config,
+        ):
+            config.set("user", "name", "Tiny Guy")
+            raise RuntimeError
+
+        assert config_file.read_bytes() == before
+        assert not config_file.with_name("config.lock").exists()
+
+    def test_raises_exception_when_lock_is_held(self, config_file):
+        lock = config_file.with_name("config.lock")
+        lock.touch()
+
+        with (
+            pytest.raises(exceptions.ConfigLockError),
+            configuration.transaction(config_file, timeout=0.05),
+        ):
+            pass
+
+        assert lock.exists()
+
+    def test_waits_for_lock_to_be_released(self, config_file):
+        lock = config_file.with_name("config.lock")
+        lock.touch()
+        timer = threading.Timer(0.05, lock.unlink)
+        timer.start()
+
+        with configuration.transaction(config_file, timeout=5) as config:
+            config.set("user", "name", "Tiny Guy")
+        timer.join()
+
+        assert configuration.read_config(config_file).get("user", "name") == "Tiny Guy"
+
+
+@pytest.fixture
+def layers(tmp_path, config_file):
+    """Provides system and global files around the local configuration file."""
+    system = tmp_path / "system-config"
+    system.write_text("[core]\nworkers = 2\npackdepth = 5\n", encoding="utf-8")
+    global_ = tmp_path / "global-config"
+    global_.write_text(
+        "[user]\nname = Global Guy\nemail = g@guy.com\n", encoding="utf-8"
+    )
+    return system, global_, config_file
+
+
+class TestReadLayeredConfig:
+    """Tests for `read_layered_config` function."""
+
+    def test_later_layers_override_earlier_ones(self, layers):
+        system, global_, local = layers
+        config = configuration.read_layered_config(local)
+
+        assert config.get("user", "name") == "Chill Guy"
+        assert config.get("user", "email") == "g@guy.com"
+        assert config.getint("core", "workers", fallback=1) == 4
+        assert config.getint("core", "packdepth", fallback=1) == 5
+        assert config.getint("core", "packwindow", fallback=1) == 1
+
+        assert config.origin("user", "name") == ("Chill Guy", "local", local)
+        assert config.origin("user", "email") == ("g@guy.com", "global", global_)
+        assert config.origin("core", "packdepth").path == system
+
+    def test_lists_merged_values(self, layers):
+        config = configuration.read_layered_config(layers[2])
+
+        assert config.sections() == ["core", "user"]
+        assert config.options("user") == ["name", "email"]
+        assert config.has_section("core")
+        assert config.has_option("core", "packdepth")
+        assert not config.has_option("core", "packwindow")
+        assert len(list(config.items())) == 4
+
+    def test_raises_parser_exceptions(self, layers):
+        config = configuration.read_layered_config(layers[2])
+
+        with pytest.raises(configparser.NoSectionError):
+            config.get("users", "name")
+        with pytest.raises(configparser.NoSectionError):
+            config.options("users")
+        with pytest.raises(configparser.NoOptionError):
+            config.get("user", "nickname")
+
+    def test_memoizes_merge_until_a_layer_changes(self, layers):
+        _, global_, local = layers
+        config = configuration.read_layered_config(local)
+        assert configuration.read_layered_config(local) is config
+
+        global_.write_text("[user]\nemail = new@guy.com\n", encoding="utf-8")
+        touch_later(global_)
+        changed = configuration.read_layered_config(local)
+
+        assert changed is not config
+        assert changed.get("user", "email") == "new@guy.com"
+
+    def test_reads_global_file_from_home(self, tmp_path, config_file, monkeypatch):
+        monkeypatch.delenv("CODETRAIL_CONFIG_GLOBAL")
+        monkeypatch.setenv("HOME", str(tmp_path))
+        (tmp_path / ".codetrailconfig").write_text(
+            "[user]\nemail = home@guy.com\n",
+            encoding="utf-8",
+        )
+
+        config = configuration.read_layered_config(config_file)
+
+        assert config.get("user", "email") == "home@guy.com"
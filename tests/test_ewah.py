@@ -0,0 +1,81 @@
+import random
+import struct
+
+import pytest
+
+from codetrail import ewah
+from codetrail import exceptions
+
+
+def bitmap_of(positions):
+    return sum(1 << position for position in positions)
+
+
+@pytest.mark.parametrize(
+    ("positions", "size"),
+    [
+        ([], 0),
+        ([], 1000),
+        ([0], 1),
+        ([63, 64], 128),
+        (range(200), 200),
+        (range(64, 640), 1000),
+        ([5, *range(128, 1024), 2000], 2001),
+    ],
+)
+def test_roundtrip(positions, size):
+    bitmap = bitmap_of(positions)
+    encoded = ewah.encode(bitmap, size)
+
+    assert ewah.decode(encoded) == (bitmap, size, len(encoded))
+    assert ewah.span(encoded) == len(encoded)
+
+
+def test_random_roundtrip():
+    generator = random.Random(7)
+    for _ in range(50):
+        size = generator.randrange(1, 5000)
+        bitmap = generator.getrandbits(size) & generator.getrandbits(size)
+        assert ewah.decode(ewah.encode(bitmap, size))[0] == bitmap
+
+
+def test_compresses_runs():
+    sparse = ewah.encode(1 << 99_999, 100_000)
+    full = ewah.encode((1 << 100_000) - 1, 100_000)
+
+    assert len(sparse) < 40
+    assert len(full) < 40
+
+
+def test_decodes_at_offset():
+    encoded = ewah.encode(0b1011, 4)
+    data = b"prefix" + encoded + b"suffix"
+
+    assert ewah.decode(data, 6) == (0b1011, 4, 6 + len(encoded))
+
+
+@pytest.mark.parametrize(
+    "positions",
+    [[], [0], [3, 7, 8, 64, 1000], range(10, 100)],
+)
+def test_positions_roundtrip(positions):
+    bitmap = ewah.from_positions(positions)
+
+    assert bitmap == bitmap_of(positions)
+    assert list(ewah.positions(bitmap)) == sorted(positions)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"\0\0",
+        struct.pack(">II", 64, 2) + bytes(8),
+        struct.pack(">IIQI", 64, 1, 5 << 1, 0),
+        struct.pack(">IIQQI", 64, 2, 2 << 33, 1, 0),
+        struct.pack(">IIQQI", 4, 2, 1 << 33, 1 << 10, 0),
+    ],
+    ids=["header", "words", "run", "literals", "size"],
+)
+def test_rejects_corrupt_bitmaps(data):
+    with pytest.raises(exceptions.CorruptObjectError):
+        ewah.decode(data)
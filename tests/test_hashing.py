@@ -0,0 +1,181 @@
+import multiprocessing
+import random
+from unittest.mock import patch
+
+import pytest
+
+from codetrail import chunking
+from codetrail import hashing
+from codetrail import index
+from codetrail import objects
+
+
+@pytest.fixture
+def files(temporary_dir):
+    """Provides a dozen files to hash, with their relative names."""
+    tree = temporary_dir / "tree"
+    tree.mkdir()
+    items = []
+    for i in range(12):
+        path = tree / f"file{i:02}.txt"
+        path.write_text(f"content {i}\n", encoding="utf-8")
+        items.append((path, f"file{i:02}.txt"))
+    return items
+
+
+def run_pipeline(store, files, workers, batch_size=2):
+    staging = index.StagingIndex(store.path.parent / "index")
+    hashed = hashing.AddPipeline(store, staging, workers, batch_size).run(files)
+    return hashed, staging
+
+
+def temporary_files(store):
+    return list(store.path.glob("tmp_obj_*"))
+
+
+class TestAddPipeline:
+    """Tests for `AddPipeline` class."""
+
+    def test_hashes_files_in_process(self, store, files):
+        hashed, staging = run_pipeline(store, files, workers=1)
+
+        assert hashed == 12
+        for (_, name), entry in zip(files, staging, strict=True):
+            assert entry.path == name
+            assert store.has_object(entry.oid)
+
+    def test_parallel_run_matches_serial_run(self, temporary_dir, files):
+        serial_store = objects.ObjectStore(temporary_dir / "serial" / "objects")
+        parallel_store = objects.ObjectStore(temporary_dir / "parallel" / "objects")
+
+        _, serial = run_pipeline(serial_store, files, workers=1)
+        hashed, parallel = run_pipeline(parallel_store, files, workers=3)
+
+        assert hashed == 12
+        assert [entry.oid for entry in parallel] == [entry.oid for entry in serial]
+        assert not temporary_files(parallel_store)
+        for entry in parallel:
+            assert parallel_store.has_object(entry.oid)
+
+    @pytest.mark.skipif(
+        multiprocessing.get_start_method() != "fork",
+        reason="Only forked workers are launched together",
+    )
+    def test_starts_writer_after_forking_workers(self, store, files):
+        forked = []
+
+        def write(pipeline, results, errors):
+            forked.append(len(multiprocessing.active_children()))
+            return original(pipeline, results, errors)
+
+        original = hashing.AddPipeline._write
+        with patch.object(hashing.AddPipeline, "_write", write):
+            run_pipeline(store, files, workers=3)
+
+        assert forked == [3]
+
+    def test_skips_files_removed_after_the_walk(self, store, files):
+        removed, _ = files[5]
+        removed.unlink()
+
+        hashed, staging = run_pipeline(store, files, workers=3)
+
+        assert hashed == 11
+        assert [entry.path for entry in staging] == [
+            name for path, name in files if path != removed
+        ]
+
+    def test_later_duplicates_win_deterministically(self, store, files):
+        path, name = files[0]
+        other, _ = files[1]
+        duplicated = [(path, name), *files[2:], (other, name)]
+
+        _, staging = run_pipeline(store, duplicated, workers=3, batch_size=1)
+
+        assert staging.get(name).oid == objects.hash_object("blob", b"content 1\n")
+
+    def test_skips_fresh_files(self, store, files):
+        with patch.object(index.StagingIndex, "is_fresh", return_value=True):
+            hashed, staging = run_pipeline(store, files, workers=1)
+
+        assert hashed == 0
+        assert len(staging) == 0
+
+    def test_discards_prepared_objects_on_worker_error(
+        self,
+        store,
+        files,
+        temporary_dir,
+    ):
+        unreadable = [*files, (temporary_dir, "directory")]
+        with (
+            patch.object(index.StagingIndex, "is_fresh", return_value=False),
+            pytest.raises(IsADirectoryError),
+        ):
+            run_pipeline(store, unreadable, workers=3)
+
+        assert not temporary_files(store)
+
+    def test_discards_prepared_objects_on_writer_error(self, store, files):
+        with (
+            patch.object(
+                objects.ObjectStore,
+                "commit_prepared",
+                side_effect=OSError("disk full"),
+            ),
+            pytest.raises(OSError, match="disk full"),
+        ):
+            run_pipeline(store, files, workers=3)
+
+        assert not temporary_files(store)
+
+    def test_stops_walking_after_writer_error(self, store, temporary_dir):
+        tree = temporary_dir / "many"
+        tree.mkdir()
+        walked = []
+
+        def walk():
+            for i in range(200):
+                path = tree / f"file{i:03}.txt"
+                path.write_text(f"content {i}\n", encoding="utf-8")
+                walked.append(path)
+                yield path, path.name
+
+        with (
+            patch.object(
+                objects.ObjectStore,
+                "commit_prepared",
+                side_effect=OSError("disk full"),
+            ),
+            pytest.raises(OSError, match="disk full"),
+        ):
+            run_pipeline(store, walk(), workers=2, batch_size=1)
+
+        assert len(walked) < 50
+        assert not temporary_files(store)
+
+
+def test_hash_file_chunks_files_selected_by_the_policy(store, temporary_dir):
+    data = random.Random(0).randbytes(300 * 1024)
+    (temporary_dir / "big.bin").write_bytes(data)
+    policy = chunking.ChunkPolicy(patterns=("*.bin",))
+
+    entry, temporary = hashing.hash_file(
+        store,
+        temporary_dir / "big.bin",
+        "big.bin",
+        policy,
+    )
+    store.commit_prepared(entry.oid, temporary)
+
+    assert entry.oid == objects.hash_object("blob", data)
+    assert entry.size == len(data)
+    assert store.is_chunked(entry.oid)
+    assert store.read_object(entry.oid).data == data
+
+
+def test_hash_batch_discards_on_error(store, files, temporary_dir):
+    batch = [files[0], (temporary_dir / "missing", "missing")]
+    with pytest.raises(FileNotFoundError):
+        hashing.hash_batch(store.path, batch)
+    assert not temporary_files(store)
@@ -0,0 +1,130 @@
+from unittest.mock import patch
+
+import pytest
+
+from codetrail import commit_graph
+from codetrail import exceptions
+from codetrail import history
+from tests.utils import write_commit
+
+
+@pytest.fixture
+def chain(store):
+    """Provides the IDs of a linear history of a hundred commits, oldest first."""
+    oids = [write_commit(store, timestamp=0)]
+    for timestamp in range(1, 100):
+        oids.append(write_commit(store, [oids[-1]], timestamp=timestamp))
+    return oids
+
+
+class TestIterHistory:
+    """Tests for `iter_history` function."""
+
+    def test_walks_newest_first(self, store, chain):
+        walked = [oid for oid, _ in history.iter_history(store, [chain[-1]])]
+        assert walked == chain[::-1]
+
+    def test_orders_merged_branches_by_commit_time(self, store):
+        root = write_commit(store, timestamp=1)
+        left = write_commit(store, [root], timestamp=2)
+        right = write_commit(store, [root], timestamp=4)
+        left_tip = write_commit(store, [left], timestamp=5)
+        merge = write_commit(store, [left_tip, right], timestamp=6)
+
+        walked = [oid for oid, _ in history.iter_history(store, [merge])]
+
+        assert walked == [merge, left_tip, right, left, root]
+
+    def test_reads_commits_lazily(self, store, chain):
+        with patch.object(store, "read_object", wraps=store.read_object) as reader:
+            walk = history.iter_history(store, [chain[-1]])
+            next(walk)
+            next(walk)
+            assert reader.call_count <= 4
+
+    def test_stops_at_since(self, store, chain):
+        with patch.object(store, "read_object", wraps=store.read_object) as reader:
+            walked = list(history.iter_history(store, [chain[-1]], since=95))
+            assert reader.call_count < 10
+
+        assert [commit.commit_time for _, commit in walked] == [99, 98, 97, 96, 95]
+
+    def test_uses_commit_graph_for_queued_commits(self, store, chain):
+        commit_graph.write_commit_graph(store, [chain[-1]])
+
+        with patch.object(store, "read_object", wraps=store.read_object) as reader:
+            walked = list(history.iter_history(store, [chain[-1]], since=98))
+            assert reader.call_count == 3
+
+        assert [oid for oid, _ in walked] == [chain[99], chain[98]]
+
+    @pytest.mark.parametrize("with_graph", [False, True])
+    def test_shows_no_parent_before_its_children_in_topo_order(
+        self,
+        store,
+        with_graph,
+    ):
+        root = write_commit(store, timestamp=1)
+        base = write_commit(store, [root], timestamp=95)
+        left = write_commit(store, [base], timestamp=50)
+        right = write_commit(store, [base], timestamp=90)
+        merge = write_commit(store, [left, right], timestamp=100)
+        if with_graph:
+            commit_graph.write_commit_graph(store, [merge])
+
+        by_time = [oid for oid, _ in history.iter_history(store, [merge])]
+        walked = [
+            oid for oid, _ in history.iter_history(store, [merge], topo_order=True)
+        ]
+
+        assert by_time == [merge, right, base, left, root]
+        assert walked == [merge, left, right, base, root]
+
+    def test_walks_several_tips_in_topo_order(self, store, chain):
+        branch = write_commit(store, [chain[50]], timestamp=200)
+        tips = [chain[-1], branch, chain[-1]]
+
+        walked = [oid for oid, _ in history.iter_history(store, tips, topo_order=True)]
+
+        assert walked == [chain[-1], *chain[98:50:-1], branch, *chain[50::-1]]
+
+    def test_reads_commits_lazily_in_topo_order_with_commit_graph(self, store, chain):
+        commit_graph.write_commit_graph(store, [chain[-1]])
+
+        with patch.object(store, "read_object", wraps=store.read_object) as reader:
+            walk = history.iter_history(store, [chain[-1]], topo_order=True)
+            next(walk)
+            next(walk)
+            assert reader.call_count == 3
+
+    def test_stops_at_since_in_topo_order(self, store, chain):
+        walked = history.iter_history(store, [chain[-1]], since=95, topo_order=True)
+        assert [commit.commit_time for _, commit in walked] == [99, 98, 97, 96, 95]
+
+    def test_skips_tips_older_than_since_in_topo_order(self, store, chain):
+        walked = history.iter_history(store, [chain[10]], since=95, topo_order=True)
+        assert list(walked) == []
+
+    def test_peels_tags(self, store, chain):
+        tag = store.write_object(
+            "tag",
+            f"object {chain[1]}\ntype commit\ntag v1\n\nRelease\n".encode(),
+        )
+
+        walked = [oid for oid, _ in history.iter_history(store, [tag])]
+
+        assert walked == [chain[1], chain[0]]
+
+
+class TestReadCommit:
+    """Tests for `read_commit` function."""
+
+    def test_peels_tags(self, store, chain):
+        tag = store.write_object("tag", f"object {chain[0]}\n\nRelease\n".encode())
+        assert history.read_commit(store, tag).commit_time == 0
+
+    def test_rejects_other_objects(self, store):
+        blob = store.write_object("blob", b"data")
+
+        with pytest.raises(exceptions.CorruptObjectError):
+            history.read_commit(store, blob)
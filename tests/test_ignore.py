@@ -0,0 +1,108 @@
+from unittest.mock import patch
+
+import pytest
+
+from codetrail import ignore
+from codetrail.conf import IGNORE_FILE
+
+
+def compile_rules(*lines):
+    return ignore.IgnoreRules(ignore.parse_rules(lines))
+
+
+@pytest.mark.parametrize(
+    ("pattern", "path", "expected"),
+    [
+        ("*.log", "debug.log", True),
+        ("*.log", "logs/debug.log", True),
+        ("*.log", "debug.log.txt", None),
+        ("/build", "build", True),
+        ("/build", "src/build", None),
+        ("docs/*.md", "docs/a.md", True),
+        ("docs/*.md", "docs/sub/a.md", None),
+        ("docs/**/*.md", "docs/sub/deep/a.md", True),
+        ("docs/**/*.md", "docs/a.md", True),
+        ("**/cache", "a/b/cache", True),
+        ("out/**", "out/a/b", True),
+        ("file?.txt", "file1.txt", True),
+        ("file?.txt", "file/.txt", None),
+        ("[abc].py", "b.py", True),
+        ("[!abc].py", "b.py", None),
+        ("[!abc].py", "d.py", True),
+        ("\\#hash", "#hash", True),
+        ("a+b(c)", "a+b(c)", True),
+    ],
+)
+def test_matches_gitignore_patterns(pattern, path, expected):
+    """Test glob patterns are translated like gitignore patterns."""
+    assert compile_rules(pattern).match(path, is_dir=False) is expected
+
+
+class TestParseRules:
+    """Tests for `parse_rules` function."""
+
+    def test_skips_blank_lines_and_comments(self):
+        assert ignore.parse_rules(["", "   ", "# comment", "/"]) == []
+
+    def test_parses_flags(self):
+        (rule,) = ignore.parse_rules(["!build/"])
+        assert rule.negated
+        assert rule.directory_only
+
+
+class TestIgnoreRules:
+    """Tests for `IgnoreRules` class."""
+
+    def test_last_matching_pattern_wins(self):
+        rules = compile_rules("*.log", "!keep.log")
+
+        assert rules.match("debug.log", is_dir=False) is True
+        assert rules.match("keep.log", is_dir=False) is False
+
+        rules = compile_rules("!keep.log", "*.log")
+        assert rules.match("keep.log", is_dir=False) is True
+
+    def test_directory_patterns_skip_files(self):
+        rules = compile_rules("build/")
+
+        assert rules.match("build", is_dir=True) is True
+        assert rules.match("build", is_dir=False) is None
+
+    def test_empty_rules_match_nothing(self):
+        assert compile_rules().match("a", is_dir=True) is None
+
+
+class TestIgnoreMatcher:
+    """Tests for `IgnoreMatcher` class."""
+
+    def test_ignores_paths_below_ignored_directory(self, temporary_dir):
+        (temporary_dir / IGNORE_FILE).write_text("build/\n!*.keep\n", encoding="utf-8")
+        matcher = ignore.IgnoreMatcher(temporary_dir)
+
+        assert matcher.is_ignored("build", is_dir=True)
+        assert matcher.is_ignored("build/lib/a.keep", is_dir=False)
+        assert not matcher.is_ignored("src/a.py", is_dir=False)
+
+    def test_deeper_ignore_files_take_precedence(self, temporary_dir):
+        (temporary_dir / "src").mkdir()
+        (temporary_dir / IGNORE_FILE).write_text("*.gen\n", encoding="utf-8")
+        (temporary_dir / "src" / IGNORE_FILE).write_text(
+            "!api.gen\n/local\n",
+            encoding="utf-8",
+        )
+        matcher = ignore.IgnoreMatcher(temporary_dir)
+
+        assert matcher.is_ignored("a.gen", is_dir=False)
+        assert matcher.is_ignored("src/b.gen", is_dir=False)
+        assert not matcher.is_ignored("src/api.gen", is_dir=False)
+        assert matcher.is_ignored("src/local", is_dir=False)
+        assert not matcher.is_ignored("local", is_dir=False)
+
+    def test_reads_each_ignore_file_once(self, temporary_dir):
+        (temporary_dir / IGNORE_FILE).write_text("*.log\n", encoding="utf-8")
+        matcher = ignore.IgnoreMatcher(temporary_dir)
+
+        with patch.object(ignore, "parse_rules", wraps=ignore.parse_rules) as mock:
+            for name in ("a.log", "b.log", "c/d.log", "c/e.log"):
+                assert matcher.is_ignored(name, is_dir=False)
+            assert mock.call_count == 1
@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+from codetrail import exceptions
+from codetrail import index
+
+
+@pytest.fixture
+def index_path(temporary_dir):
+    """Provides the path of a missing index file."""
+    return temporary_dir / "index"
+
+
+def make_entry(path, oid="ab" * 20, mode=index.MODE_FILE):
+    return index.IndexEntry(path, oid, mode, 10, 1000, 2000, 42)
+
+
+@pytest.mark.parametrize(
+    ("st_mode", "expected"),
+    [
+        (0o100644, index.MODE_FILE),
+        (0o100600, index.MODE_FILE),
+        (0o100755, index.MODE_EXECUTABLE),
+        (0o120777, index.MODE_SYMLINK),
+    ],
+)
+def test_normalize_mode(st_mode, expected):
+    assert index.normalize_mode(st_mode) == expected
+
+
+class TestStagingIndex:
+    """Tests for `StagingIndex` class."""
+
+    def test_starts_empty_without_file(self, index_path):
+        staging = index.StagingIndex(index_path)
+        assert len(staging) == 0
+        assert list(staging) == []
+
+    def test_roundtrips_entries_sorted_by_path(self, index_path):
+        staging = index.StagingIndex(index_path)
+        staging.add(make_entry("src/main.py"))
+        staging.add(make_entry("README.md", mode=index.MODE_EXECUTABLE))
+        staging.add(make_entry("dossier/ünïcode.txt"))
+        staging.write()
+
+        loaded = index.StagingIndex(index_path)
+
+        assert [entry.path for entry in loaded] == [
+            "README.md",
+            "dossier/ünïcode.txt",
+            "src/main.py",
+        ]
+        assert loaded.get("README.md") == make_entry(
+            "README.md",
+            mode=index.MODE_EXECUTABLE,
+        )
+        assert "src/main.py" in loaded
+
+    def test_removes_entries(self, index_path):
+        staging = index.StagingIndex(index_path)
+        staging.add(make_entry("a"))
+        staging.remove("a")
+        staging.remove("missing")
+
+        assert staging.get("a") is None
+
+    def test_raises_exception_on_checksum_mismatch(self, index_path):
+        staging = index.StagingIndex(index_path)
+        staging.add(make_entry("a"))
+        staging.write()
+        data = bytearray(index_path.read_bytes())
+        data[20] ^= 0xFF
+        index_path.write_bytes(bytes(data))
+
+        with pytest.raises(exceptions.CorruptIndexError):
+            index.StagingIndex(index_path)
+
+    def test_raises_exception_on_truncated_file(self, index_path):
+        index_path.write_bytes(b"CTIX")
+        with pytest.raises(exceptions.CorruptIndexError):
+            index.StagingIndex(index_path)
+
+    def test_raises_exception_on_unsupported_version(self, index_path):
+        body = b"CTIX\x00\x00\x00\x09\x00\x00\x00\x00"
+        index_path.write_bytes(body + index.objects.new_hasher(body).digest())
+        with pytest.raises(exceptions.CorruptIndexError):
+            index.StagingIndex(index_path)
+
+
+class TestIsFresh:
+    """Tests for `StagingIndex.is_fresh` method."""
+
+    def test_is_fresh_for_unchanged_file(self, index_path, temporary_file):
+        status = temporary_file.lstat()
+        staging = index.StagingIndex(index_path)
+        staging.add(index.IndexEntry.from_stat("hello.txt", "ab" * 20, status))
+        staging.timestamp_ns = status.st_mtime_ns + 1
+
+        assert staging.is_fresh("hello.txt", status)
+
+    def test_is_not_fresh_for_untracked_file(self, index_path, temporary_file):
+        staging = index.StagingIndex(index_path)
+        assert not staging.is_fresh("hello.txt", temporary_file.lstat())
+
+    def test_is_not_fresh_for_modified_file(self, index_path, temporary_file):
+        status = temporary_file.lstat()
+        staging = index.StagingIndex(index_path)
+        staging.add(index.IndexEntry.from_stat("hello.txt", "ab" * 20, status))
+        staging.timestamp_ns = status.st_mtime_ns + 1
+
+        temporary_file.write_text("changed content", encoding="utf-8")
+        os.utime(temporary_file, ns=(status.st_atime_ns, status.st_mtime_ns))
+
+        assert not staging.is_fresh("hello.txt", temporary_file.lstat())
+
+    def test_is_not_fresh_when_modified_in_index_tick(self, index_path, temporary_file):
+        status = temporary_file.lstat()
+        staging = index.StagingIndex(index_path)
+        staging.add(index.IndexEntry.from_stat("hello.txt", "ab" * 20, status))
+        staging.timestamp_ns = status.st_mtime_ns
+
+        assert not staging.is_fresh("hello.txt", status)
@@ -0,0 +1,147 @@
+import difflib
+import random
+
+import pytest
+
+from codetrail import line_diff
+
+ALGORITHMS = ["myers", "patience", "histogram"]
+
+
+def apply_edits(old, new, edits):
+    """Rebuild the new lines from the old lines and the edits."""
+    result, position = [], 0
+    for edit in edits:
+        result += old[position : edit.old_start]
+        result += new[edit.new_start : edit.new_end]
+        position = edit.old_end
+    return result + old[position:]
+
+
+def edit_cost(edits):
+    return sum(
+        edit.old_end - edit.old_start + edit.new_end - edit.new_start for edit in edits
+    )
+
+
+def lcs_length(old, new):
+    lengths = [[0] * (len(new) + 1) for _ in range(len(old) + 1)]
+    for i, old_line in enumerate(old):
+        for j, new_line in enumerate(new):
+            lengths[i + 1][j + 1] = (
+                lengths[i][j] + 1
+                if old_line == new_line
+                else max(lengths[i][j + 1], lengths[i + 1][j])
+            )
+    return lengths[-1][-1]
+
+
+class TestDiffLines:
+    """Tests for `diff_lines` function."""
+
+    @pytest.mark.parametrize("algorithm", ALGORITHMS)
+    def test_edits_rebuild_new_lines(self, algorithm):
+        generator = random.Random(algorithm)
+        for _ in range(500):
+            alphabet = generator.randint(1, 6)
+            old = [
+                generator.randint(0, alphabet) for _ in range(generator.randint(0, 25))
+            ]
+            new = [
+                generator.randint(0, alphabet) for _ in range(generator.randint(0, 25))
+            ]
+
+            edits = line_diff.diff_lines(old, new, algorithm=algorithm)
+
+            assert apply_edits(old, new, edits) == new
+            for first, second in zip(edits, edits[1:], strict=False):
+                assert (
+                    first.old_end < second.old_start or first.new_end < second.new_start
+                )
+
+    def test_myers_finds_shortest_edit_script(self):
+        generator = random.Random(0)
+        for _ in range(300):
+            old = [generator.randint(0, 4) for _ in range(generator.randint(0, 20))]
+            new = [generator.randint(0, 4) for _ in range(generator.randint(0, 20))]
+
+            edits = line_diff.diff_lines(old, new)
+
+            assert edit_cost(edits) == len(old) + len(new) - 2 * lcs_length(old, new)
+
+    @pytest.mark.parametrize("algorithm", ALGORITHMS)
+    def test_trims_common_prefix_and_suffix(self, algorithm):
+        old = [f"line {i}\n" for i in range(100_000)]
+        new = [*old[:500], "inserted\n", *old[500:]]
+
+        edits = line_diff.diff_lines(old, new, algorithm=algorithm)
+
+        assert edits == [line_diff.Edit(500, 500, 500, 501)]
+
+    @pytest.mark.parametrize("algorithm", ["patience", "histogram"])
+    def test_anchors_on_rare_lines(self, algorithm):
+        old = ["a\n", "}\n", "b\n", "}\n"]
+        new = ["b\n", "}\n", "a\n", "}\n"]
+
+        edits = line_diff.diff_lines(old, new, algorithm=algorithm)
+
+        assert apply_edits(old, new, edits) == new
+        assert edit_cost(edits) == 4
+
+    def test_gives_up_above_cost_limit(self):
+        old = list("abcdefgh")
+        new = list("hgfedcba")
+
+        edits = line_diff.diff_lines(old, new, cost_limit=1)
+
+        assert edits == [line_diff.Edit(0, 8, 0, 8)]
+
+    def test_reports_nothing_for_equal_lines(self):
+        assert line_diff.diff_lines(["a\n", "b\n"], ["a\n", "b\n"]) == []
+
+    def test_rejects_unknown_algorithm(self):
+        with pytest.raises(ValueError, match="Unknown diff algorithm"):
+            line_diff.diff_lines([], [], algorithm="minimal")
+
+
+class TestInternLines:
+    """Tests for `intern_lines` function."""
+
+    def test_shares_ids_between_sides(self):
+        old, new = line_diff.intern_lines(["a", "b", "a"], ["b", "c"])
+
+        assert old.typecode == "i"
+        assert list(old) == [0, 1, 0]
+        assert list(new) == [1, 2]
+
+
+class TestUnifiedDiff:
+    """Tests for `unified_diff` function."""
+
+    def test_matches_difflib_hunks(self):
+        old = [f"line {i}\n" for i in range(30)]
+        new = list(old)
+        new[2] = "changed\n"
+        new[8:9] = []
+        new.insert(25, "added\n")
+
+        edits = line_diff.diff_lines(old, new)
+        expected = list(difflib.unified_diff(old, new, n=3))[2:]
+
+        assert list(line_diff.unified_diff(old, new, edits)) == expected
+
+    def test_formats_empty_sides(self):
+        edits = line_diff.diff_lines([], ["a\n"])
+        assert list(line_diff.unified_diff([], ["a\n"], edits)) == [
+            "@@ -0,0 +1 @@\n",
+            "+a\n",
+        ]
+
+    def test_marks_missing_final_newline(self):
+        old, new = ["a\n", "b"], ["a\n", "c"]
+        hunk = list(line_diff.unified_diff(old, new, line_diff.diff_lines(old, new)))
+
+        assert hunk[-2:] == [
+            "-b\n\\ No newline at end of file\n",
+            "+c\n\\ No newline at end of file\n",
+        ]
@@ -10,7 +10,7 @@ def test_main_logs_message():
     """Test that main logs a welcome message."""
     with (
         patch("sys.argv", ["codetrail", "init", "/some/path"]),
-        patch("codetrail.__main__.parsers.arg_parser.parse_args") as mock_parser,
+        patch("codetrail.__main__.parsers.parse_arguments") as mock_parser,
         patch("codetrail.__main__.cli.run") as mock_match_commands,
     ):
         mock_args = MagicMock()
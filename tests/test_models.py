@@ -1,8 +1,13 @@
 import pytest
 
+from codetrail import commands
 from codetrail import exceptions
 from codetrail import models
+from codetrail.cmd_config import set_config
 from codetrail.conf import DEFAULT_CODETRAIL_DIRECTORY
+from codetrail.conf import DELTA_BASE_CACHE_LIMIT
+from codetrail.conf import OBJECT_CACHE_LIMIT
+from codetrail.conf import UPLOAD_PACK_COMMAND
 
 
 class TestCodetrailRepository:
@@ -30,3 +35,46 @@ class TestCodetrailRepository:
         code_repository.config_path.unlink()
         with pytest.raises(exceptions.MissingConfigurationFileError):
             models.CodetrailRepository(temporary_dir)
+
+    def test_exposes_object_store(self, temporary_dir, code_repository):
+        store = code_repository.objects
+        assert store.path == temporary_dir / DEFAULT_CODETRAIL_DIRECTORY / "objects"
+        assert store is code_repository.objects
+
+    @pytest.mark.usefixtures("default_path")
+    def test_sizes_object_caches_from_config(self, code_repository):
+        set_config(commands.SetConfig(key="core.objectcachelimit", value="1024"))
+        set_config(commands.SetConfig(key="core.deltabasecachelimit", value="0"))
+
+        store = models.CodetrailRepository(code_repository.work_tree).objects
+
+        assert store.object_cache.limit == 1024
+        assert store.delta_base_cache.limit == 0
+
+    def test_uses_default_cache_limits(self, code_repository):
+        store = code_repository.objects
+
+        assert store.object_cache.limit == OBJECT_CACHE_LIMIT
+        assert store.delta_base_cache.limit == DELTA_BASE_CACHE_LIMIT
+
+    @pytest.mark.usefixtures("default_path")
+    def test_reads_string_options_from_config(self, code_repository):
+        set_config(commands.SetConfig(key="core.chunkpatterns", value="*.bin"))
+        repository = models.CodetrailRepository(code_repository.work_tree)
+
+        assert repository.get_core_str("chunkpatterns", "") == "*.bin"
+        assert repository.get_core_str("chunkthreshold", "none") == "none"
+
+    @pytest.mark.usefixtures("default_path")
+    def test_builds_a_promisor_for_partial_clones(self, code_repository):
+        set_config(commands.SetConfig(key="core.promisorremote", value="/remote"))
+        set_config(commands.SetConfig(key="core.uploadpack", value="serve 'a b'"))
+
+        store = models.CodetrailRepository(code_repository.work_tree).objects
+
+        assert store.promisor.remote == "/remote"
+        assert store.promisor.upload_pack == ["serve", "a b"]
+
+    def test_has_no_promisor_by_default(self, code_repository):
+        assert code_repository.objects.promisor is None
+        assert code_repository.upload_pack == list(UPLOAD_PACK_COMMAND)
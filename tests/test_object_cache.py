@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from codetrail.object_cache import CacheStats
+from codetrail.object_cache import ObjectCache
+from codetrail.objects import RawObject
+
+
+def blob(size):
+    return RawObject("blob", bytes(size))
+
+
+class TestObjectCache:
+    """Tests for `ObjectCache` class."""
+
+    def test_counts_hits_and_misses(self):
+        cache = ObjectCache(100)
+        cache.put("a", blob(10))
+
+        assert cache.get("a") == blob(10)
+        assert cache.get("b") is None
+        assert cache.stats() == CacheStats(
+            hits=1,
+            misses=1,
+            evictions=0,
+            size=10,
+            entries=1,
+        )
+
+    def test_evicts_least_recently_used_objects_over_the_limit(self):
+        cache = ObjectCache(100)
+        cache.put("a", blob(40))
+        cache.put("b", blob(40))
+        cache.get("a")
+        cache.put("c", blob(40))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        assert cache.stats().evictions == 1
+        assert cache.stats().size == 80
+
+    def test_replacing_an_object_updates_the_size(self):
+        cache = ObjectCache(100)
+        cache.put("a", blob(40))
+        cache.put("a", blob(60))
+
+        assert len(cache) == 1
+        assert cache.stats().size == 60
+
+    @pytest.mark.parametrize(("limit", "size"), [(100, 101), (0, 0)])
+    def test_skips_objects_over_the_limit(self, limit, size):
+        cache = ObjectCache(limit)
+        cache.put("a", blob(size))
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_clear_keeps_counters(self):
+        cache = ObjectCache(100)
+        cache.put("a", blob(10))
+        cache.get("a")
+        cache.clear()
+
+        assert cache.stats() == CacheStats(1, 0, 0, 0, 0)
+
+    def test_stays_under_the_limit_across_threads(self):
+        cache = ObjectCache(1000)
+
+        def fill(start):
+            for key in range(start, start + 500):
+                cache.put(key, blob(10))
+                cache.get(key - 1)
+
+        threads = [threading.Thread(target=fill, args=(n * 500,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.stats()
+        assert stats.size == 1000
+        assert stats.entries == 100
+        assert stats.evictions == 8 * 500 - 100
@@ -0,0 +1,253 @@
+import io
+import random
+import threading
+import zlib
+from unittest.mock import patch
+
+import pytest
+
+from codetrail import chunking
+from codetrail import exceptions
+from codetrail import objects
+from codetrail import packs
+
+
+@pytest.fixture
+def object_store(temporary_dir):
+    """Provides an empty object store with a tiny chunk size."""
+    return objects.ObjectStore(temporary_dir / "objects", chunk_size=4)
+
+
+class TestObjectHeader:
+    """Tests for `object_header` function."""
+
+    def test_builds_header(self):
+        assert objects.object_header("blob", 5) == b"blob 5\0"
+
+    def test_raises_exception_on_unknown_type(self):
+        with pytest.raises(exceptions.InvalidObjectTypeError):
+            objects.object_header("blobs", 5)
+
+
+def test_hash_object_matches_git_blob_id():
+    """Test object IDs are computed like git's."""
+    oid = objects.hash_object("blob", b"hello\n")
+    assert oid == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+
+class TestObjectStore:
+    """Tests for `ObjectStore` class."""
+
+    def test_writes_and_reads_blob(self, object_store):
+        oid = object_store.write_blob(io.BytesIO(b"hello\n"))
+
+        assert oid == objects.hash_object("blob", b"hello\n")
+        assert object_store.has_object(oid)
+        assert object_store.read_object(oid) == ("blob", b"hello\n")
+
+    def test_stores_compressed_file_at_content_address(self, object_store):
+        oid = object_store.write_object("tree", b"content")
+
+        path = object_store.path / oid[:2] / oid[2:]
+        assert zlib.decompress(path.read_bytes()) == b"tree 7\0content"
+
+    def test_writes_only_requested_size(self, object_store):
+        oid = object_store.write_blob(io.BytesIO(b"hello world"), size=5)
+        assert object_store.read_object(oid).data == b"hello"
+
+    def test_writes_blob_from_file(self, object_store, temporary_file):
+        with temporary_file.open("rb") as file:
+            oid = object_store.write_blob(file)
+        assert object_store.read_object(oid).data == b"content"
+
+    def test_writing_existing_object_is_idempotent(self, object_store):
+        first = object_store.write_object("blob", b"same")
+        second = object_store.write_object("blob", b"same")
+
+        assert first == second
+        assert not list(object_store.path.glob("tmp_obj_*"))
+
+    def test_raises_exception_on_short_stream(self, object_store):
+        with pytest.raises(exceptions.CorruptObjectError):
+            object_store.write_blob(io.BytesIO(b"abc"), size=10)
+        assert not list(object_store.path.glob("tmp_obj_*"))
+
+    def test_has_object_is_false_for_missing_object(self, object_store):
+        assert not object_store.has_object("0" * 40)
+
+    def test_raises_exception_on_missing_object(self, object_store):
+        with pytest.raises(exceptions.ObjectNotFoundError):
+            object_store.read_object("0" * 40)
+
+    def test_fetches_missing_objects_from_the_promisor(
+        self, object_store, temporary_dir
+    ):
+        remote = objects.ObjectStore(temporary_dir / "remote")
+        oid = remote.write_object("blob", b"promised")
+
+        class Promisor:
+            def fetch(self, store, oids):
+                for missing in oids:
+                    store.write_object(*remote.read_object(missing))
+                return len(oids)
+
+        object_store.promisor = Promisor()
+
+        assert not object_store.has_object(oid)
+        assert object_store.read_object(oid) == ("blob", b"promised")
+
+    def test_raises_exception_when_the_promisor_sends_nothing(self, object_store):
+        object_store.promisor = type("Promisor", (), {"fetch": lambda *_: 0})()
+
+        with pytest.raises(exceptions.ObjectNotFoundError):
+            object_store.read_object("0" * 40)
+
+    def test_streams_object_in_chunks(self, object_store):
+        oid = object_store.write_object("blob", b"abcdefghij")
+
+        with object_store.open_object(oid) as stream:
+            assert stream.obj_type == "blob"
+            assert stream.size == 10
+            assert list(stream) == [b"abcd", b"efgh", b"ij"]
+
+    def test_caches_objects_read_into_memory(self, object_store):
+        oid = object_store.write_object("tree", b"content")
+        object_store.read_object(oid)
+
+        with patch.object(object_store, "find_pack") as find_pack:
+            assert object_store.read_object(oid) == ("tree", b"content")
+            with object_store.open_object(oid) as stream:
+                assert stream.read() == b"content"
+            find_pack.assert_not_called()
+        assert object_store.object_cache.stats().hits == 2
+
+    def test_cache_limits_are_configurable(self, temporary_dir):
+        store = objects.ObjectStore(
+            temporary_dir / "objects",
+            object_cache_limit=0,
+            delta_base_cache_limit=10,
+        )
+        oid = store.write_object("tree", b"content")
+        store.read_object(oid)
+
+        assert len(store.object_cache) == 0
+        assert store.delta_base_cache.limit == 10
+
+    def test_chunked_blob_keeps_its_whole_blob_id(self, object_store):
+        data = random.Random(0).randbytes(300 * 1024)
+
+        oid = object_store.write_blob(io.BytesIO(data), chunked=True)
+
+        assert oid == objects.hash_object("blob", data)
+        assert object_store.is_chunked(oid)
+        assert object_store.read_object(oid) == ("blob", data)
+        with object_store.open_object(oid) as stream:
+            assert (stream.obj_type, stream.size) == ("blob", len(data))
+
+    def test_chunked_blobs_share_unchanged_chunks(self, object_store):
+        data = random.Random(0).randbytes(300 * 1024)
+        first = object_store.write_blob(io.BytesIO(data), chunked=True)
+        stored = set(object_store.iter_loose_objects())
+
+        second = object_store.write_blob(
+            io.BytesIO(data[:-10] + b"new ending"), chunked=True
+        )
+
+        added = set(object_store.iter_loose_objects()) - stored
+        assert second in added
+        assert len(added) == 2
+        assert not object_store.is_chunked(next(iter(added - {second})))
+        assert object_store.read_object(first).data == data
+
+    def test_writing_chunked_raises_on_short_stream(self, object_store):
+        with pytest.raises(exceptions.CorruptObjectError):
+            object_store.write_blob(io.BytesIO(b"abc"), size=10, chunked=True)
+        assert not list(object_store.path.glob("tmp_obj_*"))
+
+    def test_stores_single_chunk_blobs_whole(self, object_store):
+        oid = object_store.write_blob(io.BytesIO(b"small"), chunked=True)
+
+        assert not object_store.is_chunked(oid)
+        assert object_store.read_object(oid).data == b"small"
+
+    def test_only_blobs_can_be_chunked(self, object_store):
+        with pytest.raises(exceptions.InvalidObjectTypeError):
+            object_store.write_stream("tree", io.BytesIO(b""), chunked=True)
+
+    def test_raises_on_chunks_of_the_wrong_size(self, object_store):
+        chunk = object_store.write_object("blob", b"chunk")
+        manifest = chunking.encode_manifest([(chunk, 6)])
+        record = f"{objects.MANIFEST_TYPE} {len(manifest)}\0".encode() + manifest
+        path = object_store.object_path("0" * 40)
+        path.parent.mkdir()
+        path.write_bytes(zlib.compress(record))
+
+        with pytest.raises(exceptions.CorruptObjectError, match="6"):
+            object_store.read_object("0" * 40)
+
+    def test_is_chunked_is_false_for_other_objects(self, object_store):
+        oid = object_store.write_object("blob", b"whole")
+        assert not object_store.is_chunked(oid)
+        assert not object_store.is_chunked("0" * 40)
+
+    def test_reads_objects_of_packs_written_since_listing(self, object_store):
+        old = object_store.write_object("blob", b"old")
+        packs.PackWriter(object_store, window=0, depth=0).write(
+            object_store.pack_directory,
+            [old],
+        )
+        object_store.reload_packs()
+        (first,) = object_store.packs
+        writer = objects.ObjectStore(object_store.path)
+        new = writer.write_object("blob", b"new")
+        packs.PackWriter(writer, window=0, depth=0).write(writer.pack_directory, [new])
+        writer.object_path(new).unlink()
+
+        assert object_store.read_object(new).data == b"new"
+        assert object_store.packs[1] is first
+        assert len(object_store.packs) == 2
+        with pytest.raises(exceptions.ObjectNotFoundError):
+            object_store.read_object("0" * 40)
+
+    def test_concurrent_writers_produce_whole_object(self, object_store):
+        data = bytes(range(256)) * 64
+        oids = []
+
+        def write():
+            oids.append(object_store.write_object("blob", data))
+
+        threads = [threading.Thread(target=write) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(set(oids)) == 1
+        assert object_store.read_object(oids[0]).data == data
+
+
+class TestObjectStream:
+    """Tests for `ObjectStream` class."""
+
+    def test_raises_exception_on_missing_header(self):
+        file = io.BytesIO(zlib.compress(b"blob 5"))
+        with pytest.raises(exceptions.CorruptObjectError):
+            objects.ObjectStream(file)
+        assert file.closed
+
+    def test_raises_exception_on_malformed_header(self):
+        file = io.BytesIO(zlib.compress(b"blob five\0abc"))
+        with pytest.raises(exceptions.CorruptObjectError):
+            objects.ObjectStream(file)
+        assert file.closed
+
+    def test_closes_the_file_when_it_is_not_compressed(self):
+        file = io.BytesIO(b"blob 5\0abcde")
+        with pytest.raises(zlib.error):
+            objects.ObjectStream(file)
+        assert file.closed
+
+    def test_raises_exception_on_truncated_content(self):
+        stream = objects.ObjectStream(io.BytesIO(zlib.compress(b"blob 5\0abc")))
+        with pytest.raises(exceptions.CorruptObjectError):
+            stream.read()
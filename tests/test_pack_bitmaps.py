@@ -0,0 +1,99 @@
+import pytest
+
+from codetrail import ewah
+from codetrail import exceptions
+from codetrail import objects
+from codetrail import pack_bitmaps
+from codetrail import packs
+
+
+@pytest.fixture
+def pack(store):
+    """Provides a pack of three blobs and a tree."""
+    oids = [store.write_object("blob", f"blob {i}".encode()) for i in range(3)]
+    oids.append(store.write_object("tree", b""))
+    return packs.PackWriter(store, 10, 50).write(store.pack_directory, oids)
+
+
+class TestPackBitmaps:
+    """Tests for `PackBitmaps` class and `write_bitmaps` function."""
+
+    def test_roundtrip(self, pack):
+        first, second = list(pack)[:2]
+        pack_bitmaps.write_bitmaps(
+            pack.bitmap_path,
+            pack.index,
+            pack.object_types(),
+            [(first, 0b0011), (second, 0b1010)],
+        )
+
+        bitmaps = pack_bitmaps.PackBitmaps(pack.bitmap_path, pack.index)
+        assert dict(bitmaps) == {first: 0b0011, second: 0b1010}
+        assert first in bitmaps
+        assert "0" * 40 not in bitmaps
+
+    def test_holds_type_bitmaps(self, pack):
+        pack_bitmaps.write_bitmaps(
+            pack.bitmap_path, pack.index, pack.object_types(), []
+        )
+
+        bitmaps = pack.bitmaps
+        assert bitmaps is not None
+        assert len(bitmaps) == 0
+        in_pack_order = [pack.index.pack_oid(i).hex() for i in range(len(pack))]
+        types = zip(in_pack_order, pack.object_types(), strict=True)
+        trees = [oid for oid, kind in types if kind == "tree"]
+        tree_position = pack.index.pack_position(bytes.fromhex(trees[0]))
+        assert bitmaps.type_bitmap("tree") == 1 << tree_position
+        assert bitmaps.type_bitmap("blob") == 0b1111 & ~(1 << tree_position)
+        assert bitmaps.type_bitmap("commit") == 0
+
+    def test_raises_on_unknown_commit(self, pack):
+        with pytest.raises(exceptions.ObjectNotFoundError):
+            pack_bitmaps.write_bitmaps(
+                pack.bitmap_path, pack.index, pack.object_types(), [("0" * 40, 1)]
+            )
+
+    @pytest.fixture
+    def data(self, pack):
+        pack_bitmaps.write_bitmaps(
+            pack.bitmap_path, pack.index, pack.object_types(), [(next(iter(pack)), 1)]
+        )
+        return pack.bitmap_path.read_bytes()
+
+    @pytest.mark.parametrize(
+        "corrupt",
+        [
+            lambda data: data[:10],
+            lambda data: data[:-1] + bytes([data[-1] ^ 1]),
+        ],
+        ids=["truncated", "checksum"],
+    )
+    def test_rejects_damaged_files(self, pack, data, corrupt):
+        pack.bitmap_path.write_bytes(corrupt(data))
+
+        with pytest.raises(exceptions.CorruptObjectError):
+            pack_bitmaps.PackBitmaps(pack.bitmap_path, pack.index)
+
+    @pytest.mark.parametrize(
+        ("offset", "value"),
+        [
+            (0, b"NOPE"),
+            (8, bytes(20)),
+            (28, b"\0\0\0\5"),
+            (pack_bitmaps.BITMAP_HEADER.size, b"\0\0\0\5"),
+            (-4, b"\xff\xff\xff\xff"),
+        ],
+        ids=["signature", "pack", "count", "size", "position"],
+    )
+    def test_rejects_inconsistent_files(self, pack, data, offset, value):
+        body = bytearray(data[:-20])
+        if offset < 0:
+            offset = pack_bitmaps.BITMAP_HEADER.size
+            for _ in pack_bitmaps.OBJECT_TYPES:
+                offset = ewah.span(body, offset)
+        body[offset : offset + len(value)] = value
+        pack.bitmap_path.write_bytes(body + objects.new_hasher(body).digest())
+
+        with pytest.raises(exceptions.CorruptObjectError):
+            pack_bitmaps.PackBitmaps(pack.bitmap_path, pack.index)
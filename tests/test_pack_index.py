@@ -0,0 +1,90 @@
+import hashlib
+
+import pytest
+
+from codetrail import exceptions
+from codetrail import pack_index
+
+
+def make_oids(count):
+    """Generate deterministic binary object IDs."""
+    return [hashlib.sha1(str(i).encode()).digest() for i in range(count)]
+
+
+@pytest.fixture
+def index_path(temporary_dir):
+    """Provides the path of an index over a thousand objects."""
+    path = temporary_dir / "pack-test.idx"
+    oids = [*make_oids(1000), b"\x00" * 20, b"\xff" * 20]
+    pack_index.write_index(
+        path, ((oid, i * 10) for i, oid in enumerate(oids)), b"c" * 20
+    )
+    return path
+
+
+class TestPackIndex:
+    """Tests for `PackIndex` class."""
+
+    def test_finds_every_object(self, index_path):
+        oids = [*make_oids(1000), b"\x00" * 20, b"\xff" * 20]
+        with pack_index.PackIndex(index_path) as index:
+            assert len(index) == 1002
+            for i, oid in enumerate(oids):
+                position = index.position(oid)
+                assert index.oid(position) == oid
+                assert index.offset(position) == i * 10
+
+    def test_returns_none_for_missing_object(self, index_path):
+        with pack_index.PackIndex(index_path) as index:
+            assert index.position(b"\x01" * 20) is None
+            assert index.position(b"\xff" * 19 + b"\xfe") is None
+
+    def test_iterates_in_sorted_order(self, index_path):
+        with pack_index.PackIndex(index_path) as index:
+            oids = list(index)
+        assert oids == sorted(oids)
+        assert len(oids) == 1002
+
+    def test_maps_objects_to_the_order_of_their_entries(self, temporary_dir):
+        path = temporary_dir / "pack-test.idx"
+        oids = make_oids(100)
+        pack_index.write_index(
+            path, ((oid, 1000 - i * 10) for i, oid in enumerate(oids)), b"c" * 20
+        )
+
+        with pack_index.PackIndex(path) as index:
+            for i, oid in enumerate(oids):
+                assert index.pack_position(oid) == 99 - i
+                assert index.pack_oid(99 - i) == oid
+            assert index.pack_position(b"\x01" * 20) is None
+
+    def test_exposes_pack_checksum(self, index_path):
+        with pack_index.PackIndex(index_path) as index:
+            assert index.checksum() == b"c" * 20
+
+    def test_handles_empty_index(self, temporary_dir):
+        path = temporary_dir / "empty.idx"
+        pack_index.write_index(path, [], b"c" * 20)
+
+        with pack_index.PackIndex(path) as index:
+            assert len(index) == 0
+            assert index.position(b"\x00" * 20) is None
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            b"CTPI",
+            b"CTPI\x00\x00\x00\x01" + bytes(1044),
+            b"NOPE\x00\x00\x00\x02" + bytes(1044),
+        ],
+    )
+    def test_raises_exception_on_invalid_header(self, temporary_dir, content):
+        path = temporary_dir / "bad.idx"
+        path.write_bytes(content)
+        with pytest.raises(exceptions.CorruptObjectError):
+            pack_index.PackIndex(path)
+
+    def test_raises_exception_on_size_mismatch(self, index_path):
+        index_path.write_bytes(index_path.read_bytes()[:-1])
+        with pytest.raises(exceptions.CorruptObjectError):
+            pack_index.PackIndex(index_path)
@@ -0,0 +1,90 @@
+import pytest
+
+from codetrail import exceptions
+from codetrail import packed_refs
+from codetrail.packed_refs import PackedRef
+
+
+@pytest.fixture
+def path(temporary_dir):
+    """Provides the path of a packed-refs file with branches and peeled tags."""
+    path = temporary_dir / "packed-refs"
+    records = [PackedRef(f"refs/tags/v{i}", f"{i:040x}", "f" * 40) for i in range(50)]
+    records += [
+        PackedRef("refs/heads/master", "a" * 40),
+        PackedRef("refs/heads/topic/one", "b" * 40),
+        PackedRef("refs/heads/topic/two", "c" * 40),
+    ]
+    packed_refs.write_packed_refs(path, reversed(records))
+    return path
+
+
+class TestPackedRefs:
+    """Tests for `PackedRefs` class and `write_packed_refs` function."""
+
+    def test_writes_sorted_records_with_peeled_lines(self, path):
+        lines = path.read_text().splitlines()
+
+        assert lines[0] == "# pack-refs with: peeled sorted"
+        assert lines[1] == f"{'a' * 40} refs/heads/master"
+        assert lines[4] == f"{0:040x} refs/tags/v0"
+        assert lines[5] == f"^{'f' * 40}"
+
+    @pytest.mark.parametrize(
+        ("name", "expected"),
+        [
+            ("refs/heads/master", PackedRef("refs/heads/master", "a" * 40)),
+            ("refs/heads/topic/two", PackedRef("refs/heads/topic/two", "c" * 40)),
+            ("refs/tags/v0", PackedRef("refs/tags/v0", f"{0:040x}", "f" * 40)),
+            ("refs/tags/v49", PackedRef("refs/tags/v49", f"{49:040x}", "f" * 40)),
+            ("refs/tags/v17", PackedRef("refs/tags/v17", f"{17:040x}", "f" * 40)),
+            ("refs/heads/topic", None),
+            ("refs/heads/aaa", None),
+            ("refs/tags/v50", None),
+            ("refs/zzz", None),
+        ],
+    )
+    def test_looks_up_references(self, path, name, expected):
+        with packed_refs.PackedRefs(path) as records:
+            assert records.get(name) == expected
+
+    def test_finds_every_record_by_binary_search(self, path):
+        with packed_refs.PackedRefs(path) as records:
+            for record in records:
+                assert records.get(record.name) == record
+
+    def test_lists_records_under_a_prefix(self, path):
+        with packed_refs.PackedRefs(path) as records:
+            names = [record.name for record in records.iter_prefix("refs/heads/")]
+            assert len(list(records)) == 53
+
+        assert names == [
+            "refs/heads/master",
+            "refs/heads/topic/one",
+            "refs/heads/topic/two",
+        ]
+
+    def test_reads_empty_files(self, temporary_dir):
+        (temporary_dir / "packed-refs").write_bytes(b"")
+        packed_refs.write_packed_refs(temporary_dir / "header-only", [])
+
+        for name in ("packed-refs", "header-only"):
+            with packed_refs.PackedRefs(temporary_dir / name) as records:
+                assert list(records) == []
+                assert records.get("refs/heads/master") is None
+
+    def test_rejects_unsorted_files(self, temporary_dir):
+        (temporary_dir / "packed-refs").write_text(f"{'a' * 40} refs/heads/master\n")
+
+        with pytest.raises(exceptions.CorruptObjectError):
+            packed_refs.PackedRefs(temporary_dir / "packed-refs")
+
+    def test_rejects_malformed_records(self, temporary_dir):
+        path = temporary_dir / "packed-refs"
+        path.write_bytes(packed_refs.PACKED_REFS_HEADER + b"garbage\n")
+
+        with (
+            packed_refs.PackedRefs(path) as records,
+            pytest.raises(exceptions.CorruptObjectError),
+        ):
+            records.get("refs/heads/master")
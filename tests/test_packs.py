@@ -0,0 +1,387 @@
+import io
+import random
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+
+from codetrail import exceptions
+from codetrail import objects
+from codetrail import packs
+from codetrail.object_cache import ObjectCache
+
+
+def similar_blobs(count, size=4096):
+    """Generate blobs that differ by a few bytes from each other."""
+    generator = random.Random(42)
+    base = bytearray(generator.randbytes(size))
+    blobs = []
+    for _ in range(count):
+        base[generator.randrange(size)] = generator.randrange(256)
+        blobs.append(bytes(base))
+    return blobs
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2**40])
+def test_varint_roundtrip(value):
+    encoded = packs.encode_varint(value)
+    assert packs.decode_varint(b"x" + encoded, 1) == (value, len(encoded) + 1)
+
+
+@pytest.mark.parametrize("distance", [1, 127, 128, 16511, 16512, 2**35])
+def test_entry_header_roundtrip_with_offset(distance):
+    header = packs.encode_entry_header(packs.OFS_DELTA, 1000)
+    header += packs.encode_offset(distance)
+
+    entry = packs.decode_entry_header(header, 2**36)
+
+    assert entry.type_code == packs.OFS_DELTA
+    assert entry.size == 1000
+    assert entry.base_offset == 2**36 - distance
+    assert entry.data_offset == 2**36 + len(header)
+
+
+class TestDelta:
+    """Tests for `create_delta` and `apply_delta` functions."""
+
+    @pytest.mark.parametrize(
+        ("base", "target"),
+        [
+            (b"", b""),
+            (b"", b"only inserts"),
+            (b"a" * 100, b""),
+            (b"0123456789abcdef" * 20, b"0123456789abcdef" * 20),
+            (b"0123456789abcdef" * 20, b"xx" + b"0123456789abcdef" * 20 + b"yy"),
+            (bytes(range(256)) * 4, bytes(range(256))[::-1] * 4),
+        ],
+    )
+    def test_roundtrip(self, base, target):
+        delta = packs.create_delta(base, target)
+        assert packs.apply_delta(base, delta) == target
+
+    def test_similar_content_produces_small_delta(self):
+        base, target = similar_blobs(2, size=64 * 1024)
+        delta = packs.create_delta(base, target)
+
+        assert len(delta) < 200
+        assert packs.apply_delta(base, delta) == target
+
+    def test_large_copies_are_split(self):
+        base = bytes(range(256)) * 0x11000
+        delta = packs.create_delta(base, base)
+        assert packs.apply_delta(base, delta) == base
+
+    def test_raises_exception_on_wrong_base(self):
+        delta = packs.create_delta(b"a" * 32, b"a" * 32)
+        with pytest.raises(exceptions.CorruptObjectError):
+            packs.apply_delta(b"b" * 16, delta)
+
+    def test_raises_exception_on_reserved_instruction(self):
+        with pytest.raises(exceptions.CorruptObjectError):
+            packs.apply_delta(b"", b"\x00\x01\x00")
+
+    def test_raises_exception_on_wrong_result_size(self):
+        with pytest.raises(exceptions.CorruptObjectError):
+            packs.apply_delta(b"", b"\x00\x05\x01a")
+
+
+class TestPackWriter:
+    """Tests for `PackWriter` class."""
+
+    def test_packs_and_reads_back_objects(self, store):
+        blobs = similar_blobs(20)
+        oids = [store.write_object("blob", blob) for blob in blobs]
+        tree = store.write_object("tree", b"tree content")
+
+        pack = packs.PackWriter(store, window=10, depth=50).write(
+            store.pack_directory,
+            [*oids, tree],
+        )
+
+        assert len(pack) == 21
+        assert sorted(pack) == sorted([*oids, tree])
+        for oid, blob in zip(oids, blobs, strict=True):
+            assert pack.read_object(oid) == ("blob", blob)
+        assert pack.read_object(tree) == ("tree", b"tree content")
+
+    def test_writes_entries_in_the_given_order(self, store):
+        oids = [store.write_object("blob", blob) for blob in similar_blobs(6)]
+        order = [store.write_object("tree", b"tree content"), *reversed(oids)]
+
+        pack = packs.PackWriter(store, window=0, depth=50).write(
+            store.pack_directory,
+            order,
+        )
+
+        assert [pack.index.pack_oid(i).hex() for i in range(len(pack))] == order
+
+    def test_writes_delta_bases_before_their_deltas(self, store):
+        blobs = similar_blobs(6)
+        oids = [store.write_object("blob", blob) for blob in blobs]
+        tree = store.write_object("tree", b"tree content")
+
+        pack = packs.PackWriter(store, window=10, depth=50).write(
+            store.pack_directory,
+            [tree, *reversed(oids)],
+        )
+
+        assert pack.index.pack_oid(0).hex() == tree
+        for oid, blob in zip(oids, blobs, strict=True):
+            assert pack.read_object(oid) == ("blob", blob)
+        assert pack.pack_path.stat().st_size < 4096 * 3
+
+    def test_deltas_reduce_pack_size(self, store):
+        oids = [store.write_object("blob", blob) for blob in similar_blobs(20)]
+        pack_dir = store.pack_directory
+
+        whole = packs.PackWriter(store, window=0, depth=50).write(
+            pack_dir / "whole",
+            oids,
+        )
+        deltified = packs.PackWriter(store, window=10, depth=50).write(
+            pack_dir / "delta",
+            oids,
+        )
+
+        assert deltified.pack_path.stat().st_size * 5 < whole.pack_path.stat().st_size
+
+    def test_respects_maximum_depth(self, store):
+        oids = [store.write_object("blob", blob) for blob in similar_blobs(6)]
+        pack = packs.PackWriter(store, window=1, depth=2).write(
+            store.pack_directory,
+            oids,
+        )
+
+        with pack.pack_path.open("rb") as file:
+            for oid in oids:
+                depth, entry = 0, packs.read_entry_header(file, pack.offset(oid))
+                while entry.base_offset is not None:
+                    depth += 1
+                    entry = packs.read_entry_header(file, entry.base_offset)
+                assert depth <= 2
+
+    def test_streams_big_objects(self, store, monkeypatch):
+        monkeypatch.setattr(packs, "PACK_BIG_FILE_THRESHOLD", 10)
+        oid = store.write_object("blob", b"a big blob of data")
+
+        pack = packs.PackWriter(store, window=10, depth=50).write(
+            store.pack_directory,
+            [oid],
+        )
+
+        with pack.open_object(oid, chunk_size=4) as stream:
+            assert stream.obj_type == "blob"
+            assert b"".join(stream) == b"a big blob of data"
+
+
+class TestPack:
+    """Tests for `Pack` class."""
+
+    def test_raises_exception_on_missing_object(self, store):
+        oid = store.write_object("blob", b"data")
+        pack = packs.PackWriter(store, 10, 50).write(
+            store.pack_directory,
+            [oid],
+        )
+        with pytest.raises(exceptions.ObjectNotFoundError):
+            pack.read_object("0" * 40)
+
+    def test_looks_up_missing_object_before_opening_the_pack(self, store):
+        oid = store.write_object("blob", b"data")
+        pack = packs.PackWriter(store, 10, 50).write(
+            store.pack_directory,
+            [oid],
+        )
+
+        with (
+            patch.object(Path, "open") as opened,
+            pytest.raises(exceptions.ObjectNotFoundError),
+        ):
+            pack.open_object("0" * 40)
+        opened.assert_not_called()
+
+    def test_closes_the_pack_on_corrupt_entry_header(self, store):
+        oid = store.write_object("blob", b"data")
+        pack = packs.PackWriter(store, 10, 50).write(
+            store.pack_directory,
+            [oid],
+        )
+        files = []
+        original = Path.open
+
+        def record(path, *args, **kwargs):
+            files.append(original(path, *args, **kwargs))
+            return files[-1]
+
+        with (
+            patch.object(Path, "open", record),
+            patch.object(
+                packs,
+                "read_entry_header",
+                side_effect=exceptions.CorruptObjectError("Bad header"),
+            ),
+            pytest.raises(exceptions.CorruptObjectError),
+        ):
+            pack.open_object(oid)
+        assert len(files) == 1
+        assert files[0].closed
+
+    def test_opens_deltified_object(self, store):
+        blobs = similar_blobs(2)
+        oids = [store.write_object("blob", blob) for blob in blobs]
+        pack = packs.PackWriter(store, 10, 50).write(
+            store.pack_directory,
+            oids,
+        )
+
+        for oid, blob in zip(oids, blobs, strict=True):
+            with pack.open_object(oid) as stream:
+                assert stream.read() == blob
+
+    def inflations(self, pack, oids):
+        with patch.object(packs, "_inflate", wraps=packs._inflate) as inflate:  # noqa: SLF001
+            counts = []
+            for oid in oids:
+                inflate.reset_mock()
+                pack.read_object(oid)
+                counts.append(inflate.call_count)
+        return counts
+
+    def test_resumes_delta_chains_from_cached_bases(self, store):
+        blobs = similar_blobs(8)
+        oids = [store.write_object("blob", blob) for blob in blobs]
+        path = (
+            packs.PackWriter(store, 10, 50).write(store.pack_directory, oids).pack_path
+        )
+        cache = ObjectCache(1024 * 1024)
+        pack = packs.Pack(path, cache)
+
+        for oid, blob in zip(oids, blobs, strict=True):
+            assert pack.read_object(oid).data == blob
+
+        assert max(self.inflations(packs.Pack(path), oids)) > 1
+        assert max(self.inflations(pack, oids)) <= 1
+        assert cache.stats().hits > 0
+
+    def test_reads_deltas_through_a_small_cache(self, store):
+        blobs = similar_blobs(8)
+        oids = [store.write_object("blob", blob) for blob in blobs]
+        path = (
+            packs.PackWriter(store, 10, 50).write(store.pack_directory, oids).pack_path
+        )
+        cache = ObjectCache(5000)
+        pack = packs.Pack(path, cache)
+
+        for oid, blob in reversed(list(zip(oids, blobs, strict=True))):
+            assert pack.read_object(oid).data == blob
+        assert cache.stats().evictions > 0
+
+    def test_lists_object_types_through_delta_chains(self, store):
+        oids = [store.write_object("blob", blob) for blob in similar_blobs(3)]
+        oids.append(store.write_object("tree", b""))
+        pack = packs.PackWriter(store, 10, 50).write(
+            store.pack_directory,
+            oids,
+        )
+
+        in_pack_order = [pack.index.pack_oid(i).hex() for i in range(len(pack))]
+        types = dict(zip(in_pack_order, pack.object_types(), strict=True))
+        assert types == {oid: "blob" for oid in oids[:3]} | {oids[3]: "tree"}
+
+    def test_has_no_bitmaps_by_default(self, store):
+        oid = store.write_object("blob", b"data")
+        pack = packs.PackWriter(store, 10, 50).write(
+            store.pack_directory,
+            [oid],
+        )
+        assert pack.bitmaps is None
+
+    def test_raises_exception_on_invalid_index(self, temporary_dir):
+        (temporary_dir / "pack-x.idx").write_bytes(b"NOPE" + bytes(8))
+        with pytest.raises(exceptions.CorruptObjectError):
+            packs.Pack(temporary_dir / "pack-x.pack")
+
+    def test_raises_exception_on_truncated_entry(self, store):
+        oid = store.write_object("blob", b"data" * 100)
+        pack = packs.PackWriter(store, 10, 50).write(
+            store.pack_directory,
+            [oid],
+        )
+        pack.pack_path.write_bytes(pack.pack_path.read_bytes()[:20])
+
+        with pytest.raises(exceptions.CorruptObjectError):
+            pack.read_object(oid)
+
+
+class TestIndexPack:
+    """Tests for `PackWriter.write_stream` and `index_pack` functions."""
+
+    def test_stores_a_streamed_pack(self, store, temporary_dir):
+        blobs = similar_blobs(10)
+        oids = [store.write_object("blob", blob) for blob in blobs]
+        stream = io.BytesIO()
+        packs.PackWriter(store, window=10, depth=50).write_stream(stream, oids)
+        receiver = objects.ObjectStore(temporary_dir / "receiver")
+
+        pack = packs.index_pack(receiver, io.BytesIO(stream.getvalue()))
+
+        assert sorted(pack) == sorted(oids)
+        assert [found.pack_path for found in receiver.packs] == [pack.pack_path]
+        for oid, blob in zip(oids, blobs, strict=True):
+            assert receiver.read_object(oid).data == blob
+
+    def test_resolves_thin_deltas_against_the_store(self, store, temporary_dir):
+        base, target = similar_blobs(2)
+        base_oid = store.write_object("blob", base)
+        target_oid = store.write_object("blob", target)
+        receiver = objects.ObjectStore(temporary_dir / "receiver")
+        receiver.write_object("blob", base)
+        writer = packs.PackWriter(store, window=10, depth=50)
+        thin, whole = io.BytesIO(), io.BytesIO()
+
+        writer.write_stream(thin, [target_oid], {target_oid: base_oid})
+        writer.write_stream(whole, [target_oid])
+        pack = packs.index_pack(receiver, io.BytesIO(thin.getvalue()))
+
+        assert len(thin.getvalue()) * 10 < len(whole.getvalue())
+        assert list(pack) == [target_oid]
+        assert pack.read_object(target_oid) == ("blob", target)
+
+    def test_raises_exception_on_missing_thin_base(self, store, temporary_dir):
+        base, target = similar_blobs(2)
+        base_oid = store.write_object("blob", base)
+        target_oid = store.write_object("blob", target)
+        stream = io.BytesIO()
+        packs.PackWriter(store, 10, 50).write_stream(
+            stream,
+            [target_oid],
+            {target_oid: base_oid},
+        )
+        receiver = objects.ObjectStore(temporary_dir / "receiver")
+
+        with pytest.raises(exceptions.ObjectNotFoundError):
+            packs.index_pack(receiver, io.BytesIO(stream.getvalue()))
+
+        assert not list(receiver.pack_directory.iterdir())
+
+    def test_returns_none_for_an_empty_pack(self, store):
+        stream = io.BytesIO()
+        assert packs.PackWriter(store, 10, 50).write_stream(stream, []) == 0
+        assert packs.index_pack(store, io.BytesIO(stream.getvalue())) is None
+
+    @pytest.mark.parametrize(
+        "corrupt",
+        [
+            lambda data: data[:-1] + bytes([data[-1] ^ 1]),
+            lambda data: data[:30],
+            lambda data: b"JUNK" + data[4:],
+        ],
+    )
+    def test_raises_exception_on_corrupt_stream(self, store, corrupt):
+        oid = store.write_object("blob", b"data" * 100)
+        stream = io.BytesIO()
+        packs.PackWriter(store, 10, 50).write_stream(stream, [oid])
+
+        with pytest.raises(exceptions.CorruptObjectError):
+            packs.index_pack(store, io.BytesIO(corrupt(stream.getvalue())))
@@ -0,0 +1,234 @@
+import argparse
+import time
+
+import pytest
+
+from codetrail import parsers
+
+
+def subcommands(parser):
+    (action,) = [
+        action
+        for action in parser._actions  # noqa: SLF001
+        if isinstance(action, parsers.SubParsers)
+    ]
+    return sorted(action.choices)
+
+
+class TestBuildParser:
+    """Tests for `build_parser` function."""
+
+    def test_builds_only_requested_command(self):
+        assert subcommands(parsers.build_parser("config")) == ["config"]
+
+    @pytest.mark.parametrize("command", [None, "unknown"])
+    def test_builds_every_command_otherwise(self, command):
+        assert subcommands(parsers.build_parser(command)) == [
+            "add",
+            "branch",
+            "checkout",
+            "clone",
+            "commit-graph",
+            "config",
+            "fetch",
+            "init",
+            "log",
+            "pack-refs",
+            "remote",
+            "repack",
+            "upload-pack",
+        ]
+
+
+class TestParseArguments:
+    """Tests for `parse_arguments` function."""
+
+    @pytest.mark.parametrize(
+        ("arguments", "expected"),
+        [
+            (["init"], {"command": "init", "path": "."}),
+            (["add", "a", "b"], {"command": "add", "paths": ["a", "b"]}),
+            (["config", "get", "user.name"], {"command": "get", "key": ["user.name"]}),
+            (
+                ["config", "set", "user.name", "me", "user.email", "me@me.me"],
+                {
+                    "command": "set",
+                    "entries": ["user.name", "me", "user.email", "me@me.me"],
+                    "stdin": False,
+                },
+            ),
+            (
+                ["config", "set", "--stdin"],
+                {"command": "set", "entries": [], "stdin": True},
+            ),
+            (["config", "list"], {"command": "list", "show_origin": False}),
+            (
+                ["config", "unset", "user.name"],
+                {"command": "unset", "key": ["user.name"]},
+            ),
+            (
+                ["config", "edit", "user.name", "me"],
+                {"command": "edit", "key": ["user.name"], "value": ["me"]},
+            ),
+            (
+                ["repack", "--window", "5"],
+                {
+                    "command": "repack",
+                    "window": 5,
+                    "depth": None,
+                    "write_bitmap": False,
+                },
+            ),
+            (
+                ["repack", "-b"],
+                {
+                    "command": "repack",
+                    "window": None,
+                    "depth": None,
+                    "write_bitmap": True,
+                },
+            ),
+            (["pack-refs"], {"command": "pack-refs"}),
+            (["checkout", "topic"], {"command": "checkout", "revision": "topic"}),
+            (
+                ["upload-pack", "remote"],
+                {"command": "upload-pack", "directory": "remote", "listen": None},
+            ),
+            (
+                ["fetch", "../remote"],
+                {
+                    "command": "fetch",
+                    "remote": "../remote",
+                    "all": False,
+                    "jobs": None,
+                    "name": "origin",
+                    "upload_pack": None,
+                },
+            ),
+            (
+                ["clone", "../remote", "--filter", "blob:none"],
+                {
+                    "command": "clone",
+                    "remote": "../remote",
+                    "directory": None,
+                    "filter_spec": "blob:none",
+                    "upload_pack": None,
+                },
+            ),
+            (
+                ["fetch", "--all", "-j", "4"],
+                {
+                    "command": "fetch",
+                    "remote": None,
+                    "all": True,
+                    "jobs": 4,
+                    "name": "origin",
+                    "upload_pack": None,
+                },
+            ),
+            (
+                ["upload-pack", "--listen", "serve.sock", "remote"],
+                {
+                    "command": "upload-pack",
+                    "directory": "remote",
+                    "listen": "serve.sock",
+                },
+            ),
+            (["remote"], {"command": "remote", "name": None, "url": None}),
+            (
+                ["remote", "mirror", "../mirror"],
+                {"command": "remote", "name": "mirror", "url": "../mirror"},
+            ),
+            (
+                ["branch"],
+                {
+                    "command": "branch",
+                    "list": False,
+                    "name": None,
+                    "start_point": "HEAD",
+                },
+            ),
+            (
+                ["branch", "--list", "feat*"],
+                {
+                    "command": "branch",
+                    "list": True,
+                    "name": "feat*",
+                    "start_point": "HEAD",
+                },
+            ),
+            (
+                ["branch", "topic", "v1"],
+                {
+                    "command": "branch",
+                    "list": False,
+                    "name": "topic",
+                    "start_point": "v1",
+                },
+            ),
+            (
+                ["log", "-n", "3", "--since", "1700000000", "topic"],
+                {
+                    "command": "log",
+                    "revision": "topic",
+                    "max_count": 3,
+                    "since": 1700000000,
+                    "topo_order": False,
+                },
+            ),
+            (
+                ["log", "--topo-order"],
+                {
+                    "command": "log",
+                    "revision": "HEAD",
+                    "max_count": None,
+                    "since": None,
+                    "topo_order": True,
+                },
+            ),
+            (
+                ["log"],
+                {
+                    "command": "log",
+                    "revision": "HEAD",
+                    "max_count": None,
+                    "since": None,
+                    "topo_order": False,
+                },
+            ),
+            (
+                ["commit-graph", "write"],
+                {"command": "commit-graph", "action": "write"},
+            ),
+        ],
+    )
+    def test_parses_commands(self, arguments, expected):
+        assert vars(parsers.parse_arguments(arguments)) == expected
+
+    def test_exits_on_missing_command(self):
+        with pytest.raises(SystemExit):
+            parsers.parse_arguments([])
+
+
+class TestParseDate:
+    """Tests for `parse_date` function."""
+
+    @pytest.mark.parametrize(
+        "value",
+        ["1700000000", "2023-11-14T22:13:20+00:00", "2023-11-14T23:13:20+01:00"],
+    )
+    def test_parses_dates(self, value):
+        assert parsers.parse_date(value) == 1700000000
+
+    def test_reads_naive_dates_in_local_time(self, monkeypatch):
+        monkeypatch.setenv("TZ", "UTC")
+        time.tzset()
+        try:
+            assert parsers.parse_date("2023-11-14") == 1699920000
+        finally:
+            monkeypatch.undo()
+            time.tzset()
+
+    def test_rejects_invalid_dates(self):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parsers.parse_date("yesterday")
@@ -0,0 +1,54 @@
+import sys
+
+import pytest
+
+from codetrail import cmd_init
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import models
+from codetrail import refs
+from codetrail.promisor import PromisorRemote
+from tests.utils import write_commit
+from tests.utils import write_tree
+
+UPLOAD_PACK = [sys.executable, "-m", "codetrail", "upload-pack"]
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """Provides a repository with one commit of two files."""
+    path = tmp_path / "remote"
+    cmd_init.initialize_repository(commands.InitializeRepository(path=path))
+    repository = models.CodetrailRepository(path)
+    tree = write_tree(repository.objects, {"a": b"first", "b": b"second"})
+    commit = write_commit(repository.objects, [], tree=tree)
+    refs.write_ref(repository.repo_dir, "refs/heads/master", commit)
+    return repository
+
+
+class TestPromisorRemote:
+    """Tests for `PromisorRemote` class."""
+
+    def test_fetches_missing_objects_in_one_batch(self, remote, store):
+        first = remote.objects.write_object("blob", b"first")
+        second = remote.objects.write_object("blob", b"second")
+        store.write_object("blob", b"first")
+        promisor = PromisorRemote(str(remote.work_tree), UPLOAD_PACK)
+
+        assert promisor.fetch(store, [first, second, second]) == 1
+
+        assert store.read_object(second).data == b"second"
+        assert promisor.fetched == 1
+
+    def test_fetches_nothing_when_no_object_is_missing(self, remote, store):
+        oid = store.write_object("blob", b"first")
+        promisor = PromisorRemote(str(remote.work_tree), ["false"])
+
+        assert promisor.fetch(store, [oid]) == 0
+        assert promisor.fetched == 0
+
+    def test_raises_exception_when_the_remote_has_no_such_object(self, remote, store):
+        promisor = PromisorRemote(str(remote.work_tree), UPLOAD_PACK)
+
+        with pytest.raises(exceptions.ObjectNotFoundError, match="promisor remote"):
+            promisor.fetch(store, ["f" * 40])
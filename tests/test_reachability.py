@@ -0,0 +1,315 @@
+from unittest.mock import patch
+
+import pytest
+
+from codetrail import commits
+from codetrail import ewah
+from codetrail import objects
+from codetrail import packs
+from codetrail import reachability
+from tests.utils import write_commit
+from tests.utils import write_tree
+
+
+@pytest.fixture
+def history(store):
+    """Provides a linear history of commits that each change one file."""
+    oids = []
+    for i in range(6):
+        tree = write_tree(store, {"README": b"readme", "src/main.py": f"v{i}".encode()})
+        parents = oids[-1:]
+        oids.append(write_commit(store, parents, timestamp=i + 1, tree=tree))
+    return oids
+
+
+def reachable(store, tip):
+    """Walk the object graph from a tip with no bitmaps."""
+    return reachability.enumerate_objects(store, [tip])
+
+
+def pack_everything(store):
+    """Pack every loose object and return the pack."""
+    pack = packs.PackWriter(store, 10, 50).write(
+        store.pack_directory,
+        list(store.iter_loose_objects()),
+    )
+    for oid in list(store.iter_loose_objects()):
+        store.remove_loose_object(oid)
+    store.reload_packs()
+    return pack
+
+
+class TestReferences:
+    """Tests for `references` function."""
+
+    def test_lists_commit_tree_then_parents(self, store, history):
+        commit = history[1]
+        tree = commits.Commit.parse(store.read_object(commit).data).tree
+
+        assert reachability.references(store.read_object(commit)) == [
+            (tree, "tree"),
+            (history[0], "commit"),
+        ]
+
+    def test_lists_tree_entries_with_types(self, store):
+        tree = write_tree(store, {"a": b"a", "d/b": b"b"})
+
+        kinds = [kind for _, kind in reachability.references(store.read_object(tree))]
+        assert kinds == ["blob", "tree"]
+
+    def test_lists_tag_target_without_type(self, store, history):
+        tag = store.write_object("tag", f"object {history[0]}\ntype commit\n".encode())
+
+        assert reachability.references(store.read_object(tag)) == [(history[0], None)]
+
+    def test_lists_nothing_for_blobs(self, store):
+        blob = store.write_object("blob", b"data")
+        assert reachability.references(store.read_object(blob)) == []
+
+
+class TestEnumerateObjects:
+    """Tests for `enumerate_objects` function."""
+
+    def test_finds_every_object_of_a_commit(self, store, history):
+        # 6 commits, 6 root trees, 6 src trees, 6 versions and the shared readme.
+        assert len(reachable(store, history[-1])) == 25
+
+    def test_excludes_the_history_of_haves(self, store, history):
+        found = reachability.enumerate_objects(store, [history[-1]], [history[-2]])
+
+        commit = commits.Commit.parse(store.read_object(history[-1]).data)
+        assert history[-1] in found
+        assert commit.tree in found
+        assert history[-2] not in found
+        assert len(found) == 4
+
+    def test_bitmaps_give_the_same_objects(self, store, history):
+        expected = reachability.enumerate_objects(store, [history[-1]], [history[1]])
+        pack = pack_everything(store)
+        reachability.write_pack_bitmaps(store, pack, [history[-1]], interval=2)
+        store.reload_packs()
+
+        found = reachability.enumerate_objects(store, [history[-1]], [history[1]])
+        assert found == expected
+
+    def test_bitmapped_tips_read_no_object(self, store, history):
+        pack = pack_everything(store)
+        reachability.write_pack_bitmaps(store, pack, [history[-1], history[2]])
+        store.reload_packs()
+
+        with patch.object(store, "read_object") as read_object:
+            found = reachability.enumerate_objects(store, [history[-1]], [history[2]])
+        read_object.assert_not_called()
+        assert history[3] in found
+        assert history[2] not in found
+
+    def test_walks_new_objects_down_to_bitmaps(self, store, history):
+        pack = pack_everything(store)
+        reachability.write_pack_bitmaps(store, pack, [history[-1]])
+        store.reload_packs()
+        tree = write_tree(store, {"README": b"readme", "src/main.py": b"new"})
+        new = write_commit(store, [history[-1]], timestamp=10, tree=tree)
+
+        with patch.object(store, "read_object", wraps=store.read_object) as read:
+            found = reachability.enumerate_objects(store, [new], [history[-1]])
+        assert len(found) == 4
+        assert read.call_count == 3
+        assert reachable(store, new) == reachable(store, history[-1]) | found
+
+
+class TestWritePackBitmaps:
+    """Tests for `write_pack_bitmaps` function."""
+
+    def test_selects_tips_and_every_interval(self, store, history):
+        pack = pack_everything(store)
+
+        written = reachability.write_pack_bitmaps(store, pack, [history[3]], interval=2)
+
+        assert written == 2
+        bitmaps = packs.Pack(pack.pack_path).bitmaps
+        assert bitmaps is not None
+        assert set(bitmaps) == {history[3], history[1]}
+
+    def test_bitmaps_match_the_object_graph(self, store, history):
+        pack = pack_everything(store)
+        reachability.write_pack_bitmaps(store, pack, [history[-1]], interval=1)
+
+        bitmaps = packs.Pack(pack.pack_path).bitmaps
+        assert bitmaps is not None
+        for commit in history:
+            found = {
+                pack.index.pack_oid(p).hex() for p in ewah.positions(bitmaps[commit])
+            }
+            assert found == reachable(store, commit)
+
+    def test_peels_tags_and_skips_other_tips(self, store, history):
+        tag = store.write_object("tag", f"object {history[2]}\ntype commit\n".encode())
+        tree = write_tree(store, {"a": b"a"})
+        pack = pack_everything(store)
+
+        reachability.write_pack_bitmaps(store, pack, [tag, tree], interval=100)
+
+        bitmaps = packs.Pack(pack.pack_path).bitmaps
+        assert bitmaps is not None
+        assert set(bitmaps) == {history[2]}
+
+    def test_skips_commits_reaching_outside_the_pack(self, store, history):
+        pack = packs.PackWriter(store, 10, 50).write(store.pack_directory, history)
+
+        written = reachability.write_pack_bitmaps(store, pack, [history[-1]])
+
+        assert written == 0
+
+
+class TestRecencyOrder:
+    """Tests for `recency_order` function."""
+
+    def test_groups_types_newest_first(self, store, history):
+        tag = store.write_object("tag", f"object {history[-1]}\ntype commit\n".encode())
+        stray = store.write_object("blob", b"stray")
+        oids = list(store.iter_loose_objects())
+
+        order = reachability.recency_order(store, [tag], oids)
+
+        assert sorted(order) == sorted(oids)
+        assert order[:6] == history[::-1]
+        types = [store.read_object(oid).obj_type for oid in order]
+        assert types == ["commit"] * 6 + ["tree"] * 12 + ["blob"] * 7 + ["tag", "blob"]
+        assert order[18:] == [
+            objects.hash_object("blob", b"readme"),
+            *(objects.hash_object("blob", f"v{i}".encode()) for i in range(5, -1, -1)),
+            tag,
+            stray,
+        ]
+
+    def test_walks_trees_and_blobs_named_by_tips(self, store):
+        tree = write_tree(store, {"d/a": b"a"})
+        blob = store.write_object("blob", b"b")
+
+        order = reachability.recency_order(
+            store,
+            [blob, tree],
+            list(store.iter_loose_objects()),
+        )
+
+        assert order[0] == tree
+        assert store.read_object(order[1]).obj_type == "tree"
+        assert order[2:] == [blob, objects.hash_object("blob", b"a")]
+
+    def test_keeps_bitmaps_of_a_history_small(self, store):
+        files = {
+            f"d{d}/f{f}": f"{d} {f}".encode() for d in range(12) for f in range(40)
+        }
+        tips: list[str] = []
+        for i in range(20):
+            for j in range(3):
+                files[f"d0/f{(i * 7 + j) % 40}"] = f"{i} {j}".encode()
+            tree = write_tree(store, files)
+            tips = [write_commit(store, tips, timestamp=i + 1, tree=tree)]
+        oids = list(store.iter_loose_objects())
+        pack = packs.PackWriter(store, 10, 50).write(
+            store.pack_directory,
+            reachability.recency_order(store, tips, oids),
+        )
+
+        reachability.write_pack_bitmaps(store, pack, tips, interval=1)
+
+        bitmaps = packs.Pack(pack.pack_path).bitmaps
+        assert bitmaps is not None
+        assert len(bitmaps) == 20
+        encoded = [bitmaps.type_bitmap(kind) for kind in ("commit", "tree", "blob")]
+        encoded += bitmaps.values()
+        for bitmap in encoded:
+            assert len(ewah.encode(bitmap, len(pack))) < len(pack) / 8
+
+
+class TestMissingObjects:
+    """Tests for `missing_objects` function."""
+
+    def test_finds_every_object_of_a_commit(self, store, history):
+        assert reachability.missing_objects(store, [history[-1]]) == reachable(
+            store, history[-1]
+        )
+
+    def test_finds_only_the_change_since_haves(self, store, history):
+        found = reachability.missing_objects(store, [history[-1]], [history[-3]])
+
+        commit = commits.Commit.parse(store.read_object(history[-1]).data)
+        assert history[-1] in found
+        assert history[-2] in found
+        assert commit.tree in found
+        assert history[-3] not in found
+        assert not found & reachable(store, history[-3])
+
+    def test_reads_no_commit_below_the_haves(self, store, history):
+        read = []
+        original = reachability.history.read_commit
+
+        def spy(store, oid):
+            read.append(oid)
+            return original(store, oid)
+
+        with patch.object(reachability.history, "read_commit", spy):
+            reachability.missing_objects(store, [history[-1]], [history[-2]])
+
+        assert not set(read) & set(history[:-2])
+
+    def test_sends_tags_and_their_targets(self, store, history):
+        tag = store.write_object(
+            "tag",
+            f"object {history[1]}\ntype commit\ntag v1\n\nmessage\n".encode(),
+        )
+
+        found = reachability.missing_objects(store, [tag], [history[0]])
+
+        assert {tag, history[1]} <= found
+        assert history[0] not in found
+
+    def test_uses_bitmaps_when_available(self, store, history):
+        pack = pack_everything(store)
+        reachability.write_pack_bitmaps(store, pack, [history[-1]])
+        store.reload_packs()
+
+        found = reachability.missing_objects(store, [history[-1]], [history[2]])
+
+        assert found == reachable(store, history[-1]) - reachable(store, history[2])
+
+
+class TestFilterBlobs:
+    """Tests for `filter_blobs` function."""
+
+    @pytest.mark.parametrize(("limit", "blobs"), [(0, 0), (3, 6), (100, 7)])
+    def test_leaves_out_blobs_from_the_limit(self, store, history, limit, blobs):
+        found = reachable(store, history[-1])
+
+        kept = reachability.filter_blobs(store, found, limit)
+
+        assert len(kept) == 6 * 3 + blobs
+
+    def test_uses_the_blob_bitmap_of_packed_objects(self, store, history):
+        pack_everything(store)
+        reachability.write_pack_bitmaps(store, store.packs[0], [history[-1]])
+        store.reload_packs()
+        found = reachable(store, history[-1])
+
+        with patch.object(store, "open_object", wraps=store.open_object) as opener:
+            kept = reachability.filter_blobs(store, found, 0)
+            opener.assert_not_called()
+
+        assert {store.read_object(oid).obj_type for oid in kept} == {"commit", "tree"}
+        assert len(kept) == 6 * 3
+
+
+class TestThinBases:
+    """Tests for `thin_bases` function."""
+
+    def test_suggests_the_previous_version_of_modified_files(self, store, history):
+        old_blob = store.write_object("blob", b"v2")
+        new_blob = store.write_object("blob", b"v5")
+
+        bases = reachability.thin_bases(store, [history[-1]], [history[1], history[2]])
+
+        assert bases == {new_blob: old_blob}
+
+    def test_suggests_nothing_without_haves(self, store, history):
+        assert reachability.thin_bases(store, [history[-1]], []) == {}
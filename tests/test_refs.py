@@ -0,0 +1,198 @@
+import pytest
+
+from codetrail import refs
+from codetrail.packed_refs import PackedRef
+from codetrail.packed_refs import write_packed_refs
+
+
+def pack(repo_dir, *records):
+    """Write the packed-refs file of a repository."""
+    write_packed_refs(repo_dir / "packed-refs", records)
+
+
+class TestResolveRef:
+    """Tests for `resolve_ref` function."""
+
+    def test_follows_symbolic_references(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        (repo_dir / "refs/heads/master").write_text("a" * 40 + "\n", encoding="utf-8")
+
+        assert refs.resolve_ref(repo_dir) == "a" * 40
+
+    def test_returns_none_for_unborn_branch(self, code_repository):
+        assert refs.resolve_ref(code_repository.repo_dir) is None
+
+    def test_stops_on_symbolic_loops(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        (repo_dir / "refs/heads/master").write_text("ref: HEAD", encoding="utf-8")
+
+        assert refs.resolve_ref(repo_dir) is None
+
+
+class TestReadRef:
+    """Tests for `read_ref` function."""
+
+    def test_reads_packed_references(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        pack(repo_dir, PackedRef("refs/heads/master", "a" * 40))
+
+        assert refs.read_ref(repo_dir, "refs/heads/master") == "a" * 40
+        assert refs.resolve_ref(repo_dir) == "a" * 40
+        assert refs.read_ref(repo_dir, "refs/heads/other") is None
+
+    def test_prefers_loose_references(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        pack(repo_dir, PackedRef("refs/heads/master", "a" * 40))
+        refs.write_ref(repo_dir, "refs/heads/master", "b" * 40)
+
+        assert refs.read_ref(repo_dir, "refs/heads/master") == "b" * 40
+
+    def test_remaps_packed_file_when_it_changes(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        pack(repo_dir, PackedRef("refs/heads/master", "a" * 40))
+        first = refs.packed_refs(repo_dir)
+        assert refs.packed_refs(repo_dir) is first
+
+        pack(repo_dir, PackedRef("refs/heads/master", "b" * 40))
+        assert refs.read_ref(repo_dir, "refs/heads/master") == "b" * 40
+
+        (repo_dir / "packed-refs").unlink()
+        assert refs.packed_refs(repo_dir) is None
+        assert refs.read_ref(repo_dir, "refs/heads/master") is None
+
+
+class TestWriteRef:
+    """Tests for `write_ref`, `write_symbolic_ref` and `delete_loose_ref` functions."""
+
+    def test_creates_parent_directories(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        refs.write_ref(repo_dir, "refs/heads/topic/one", "a" * 40)
+
+        assert (repo_dir / "refs/heads/topic/one").read_text() == f"{'a' * 40}\n"
+        assert list(repo_dir.glob("tmp_ref_*")) == []
+
+    def test_writes_symbolic_references(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        refs.write_ref(repo_dir, "refs/heads/topic", "a" * 40)
+        refs.write_symbolic_ref(repo_dir, "HEAD", "refs/heads/topic")
+
+        assert refs.read_ref(repo_dir, "HEAD") == "ref: refs/heads/topic"
+        assert refs.resolve_ref(repo_dir) == "a" * 40
+
+    def test_removes_empty_directories_but_keeps_heads(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        refs.write_ref(repo_dir, "refs/heads/topic/one", "a" * 40)
+        refs.write_ref(repo_dir, "refs/heads/master", "a" * 40)
+
+        refs.delete_loose_ref(repo_dir, "refs/heads/topic/one")
+        refs.delete_loose_ref(repo_dir, "refs/heads/master")
+
+        assert not (repo_dir / "refs/heads/topic").exists()
+        assert (repo_dir / "refs/heads").is_dir()
+
+    def test_keeps_directories_with_other_references(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        refs.write_ref(repo_dir, "refs/remotes/origin/a", "a" * 40)
+        refs.write_ref(repo_dir, "refs/remotes/origin/b", "b" * 40)
+
+        refs.delete_loose_ref(repo_dir, "refs/remotes/origin/a")
+
+        assert (repo_dir / "refs/remotes/origin/b").exists()
+
+
+@pytest.mark.parametrize(
+    ("name", "valid"),
+    [
+        ("refs/heads/master", True),
+        ("refs/heads/feature/x.y", True),
+        ("refs/heads/.hidden", False),
+        ("refs/heads/-x", False),
+        ("refs/heads/a..b", False),
+        ("refs/heads/a b", False),
+        ("refs/heads/a~1", False),
+        ("refs/heads/a@{1}", False),
+        ("refs/heads/a/", False),
+        ("refs/heads/a.lock", False),
+        ("", False),
+    ],
+)
+def test_is_valid_ref_name(name, valid):
+    assert refs.is_valid_ref_name(name) is valid
+
+
+class TestIterRefs:
+    """Tests for `iter_refs` function."""
+
+    def test_layers_loose_references_over_packed_ones(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        pack(
+            repo_dir,
+            PackedRef("refs/heads/master", "a" * 40),
+            PackedRef("refs/heads/shadowed", "b" * 40),
+            PackedRef("refs/tags/v1", "c" * 40, "d" * 40),
+        )
+        refs.write_ref(repo_dir, "refs/heads/master", "e" * 40)
+        refs.write_ref(repo_dir, "refs/heads/new", "f" * 40)
+        (repo_dir / "refs/heads/shadowed").write_text("ref: refs/heads/new", "utf-8")
+
+        assert list(refs.iter_refs(repo_dir)) == [
+            ("refs/heads/master", "e" * 40),
+            ("refs/heads/new", "f" * 40),
+            ("refs/tags/v1", "c" * 40),
+        ]
+        assert list(refs.iter_refs(repo_dir, "refs/tags/")) == [
+            ("refs/tags/v1", "c" * 40)
+        ]
+
+    def test_lists_direct_references(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        (repo_dir / "refs/heads/master").write_text("a" * 40, encoding="utf-8")
+        (repo_dir / "refs/heads/topic").mkdir()
+        (repo_dir / "refs/heads/topic/one").write_text("b" * 40, encoding="utf-8")
+        (repo_dir / "refs/tags/latest").write_text("ref: refs/heads/master", "utf-8")
+
+        assert list(refs.iter_refs(repo_dir)) == [
+            ("refs/heads/master", "a" * 40),
+            ("refs/heads/topic/one", "b" * 40),
+        ]
+
+
+class TestResolveRevision:
+    """Tests for `resolve_revision` function."""
+
+    @pytest.fixture
+    def repo_dir(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        (repo_dir / "refs/heads/master").write_text("a" * 40, encoding="utf-8")
+        (repo_dir / "refs/heads/v1").write_text("b" * 40, encoding="utf-8")
+        (repo_dir / "refs/tags/v1").write_text("c" * 40, encoding="utf-8")
+        return repo_dir
+
+    @pytest.mark.parametrize(
+        ("revision", "expected"),
+        [
+            ("d" * 40, "d" * 40),
+            ("HEAD", "a" * 40),
+            ("master", "a" * 40),
+            ("refs/heads/v1", "b" * 40),
+            ("v1", "c" * 40),
+            ("config", None),
+            ("unknown", None),
+        ],
+    )
+    def test_resolves_revisions(self, repo_dir, revision, expected):
+        assert refs.resolve_revision(repo_dir, revision) == expected
+
+
+class TestRefTips:
+    """Tests for `ref_tips` function."""
+
+    def test_lists_references_then_head(self, code_repository):
+        repo_dir = code_repository.repo_dir
+        (repo_dir / "refs/heads/master").write_text("a" * 40, encoding="utf-8")
+        (repo_dir / "refs/tags/v1").write_text("b" * 40, encoding="utf-8")
+
+        assert refs.ref_tips(repo_dir) == ["a" * 40, "b" * 40, "a" * 40]
+
+    def test_skips_unborn_head(self, code_repository):
+        assert refs.ref_tips(code_repository.repo_dir) == []
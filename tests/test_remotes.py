@@ -0,0 +1,39 @@
+import pytest
+
+from codetrail import exceptions
+from codetrail import remotes
+from codetrail.conf import REMOTES_DIRECTORY
+
+
+class TestRemotes:
+    """Tests for `read_remotes` and `write_remote` functions."""
+
+    def test_round_trips_remotes_in_name_order(self, temporary_dir):
+        remotes.write_remote(temporary_dir, "upstream", "/srv/upstream")
+        remotes.write_remote(temporary_dir, "origin", "/srv/origin")
+        remotes.write_remote(temporary_dir, "origin", "/srv/moved")
+
+        assert remotes.read_remotes(temporary_dir) == {
+            "origin": "/srv/moved",
+            "upstream": "/srv/upstream",
+        }
+        assert (temporary_dir / REMOTES_DIRECTORY / "origin").read_text() == (
+            "URL: /srv/moved\n"
+        )
+
+    def test_reads_nothing_without_remotes(self, temporary_dir):
+        assert remotes.read_remotes(temporary_dir) == {}
+
+    def test_ignores_files_without_url(self, temporary_dir):
+        directory = temporary_dir / REMOTES_DIRECTORY
+        directory.mkdir()
+        (directory / "broken").write_text("Pull: refs/heads/master\n")
+        (directory / "nested").mkdir()
+        (directory / "bad..name").write_text("URL: /srv/bad\n")
+
+        assert remotes.read_remotes(temporary_dir) == {}
+
+    @pytest.mark.parametrize("name", ["a/b", "..", "bad..name", "-x"])
+    def test_raises_exception_on_invalid_name(self, temporary_dir, name):
+        with pytest.raises(exceptions.InvalidReferenceError):
+            remotes.write_remote(temporary_dir, name, "/srv/remote")
@@ -0,0 +1,182 @@
+import shutil
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from codetrail import cmd_init
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import models
+from codetrail import refs
+from codetrail import session
+from codetrail import transfer
+from codetrail.cmd_upload_pack import UploadPackServer
+from tests.utils import write_commit
+from tests.utils import write_tree
+
+UPLOAD_PACK = [sys.executable, "-m", "codetrail", "upload-pack"]
+
+
+def make_repository(path):
+    """Initialize a repository and return it."""
+    cmd_init.initialize_repository(commands.InitializeRepository(path=path))
+    return models.CodetrailRepository(path)
+
+
+def commit_file(repository, content, parents=()):
+    """Commit a single file and point `master` to the commit."""
+    store = repository.objects
+    tree = write_tree(store, {"README": content})
+    oid = write_commit(store, list(parents), tree=tree)
+    refs.write_ref(repository.repo_dir, "refs/heads/master", oid)
+    return oid
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """Provides a repository with a `master` branch of one commit."""
+    repository = make_repository(tmp_path / "remote")
+    commit_file(repository, b"one")
+    return repository
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Provides an empty repository."""
+    return make_repository(tmp_path / "client")
+
+
+@pytest.fixture
+def socket_path():
+    """Provides a path short enough for a Unix socket."""
+    directory = tempfile.mkdtemp(prefix="ct")
+    yield str(Path(directory) / "serve.sock")
+    shutil.rmtree(directory)
+
+
+def fetch_master(remote_session, client):
+    """List the references of a remote then fetch its `master` branch."""
+    advertisement = remote_session.list_refs()
+    tip = advertisement.refs["refs/heads/master"]
+    negotiator = transfer.Negotiator(client.objects, refs.ref_tips(client.repo_dir))
+    pack = remote_session.fetch(client.objects, [tip], negotiator)
+    refs.write_ref(client.repo_dir, "refs/remotes/origin/master", tip)
+    return tip, pack
+
+
+class TestRemoteSession:
+    """Tests for `RemoteSession` class."""
+
+    def test_reuses_one_connection_across_requests(self, remote, client):
+        remote_session = session.RemoteSession(str(remote.work_tree), UPLOAD_PACK)
+        first, pack = fetch_master(remote_session, client)
+        assert len(pack) == 3
+        second = commit_file(remote, b"two", [first])
+        messages = []
+
+        assert fetch_master(remote_session, client)[0] == second
+        pack = remote_session.fetch(
+            client.objects,
+            [second],
+            transfer.Negotiator(client.objects, [second]),
+            progress=messages.append,
+        )
+
+        assert remote_session.connections == 1
+        assert remote_session.reusable
+        assert pack is None
+        assert client.objects.read_object(second).obj_type == "commit"
+        assert messages[0] == "Counting objects: 0, done."
+        remote_session.close()
+        assert not remote_session.reusable
+
+    def test_passes_progress_messages_on(self, remote, client):
+        remote_session = session.RemoteSession(str(remote.work_tree), UPLOAD_PACK)
+        tip = remote_session.list_refs().refs["refs/heads/master"]
+        messages = []
+
+        remote_session.fetch(
+            client.objects,
+            [tip],
+            transfer.Negotiator(client.objects, ()),
+            progress=messages.append,
+        )
+
+        assert messages == ["Counting objects: 3, done.", messages[1]]
+        assert messages[1].startswith("Total 3 objects, ")
+
+    def test_reconnects_for_every_fetch_without_sessions(self, remote, client):
+        remote_session = session.RemoteSession(str(remote.work_tree), UPLOAD_PACK)
+        original = transfer.read_advertisement
+
+        def without_sessions(stream):
+            advertisement = original(stream)
+            capabilities = advertisement.capabilities - {transfer.SESSION}
+            return advertisement._replace(capabilities=capabilities)
+
+        with patch.object(transfer, "read_advertisement", without_sessions):
+            first, _ = fetch_master(remote_session, client)
+            commit_file(remote, b"two", [first])
+            remote_session.list_refs()
+            second, pack = fetch_master(remote_session, client)
+
+        assert remote_session.connections == 3
+        assert len(pack) == 3
+        assert client.objects.has_object(second)
+
+    def test_reconnects_after_a_failed_request(self, remote, client):
+        remote_session = session.RemoteSession(str(remote.work_tree), UPLOAD_PACK)
+        remote_session.list_refs()
+
+        with pytest.raises(exceptions.ProtocolError, match="not our object"):
+            remote_session.fetch(
+                client.objects,
+                ["f" * 40],
+                transfer.Negotiator(client.objects, ()),
+            )
+
+        assert not remote_session.reusable
+        fetch_master(remote_session, client)
+        assert remote_session.connections == 2
+
+    def test_serves_a_unix_socket(self, remote, client, socket_path):
+        server = UploadPackServer(socket_path, str(remote.work_tree))
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            remote_session = session.RemoteSession(socket_path, ["false"])
+            tip, pack = fetch_master(remote_session, client)
+            remote_session.list_refs()
+            remote_session.close()
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+
+        assert len(pack) == 3
+        assert client.objects.read_object(tip).obj_type == "commit"
+        assert remote_session.connections == 1
+
+
+class TestOpenSession:
+    """Tests for `open_session` and `close_sessions` functions."""
+
+    def test_shares_one_session_per_remote_and_command(self, remote):
+        path = str(remote.work_tree)
+        remote_session = session.open_session(path, UPLOAD_PACK)
+
+        assert session.open_session(path, tuple(UPLOAD_PACK)) is remote_session
+        assert session.open_session(path, ["other"]) is not remote_session
+
+    def test_closes_every_session(self, remote):
+        remote_session = session.open_session(str(remote.work_tree), UPLOAD_PACK)
+        remote_session.list_refs()
+
+        session.close_sessions()
+
+        assert not remote_session.reusable
+        assert session.open_session(str(remote.work_tree)) is not remote_session
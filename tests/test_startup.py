@@ -0,0 +1,69 @@
+"""Startup regression benchmark for the command line entrypoint."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# The sum of the import times reported by `python -X importtime`, in microseconds.
+# A plain `config get` imports about 80ms worth of modules; Pydantic alone adds
+# about 200ms.
+IMPORT_TIME_BUDGET_US = 200_000
+
+DEFERRED_MODULES = [
+    "pydantic",
+    "codetrail.cmd_add",
+    "codetrail.cmd_init",
+    "codetrail.cmd_repack",
+    "codetrail.hashing",
+    "codetrail.objects",
+    "codetrail.packs",
+]
+
+
+def import_times(cwd):
+    """Run `config get` with `-X importtime` and parse the report."""
+    root = Path(__file__).resolve().parent.parent
+    environment = {**os.environ, "PYTHONPATH": str(root)}
+    environment.pop("PYTHONIMPORTTIME", None)
+    result = subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-m",
+            "codetrail",
+            "config",
+            "get",
+            "user.name",
+        ],
+        cwd=cwd,
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, _, name = line.removeprefix("import time:").split("|")
+        if own.strip().isdigit():
+            times[name.strip()] = int(own)
+    return times
+
+
+@pytest.mark.usefixtures("code_repository")
+class TestStartup:
+    """Tests for the import cost of `codetrail config get`."""
+
+    def test_defers_unused_modules(self, temporary_dir):
+        times = import_times(temporary_dir)
+
+        assert "codetrail.cmd_config" in times
+        assert not [name for name in DEFERRED_MODULES if name in times]
+
+    def test_stays_within_import_budget(self, temporary_dir):
+        assert sum(import_times(temporary_dir).values()) < IMPORT_TIME_BUDGET_US
@@ -0,0 +1,469 @@
+import io
+import os
+import threading
+
+import pytest
+
+from codetrail import cmd_init
+from codetrail import commands
+from codetrail import exceptions
+from codetrail import models
+from codetrail import packs
+from codetrail import refs
+from codetrail import transfer
+from tests.utils import write_commit
+from tests.utils import write_tree
+
+
+def make_repository(path):
+    """Initialize a repository and return it."""
+    path.mkdir()
+    cmd_init.initialize_repository(commands.InitializeRepository(path=path))
+    return models.CodetrailRepository(path)
+
+
+def write_history(store, count, start=0, parents=()):
+    """Write a linear history where every commit changes one file."""
+    oids = list(parents)
+    for i in range(start, start + count):
+        content = f"version {i}\n".encode() * 200
+        tree = write_tree(store, {"README": b"readme", "main.py": content})
+        oids.append(write_commit(store, oids[-1:], timestamp=1000 + i, tree=tree))
+    return oids[len(parents) :]
+
+
+def pipe():
+    """Open a pipe and return its ends as binary files."""
+    read, write = os.pipe()
+    return os.fdopen(read, "rb"), os.fdopen(write, "wb")
+
+
+def run_fetch(  # noqa: PLR0913
+    server,
+    client,
+    wants,
+    tips=(),
+    *,
+    thin=True,
+    filter_spec=None,
+    progress=None,
+):
+    """Fetch from a server repository running in a thread over pipes."""
+    to_server, from_client = pipe()
+    to_client, from_server = pipe()
+    errors = []
+
+    def serve():
+        try:
+            transfer.serve_upload_pack(
+                server.objects,
+                server.repo_dir,
+                to_server,
+                from_server,
+                window=10,
+                depth=50,
+            )
+        except (exceptions.ProtocolError, exceptions.InvalidFilterError) as e:
+            transfer.write_error(from_server, str(e))
+            errors.append(e)
+        finally:
+            from_server.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    try:
+        advertisement = transfer.read_advertisement(to_client)
+        negotiator = transfer.Negotiator(
+            client.objects, tips, advertisement.refs.values()
+        )
+        pack = transfer.fetch_pack(
+            client.objects,
+            to_client,
+            from_client,
+            wants,
+            negotiator,
+            thin=thin,
+            filter_spec=filter_spec,
+            sideband=progress is not None,
+            progress=progress,
+        )
+    finally:
+        from_client.close()
+        thread.join()
+        to_client.close()
+        to_server.close()
+    return pack, errors
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Provides a repository with a `master` branch of 6 commits."""
+    repository = make_repository(tmp_path / "server")
+    oids = write_history(repository.objects, 6)
+    refs.write_ref(repository.repo_dir, "refs/heads/master", oids[-1])
+    return repository
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Provides an empty repository."""
+    return make_repository(tmp_path / "client")
+
+
+class TestPktLine:
+    """Tests for `write_pkt_line` and `read_pkt_line` functions."""
+
+    def test_round_trips_lines_and_flushes(self):
+        stream = io.BytesIO()
+        transfer.write_pkt_line(stream, "want abc\n")
+        transfer.write_flush(stream)
+        transfer.write_pkt_line(stream, b"")
+
+        assert stream.getvalue() == b"000dwant abc\n00000004"
+        stream.seek(0)
+        assert transfer.read_pkt_line(stream) == b"want abc\n"
+        assert transfer.read_pkt_line(stream) is None
+        assert transfer.read_pkt_line(stream) == b""
+
+    @pytest.mark.parametrize(
+        ("data", "message"),
+        [
+            (b"", "Connection closed"),
+            (b"zzzz", "Malformed"),
+            (b"0010abc", "middle of a pkt-line"),
+            (b"000dERR oops\n", "oops"),
+        ],
+    )
+    def test_raises_exception_on_bad_input(self, data, message):
+        with pytest.raises(exceptions.ProtocolError, match=message):
+            transfer.read_pkt_line(io.BytesIO(data))
+
+    def test_raises_exception_on_oversized_payload(self):
+        with pytest.raises(exceptions.ProtocolError):
+            transfer.write_pkt_line(io.BytesIO(), bytes(transfer.PKT_LINE_LIMIT + 1))
+
+
+class TestReadRequest:
+    """Tests for `read_request` function."""
+
+    def test_reads_requests_until_the_connection_is_closed(self):
+        stream = io.BytesIO()
+        transfer.write_pkt_line(stream, "ls-refs\n")
+        transfer.write_flush(stream)
+        transfer.write_flush(stream)
+        stream.seek(0)
+
+        assert transfer.read_request(stream) == ["ls-refs"]
+        assert transfer.read_request(stream) == []
+        assert transfer.read_request(stream) is None
+
+
+class TestSideband:
+    """Tests for `SidebandWriter` and `SidebandReader` classes."""
+
+    def test_round_trips_data_and_progress(self):
+        stream = io.BytesIO()
+        writer = transfer.SidebandWriter(stream)
+        data = bytes(range(256)) * 600
+        writer.write(data[:1000])
+        writer.progress("Halfway")
+        writer.write(data[1000:])
+        writer.close()
+        stream.seek(0)
+        messages = []
+
+        reader = transfer.SidebandReader(stream, messages.append)
+        received = b"".join(iter(lambda: reader.read(50_000), b""))
+
+        assert received == data
+        assert writer.written == len(data)
+        assert messages == ["Halfway"]
+        assert stream.read() == b""
+
+    def test_finish_reads_the_last_progress_messages(self):
+        stream = io.BytesIO()
+        writer = transfer.SidebandWriter(stream)
+        writer.write(b"pack")
+        writer.progress("Done")
+        writer.close()
+        stream.seek(0)
+        messages = []
+
+        reader = transfer.SidebandReader(stream, messages.append)
+        assert reader.read(4) == b"pack"
+        reader.finish()
+
+        assert messages == ["Done"]
+
+    def test_ignores_progress_without_a_callback(self):
+        stream = io.BytesIO()
+        writer = transfer.SidebandWriter(stream)
+        writer.progress("Ignored")
+        writer.close()
+        stream.seek(0)
+
+        assert transfer.SidebandReader(stream).read(10) == b""
+
+    def test_raises_exception_on_data_left_after_the_pack(self):
+        stream = io.BytesIO()
+        writer = transfer.SidebandWriter(stream)
+        writer.write(b"extra")
+        writer.close()
+        stream.seek(0)
+
+        with pytest.raises(exceptions.ProtocolError, match="after the end"):
+            transfer.SidebandReader(stream).finish()
+
+    def test_raises_exception_on_unknown_band(self):
+        stream = io.BytesIO()
+        transfer.write_pkt_line(stream, b"\x05data")
+        stream.seek(0)
+
+        with pytest.raises(exceptions.ProtocolError, match="Unknown sideband"):
+            transfer.SidebandReader(stream).read(4)
+
+
+class TestParseFilter:
+    """Tests for `parse_filter` function."""
+
+    @pytest.mark.parametrize(
+        ("spec", "expected"),
+        [
+            ("blob:none", 0),
+            ("blob:limit=0", 0),
+            ("blob:limit=100", 100),
+            ("blob:limit=2k", 2048),
+            ("blob:limit=1M", 1024**2),
+            ("blob:limit=3g", 3 * 1024**3),
+        ],
+    )
+    def test_parses_blob_filters(self, spec, expected):
+        assert transfer.parse_filter(spec) == expected
+
+    @pytest.mark.parametrize(
+        "spec",
+        ["tree:0", "blob:limit=", "blob:limit=k", "blob:limit=1t", "blob:limit=-1"],
+    )
+    def test_raises_exception_on_unsupported_filter(self, spec):
+        with pytest.raises(exceptions.InvalidFilterError):
+            transfer.parse_filter(spec)
+
+
+class TestAdvertisement:
+    """Tests for `advertise_refs` and `read_advertisement` functions."""
+
+    def test_round_trips_refs_peeled_tags_and_capabilities(self, server):
+        master = refs.resolve_ref(server.repo_dir, "refs/heads/master")
+        tag = server.objects.write_object(
+            "tag",
+            f"object {master}\ntype commit\ntag v1\n\nmessage\n".encode(),
+        )
+        refs.write_ref(server.repo_dir, "refs/tags/v1", tag)
+        refs.write_ref(server.repo_dir, "refs/tags/light", master)
+        stream = io.BytesIO()
+
+        transfer.advertise_refs(server.objects, server.repo_dir, stream)
+        stream.seek(0)
+        advertisement = transfer.read_advertisement(stream)
+
+        assert advertisement.refs == {
+            "HEAD": master,
+            "refs/heads/master": master,
+            "refs/tags/light": master,
+            "refs/tags/v1": tag,
+        }
+        assert advertisement.peeled == {"refs/tags/v1": master}
+        assert advertisement.head == "refs/heads/master"
+        assert transfer.THIN_PACK in advertisement.capabilities
+
+    def test_advertises_capabilities_of_an_empty_repository(self, client):
+        stream = io.BytesIO()
+
+        transfer.advertise_refs(client.objects, client.repo_dir, stream)
+        stream.seek(0)
+        advertisement = transfer.read_advertisement(stream)
+
+        assert advertisement.refs == {}
+        assert advertisement.head == "refs/heads/master"
+
+    def test_has_no_head_branch_when_detached(self):
+        advertisement = transfer.Advertisement({}, {}, frozenset({"thin-pack"}))
+        assert advertisement.head is None
+
+
+class TestNegotiator:
+    """Tests for `Negotiator` class."""
+
+    def test_offers_known_commits_then_history_newest_first(self, client):
+        oids = write_history(client.objects, 4)
+
+        negotiator = transfer.Negotiator(client.objects, [oids[-1]], [oids[0]])
+
+        assert negotiator.next_batch(2) == [oids[0], oids[3]]
+        assert negotiator.next_batch(5) == [oids[2], oids[1]]
+        assert negotiator.next_batch() == []
+
+    def test_skips_ancestors_of_acknowledged_commits(self, client):
+        oids = write_history(client.objects, 6)
+        negotiator = transfer.Negotiator(client.objects, [oids[-1]])
+
+        assert negotiator.next_batch(3) == [oids[5], oids[4], oids[3]]
+        negotiator.acknowledge(oids[4])
+
+        assert negotiator.next_batch() == []
+        assert set(oids[2:5]) <= negotiator.common
+
+    def test_ignores_unknown_objects_and_non_commit_tips(self, client):
+        blob = client.objects.write_object("blob", b"data")
+
+        negotiator = transfer.Negotiator(client.objects, [blob], ["f" * 40])
+
+        assert negotiator.next_batch() == []
+
+
+class TestFetchPack:
+    """Tests for `serve_upload_pack` and `fetch_pack` functions."""
+
+    def test_clones_a_whole_history(self, server, client):
+        tip = refs.resolve_ref(server.repo_dir, "refs/heads/master")
+
+        pack, errors = run_fetch(server, client, [tip])
+
+        assert not errors
+        assert len(pack) == 6 * 3 + 1
+        assert client.objects.read_object(tip).obj_type == "commit"
+
+    def test_sends_only_new_objects(self, server, client):
+        old_tip = refs.resolve_ref(server.repo_dir, "refs/heads/master")
+        run_fetch(server, client, [old_tip])
+        new = write_history(server.objects, 2, start=6, parents=[old_tip])
+
+        pack, _ = run_fetch(server, client, [new[-1]], [old_tip])
+
+        assert len(pack) == 2 * 3
+        assert client.objects.read_object(new[-1]).obj_type == "commit"
+
+    def test_thin_packs_give_the_same_objects(self, server, client, tmp_path):
+        old_tip = refs.resolve_ref(server.repo_dir, "refs/heads/master")
+        run_fetch(server, client, [old_tip])
+        other = make_repository(tmp_path / "other")
+        run_fetch(server, other, [old_tip])
+        new = write_history(server.objects, 1, start=6, parents=[old_tip])
+
+        thin, _ = run_fetch(server, client, [new[-1]], [old_tip])
+        whole, _ = run_fetch(server, other, [new[-1]], [old_tip], thin=False)
+
+        assert sorted(thin) == sorted(whole)
+        assert other.objects.read_object(new[-1]) == client.objects.read_object(new[-1])
+
+    def test_stops_negotiating_after_too_many_haves_in_vain(
+        self, server, client, monkeypatch
+    ):
+        monkeypatch.setattr(transfer, "NEGOTIATION_MAX_IN_VAIN", 4)
+        monkeypatch.setattr(transfer, "NEGOTIATION_BATCH_SIZE", 2)
+        unrelated = write_history(client.objects, 10, start=100)
+        tip = refs.resolve_ref(server.repo_dir, "refs/heads/master")
+        sent = []
+        original = transfer.Negotiator.next_batch
+
+        def spy(self, size=2):
+            batch = original(self, size)
+            sent.extend(batch)
+            return batch
+
+        monkeypatch.setattr(transfer.Negotiator, "next_batch", spy)
+        pack, _ = run_fetch(server, client, [tip], [unrelated[-1]])
+
+        assert len(sent) == 4
+        assert len(pack) == 6 * 3 + 1
+
+    def test_filter_leaves_blobs_out(self, server, client):
+        tip = refs.resolve_ref(server.repo_dir, "refs/heads/master")
+
+        pack, _ = run_fetch(server, client, [tip], filter_spec="blob:limit=100")
+
+        assert len(pack) == 6 * 2 + 1
+        readme = server.objects.write_object("blob", b"readme")
+        assert readme in pack
+
+    def test_filter_keeps_wanted_blobs(self, server, client):
+        blob = server.objects.write_object("blob", b"version 0\n" * 200)
+
+        pack, _ = run_fetch(server, client, [blob], filter_spec="blob:none")
+
+        assert list(pack) == [blob]
+
+    def test_server_refuses_unsupported_filters(self, server, client):
+        tip = refs.resolve_ref(server.repo_dir, "refs/heads/master")
+
+        with pytest.raises(exceptions.ProtocolError, match="Unsupported object filter"):
+            run_fetch(server, client, [tip], filter_spec="tree:0")
+
+    def test_receives_the_pack_and_progress_on_sidebands(self, server, client):
+        tip = refs.resolve_ref(server.repo_dir, "refs/heads/master")
+        messages = []
+
+        pack, _ = run_fetch(server, client, [tip], progress=messages.append)
+
+        assert len(pack) == 6 * 3 + 1
+        assert messages[0] == "Counting objects: 19, done."
+        assert messages[1].startswith("Total 19 objects, ")
+
+    def test_fetches_nothing_without_wants(self, server, client):
+        assert run_fetch(server, client, []) == (None, [])
+
+    def test_server_refuses_unknown_wants(self, server, client):
+        with pytest.raises(exceptions.ProtocolError, match="not our object"):
+            run_fetch(server, client, ["f" * 40])
+
+
+class TestSessions:
+    """Tests for the session requests of `serve_upload_pack`."""
+
+    def serve(self, server, requests):
+        """Serve requests written in advance, then return what the server wrote."""
+        output = io.BytesIO()
+        count = transfer.serve_upload_pack(
+            server.objects,
+            server.repo_dir,
+            io.BytesIO(requests),
+            output,
+            window=10,
+            depth=50,
+        )
+        output.seek(0)
+        return count, output
+
+    def test_serves_pipelined_requests_on_one_connection(self, server, client):
+        tip = refs.resolve_ref(server.repo_dir, "refs/heads/master")
+        requests = io.BytesIO()
+        for section in (
+            ["session\n"],
+            ["ls-refs\n"],
+            ["fetch\n", f"want {tip} side-band\n"],
+        ):
+            for line in section:
+                transfer.write_pkt_line(requests, line)
+            transfer.write_flush(requests)
+        transfer.write_pkt_line(requests, "done\n")
+
+        count, output = self.serve(server, requests.getvalue())
+
+        first = transfer.read_advertisement(output)
+        assert transfer.SESSION in first.capabilities
+        assert transfer.read_advertisement(output).refs == first.refs
+        assert transfer.read_section(output) == []
+        reader = transfer.SidebandReader(output)
+        pack = packs.index_pack(client.objects, reader)
+        reader.finish()
+        assert count == len(pack) == 6 * 3 + 1
+        assert output.read() == b""
+
+    def test_raises_exception_on_unknown_request(self, server):
+        requests = io.BytesIO()
+        for line in ("session\n", "push\n"):
+            transfer.write_pkt_line(requests, line)
+            transfer.write_flush(requests)
+
+        with pytest.raises(exceptions.ProtocolError, match="Unknown session request"):
+            self.serve(server, requests.getvalue())
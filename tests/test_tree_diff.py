@@ -0,0 +1,132 @@
+from unittest.mock import patch
+
+
+from codetrail import index
+from codetrail import tree_diff
+from codetrail import trees
+from tests.utils import index_entries
+from tests.utils import write_tree
+
+FILES = {
+    "README": b"readme",
+    "docs/guide.md": b"guide",
+    "src/app/main.py": b"main",
+    "src/app/util.py": b"util",
+    "src/lib.py": b"lib",
+}
+
+
+def changes(diff):
+    return [(change.status, change.path) for change in diff]
+
+
+class TestDiffTrees:
+    """Tests for `diff_trees` function."""
+
+    def test_reports_nothing_for_identical_trees(self, store):
+        tree = write_tree(store, FILES)
+
+        with patch.object(store, "read_object") as reader:
+            assert changes(tree_diff.diff_trees(store, tree, tree)) == []
+            reader.assert_not_called()
+
+    def test_reports_changes_in_path_order(self, store):
+        old = write_tree(store, FILES)
+        new_files = {**FILES, "src/app/main.py": b"new", "src/new.py": b"new"}
+        del new_files["docs/guide.md"]
+        new = write_tree(store, new_files)
+
+        assert changes(tree_diff.diff_trees(store, old, new)) == [
+            ("D", "docs/guide.md"),
+            ("M", "src/app/main.py"),
+            ("A", "src/new.py"),
+        ]
+
+    def test_diffs_against_empty_tree(self, store):
+        tree = write_tree(store, {"a/b": b"b", "c": b"c"})
+
+        assert changes(tree_diff.diff_trees(store, None, tree)) == [
+            ("A", "a/b"),
+            ("A", "c"),
+        ]
+        assert changes(tree_diff.diff_trees(store, tree, None)) == [
+            ("D", "a/b"),
+            ("D", "c"),
+        ]
+
+    def test_reports_file_replaced_by_directory(self, store):
+        old = write_tree(store, {"a": b"file", "a.txt": b"text"})
+        new = write_tree(store, {"a/b": b"nested", "a.txt": b"text"})
+
+        assert changes(tree_diff.diff_trees(store, old, new)) == [
+            ("D", "a"),
+            ("A", "a/b"),
+        ]
+
+    def test_reports_mode_changes(self, store):
+        old = write_tree(store, {"run.sh": b"echo"})
+        entries = index_entries(store, {"run.sh": b"echo"}, index.MODE_EXECUTABLE)
+        new, built = trees.build_index_trees(entries)
+        store.write_object("tree", trees.encode_tree(built[new]))
+
+        (change,) = tree_diff.diff_trees(store, old, new)
+        assert change.status == "M"
+        assert change.old.oid == change.new.oid
+        assert change.new.mode == index.MODE_EXECUTABLE
+
+    def test_skips_unchanged_subtrees(self, store):
+        files = {
+            f"dir{i}/sub{j}/file{k}": f"{i}{j}{k}".encode()
+            for i in range(10)
+            for j in range(10)
+            for k in range(5)
+        }
+        old = write_tree(store, files)
+        new = write_tree(store, {**files, "dir3/sub4/file2": b"changed"})
+
+        with patch.object(store, "read_object", wraps=store.read_object) as reader:
+            assert changes(tree_diff.diff_trees(store, old, new)) == [
+                ("M", "dir3/sub4/file2"),
+            ]
+            assert reader.call_count == 6
+
+    def test_yields_lazily(self, store):
+        old = write_tree(store, {"a/x": b"1", "b/x": b"1"})
+        new = write_tree(store, {"a/x": b"2", "b/x": b"2"})
+
+        with patch.object(store, "read_object", wraps=store.read_object) as reader:
+            diff = tree_diff.diff_trees(store, old, new)
+            assert next(diff).path == "a/x"
+            assert reader.call_count == 4
+
+
+class TestDiffTreeToIndex:
+    """Tests for `diff_tree_to_index` function."""
+
+    def test_reports_staged_changes(self, store):
+        tree = write_tree(store, FILES)
+        staged = {**FILES, "docs/guide.md": b"edited", "setup.py": b"setup"}
+        del staged["src/lib.py"]
+
+        diff = tree_diff.diff_tree_to_index(store, tree, index_entries(store, staged))
+
+        assert changes(diff) == [
+            ("M", "docs/guide.md"),
+            ("A", "setup.py"),
+            ("D", "src/lib.py"),
+        ]
+
+    def test_skips_unchanged_directories(self, store):
+        tree = write_tree(store, FILES)
+        staged = {**FILES, "README": b"edited"}
+
+        with patch.object(store, "read_object", wraps=store.read_object) as reader:
+            diff = tree_diff.diff_tree_to_index(
+                store, tree, index_entries(store, staged)
+            )
+            assert changes(diff) == [("M", "README")]
+            assert reader.call_count == 1
+
+    def test_reports_everything_without_a_tree(self, store):
+        diff = tree_diff.diff_tree_to_index(store, None, index_entries(store, FILES))
+        assert [path for _, path in changes(diff)] == sorted(FILES)
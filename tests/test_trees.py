@@ -0,0 +1,70 @@
+import pytest
+
+from codetrail import exceptions
+from codetrail import index
+from codetrail import objects
+from codetrail import trees
+from tests.utils import index_entries
+from tests.utils import write_tree
+
+
+class TestTreeFormat:
+    """Tests for `parse_tree` and `encode_tree` functions."""
+
+    def test_round_trips_in_tree_order(self):
+        entries = [
+            trees.TreeEntry(index.MODE_TREE, "a", "1" * 40),
+            trees.TreeEntry(index.MODE_FILE, "a.txt", "2" * 40),
+            trees.TreeEntry(index.MODE_EXECUTABLE, "a-b", "3" * 40),
+        ]
+
+        parsed = trees.parse_tree(trees.encode_tree(entries))
+
+        assert [entry.name for entry in parsed] == ["a-b", "a.txt", "a"]
+        assert sorted(parsed) == sorted(entries)
+
+    def test_matches_git_tree_encoding(self):
+        entry = trees.TreeEntry(index.MODE_TREE, "docs", "ab" * 20)
+        assert trees.encode_tree([entry]) == b"40000 docs\0" + b"\xab" * 20
+
+    @pytest.mark.parametrize(
+        "data",
+        [b"100644 name", b"100644 name\0" + b"\x00" * 19, b"10x644 name\0" + b"0" * 20],
+    )
+    def test_rejects_corrupt_tree(self, data):
+        with pytest.raises(exceptions.CorruptObjectError):
+            trees.parse_tree(data)
+
+    def test_read_tree_rejects_other_objects(self, store):
+        blob = store.write_object("blob", b"data")
+
+        with pytest.raises(exceptions.CorruptObjectError):
+            trees.read_tree(store, blob)
+
+
+class TestBuildIndexTrees:
+    """Tests for `build_index_trees` function."""
+
+    def test_builds_nested_trees(self, store):
+        files = {"a/b/c.txt": b"c", "a/d.txt": b"d", "e.txt": b"e"}
+        root, built = trees.build_index_trees(index_entries(store, files))
+
+        entries = built[root]
+        assert [(entry.name, entry.is_tree) for entry in entries] == [
+            ("a", True),
+            ("e.txt", False),
+        ]
+        subtree = built[entries[0].oid]
+        assert [entry.name for entry in subtree] == ["b", "d.txt"]
+        assert root == objects.hash_object("tree", trees.encode_tree(entries))
+
+    def test_matches_stored_trees(self, store):
+        files = {"a/b/c.txt": b"c", "a/d.txt": b"d", "e.txt": b"e"}
+        root = write_tree(store, files)
+
+        assert [entry.name for entry in trees.read_tree(store, root)] == ["a", "e.txt"]
+
+    def test_builds_empty_tree(self):
+        root, built = trees.build_index_trees([])
+        assert root == objects.hash_object("tree", b"")
+        assert built == {root: []}
@@ -1,5 +1,6 @@
 """Unit tests for module `command.utils`."""
 
+import os
 from pathlib import Path
 from unittest.mock import patch
 
@@ -131,6 +132,64 @@ class TestFindRepositoryPath:
             result = utils.find_repository_path(str(current_path))
             assert result == temporary_home
 
+    def test_stops_below_ceiling_directories(self, temporary_dir, monkeypatch):
+        """Test the search does not enter a ceiling directory."""
+        (temporary_dir / DEFAULT_CODETRAIL_DIRECTORY).mkdir()
+        current_path = temporary_dir / "a" / "b"
+        current_path.mkdir(parents=True)
+        ceilings = f"relative{os.pathsep}{temporary_dir}"
+        monkeypatch.setenv("CODETRAIL_CEILING_DIRECTORIES", ceilings)
+
+        assert utils.find_repository_path(current_path) is None
+        utils.clear_repository_cache()
+        assert utils.find_repository_path(temporary_dir) == temporary_dir
+
+    def test_uses_repository_directory_from_environment(
+        self,
+        temporary_dir,
+        monkeypatch,
+    ):
+        """Test `CODETRAIL_DIR` overrides the search."""
+        repository = temporary_dir / "elsewhere"
+        (repository / DEFAULT_CODETRAIL_DIRECTORY).mkdir(parents=True)
+        monkeypatch.setenv(
+            "CODETRAIL_DIR",
+            str(repository / DEFAULT_CODETRAIL_DIRECTORY),
+        )
+        assert utils.find_repository_path(temporary_dir) == repository
+
+        monkeypatch.setenv("CODETRAIL_DIR", str(repository))
+        assert utils.find_repository_path(temporary_dir) is None
+
+    def test_stops_at_file_system_boundary(self, temporary_dir):
+        """Test the search does not cross into another file system."""
+        (temporary_dir / DEFAULT_CODETRAIL_DIRECTORY).mkdir()
+        current_path = temporary_dir / "mount"
+        current_path.mkdir()
+        real_stat = Path.stat
+
+        def stat(path, **kwargs):
+            status = real_stat(path, **kwargs)
+            if path == current_path:
+                return os.stat_result((*status[:2], status.st_dev + 1, *status[3:]))
+            return status
+
+        with patch.object(Path, "stat", stat):
+            assert utils.find_repository_path(current_path) is None
+
+    def test_memoizes_result(self, temporary_dir):
+        """Test repeated searches do not touch the file system."""
+        (temporary_dir / DEFAULT_CODETRAIL_DIRECTORY).mkdir()
+        assert utils.find_repository_path(temporary_dir) == temporary_dir
+
+        with patch.object(utils, "path_is_directory") as mock_is_directory:
+            assert utils.find_repository_path(temporary_dir) == temporary_dir
+            mock_is_directory.assert_not_called()
+
+        utils.clear_repository_cache()
+        with patch.object(utils, "path_is_directory", return_value=False):
+            assert utils.find_repository_path(temporary_dir) is None
+
 
 class TestFindChildRepositoryPath:
     """Tests for `find_child_repository_path` function."""
@@ -149,3 +208,27 @@ class TestFindChildRepositoryPath:
 
         result = utils.find_child_repository_path(str(desired_repo_path))
         assert result == child_path
+
+    def test_continues_past_repository_file(self, temporary_dir):
+        """Test a `.codetrail` file does not end the search."""
+        (temporary_dir / "a").mkdir()
+        (temporary_dir / "a" / DEFAULT_CODETRAIL_DIRECTORY).touch()
+        repository = temporary_dir / "b"
+        (repository / DEFAULT_CODETRAIL_DIRECTORY).mkdir(parents=True)
+
+        assert utils.find_child_repository_path(temporary_dir) == repository
+
+    def test_skips_pruned_directories(self, temporary_dir):
+        """Test heavy directories are not searched."""
+        vendored = temporary_dir / "node_modules" / "package"
+        (vendored / DEFAULT_CODETRAIL_DIRECTORY).mkdir(parents=True)
+
+        assert utils.find_child_repository_path(temporary_dir) is None
+
+    def test_stops_at_max_depth(self, temporary_dir):
+        """Test repositories below the depth limit are not found."""
+        nested = temporary_dir / "a" / "b"
+        (nested / DEFAULT_CODETRAIL_DIRECTORY).mkdir(parents=True)
+
+        assert utils.find_child_repository_path(temporary_dir, max_depth=1) is None
+        assert utils.find_child_repository_path(temporary_dir, max_depth=2) == nested
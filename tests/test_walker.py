@@ -0,0 +1,85 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from codetrail import walker
+
+
+@pytest.fixture
+def tree(temporary_dir):
+    """Provides a small directory tree."""
+    (temporary_dir / "b" / "c").mkdir(parents=True)
+    (temporary_dir / "a.txt").write_text("a", encoding="utf-8")
+    (temporary_dir / "b" / "b.txt").write_text("b", encoding="utf-8")
+    (temporary_dir / "b" / "c" / "c.txt").write_text("c", encoding="utf-8")
+    return temporary_dir
+
+
+def relative_paths(root, entries):
+    return [os.path.relpath(entry.path, root) for entry in entries]
+
+
+class TestWalkTree:
+    """Tests for `walk_tree` function."""
+
+    def test_yields_every_entry_sorted(self, tree):
+        result = relative_paths(tree, walker.walk_tree(tree))
+        assert result == ["a.txt", "b", "b/b.txt", "b/c", "b/c/c.txt"]
+
+    def test_skips_excluded_names(self, tree):
+        result = relative_paths(tree, walker.walk_tree(tree, exclude={"c"}))
+        assert result == ["a.txt", "b", "b/b.txt"]
+
+    def test_stops_at_max_depth(self, tree):
+        assert relative_paths(tree, walker.walk_tree(tree, max_depth=0)) == [
+            "a.txt",
+            "b",
+        ]
+        assert "b/c/c.txt" not in relative_paths(
+            tree, walker.walk_tree(tree, max_depth=1)
+        )
+
+    def test_is_lazy(self, tree):
+        with patch.object(os, "scandir", wraps=os.scandir) as mock_scandir:
+            for entry in walker.walk_tree(tree):
+                if entry.name == "a.txt":
+                    break
+            assert mock_scandir.call_count == 1
+
+    def test_does_not_follow_symlinks_by_default(self, tree):
+        (tree / "link").symlink_to(tree / "b")
+        result = relative_paths(tree, walker.walk_tree(tree))
+        assert "link" in result
+        assert "link/b.txt" not in result
+
+    def test_follows_symlinks_without_looping(self, tree):
+        (tree / "b" / "c" / "loop").symlink_to(tree)
+        (tree / "link").symlink_to(tree / "b")
+
+        result = relative_paths(tree, walker.walk_tree(tree, follow_symlinks=True))
+
+        assert result.count("b/b.txt") + result.count("link/b.txt") == 1
+        assert "b/c/loop/a.txt" not in result
+
+    def test_stays_on_root_filesystem(self, tree):
+        status = os.stat(tree)
+        mounted = os.stat_result((*status[:2], status.st_dev + 1, *status[3:]))
+
+        with patch.object(os, "stat", return_value=mounted):
+            result = relative_paths(tree, walker.walk_tree(tree, same_filesystem=True))
+
+        assert result == ["a.txt", "b"]
+
+    def test_skips_unreadable_directories(self, tree):
+        real_scandir = os.scandir
+
+        def scandir(path):
+            if path.endswith("/b"):
+                raise PermissionError(path)
+            return real_scandir(path)
+
+        with patch.object(os, "scandir", side_effect=scandir):
+            result = relative_paths(tree, walker.walk_tree(tree))
+
+        assert result == ["a.txt", "b"]
@@ -2,9 +2,42 @@
 
 from pathlib import Path
 
+from codetrail import commits
+from codetrail import index
+from codetrail import trees
+
 
 def assert_file_has_content(path, content):
     """Assert specified file has specified content."""
     with Path.open(path, "r", encoding="utf-8") as file:
         file_content = file.read()
         assert file_content == content, f"Expected {file_content} != {content}"
+
+
+def write_commit(
+    store, parents=(), timestamp=1700000000, message="message\n", tree=None
+):
+    """Write a commit, over an empty tree by default, and return its ID."""
+    if tree is None:
+        tree = store.write_object("tree", b"")
+    signature = f"Chill Guy <chill@guy.com> {timestamp} +0000"
+    commit = commits.Commit(tree, tuple(parents), signature, signature, message)
+    return store.write_object("commit", commit.encode())
+
+
+def index_entries(store, files, mode=index.MODE_FILE):
+    """Write the blobs of a mapping of paths to content and return index entries."""
+    return [
+        index.IndexEntry(
+            path, store.write_object("blob", files[path]), mode, 0, 0, 0, 0
+        )
+        for path in sorted(files)
+    ]
+
+
+def write_tree(store, files):
+    """Write the tree of a mapping of paths to content and return its ID."""
+    root, built = trees.build_index_trees(index_entries(store, files))
+    for entries in built.values():
+        store.write_object("tree", trees.encode_tree(entries))
+    return root